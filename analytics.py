@@ -0,0 +1,210 @@
+import csv
+import math
+import os
+from collections import defaultdict
+from itertools import count
+
+from catalog import OTHER_PREFIX, SERVICE_LABELS
+from gazetteer import zone_name
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Where and when demand happens, for placing workers.
+#
+# Request timestamps, coordinates, zones and services are read from the hot
+# database and the archive partitions in large batches and turned into NumPy
+# arrays column by column; nothing below loops over rows in Python. The
+# services and zone columns repeat a few values endlessly, so they are
+# dictionary-encoded as they are read (a C-level map over a defaultdict) and
+# only the distinct values are parsed. From those arrays we bin a spatial
+# heatmap, an hour-of-week histogram, a service co-occurrence matrix and a
+# zone-by-service matrix, and write each as a plain grid CSV that a
+# spreadsheet or plotting tool can render directly.
+
+# Addis Ababa is UTC+3 all year; submitted_at is stored in UTC
+LOCAL_UTC_OFFSET_HOURS = 3
+# Heatmap grid: (south, north, west, east) in degrees, and the cell size
+ADDIS_ABABA_BOUNDS = (8.82, 9.10, 38.65, 38.92)
+HEATMAP_CELL_KM = 1.0
+# Rows fetched and converted per batch
+LOAD_BATCH_SIZE = 100000
+
+WEEKDAYS = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+SERVICE_KEYS = list(SERVICE_LABELS)
+KM_PER_DEGREE_LATITUDE = 110.574
+KM_PER_DEGREE_LONGITUDE_AT_EQUATOR = 111.320
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("numpy is required for analytics (pip install -r requirements.txt)")
+
+
+def _service_flags(services):
+    """Which SERVICE_KEYS a stored services string contains, as a list of bools."""
+    parts = [part.strip() for part in (services or '').split(',')]
+    return [
+        any(part.startswith(OTHER_PREFIX) for part in parts) if key == 'other'
+        else any(label in parts for label in SERVICE_LABELS[key])
+        for key in SERVICE_KEYS
+    ]
+
+
+# Columns load_requests expects in each row, in its order
+LOAD_COLUMNS = ['submitted_at', 'services', 'location_zone', 'location_latitude', 'location_longitude']
+
+
+def source_batches(sources, where='', params=(), batch_size=LOAD_BATCH_SIZE):
+    """Yield batches of LOAD_COLUMNS rows from each SQLite source connection.
+
+    ``where`` and ``params`` filter service_requests in every source.
+    """
+    for source in sources:
+        # Partitions archived before zones were resolved have none of the location_zone columns
+        existing = {row[1] for row in source.execute('PRAGMA table_info(service_requests)')}
+        located = 'location_zone' in existing
+        cursor = source.execute(
+            'SELECT submitted_at, services, '
+            + ('location_zone, location_latitude, location_longitude' if located else 'NULL, NULL, NULL')
+            + f' FROM service_requests{where}',
+            list(params)
+        )
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+
+
+def load_requests(batches):
+    """Turn batches of request rows into a dict of NumPy arrays.
+
+    Each row starts with the LOAD_COLUMNS values; anything after them is
+    ignored. Returns submitted_at (datetime64[s], UTC), latitude and
+    longitude (NaN when unknown), zone_codes into ``zones`` (None for
+    unresolved), and services, a boolean matrix with one column per
+    SERVICE_KEYS entry.
+    """
+    require_numpy()
+    service_codes = defaultdict(count().__next__)
+    zone_codes = defaultdict(count().__next__)
+    columns = {'submitted_at': [], 'latitude': [], 'longitude': [], 'zone_codes': [], 'service_codes': []}
+    for batch in batches:
+        submitted_at, services, zones, latitudes, longitudes = list(zip(*batch))[:len(LOAD_COLUMNS)]
+        columns['submitted_at'].append(np.array(submitted_at, dtype='datetime64[s]'))
+        columns['latitude'].append(np.array(latitudes, dtype=np.float64))
+        columns['longitude'].append(np.array(longitudes, dtype=np.float64))
+        columns['service_codes'].append(
+            np.fromiter(map(service_codes.__getitem__, services), dtype=np.int32, count=len(batch))
+        )
+        columns['zone_codes'].append(
+            np.fromiter(map(zone_codes.__getitem__, zones), dtype=np.int32, count=len(batch))
+        )
+
+    empty = {'submitted_at': 'datetime64[s]', 'latitude': np.float64, 'longitude': np.float64,
+             'zone_codes': np.int32, 'service_codes': np.int32}
+    data = {
+        name: np.concatenate(arrays) if arrays else np.empty(0, dtype=empty[name])
+        for name, arrays in columns.items()
+    }
+    # The dicts hand out codes in insertion order, so their keys are the code tables
+    flags = np.array([_service_flags(services) for services in service_codes], dtype=bool)
+    data['services'] = flags.reshape(-1, len(SERVICE_KEYS))[data.pop('service_codes')]
+    data['zones'] = list(zone_codes)
+    return data
+
+
+def hour_of_week(submitted_at, utc_offset_hours=LOCAL_UTC_OFFSET_HOURS):
+    """Requests per local weekday and hour, as a 7×24 matrix starting on Monday."""
+    seconds = submitted_at[~np.isnat(submitted_at)].astype(np.int64) + utc_offset_hours * 3600
+    days, seconds_of_day = np.divmod(seconds, 86400)
+    # 1970-01-01 was a Thursday
+    weekday = (days + 3) % 7
+    return np.bincount(weekday * 24 + seconds_of_day // 3600, minlength=7 * 24).reshape(7, 24)
+
+
+def heatmap(latitude, longitude, cell_km=HEATMAP_CELL_KM, bounds=ADDIS_ABABA_BOUNDS):
+    """Requests per grid cell of roughly ``cell_km`` square.
+
+    Returns ``(counts, latitudes, longitudes)``: counts has one row per
+    latitude band, north first so it reads like a map, and the two arrays
+    hold the cell centres. Requests without coordinates or outside
+    ``bounds`` are left out.
+    """
+    south, north, west, east = bounds
+    latitude_step = cell_km / KM_PER_DEGREE_LATITUDE
+    longitude_step = cell_km / (KM_PER_DEGREE_LONGITUDE_AT_EQUATOR * math.cos(math.radians((south + north) / 2)))
+    latitude_edges = np.arange(south, north + latitude_step, latitude_step)
+    longitude_edges = np.arange(west, east + longitude_step, longitude_step)
+    known = ~(np.isnan(latitude) | np.isnan(longitude))
+    counts, _, _ = np.histogram2d(latitude[known], longitude[known], bins=(latitude_edges, longitude_edges))
+    latitudes = (latitude_edges[:-1] + latitude_edges[1:]) / 2
+    longitudes = (longitude_edges[:-1] + longitude_edges[1:]) / 2
+    return counts[::-1].astype(np.int64), latitudes[::-1], longitudes
+
+
+def cooccurrence(services):
+    """How often each pair of services is requested together; the diagonal counts each service."""
+    flags = services.astype(np.int64)
+    return flags.T @ flags
+
+
+def zone_totals(zone_codes, zone_count):
+    """Requests per zone code."""
+    return np.bincount(zone_codes, minlength=zone_count)
+
+
+def zone_services(zone_codes, zone_count, services):
+    """Requests for each service per zone, as a zones × SERVICE_KEYS matrix."""
+    return np.stack([
+        np.bincount(zone_codes, weights=services[:, column], minlength=zone_count)
+        for column in range(services.shape[1])
+    ], axis=1).astype(np.int64)
+
+
+def analyse(data, cell_km=HEATMAP_CELL_KM, utc_offset_hours=LOCAL_UTC_OFFSET_HOURS):
+    """Compute every report from load_requests output; returns a dict of arrays and labels."""
+    counts, latitudes, longitudes = heatmap(data['latitude'], data['longitude'], cell_km)
+    zone_labels = [zone_name(zone) if zone else 'unresolved' for zone in data['zones']]
+    return {
+        'requests': len(data['submitted_at']),
+        'located': int(counts.sum()),
+        'heatmap': counts,
+        'heatmap_latitudes': latitudes,
+        'heatmap_longitudes': longitudes,
+        'hour_of_week': hour_of_week(data['submitted_at'], utc_offset_hours),
+        'cooccurrence': cooccurrence(data['services']),
+        'zones': zone_labels,
+        'zone_services': zone_services(data['zone_codes'], len(zone_labels), data['services'])
+    }
+
+
+def _write_grid(path, corner, column_labels, row_labels, matrix):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([corner] + list(column_labels))
+        for label, row in zip(row_labels, matrix.tolist()):
+            writer.writerow([label] + row)
+
+
+def write_reports(results, output_dir):
+    """Write each report as a grid CSV in ``output_dir``; returns the paths written."""
+    os.makedirs(output_dir, exist_ok=True)
+    services = [SERVICE_LABELS[key][0] for key in SERVICE_KEYS]
+    grids = {
+        'demand_heatmap.csv': ('latitude\\longitude', [f"{value:.4f}" for value in results['heatmap_longitudes']],
+                               [f"{value:.4f}" for value in results['heatmap_latitudes']], results['heatmap']),
+        'demand_hour_of_week.csv': ('weekday\\hour', [f"{hour:02d}" for hour in range(24)], WEEKDAYS,
+                                    results['hour_of_week']),
+        'service_cooccurrence.csv': ('service', services, services, results['cooccurrence']),
+        'zone_services.csv': ('zone', services, results['zones'], results['zone_services'])
+    }
+    paths = []
+    for name, (corner, column_labels, row_labels, matrix) in grids.items():
+        path = os.path.join(output_dir, name)
+        _write_grid(path, corner, column_labels, row_labels, matrix)
+        paths.append(path)
+    return paths
@@ -0,0 +1,257 @@
+import heapq
+import itertools
+import logging
+import os
+import re
+import sqlite3
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Monthly archive partitions for service_requests.
+#
+# Old closed rows are moved out of the hot database into archive/service_requests_YYYY_MM.db,
+# one file per calendar month of submitted_at. Each file holds a service_requests
+# table with the hot table's schema, so the same SQL runs against either. Readers
+# go through request_sources(), which yields the hot connection first and then
+# read-only connections to the partitions whose month can match the query.
+# Partitions never overlap, but the hot database can hold rows of any age
+# (bulk imports write historical requests straight into it), so ordered
+# reads merge the hot rows with the partitions' rather than appending them.
+
+ARCHIVE_DIR = 'archive'
+# Closed requests older than this many days are moved out of the hot database
+ARCHIVE_AFTER_DAYS = 180
+# Finished requests; only these are archived
+CLOSED_STATUSES = ['done', 'cancelled']
+
+PARTITION_PATTERN = re.compile(r'^service_requests_(\d{4})_(\d{2})\.db$')
+
+# Indexes recreated in every partition so filtered queries stay indexed
+PARTITION_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_service_requests_submitted_at ON service_requests(submitted_at, request_id)',
+    'CREATE INDEX IF NOT EXISTS idx_service_requests_service_type ON service_requests(service_type, submitted_at)',
+    'CREATE INDEX IF NOT EXISTS idx_service_requests_phone ON service_requests(phone)'
+]
+
+# Per-partition aggregate cache, keyed by path and invalidated by file mtime
+_partition_totals_cache = {}
+
+
+def partition_path(month, archive_dir=ARCHIVE_DIR):
+    """Path of the partition file for a 'YYYY-MM' month."""
+    return os.path.join(archive_dir, f"service_requests_{month.replace('-', '_')}.db")
+
+
+def list_partitions(archive_dir=ARCHIVE_DIR):
+    """Return ``(month, path)`` for every partition, newest month first."""
+    if not os.path.isdir(archive_dir):
+        return []
+    partitions = []
+    for filename in os.listdir(archive_dir):
+        match = PARTITION_PATTERN.match(filename)
+        if match:
+            partitions.append((f"{match.group(1)}-{match.group(2)}", os.path.join(archive_dir, filename)))
+    return sorted(partitions, reverse=True)
+
+
+def prune_partitions(partitions, date_from=None, date_to=None):
+    """Keep only partitions whose month overlaps the submitted_at range."""
+    return [
+        (month, path) for month, path in partitions
+        if (not date_from or month >= date_from[:7]) and (not date_to or month <= date_to[:7])
+    ]
+
+
+def open_partition(path):
+    """Open a partition read-only."""
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+def request_sources(conn, date_from=None, date_to=None, archive_dir=ARCHIVE_DIR, newest_first=True):
+    """Yield the hot connection and read-only connections to the matching partitions.
+
+    With ``newest_first`` the hot connection comes first and partitions
+    follow newest month first; otherwise partitions come oldest month first
+    and the hot connection last. A partition missing columns of the hot
+    table is upgraded before it is opened. Partition connections are closed
+    as soon as the caller moves past them.
+    """
+    partitions = prune_partitions(list_partitions(archive_dir), date_from, date_to)
+    hot_columns = set(table_columns(conn)) if partitions else set()
+    if newest_first:
+        yield conn
+    for _, path in (partitions if newest_first else reversed(partitions)):
+        partition = open_partition(path)
+        # Partitions archived before the hot table gained columns get them first, so every query runs on both
+        if not hot_columns <= set(table_columns(partition)):
+            partition.close()
+            ensure_partition(conn, path)
+            partition = open_partition(path)
+        try:
+            yield partition
+        finally:
+            partition.close()
+    if not newest_first:
+        yield conn
+
+
+def _fetch_rows(cursor, batch_size):
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            return
+        yield from batch
+
+
+def query_newest_first(conn, query, params=(), limit=None, date_from=None, date_to=None,
+                       archive_dir=ARCHIVE_DIR, batch_size=5000):
+    """Run a newest-first service_requests query across hot and archived rows.
+
+    ``query`` must select submitted_at and request_id and order by them
+    descending. Yields row batches in that order: the hot rows are merged
+    with the partitions', which are read newest month first and only as far
+    as the merge needs. ``limit`` is passed down to every source as a LIMIT.
+    """
+    if limit:
+        query += ' LIMIT ?'
+        params = [*params, limit]
+    sources = request_sources(conn, date_from, date_to, archive_dir)
+    hot = next(sources).execute(query, params)
+    columns = [description[0] for description in hot.description]
+    submitted_at, request_id = columns.index('submitted_at'), columns.index('request_id')
+    archived = (row for source in sources for row in _fetch_rows(source.execute(query, params), batch_size))
+    rows = heapq.merge(_fetch_rows(hot, batch_size), archived,
+                       key=lambda row: (row[submitted_at], row[request_id]), reverse=True)
+    if limit:
+        rows = itertools.islice(rows, limit)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def table_columns(conn, schema='main'):
+    """Column names of service_requests in the given schema."""
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info(service_requests)')]
+
+
+def ensure_partition(conn, path):
+    """Create or upgrade a partition so it has every column of the hot table."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    partition = sqlite3.connect(path)
+    try:
+        if not table_columns(partition):
+            table_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'service_requests'"
+            ).fetchone()[0]
+            partition.execute(table_sql)
+        else:
+            existing = set(table_columns(partition))
+            for _, name, column_type, not_null, default, _ in conn.execute('PRAGMA table_info(service_requests)'):
+                if name not in existing:
+                    # With the hot table's default, older rows read as the hot table's did when it was upgraded
+                    definition = column_type
+                    if default is not None:
+                        definition += f"{' NOT NULL' if not_null else ''} DEFAULT {default}"
+                    partition.execute(f'ALTER TABLE service_requests ADD COLUMN {name} {definition}')
+        for statement in PARTITION_INDEXES:
+            partition.execute(statement)
+        partition.commit()
+    finally:
+        partition.close()
+
+
+def archive_old_requests(database_file, older_than_days=ARCHIVE_AFTER_DAYS, archive_dir=ARCHIVE_DIR):
+    """Move closed requests older than the cutoff into their monthly partitions.
+
+    Only done and cancelled requests move; one still in progress stays hot
+    however old it is, so the bot and dispatchers keep seeing it, and since
+    only pending requests are queued none of the moved rows are in the
+    dispatch queue. The database must have the bot's schema (run
+    storage.init_sqlite_schema first).
+
+    Each month is copied and deleted in one transaction over the attached
+    partition, so a row is never in both places or neither. Only rows found
+    in the partition exactly as in the hot table are deleted: one whose
+    request_id the partition already holds with other values stays hot.
+    Returns a ``{month: rows_moved}`` dict.
+    """
+    cutoff = (datetime.utcnow() - timedelta(days=older_than_days)).strftime('%Y-%m-%d %H:%M:%S')
+    conn = sqlite3.connect(database_file)
+    moved = {}
+    try:
+        months = [row[0] for row in conn.execute(
+            "SELECT DISTINCT strftime('%Y-%m', submitted_at) FROM service_requests "
+            f"WHERE submitted_at < ? AND status IN ({', '.join('?' * len(CLOSED_STATUSES))}) ORDER BY 1",
+            (cutoff, *CLOSED_STATUSES)
+        )]
+        names = table_columns(conn)
+        columns = ', '.join(names)
+        # Rows of the window now in the partition as they are here
+        copied = 'EXISTS (SELECT 1 FROM archive_partition.service_requests p WHERE ' + ' AND '.join(
+            f'p.{name} IS r.{name}' for name in names
+        ) + ')'
+
+        for month in months:
+            month_start = f"{month}-01 00:00:00"
+            next_month = (datetime.strptime(month_start, '%Y-%m-%d %H:%M:%S') + timedelta(days=32)).strftime('%Y-%m-01 00:00:00')
+            window = ("submitted_at >= ? AND submitted_at < ? AND submitted_at < ? "
+                      f"AND status IN ({', '.join('?' * len(CLOSED_STATUSES))})",
+                      (month_start, next_month, cutoff, *CLOSED_STATUSES))
+
+            path = partition_path(month, archive_dir)
+            ensure_partition(conn, path)
+            conn.execute('ATTACH DATABASE ? AS archive_partition', (path,))
+            try:
+                with conn:
+                    conn.execute(
+                        f'INSERT OR IGNORE INTO archive_partition.service_requests ({columns}) '
+                        f'SELECT {columns} FROM main.service_requests WHERE {window[0]}', window[1]
+                    )
+                    moved[month] = conn.execute(
+                        f'DELETE FROM main.service_requests AS r WHERE {window[0]} AND {copied}', window[1]
+                    ).rowcount
+                    kept = conn.execute(
+                        f'SELECT COUNT(*) FROM main.service_requests WHERE {window[0]}', window[1]
+                    ).fetchone()[0]
+                    if kept:
+                        logger.warning(f"⚠️ {kept} request(s) from {month} kept in the hot database: "
+                                       f"{path} already holds other rows with their request_id")
+            finally:
+                conn.execute('DETACH DATABASE archive_partition')
+    finally:
+        conn.close()
+    return moved
+
+
+def archived_totals(archive_dir=ARCHIVE_DIR, tenant_id=None):
+    """Total archived requests and their service_type counts, for one tenant or all of them.
+
+    Closed partitions rarely change, so per-partition results are cached
+    until the file's mtime moves. Rows archived before tenants existed
+    count as the default tenant's.
+    """
+    total = 0
+    by_service_type = {}
+    for _, path in list_partitions(archive_dir):
+        mtime = os.path.getmtime(path)
+        cached = _partition_totals_cache.get(path)
+        if cached is None or cached[0] != mtime:
+            partition = open_partition(path)
+            try:
+                tenant = "COALESCE(tenant_id, 'default')" if 'tenant_id' in table_columns(partition) else "'default'"
+                counts = partition.execute(
+                    f'SELECT {tenant}, service_type, COUNT(*) FROM service_requests GROUP BY 1, 2'
+                ).fetchall()
+            finally:
+                partition.close()
+            cached = (mtime, counts)
+            _partition_totals_cache[path] = cached
+        for row_tenant, service_type, count in cached[1]:
+            if tenant_id and row_tenant != tenant_id:
+                continue
+            total += count
+            by_service_type[service_type] = by_service_type.get(service_type, 0) + count
+    return {'requests': total, 'by_service_type': by_service_type}
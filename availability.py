@@ -0,0 +1,173 @@
+import bisect
+import functools
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from catalog import OTHER_PREFIX, SERVICE_LABELS, canonical_services
+from gazetteer import distance_km, locate
+
+# Worker availability calendars for temporary bookings.
+#
+# Each worker's calendar keeps availability windows and bookings as sorted
+# lists of disjoint intervals (parallel start and end lists), with touching
+# windows merged as they are added. Because intervals never overlap, both
+# checks a booking needs are one bisect each: the only window that could
+# contain a slot is the last one starting at or before it, and the only
+# booking that could clash with it is the first one ending after its start.
+# An AvailabilityIndex holds every worker's calendar grouped by skill and
+# by the gazetteer point (sub-city or landmark centroid) they are placed at.
+# There are only a few dozen such points, so "who can cook from 9 to 12 near
+# Bole" sorts the points by distance once per place and checks workers point
+# by point, nearest first, until it has enough. Times are local Addis Ababa
+# wall-clock times, as staff type them; the index keeps them as seconds.
+
+# Workers further than this from the requested place are not offered
+MAX_DISTANCE_KM = 10.0
+
+_EPOCH = datetime(1970, 1, 1)
+_LABEL_KEYS = {label: key for key, labels in SERVICE_LABELS.items() for label in labels}
+
+Worker = namedtuple('Worker', ['worker_id', 'name', 'phone', 'place', 'calendar'])
+# distance_km is None when no place was asked for
+FreeWorker = namedtuple('FreeWorker', ['worker_id', 'name', 'phone', 'zone_id', 'distance_km'])
+
+
+def parse_time(text):
+    """'YYYY-MM-DD HH:MM[:SS]' as seconds since the epoch; raises ValueError."""
+    return int((datetime.fromisoformat(text.strip()) - _EPOCH).total_seconds())
+
+
+def format_time(seconds):
+    """Seconds since the epoch as 'YYYY-MM-DD HH:MM:SS', as timestamps are stored."""
+    return (_EPOCH + timedelta(seconds=seconds)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def skills(services):
+    """The SERVICE_LABELS keys named in a worker's free-text services."""
+    keys = set()
+    for part in canonical_services(services or '').split(', '):
+        if part.startswith(OTHER_PREFIX):
+            keys.add('other')
+        elif part in _LABEL_KEYS:
+            keys.add(_LABEL_KEYS[part])
+    return keys
+
+
+class WorkerCalendar:
+    """Availability windows and bookings of one worker, as sorted disjoint intervals in seconds."""
+
+    __slots__ = ('window_starts', 'window_ends', 'booking_starts', 'booking_ends')
+
+    def __init__(self):
+        self.window_starts = []
+        self.window_ends = []
+        self.booking_starts = []
+        self.booking_ends = []
+
+    def add_window(self, start, end):
+        """Make the worker available from ``start`` to ``end``, merging overlapping and touching windows."""
+        first = bisect.bisect_left(self.window_ends, start)
+        last = bisect.bisect_right(self.window_starts, end)
+        if first < last:
+            start = min(start, self.window_starts[first])
+            end = max(end, self.window_ends[last - 1])
+        self.window_starts[first:last] = [start]
+        self.window_ends[first:last] = [end]
+
+    def add_booking(self, start, end):
+        """Record a booking as stored, without checking it; see book."""
+        position = bisect.bisect_right(self.booking_ends, start)
+        self.booking_starts.insert(position, start)
+        self.booking_ends.insert(position, end)
+
+    def is_free(self, start, end):
+        """Whether one window covers ``start``..``end`` and no booking overlaps it."""
+        window = bisect.bisect_right(self.window_starts, start) - 1
+        if window < 0 or self.window_ends[window] < end:
+            return False
+        booking = bisect.bisect_right(self.booking_ends, start)
+        return booking == len(self.booking_starts) or self.booking_starts[booking] >= end
+
+    def book(self, start, end):
+        """Book ``start``..``end``; raises ValueError unless the worker is free for all of it."""
+        if start >= end:
+            raise ValueError("A booking must end after it starts")
+        if not self.is_free(start, end):
+            raise ValueError(f"Not free from {format_time(start)} to {format_time(end)}")
+        self.add_booking(start, end)
+
+
+class AvailabilityIndex:
+    """Calendars of every worker, grouped by skill and placement for finding free workers."""
+
+    def __init__(self):
+        self.workers = {}
+        # skill (None for any): {(latitude, longitude) or None if unknown: [Worker, ...]}
+        self._groups = {}
+        self._nearest_points = functools.lru_cache(maxsize=256)(self._points_by_distance)
+
+    def _points_by_distance(self, origin):
+        """Every point workers are placed at, with its distance from ``origin``, nearest first."""
+        points = {point for groups in self._groups.values() for point in groups if point}
+        return sorted((distance_km(origin, point), point) for point in points)
+
+    def add_worker(self, worker_id, name, phone, location, services):
+        """Index a worker, placing them with the gazetteer; returns their empty calendar."""
+        place = locate(location) if location else None
+        worker = Worker(worker_id, name, phone, place, WorkerCalendar())
+        self.workers[worker_id] = worker
+        point = (place.latitude, place.longitude) if place else None
+        for skill in skills(services) | {None}:
+            self._groups.setdefault(skill, {}).setdefault(point, []).append(worker)
+        self._nearest_points.cache_clear()
+        return worker.calendar
+
+    def book(self, worker_id, start, end):
+        """Book a worker; raises ValueError for an unknown or busy worker."""
+        if worker_id not in self.workers:
+            raise ValueError(f"Worker #{worker_id} not found")
+        self.workers[worker_id].calendar.book(start, end)
+
+    def free_workers(self, start, end, skill=None, near=None, max_km=MAX_DISTANCE_KM, limit=None):
+        """Workers with ``skill`` free for all of ``start``..``end``, as FreeWorker tuples.
+
+        With ``near`` (a gazetteer Place) only workers within ``max_km`` are
+        offered, nearest first (then by worker_id), and the search stops
+        at the first point past the ``limit`` nearest. Workers whose
+        location isn't known are left out. Without ``near``, every free
+        worker is offered in worker_id order.
+        """
+        groups = self._groups.get(skill, {})
+        found = []
+        if near is None:
+            for workers in groups.values():
+                for worker in workers:
+                    if worker.calendar.is_free(start, end):
+                        found.append(FreeWorker(worker.worker_id, worker.name, worker.phone,
+                                                worker.place.zone_id if worker.place else None, None))
+            found.sort()
+            return found[:limit] if limit else found
+
+        for distance, point in self._nearest_points((near.latitude, near.longitude)):
+            if distance > max_km or (limit and len(found) >= limit and distance > found[-1].distance_km):
+                break
+            for worker in groups.get(point, ()):
+                if worker.calendar.is_free(start, end):
+                    found.append(FreeWorker(worker.worker_id, worker.name, worker.phone, worker.place.zone_id, distance))
+        # Points at the same distance are visited one after the other
+        found.sort(key=lambda worker: (worker.distance_km, worker.worker_id))
+        return found[:limit] if limit else found
+
+
+def build_index(workers, windows, bookings):
+    """An AvailabilityIndex from rows of storage WORKER_COLUMNS and CALENDAR_COLUMNS."""
+    index = AvailabilityIndex()
+    for worker_id, name, phone, location, services in workers:
+        index.add_worker(worker_id, name, phone, location, services)
+    for worker_id, starts_at, ends_at in windows:
+        if worker_id in index.workers:
+            index.workers[worker_id].calendar.add_window(parse_time(starts_at), parse_time(ends_at))
+    for worker_id, starts_at, ends_at in bookings:
+        if worker_id in index.workers:
+            index.workers[worker_id].calendar.add_booking(parse_time(starts_at), parse_time(ends_at))
+    return index
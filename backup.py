@@ -0,0 +1,214 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+import shutil
+import sqlite3
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BACKUP_DIR = 'backups'
+# Compressed snapshots kept before the oldest are deleted
+BACKUP_KEEP = 7
+# Pages copied per backup step, and the pause between steps that lets writers in
+BACKUP_PAGES_PER_STEP = 64
+BACKUP_STEP_SLEEP = 0.005
+# Restarts tolerated before the stepped copy gives up and copies in one step
+BACKUP_MAX_RESTARTS = 3
+
+SNAPSHOT_SUFFIX = '.db.gz'
+
+
+def _sha256(path):
+    """Hex SHA-256 of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def check_integrity(path):
+    """Run PRAGMA integrity_check on a database file; returns True if it reports ok."""
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    finally:
+        conn.close()
+
+
+def list_backups(backup_dir=BACKUP_DIR):
+    """Compressed snapshots in the backup directory, newest first."""
+    if not os.path.isdir(backup_dir):
+        return []
+    names = [name for name in os.listdir(backup_dir) if name.endswith(SNAPSHOT_SUFFIX)]
+    return [os.path.join(backup_dir, name) for name in sorted(names, reverse=True)]
+
+
+def rotate_backups(backup_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+    """Delete all but the newest ``keep`` snapshots and their checksum files."""
+    for path in list_backups(backup_dir)[keep:]:
+        os.remove(path)
+        if os.path.exists(path + '.sha256'):
+            os.remove(path + '.sha256')
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _copy(source_file, destination_file, pages, sleep, progress=None):
+    source = sqlite3.connect(source_file)
+    destination = sqlite3.connect(destination_file)
+    try:
+        source.backup(destination, pages=pages, sleep=sleep, progress=progress)
+    finally:
+        destination.close()
+        source.close()
+
+
+def online_copy(source_file, destination_file, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP,
+                max_restarts=BACKUP_MAX_RESTARTS):
+    """Copy a live database with the SQLite online backup API.
+
+    Only ``pages`` pages are copied per step and the source is unlocked for
+    ``sleep`` seconds between steps, so the bot's writers are never blocked
+    for long. A write from another connection makes SQLite restart the copy;
+    under steady traffic that can repeat forever, so after ``max_restarts``
+    the copy is redone in one step. In WAL mode that single step only holds a
+    read snapshot, which writers don't wait on either.
+    """
+    if pages <= 0:
+        _copy(source_file, destination_file, -1, 0)
+        return
+
+    last_remaining = [None]
+    restarts = [0]
+
+    def progress(status, remaining, total):
+        if last_remaining[0] is not None and remaining > last_remaining[0]:
+            restarts[0] += 1
+            if restarts[0] > max_restarts:
+                raise _TooManyRestarts()
+        last_remaining[0] = remaining
+
+    try:
+        _copy(source_file, destination_file, pages, sleep, progress)
+    except _TooManyRestarts:
+        logger.warning(f"⚠️ Backup restarted {restarts[0]} times under write load, copying in one step")
+        _copy(source_file, destination_file, -1, 0)
+
+
+def create_backup(database_file, backup_dir=BACKUP_DIR, keep=BACKUP_KEEP,
+                  pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP):
+    """Take a checked, compressed snapshot of the database and rotate old ones.
+
+    The snapshot is copied online, verified with PRAGMA integrity_check,
+    gzip-compressed and written with a .sha256 checksum next to it. Returns
+    the snapshot path.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(database_file))[0]
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    raw_path = os.path.join(backup_dir, f"{name}_{stamp}.db.tmp")
+    snapshot_path = os.path.join(backup_dir, f"{name}_{stamp}{SNAPSHOT_SUFFIX}")
+
+    try:
+        online_copy(database_file, raw_path, pages, sleep)
+        if not check_integrity(raw_path):
+            raise RuntimeError("integrity check failed on the copied database")
+
+        with open(raw_path, 'rb') as src, gzip.open(snapshot_path + '.tmp', 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(snapshot_path + '.tmp', snapshot_path)
+        with open(snapshot_path + '.sha256', 'w', encoding='utf-8') as f:
+            f.write(f"{_sha256(snapshot_path)}  {os.path.basename(snapshot_path)}\n")
+    finally:
+        for leftover in (raw_path, snapshot_path + '.tmp'):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    rotate_backups(backup_dir, keep)
+    return snapshot_path
+
+
+def verify_backup(snapshot_path):
+    """Check a snapshot against its .sha256 file; returns True if they match."""
+    checksum_path = snapshot_path + '.sha256'
+    if not os.path.exists(checksum_path):
+        return False
+    with open(checksum_path, 'r', encoding='utf-8') as f:
+        expected = f.read().split()[0]
+    return _sha256(snapshot_path) == expected
+
+
+def restore_backup(snapshot_path, database_file):
+    """Restore a snapshot over the database, keeping the current file as .pre-restore.
+
+    The snapshot's checksum and the decompressed database's integrity are
+    checked before anything is overwritten. The restore itself goes through
+    the backup API, so connections that are already open see either the old
+    or the new contents, never a torn file.
+    """
+    if not verify_backup(snapshot_path):
+        raise RuntimeError(f"checksum mismatch or missing .sha256 for {snapshot_path}")
+
+    raw_path = database_file + '.restore.tmp'
+    try:
+        with gzip.open(snapshot_path, 'rb') as src, open(raw_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        if not check_integrity(raw_path):
+            raise RuntimeError("integrity check failed on the decompressed snapshot")
+
+        if os.path.exists(database_file):
+            online_copy(database_file, database_file + '.pre-restore', pages=-1, sleep=0)
+        online_copy(raw_path, database_file, pages=-1, sleep=0)
+    finally:
+        if os.path.exists(raw_path):
+            os.remove(raw_path)
+
+
+class BackupJob:
+    """Takes a snapshot every ``interval`` seconds from a background task.
+
+    The copy runs in a worker thread, so handlers on the event loop keep
+    running while it progresses step by step.
+    """
+
+    def __init__(self, database_file, interval, backup_dir=BACKUP_DIR, keep=BACKUP_KEEP):
+        self.database_file = database_file
+        self.interval = interval
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self._task = None
+
+    def start(self):
+        """Start periodic backups on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic backups, abandoning one in progress."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self):
+        """Take one snapshot off the event loop and return its path."""
+        path = await asyncio.to_thread(create_backup, self.database_file, self.backup_dir, self.keep)
+        logger.info(f"✅ Database backed up to {path}")
+        return path
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"❌ Database backup failed: {e}")
@@ -0,0 +1,134 @@
+"""Benchmark the NumPy demand analytics against a per-row pure-Python version.
+
+Builds a service_requests table of synthetic requests spread over the
+gazetteer zones, a year of timestamps and typical service combinations,
+then computes the heatmap, hour-of-week histogram, service co-occurrence
+and zone-by-service matrices both ways and checks they agree.
+
+Usage: python benchmarks/bench_analytics.py [--rows 1000000]
+"""
+import argparse
+import asyncio
+import math
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import analytics
+import storage
+from gazetteer import SUB_CITIES
+
+SERVICE_CHOICES = ['🧹 Full House Work', '🏠 House Cleaning, 👕 Laundry Service', '🍳 ምግብ አብሳይ',
+                   '👶 Child Care, 🍳 Cooking Service', '🏠 የቤት ፅዳት, 👕 የልብስ እጥበት, 🍳 ምግብ አብሳይ',
+                   '👵 Elder Care', '🌿 Gardening, 🐕 Pet Care', '📝 Other: driver', '🧹 Full House Work, 👶 Child Care']
+
+
+def build_database(path, rows):
+    """Create the bot's schema and fill service_requests with synthetic rows."""
+    repository = storage.SQLiteRepository(path)
+    asyncio.run(repository.init())
+    asyncio.run(repository.close())
+    rng = random.Random(42)
+    zones = list(SUB_CITIES)
+    start = datetime(2025, 1, 1)
+    conn = sqlite3.connect(path)
+    chunk = 50000
+    for offset in range(0, rows, chunk):
+        batch = []
+        for i in range(offset, min(offset + chunk, rows)):
+            zone = rng.choice(zones) if rng.random() < 0.8 else None
+            latitude = longitude = None
+            if zone:
+                (latitude, longitude), _ = SUB_CITIES[zone]
+                latitude += rng.gauss(0, 0.01)
+                longitude += rng.gauss(0, 0.01)
+            submitted_at = start + timedelta(seconds=rng.randrange(365 * 86400))
+            batch.append(('Abebe', f"+2519{i % 100000000:08d}", '🔄 Temporary', rng.choice(SERVICE_CHOICES),
+                          zone, latitude, longitude, submitted_at.strftime('%Y-%m-%d %H:%M:%S')))
+        conn.executemany(
+            'INSERT INTO service_requests (name, phone, service_type, services, location_zone, '
+            'location_latitude, location_longitude, submitted_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            batch
+        )
+        conn.commit()
+    conn.close()
+
+
+def naive_reports(conn, cell_km=analytics.HEATMAP_CELL_KM):
+    """The same reports with a Python loop over every row."""
+    south, north, west, east = analytics.ADDIS_ABABA_BOUNDS
+    latitude_step = cell_km / analytics.KM_PER_DEGREE_LATITUDE
+    longitude_step = cell_km / (analytics.KM_PER_DEGREE_LONGITUDE_AT_EQUATOR
+                                * math.cos(math.radians((south + north) / 2)))
+    latitude_edges = np.arange(south, north + latitude_step, latitude_step).tolist()
+    longitude_edges = np.arange(west, east + longitude_step, longitude_step).tolist()
+    keys = analytics.SERVICE_KEYS
+    heatmap = {}
+    hours = [[0] * 24 for _ in range(7)]
+    pairs = [[0] * len(keys) for _ in keys]
+    zones = {}
+    for submitted_at, services, zone, latitude, longitude in conn.execute(
+        'SELECT submitted_at, services, location_zone, location_latitude, location_longitude FROM service_requests'
+    ):
+        local = datetime.strptime(submitted_at, '%Y-%m-%d %H:%M:%S') + timedelta(hours=analytics.LOCAL_UTC_OFFSET_HOURS)
+        hours[local.weekday()][local.hour] += 1
+        if latitude is not None and latitude_edges[0] <= latitude <= latitude_edges[-1] \
+                and longitude_edges[0] <= longitude <= longitude_edges[-1]:
+            row = min(int((latitude - latitude_edges[0]) / latitude_step), len(latitude_edges) - 2)
+            column = min(int((longitude - longitude_edges[0]) / longitude_step), len(longitude_edges) - 2)
+            heatmap[row, column] = heatmap.get((row, column), 0) + 1
+        flags = analytics._service_flags(services)
+        per_zone = zones.setdefault(zone, [0] * len(keys))
+        for i, flag in enumerate(flags):
+            if flag:
+                per_zone[i] += 1
+                for j, other in enumerate(flags):
+                    if other:
+                        pairs[i][j] += 1
+    return heatmap, hours, pairs, zones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'analytics.db')
+        started = time.perf_counter()
+        build_database(path, args.rows)
+        print(f"🏗️  {args.rows:,} requests built in {time.perf_counter() - started:.1f}s")
+
+        conn = sqlite3.connect(path)
+        started = time.perf_counter()
+        data = analytics.load_requests(analytics.source_batches([conn]))
+        loaded = time.perf_counter()
+        results = analytics.analyse(data)
+        finished = time.perf_counter()
+        print(f"   NumPy load    {loaded - started:7.2f}s")
+        print(f"   NumPy analyse {finished - loaded:7.2f}s")
+
+        started = time.perf_counter()
+        heatmap, hours, pairs, zones = naive_reports(conn)
+        print(f"   pure Python   {time.perf_counter() - started:7.2f}s")
+        conn.close()
+
+    counts = results['heatmap'][::-1]
+    assert {cell: int(counts[cell]) for cell in zip(*counts.nonzero())} == heatmap, "heatmaps differ"
+    assert results['hour_of_week'].tolist() == hours, "hour-of-week histograms differ"
+    assert results['cooccurrence'].tolist() == pairs, "co-occurrence matrices differ"
+    assert {zone: row for zone, row in zip(data['zones'], results['zone_services'].tolist())} == zones, \
+        "zone matrices differ"
+    print(f"✅ Reports agree ({results['located']:,} requests on the heatmap)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark free-worker queries on the availability index against SQLite.
+
+Builds realistic calendars: workers spread over the gazetteer's sub-cities
+and landmarks with one to three skills, available most days of an
+eight-week period from early morning to evening, and booked for a few
+two-to-four hour jobs a day. Then times "which workers with skill X are
+free from T1 to T2 near Z" on the in-memory index, with and without a
+limit, against the same question asked of indexed SQLite tables (with
+the distance filter applied to its result), and checks they agree. Also
+times booking a slot.
+
+Usage: python benchmarks/bench_availability.py [--workers 5000] [--queries 2000]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import storage
+from availability import MAX_DISTANCE_KM, build_index, format_time, parse_time
+from catalog import SERVICE_LABELS
+from gazetteer import LANDMARKS, SUB_CITIES, distance_km, locate
+
+PLACES = [names[0] for _, names in SUB_CITIES.values()] + [names[0] for _, _, names in LANDMARKS.values()]
+SKILLS = [key for key in SERVICE_LABELS if key != 'other']
+DAYS = 56
+START = parse_time('2030-01-06 00:00')
+
+
+def build_calendars(rng, workers):
+    """Rows of storage.IMPORT_WORKER_COLUMNS and of (worker_id, starts_at, ends_at) windows and bookings."""
+    worker_rows, windows, bookings = [], [], []
+    for worker_id in range(1, workers + 1):
+        skills = rng.sample(SKILLS, rng.randint(1, 3))
+        worker_rows.append((f"Worker {worker_id}", f"+2519{worker_id:08d}", rng.choice(PLACES),
+                            ', '.join(SERVICE_LABELS[skill][0] for skill in skills)))
+        for day in range(DAYS):
+            # Sundays off, and the odd other day
+            if day % 7 == 0 or rng.random() < 0.1:
+                continue
+            day_start = START + day * 86400
+            window_start = day_start + rng.choice([6, 7, 8, 9]) * 3600
+            window_end = day_start + rng.choice([16, 17, 18, 20]) * 3600
+            windows.append((worker_id, format_time(window_start), format_time(window_end)))
+            slot = window_start
+            for _ in range(rng.choice([0, 1, 1, 2, 2, 3])):
+                slot += rng.choice([0, 1, 2]) * 1800
+                length = rng.choice([2, 3, 4]) * 3600
+                if slot + length > window_end:
+                    break
+                bookings.append((worker_id, format_time(slot), format_time(slot + length)))
+                slot += length
+    return worker_rows, windows, bookings
+
+
+def build_database(path, worker_rows, windows, bookings):
+    repository = storage.SQLiteRepository(path)
+    asyncio.run(repository.init())
+    asyncio.run(repository.close())
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany('INSERT INTO workers (name, phone, location, services) VALUES (?, ?, ?, ?)', worker_rows)
+        conn.executemany('INSERT INTO worker_availability (worker_id, starts_at, ends_at) VALUES (?, ?, ?)', windows)
+        conn.executemany('INSERT INTO worker_bookings (worker_id, starts_at, ends_at) VALUES (?, ?, ?)', bookings)
+    return conn
+
+
+def sql_free_workers(conn, places, start, end, skill, near):
+    """The same question asked of SQLite, distance-filtered and sorted in Python."""
+    starts_at, ends_at = format_time(start), format_time(end)
+    rows = conn.execute('''
+        SELECT w.worker_id FROM workers w
+        WHERE w.services LIKE ?
+          AND EXISTS (SELECT 1 FROM worker_availability a
+                      WHERE a.worker_id = w.worker_id AND a.starts_at <= ? AND a.ends_at >= ?)
+          AND NOT EXISTS (SELECT 1 FROM worker_bookings b
+                          WHERE b.worker_id = w.worker_id AND b.starts_at < ? AND b.ends_at > ?)
+    ''', (f'%{SERVICE_LABELS[skill][0]}%', starts_at, ends_at, ends_at, starts_at)).fetchall()
+    point = (near.latitude, near.longitude)
+    found = []
+    for (worker_id,) in rows:
+        place = places[worker_id]
+        if place:
+            distance = distance_km(point, (place.latitude, place.longitude))
+            if distance <= MAX_DISTANCE_KM:
+                found.append((distance, worker_id))
+    return [worker_id for _, worker_id in sorted(found)]
+
+
+def timed(function, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        function(*query)
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=5000)
+    parser.add_argument('--queries', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    worker_rows, windows, bookings = build_calendars(rng, args.workers)
+    print(f"📅 {args.workers:,} workers, {len(windows):,} availability windows, {len(bookings):,} bookings "
+          f"over {DAYS} days")
+
+    started = time.perf_counter()
+    index = build_index([(worker_id, *row) for worker_id, row in enumerate(worker_rows, 1)], windows, bookings)
+    print(f"   index built in {time.perf_counter() - started:.2f}s")
+
+    queries = []
+    for _ in range(args.queries):
+        start = START + rng.randrange(DAYS) * 86400 + rng.randrange(12, 36) * 1800
+        queries.append((start, start + rng.choice([2, 3, 4]) * 3600, rng.choice(SKILLS), locate(rng.choice(PLACES))))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_database(os.path.join(tmp, 'availability.db'), worker_rows, windows, bookings)
+        places = {worker_id: worker.place for worker_id, worker in index.workers.items()}
+        for start, end, skill, near in queries[:200]:
+            expected = sql_free_workers(conn, places, start, end, skill, near)
+            found = index.free_workers(start, end, skill, near)
+            assert [worker.worker_id for worker in found] == expected, (format_time(start), skill, near)
+            assert [worker.worker_id for worker in index.free_workers(start, end, skill, near, limit=10)] \
+                == expected[:10]
+
+        free = [len(index.free_workers(start, end, skill, near)) for start, end, skill, near in queries]
+        print(f"   {statistics.mean(free):.0f} workers free per query on average")
+        for label, function in (
+            ("index, limit 10", lambda start, end, skill, near: index.free_workers(start, end, skill, near, limit=10)),
+            ("index, all", lambda start, end, skill, near: index.free_workers(start, end, skill, near)),
+            ("SQLite", lambda start, end, skill, near: sql_free_workers(conn, places, start, end, skill, near))
+        ):
+            mean, p99 = timed(function, queries)
+            print(f"   {label:16} {mean:9.1f} µs mean, {p99:9.1f} µs p99")
+        conn.close()
+
+    def book(start, end, skill, near):
+        free = index.free_workers(start, end, skill, near, limit=1)
+        if free:
+            index.book(free[0].worker_id, start, end)
+
+    mean, p99 = timed(book, queries)
+    print(f"   find and book    {mean:9.1f} µs mean, {p99:9.1f} µs p99")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Benchmark handler write latency while an online backup runs.
+
+A writer thread saves a service request every --interval ms through
+storage.insert_request, first with no backup, then while a stepped
+backup (backup.create_backup) runs, then during a single-step copy. Pass
+--journal-mode delete to see the same runs without WAL, where the single
+step blocks writers for the whole copy.
+
+Usage: python benchmarks/bench_backup.py [--rows 300000] [--interval 20] [--journal-mode wal]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import backup
+import storage
+
+
+def build_database(path, rows):
+    """Create the bot's schema and fill service_requests with synthetic rows."""
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    storage.init_sqlite_schema(conn)
+    conn.execute("INSERT INTO users (telegram_id, first_name) VALUES (1, 'Bench')")
+    chunk = 50000
+    for offset in range(0, rows, chunk):
+        conn.executemany(
+            'INSERT INTO service_requests (user_id, name, phone, location, service_type, services) '
+            'VALUES (1, ?, ?, ?, ?, ?)',
+            (
+                (f"Customer {i}", f"+2519{i % 100000000:08d}",
+                 f"Bole, Addis Ababa - Near landmark {rng.randrange(1000)}",
+                 "🔄 Temporary", "🏠 House Cleaning, 👕 Laundry Service")
+                for i in range(offset, min(offset + chunk, rows))
+            )
+        )
+        conn.commit()
+    conn.close()
+
+
+def measure_writes(path, interval, stop):
+    """Save a request every ``interval`` seconds until ``stop`` is set; return latencies in ms."""
+    latencies = []
+    conn = sqlite3.connect(path)
+    while not stop.is_set():
+        started = time.perf_counter()
+        storage.insert_request(conn, 1, 'Bench Customer', '+251911000000', 'Bole',
+                               '🔄 Temporary', '🏠 House Cleaning', 'manual_entry', 'manual_entry')
+        latencies.append((time.perf_counter() - started) * 1000)
+        time.sleep(interval)
+    conn.close()
+    return latencies
+
+
+def run_scenario(name, path, interval, work, duration):
+    """Measure writer latency while ``work`` runs (or for ``duration`` seconds if None)."""
+    stop = threading.Event()
+    result = {}
+    writer = threading.Thread(target=lambda: result.setdefault('latencies', measure_writes(path, interval, stop)))
+    writer.start()
+    started = time.perf_counter()
+    if work is None:
+        time.sleep(duration)
+    else:
+        work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    writer.join()
+
+    latencies = sorted(result['latencies'])
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"   {name:<22} {len(latencies):5d} writes in {elapsed:5.1f}s  "
+          f"p50 {statistics.median(latencies):6.2f} ms  p99 {p99:7.2f} ms  max {latencies[-1]:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--interval', type=float, default=20, help="Milliseconds between writes")
+    parser.add_argument('--journal-mode', default='wal', choices=['wal', 'delete'])
+    args = parser.parse_args()
+    interval = args.interval / 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench_backup.db')
+        backup_dir = os.path.join(tmp, 'backups')
+        print(f"📦 Building {args.rows:,} rows...")
+        build_database(db_path, args.rows)
+        conn = sqlite3.connect(db_path)
+        conn.execute(f'PRAGMA journal_mode={args.journal_mode}')
+        conn.close()
+        print(f"   {os.path.getsize(db_path) / 1024 / 1024:.1f} MiB\n")
+
+        run_scenario('no backup', db_path, interval, None, 3)
+        run_scenario('stepped backup', db_path, interval,
+                     lambda: backup.create_backup(db_path, backup_dir), None)
+        run_scenario('single-step copy', db_path, interval,
+                     lambda: backup.online_copy(db_path, os.path.join(tmp, 'full.db'), pages=-1, sleep=0), None)
+
+
+if __name__ == '__main__':
+    main()
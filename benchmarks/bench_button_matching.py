@@ -0,0 +1,91 @@
+"""Benchmark resolving typed text to menu buttons: ButtonMatcher vs difflib over every key.
+
+Builds bot.MENU_MATCHERS and looks up a mix of exact taps, typed words,
+typos, Ethiopic text and sentences against the main, services and
+confirmation menus. Each is timed uncached (the cache cleared before every
+lookup) and cached, and compared with difflib.get_close_matches over the
+same labels and aliases, the obvious way to do it without an index. Texts in
+UNRELATED must neither match nor be suggested a button; the run fails if one
+is.
+
+Usage: python benchmarks/bench_button_matching.py [--rounds 2000]
+"""
+import argparse
+import difflib
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.setdefault('BOT_TOKEN_CLIENT', 'benchmark')
+
+import bot
+from button_matcher import normalize
+
+TYPED = {
+    bot.MAIN_MENU: ['🚀 Start', 'strat', 'setings', 'start please', 'cleaning'],
+    bot.SERVICES: ['🏠 House Cleaning', 'cleaning', 'clening', 'nanny', 'laundary', 'ጽዳት', 'የአትክልት ስራ',
+                   'house', 'i need a cook please', 'done', 'somthing else', 'plumber'],
+    bot.CONFIRMATION: ['✅ Confirm & Submit Request', 'confirm', 'confrim', 'edit phone', 'edit', 'cancel',
+                       'አረጋግጥ', 'ስልክ ቀይር', 'submit please', 'hello'],
+}
+# Typed texts that were once wrongly suggested a button of the menu
+UNRELATED = {
+    bot.MAIN_MENU: ['cleaning'],
+    bot.SERVICES: ['back', 'yes', 'hello'],
+    bot.CONFIRMATION: ['hello'],
+}
+
+
+def difflib_lookup(keys, text):
+    return difflib.get_close_matches(normalize(text), keys, n=3, cutoff=0.5)
+
+
+def timed(function, texts, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            function(text)
+    return (time.perf_counter() - started) / (rounds * len(texts)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    failures = 0
+    for state, texts in TYPED.items():
+        matcher = bot.MENU_MATCHERS[state]
+        keys = list(matcher._keys)
+        print(f"🔎 {len(matcher.choices)} buttons, {len(keys)} keys, {len(texts)} typed texts")
+        for text in texts:
+            match = matcher.match(text)
+            if match.choice is not None:
+                outcome = matcher.label(match.choice, 'english')
+            elif match.suggestions:
+                outcome = 'ask: ' + ' | '.join(matcher.label(choice, 'english') for choice in match.suggestions)
+            else:
+                outcome = '-'
+            print(f"   {text!r:28} {match.score:4.2f} {outcome}")
+        for text in UNRELATED.get(state, []):
+            match = matcher.match(text)
+            if match.choice is not None or match.suggestions:
+                failures += 1
+                print(f"   ❌ {text!r} should not match a button, got {match}")
+
+        def uncached(text):
+            matcher.match.cache_clear()
+            return matcher.match(text)
+
+        print(f"   ButtonMatcher, uncached {timed(uncached, texts, args.rounds):8.1f} µs/lookup")
+        print(f"   ButtonMatcher, cached   {timed(matcher.match, texts, args.rounds):8.1f} µs/lookup")
+        rounds = max(1, args.rounds // 10)
+        print(f"   difflib over all keys   {timed(lambda text: difflib_lookup(keys, text), texts, rounds):8.1f} µs/lookup")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""Benchmark Bot API calls and user-visible latency per conversation, with and without reply coalescing.
+
+Runs the full request flow (change language, pick a service, name, phone,
+address, confirm) for --users simulated users through bot.build_application,
+against replay.StubRequest with --latency ms added to every Bot API call as
+the HTTPS round-trip. Each run reports calls per conversation and the time
+each step kept its user waiting, first sending every text on its own (the
+previous behaviour), then with responses.Reply coalescing.
+
+Usage: python benchmarks/bench_coalescing.py [--users 200] [--latency 80]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+
+import bot
+import replay
+import responses
+from storage import SQLiteRepository
+
+FLOW = [
+    '/start', '⚙️ ማስተካከያ', '🌍 ቋንቋ ቀይር', '🇬🇧 English', '🚀 Start', '🔄 Temporary',
+    '🏠 House Cleaning', '✅ Done Selecting', '✅ Use My Telegram Name', '0911223344',
+    'Bole, near Edna Mall', '✅ Confirm & Submit Request'
+]
+
+
+def make_update(update_id, user_id, text):
+    message = {
+        'message_id': update_id, 'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private', 'first_name': 'Customer'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': 'Customer', 'last_name': 'Test'},
+        'text': text
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+    return {'update_id': update_id, 'message': message}
+
+
+async def run(users, latency, database_file, coalesce):
+    responses.COALESCE_REPLIES = coalesce
+    bot.BACKUP_INTERVAL_HOURS = 0
+    stub = replay.StubRequest(latency)
+    application = bot.build_application(
+        Application.builder().token('0:bench').request(stub).get_updates_request(replay.StubRequest()).job_queue(None),
+        SQLiteRepository(database_file)
+    )
+    step_times = {text: [] for text in FLOW}
+    async with application:
+        await bot.post_init(application)
+        await application.start()
+        stub.calls.clear()
+        update_id = 0
+
+        async def conversation(user_id):
+            nonlocal update_id
+            for text in FLOW:
+                update_id += 1
+                update = Update.de_json(make_update(update_id, user_id, text), application.bot)
+                started = time.perf_counter()
+                await application.process_update(update)
+                step_times[text].append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(conversation(1000 + user) for user in range(users)))
+        elapsed = time.perf_counter() - started
+        finished = sum(1 for state in replay.conversation_states(
+            next(handler for handler in application.handlers[0] if isinstance(handler, ConversationHandler))
+        ).values() if state == bot.POST_SUBMISSION)
+        await application.stop()
+        await bot.post_shutdown(application)
+
+    calls = sum(count for endpoint, count in stub.calls.items() if endpoint != 'getMe')
+    name = 'coalesced' if coalesce else 'one per text'
+    print(f"   {name:<13} {calls / users:5.1f} calls/conversation  "
+          f"{sum(statistics.mean(times) for times in step_times.values()):7.0f} ms waiting/conversation  "
+          f"({finished}/{users} submitted, {elapsed:.1f}s)")
+    for text in ('🇬🇧 English', 'Bole, near Edna Mall', '✅ Confirm & Submit Request'):
+        print(f"      {text:<28} {statistics.mean(step_times[text]):6.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=80, help="Milliseconds added to each Bot API call")
+    args = parser.parse_args()
+
+    print(f"💬 {args.users} conversations, {args.latency:.0f} ms per Bot API call")
+    for coalesce in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run(args.users, args.latency / 1000, os.path.join(tmp, 'bench.db'), coalesce))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the dispatch queue at different queue lengths.
+
+Fills a fresh database with pending requests (a mix of temporary and
+permanent, submitted over the last few days, some from returning
+customers), then times enqueueing a new request, claiming the most urgent
+one, re-prioritising a random one and listing the top of the queue. The
+index on (deadline, request_id) should keep each of them roughly flat as
+the queue grows ten-fold.
+
+Usage: python benchmarks/bench_dispatch.py [--sizes 10000 100000] [--operations 500]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import storage
+
+SERVICE_TYPES = ['🔄 Temporary', '⏰ Permanent']
+
+
+def import_rows(rng, size):
+    """Rows of storage.IMPORT_REQUEST_COLUMNS; one in ten customers has a finished earlier request."""
+    now = datetime.utcnow()
+    rows = []
+    for number in range(size):
+        phone = f"+2519{rng.randrange(size):08d}"
+        submitted_at = (now - timedelta(seconds=rng.randrange(3 * 86400))).strftime('%Y-%m-%d %H:%M:%S')
+        status = 'done' if rng.random() < 0.1 else 'pending'
+        rows.append((f"Customer {number}", phone, 'Bole', rng.choice(SERVICE_TYPES), '🧹 Full House Work',
+                     submitted_at, status, f"bench:{number}"))
+    return rows
+
+
+def timed(function, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        function()
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def run(size, operations, rng):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'dispatch.db')
+        repository = storage.SQLiteRepository(path)
+        asyncio.run(repository.init())
+        asyncio.run(repository.close())
+        conn = sqlite3.connect(path)
+
+        started = time.perf_counter()
+        storage.import_requests(conn, import_rows(rng, size))
+        queued = conn.execute('SELECT COUNT(*) FROM dispatch_queue').fetchone()[0]
+        print(f"📋 {queued:,} queued requests, imported in {time.perf_counter() - started:.2f}s")
+
+        ids = [row[0] for row in conn.execute('SELECT request_id FROM dispatch_queue')]
+        counter = iter(range(operations * 10))
+
+        def enqueue():
+            storage.insert_request(conn, None, 'Walk In', f"+2519{rng.randrange(size):08d}", None,
+                                   rng.choice(SERVICE_TYPES), '🌿 Gardening', 'manual_entry', 'manual_entry',
+                                   f"walk-in:{next(counter)}")
+
+        def reprioritise():
+            deadline = (datetime.utcnow() + timedelta(hours=rng.uniform(-48, 48))).strftime('%Y-%m-%d %H:%M:%S')
+            storage.reprioritise_request(conn, rng.choice(ids), deadline)
+
+        for label, function in (
+            ("enqueue", enqueue),
+            ("claim", lambda: storage.claim_request(conn, 'bench')),
+            ("reprioritise", reprioritise),
+            ("list top 20", lambda: storage.dispatch_queue(conn, 20))
+        ):
+            mean, p99 = timed(function, operations)
+            print(f"   {label:14} {mean:9.1f} µs mean, {p99:9.1f} µs p99")
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--operations', type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for size in args.sizes:
+        run(size, args.operations, rng)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark streaming exports: peak memory should stay flat as the table grows.
+
+Usage: python benchmarks/bench_export.py [--rows 100000 1000000 10000000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import storage
+import view_database
+
+
+def build_database(path, rows):
+    """Create a service_requests table filled with synthetic rows."""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE service_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            location TEXT,
+            service_type TEXT NOT NULL,
+            services TEXT NOT NULL,
+            phone_source TEXT,
+            location_source TEXT,
+            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    chunk = 50000
+    for offset in range(0, rows, chunk):
+        conn.executemany(
+            'INSERT INTO service_requests (user_id, name, phone, location, service_type, services, submitted_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (
+                (i % 5000, f"Customer {i}", f"+2519{i % 100000000:08d}", "Bole, Addis Ababa",
+                 "🔄 Temporary", "🏠 House Cleaning, 👕 Laundry Service", "2025-01-01 10:00:00")
+                for i in range(offset, min(offset + chunk, rows))
+            )
+        )
+    conn.commit()
+    conn.close()
+
+
+def measure(label, func):
+    """Run func and report wall time and peak traced memory."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<28} {elapsed:8.2f}s  peak {peak / 1024 / 1024:8.2f} MiB")
+    return result
+
+
+def fetchall_export(conn, path):
+    """The previous approach: materialise the whole table before writing."""
+    import csv
+    rows = conn.execute('SELECT request_id, user_id, name, phone, location, service_type, services, submitted_at '
+                        'FROM service_requests').fetchall()
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f).writerows(rows)
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--baseline', action='store_true', help="Also run the fetchall() exporter")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            db_path = os.path.join(tmp, f"bench_{rows}.db")
+            print(f"\n📦 Building {rows:,} rows...")
+            build_database(db_path, rows)
+            with view_database.open_storage(storage.SQLiteRepository(db_path)) as (repository, run):
+                for fmt, compress in (('csv', False), ('jsonl', False), ('csv', True)):
+                    label = f"stream {fmt}{'.gz' if compress else ''}"
+                    measure(label, lambda: view_database.export_table(
+                        run, repository, 'service_requests', fmt=fmt, compress=compress, output_dir=tmp))
+
+            if args.baseline:
+                conn = sqlite3.connect(db_path)
+                measure("fetchall csv (baseline)", lambda: fetchall_export(conn, os.path.join(tmp, 'baseline.csv')))
+                conn.close()
+
+            for name in os.listdir(tmp):
+                os.remove(os.path.join(tmp, name))
+
+
+if __name__ == '__main__':
+    main()
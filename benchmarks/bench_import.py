@@ -0,0 +1,103 @@
+"""Benchmark importing historical requests: one save per row vs bulk_import batches.
+
+Writes --rows synthetic spreadsheet rows (messy phones, free-text services,
+day/month/year dates) to a CSV, then imports them into fresh SQLite files:
+first row by row, validating as the importer does and saving each through
+the bot's path (a new connection per row, one transaction each), then with
+bulk_import.import_file at --batch-size rows per transaction. The per-row
+run is capped at --per-row-rows and both report rows/s.
+
+Usage: python benchmarks/bench_import.py [--rows 200000] [--batch-size 5000] [--per-row-rows 5000]
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import bulk_import
+import storage
+
+SERVICES = ['cleaning', 'Laundry & ironing', 'nanny', 'cook, cleaning', 'Full house', 'elderly care',
+            'ምግብ አብሳይ', 'gardening / dog walking', 'driver']
+TYPES = ['Permanent', 'temporary', 'Full time', 'part-time', 'ቋሚ']
+PHONE_FORMATS = ['09{:08d}', '+2519{:08d}', '2519{:08d}', '09{:08d}'.replace('09', '0 9'), '9{:08d}']
+
+
+def write_spreadsheet(path, rows):
+    rng = random.Random(7)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Name', 'Phone Number', 'Address', 'Type', 'Services', 'Date'])
+        for i in range(rows):
+            writer.writerow([
+                f"Customer {i}", rng.choice(PHONE_FORMATS).format(rng.randrange(10 ** 8)),
+                f"Bole, near landmark {rng.randrange(1000)}", rng.choice(TYPES), rng.choice(SERVICES),
+                f"{rng.randrange(1, 29):02d}/{rng.randrange(1, 13):02d}/{rng.randrange(2019, 2024)}"
+            ])
+
+
+def per_row_import(path, database_file, limit):
+    """Validate and save rows one at a time, each on its own connection."""
+    started = time.perf_counter()
+    done = 0
+    with bulk_import.open_input(path) as f:
+        for record in bulk_import.read_records(f, 'csv'):
+            if done >= limit:
+                break
+            done += 1
+            try:
+                name, phone, location, service_type, services, submitted_at, status, key = \
+                    bulk_import.request_row(record, 'done')
+            except ValueError:
+                continue
+            conn = sqlite3.connect(database_file)
+            storage.insert_request(conn, None, name, phone, location, service_type, services,
+                                   'manual_entry', 'manual_entry', key)
+            conn.close()
+    return done, time.perf_counter() - started
+
+
+async def bulk(path, database_file, batch_size):
+    repository = storage.SQLiteRepository(database_file)
+    await repository.init()
+    try:
+        return await bulk_import.import_file(repository, path, 'requests', batch_size, resume=False)
+    finally:
+        await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200000)
+    parser.add_argument('--batch-size', type=int, default=bulk_import.IMPORT_BATCH_SIZE)
+    parser.add_argument('--per-row-rows', type=int, default=5000, help="Rows imported one at a time")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'history.csv')
+        write_spreadsheet(path, args.rows)
+        print(f"📥 {args.rows:,} spreadsheet rows ({os.path.getsize(path) / 1024 / 1024:.1f} MiB)")
+
+        database_file = os.path.join(tmp, 'per_row.db')
+        conn = sqlite3.connect(database_file)
+        storage.init_sqlite_schema(conn)
+        conn.close()
+        rows, elapsed = per_row_import(path, database_file, args.per_row_rows)
+        print(f"   one per row     {rows / elapsed:10,.0f} rows/s  ({rows:,} rows in {elapsed:.1f}s)")
+
+        result = bulk(path, os.path.join(tmp, 'bulk.db'), args.batch_size)
+        result = asyncio.run(result)
+        print(f"   bulk, {args.batch_size:>5}/tx {result['rate']:10,.0f} rows/s  ({result['rows']:,} rows in "
+              f"{result['elapsed']:.1f}s, {result['inserted']:,} new, {result['duplicates']:,} duplicates, "
+              f"{result['rejected']:,} rejected)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark FTS5 request search latency.
+
+Usage: python benchmarks/bench_search.py [--rows 1000000] [--queries 200]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import search_index
+
+NAMES = ['Abebe', 'Meron', 'Hana', 'ሐና', 'ሀይሌ', 'Tigist', 'Selam', 'ሠላም', 'Dawit', 'ዐለሙ', 'Kebede', 'Yonas']
+AREAS = ['Bole', 'Kazanchis', 'Piassa', 'Megenagna', 'CMC', 'Ayat', 'ቦሌ', 'ሐያት', 'ሰሚት', 'ጀሞ', 'Gerji', 'Lebu']
+LANDMARKS = ['Medhanealem', 'Edna Mall', 'ሚካኤል ቤተ ክርስቲያን', 'Friendship', 'ዐደባባይ', 'Atlas', 'Shola Market']
+SERVICES = ['🏠 House Cleaning', '👕 Laundry Service', '🍳 Cooking Service', '🧹 ሙሉ የቤት ስራ',
+            '👶 Child Care', '📝 Other: ጓሮ አትክልት', '📝 Other: window washing']
+QUERIES = ['bole', 'ሀያት', 'ሐያት', 'hana', 'medhane', 'ዐደባባይ', 'window', 'ጓሮ', 'ሰላም', 'edna mall',
+           'kazanchis cooking', 'ቤተ ክርስቲያን', 'shola']
+
+
+def build_database(path, rows):
+    """Create service_requests with the search index and synthetic rows."""
+    rng = random.Random(42)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE service_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            location TEXT,
+            service_type TEXT NOT NULL,
+            services TEXT NOT NULL,
+            phone_source TEXT,
+            location_source TEXT,
+            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    search_index.ensure_search_index(conn)
+    chunk = 50000
+    for offset in range(0, rows, chunk):
+        conn.executemany(
+            'INSERT INTO service_requests (user_id, name, phone, location, service_type, services) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            (
+                (i, f"{rng.choice(NAMES)} {rng.choice(NAMES)}", f"+2519{i % 100000000:08d}",
+                 f"{rng.choice(AREAS)}, Addis Ababa - Near {rng.choice(LANDMARKS)} {i % 997}",
+                 "🔄 Temporary", ', '.join(rng.sample(SERVICES, 2)))
+                for i in range(offset, min(offset + chunk, rows))
+            )
+        )
+        conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench_search.db')
+        print(f"📦 Building {args.rows:,} rows with FTS triggers...")
+        started = time.perf_counter()
+        build_database(db_path, args.rows)
+        print(f"   built in {time.perf_counter() - started:.1f}s")
+
+        conn = sqlite3.connect(db_path)
+        columns = ['request_id', 'name', 'location', 'services']
+        latencies = []
+        for i in range(args.queries):
+            term = QUERIES[i % len(QUERIES)]
+            started = time.perf_counter()
+            rows = search_index.search_requests(conn, term, columns, limit=args.limit)
+            latencies.append((time.perf_counter() - started) * 1000)
+            if i < len(QUERIES):
+                print(f"   {term!r:<22} {len(rows):3d} rows  {latencies[-1]:7.2f} ms")
+        conn.close()
+
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"\n🔎 {args.queries} queries: p50 {statistics.median(latencies):.2f} ms, p99 {p99:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
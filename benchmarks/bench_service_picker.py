@@ -0,0 +1,124 @@
+"""Benchmark Bot API messages and bytes per completed request: typed service choices vs the inline picker.
+
+Runs --users simulated users through the full request flow via
+bot.build_application against replay.StubRequest, picking --picks services
+each. The "typed" run sends each choice as a text message, as the old reply
+keyboard did, so every toggle costs a new message with the whole menu. The
+"picker" run taps the inline picker --tap-gap ms apart; taps are answered
+at once and a burst costs one debounced edit.
+
+Usage: python benchmarks/bench_service_picker.py [--users 200] [--picks 4] [--tap-gap 150]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+
+import bot
+import replay
+from storage import SQLiteRepository
+
+BEFORE_SERVICES = ['/start', '🚀 ጀምር', '🔄 ጊዜያዊ']
+AFTER_SERVICES = ['✅ የቴሌግራም ስሜን ተጠቀም', '0911223344', 'Bole, near Edna Mall', '✅ አረጋግጥ እና ላክ']
+
+_update_id = 0
+
+
+def next_id():
+    global _update_id
+    _update_id += 1
+    return _update_id
+
+
+def user_dict(user_id):
+    return {'id': user_id, 'is_bot': False, 'first_name': 'Customer', 'last_name': 'Test'}
+
+
+def text_update(user_id, text):
+    message = {
+        'message_id': next_id(), 'date': int(time.time()), 'text': text,
+        'chat': {'id': user_id, 'type': 'private'}, 'from': user_dict(user_id)
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+    return {'update_id': next_id(), 'message': message}
+
+
+def tap_update(user_id, data):
+    return {'update_id': next_id(), 'callback_query': {
+        'id': str(next_id()), 'from': user_dict(user_id), 'chat_instance': str(user_id), 'data': data,
+        'message': {'message_id': 1, 'date': int(time.time()), 'text': 'picker',
+                    'chat': {'id': user_id, 'type': 'private'}, 'from': replay.STUB_BOT_USER}
+    }}
+
+
+async def run(mode, users, picks, tap_gap, database_file):
+    bot.BACKUP_INTERVAL_HOURS = 0
+    stub = replay.StubRequest()
+    application = bot.build_application(
+        Application.builder().token('0:bench').request(stub).get_updates_request(replay.StubRequest()).job_queue(None),
+        SQLiteRepository(database_file)
+    )
+    conversation_handler = next(
+        handler for handler in application.handlers[0] if isinstance(handler, ConversationHandler)
+    )
+
+    async def process(data):
+        await application.process_update(Update.de_json(data, application.bot))
+
+    async def conversation(user_id):
+        for text in BEFORE_SERVICES:
+            await process(text_update(user_id, text))
+        for index in range(1, picks + 1):
+            if mode == 'typed':
+                await process(text_update(user_id, bot.SERVICE_OPTIONS['amharic'][index]))
+            else:
+                await process(tap_update(user_id, f"{bot.SERVICE_PICKER_PREFIX}{index}"))
+                await asyncio.sleep(tap_gap)
+        if mode == 'typed':
+            await process(text_update(user_id, '✅ ምርጫ ጨርሻለሁ'))
+        else:
+            await process(tap_update(user_id, f"{bot.SERVICE_PICKER_PREFIX}done"))
+        for text in AFTER_SERVICES:
+            await process(text_update(user_id, text))
+
+    async with application:
+        await bot.post_init(application)
+        await application.start()
+        stub.calls.clear()
+        stub.bytes_sent.clear()
+        await asyncio.gather(*(conversation(1000 + user) for user in range(users)))
+        states = replay.conversation_states(conversation_handler).values()
+        submitted = sum(1 for state in states if state == bot.POST_SUBMISSION)
+        await application.stop()
+        await bot.post_shutdown(application)
+
+    messages = stub.calls['sendMessage'] + stub.calls['editMessageText']
+    calls = sum(count for endpoint, count in stub.calls.items() if endpoint != 'getMe')
+    print(f"   {mode:<7} {messages / submitted:5.1f} messages sent or edited  {calls / submitted:5.1f} API calls  "
+          f"{sum(stub.bytes_sent.values()) / submitted / 1024:6.1f} KiB sent per completed request  "
+          f"({stub.calls['editMessageText'] / submitted:.1f} edits, {submitted}/{users} submitted)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--picks', type=int, default=4, help="Services chosen per request")
+    parser.add_argument('--tap-gap', type=float, default=150, help="Milliseconds between picker taps")
+    args = parser.parse_args()
+
+    print(f"🧺 {args.users} requests with {args.picks} services each")
+    for mode in ('typed', 'picker'):
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run(mode, args.users, args.picks, args.tap_gap / 1000, os.path.join(tmp, 'bench.db')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Benchmark memory per session and serialisation speed: user_data dicts vs Session.
+
+Builds the same half-filled draft both as the free-form user_data dict the
+handlers used to keep and as a slotted sessions.Session, then times
+serialising the persistent part of each (json of the dict keys vs
+Session.dumps) and loading it back.
+
+Usage: python benchmarks/bench_session_model.py [--sessions 100000] [--rounds 100000]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sessions
+
+PERSISTENT_KEYS = ('language', 'saved_contact_info', 'user_info', 'detected_name')
+
+
+def make_dict(user_id):
+    return {
+        'language': 'english',
+        'user_info': {'username': f"user{user_id}", 'first_name': 'Customer', 'last_name': 'Test', 'user_id': user_id},
+        'detected_name': 'Customer Test',
+        'saved_contact_info': {'name': 'Customer Test', 'phone': f"+2519{user_id:08d}",
+                               'location': 'Bole, Addis Ababa', 'phone_source': 'contact_shared'},
+        'service_type': '🔄 Temporary',
+        'selected_services': ['🏠 House Cleaning', '👕 Laundry Service', '🍳 Cooking Service'],
+        'services': '🏠 House Cleaning, 👕 Laundry Service, 🍳 Cooking Service',
+        'name': 'Customer Test',
+        'phone': f"+2519{user_id:08d}",
+        'location': 'Bole, Addis Ababa',
+        'phone_source': 'contact_shared',
+        'location_source': 'manual_entry',
+        'editing_from_confirmation': False
+    }
+
+
+def make_session(user_id):
+    session = sessions.Session()
+    session.language = 'english'
+    session.telegram_id = user_id
+    session.username = f"user{user_id}"
+    session.first_name = 'Customer'
+    session.last_name = 'Test'
+    session.detected_name = 'Customer Test'
+    session.saved_contact = sessions.SavedContact('Customer Test', f"+2519{user_id:08d}",
+                                                  'Bole, Addis Ababa', sessions.Source.CONTACT_SHARED)
+    draft = session.draft
+    draft.service_type = sessions.ServiceType.TEMPORARY
+    draft.services_mask = 0b1110
+    draft.name = 'Customer Test'
+    draft.phone = f"+2519{user_id:08d}"
+    draft.location = 'Bole, Addis Ababa'
+    draft.phone_source = sessions.Source.CONTACT_SHARED
+    return session
+
+
+def measure_memory(factory, count):
+    """Bytes allocated per object when ``count`` of them are alive."""
+    tracemalloc.start()
+    objects = [factory(user_id) for user_id in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return current / count
+
+
+def time_per_call(function, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, default=100000)
+    parser.add_argument('--rounds', type=int, default=100000)
+    args = parser.parse_args()
+
+    dict_bytes = measure_memory(make_dict, args.sessions)
+    session_bytes = measure_memory(make_session, args.sessions)
+    print(f"🧠 Memory per session ({args.sessions:,} alive)")
+    print(f"   user_data dict  {dict_bytes:7.0f} B  ({dict_bytes * 100000 / 1024 / 1024:6.1f} MiB per 100k)")
+    print(f"   Session         {session_bytes:7.0f} B  ({session_bytes * 100000 / 1024 / 1024:6.1f} MiB per 100k)")
+
+    user_data = make_dict(1)
+    session = make_session(1)
+    dict_text = json.dumps({key: user_data[key] for key in PERSISTENT_KEYS}, ensure_ascii=False)
+    session_text = session.dumps()
+    target = sessions.Session()
+
+    print(f"\n💾 Serialising the persistent part ({args.rounds:,} rounds)")
+    print(f"   dict json       {len(dict_text.encode()):4d} B  "
+          f"dump {time_per_call(lambda: json.dumps({key: user_data[key] for key in PERSISTENT_KEYS}, ensure_ascii=False), args.rounds):5.2f} us  "
+          f"load {time_per_call(lambda: json.loads(dict_text), args.rounds):5.2f} us")
+    print(f"   Session.dumps   {len(session_text.encode()):4d} B  "
+          f"dump {time_per_call(session.dumps, args.rounds):5.2f} us  "
+          f"load {time_per_call(lambda: target.loads(session_text), args.rounds):5.2f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Benchmark session memory per 100k simulated users, with and without eviction.
+
+Every simulated user touches the bot once and leaves a half-filled draft in
+their Session (selected services, name, phone, location). The unbounded run
+keeps them all, as PTB does by default; the bounded run sweeps with
+sessions.SessionStore.
+
+Usage: python benchmarks/bench_sessions.py [--users 100000] [--max-sessions 10000]
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import sessions
+import storage
+
+
+class FakeApplication:
+    """The slice of telegram.ext.Application that SessionStore uses."""
+
+    def __init__(self):
+        self.user_data = defaultdict(sessions.Session)
+        self.chat_data = defaultdict(dict)
+
+    def drop_user_data(self, user_id):
+        self.user_data.pop(user_id, None)
+
+    def drop_chat_data(self, chat_id):
+        self.chat_data.pop(chat_id, None)
+
+
+def fill_session(session, user_id):
+    """Leave a typical half-filled request, as an abandoned conversation does."""
+    session.language = 'english' if user_id % 3 else 'amharic'
+    session.telegram_id = user_id
+    session.username = f"user{user_id}"
+    session.first_name = 'Customer'
+    session.detected_name = f"Customer {user_id}"
+    draft = session.draft
+    draft.service_type = sessions.ServiceType.TEMPORARY
+    draft.services_mask = 0b1110
+    draft.name = f"Customer {user_id}"
+    draft.phone = f"+2519{user_id:08d}"
+    draft.location = f"Bole, Addis Ababa - Near landmark {user_id % 997}"
+
+
+async def simulate(users, store, application, sweep_every):
+    """Touch every user once, sweeping every ``sweep_every`` users if a store is given."""
+    for user_id in range(1, users + 1):
+        update = SimpleNamespace(effective_user=SimpleNamespace(id=user_id))
+        context = SimpleNamespace(user_data=application.user_data[user_id])
+        if store:
+            await store.touch(update, context)
+        fill_session(context.user_data, user_id)
+        if store and user_id % sweep_every == 0:
+            await store.sweep()
+    if store:
+        await store.sweep()
+
+
+def run(name, users, repository, max_sessions, sweep_every):
+    application = FakeApplication()
+    store = sessions.SessionStore(application, repository, max_sessions=max_sessions) if max_sessions else None
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    asyncio.run(simulate(users, store, application, sweep_every))
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_100k = current / users * 100000 / 1024 / 1024
+    print(f"   {name:<12} {len(application.user_data):7,d} sessions in memory  "
+          f"{current / 1024 / 1024:7.1f} MiB ({per_100k:6.1f} MiB per 100k users)  "
+          f"peak {peak / 1024 / 1024:7.1f} MiB  {elapsed:5.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--max-sessions', type=int, default=10000)
+    parser.add_argument('--sweep-every', type=int, default=5000, help="Users between sweeps")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_file = os.path.join(tmp, 'bench_sessions.db')
+        repository = storage.SQLiteRepository(database_file)
+        asyncio.run(repository.init())
+
+        print(f"👥 Simulating {args.users:,} users...")
+        run('unbounded', args.users, repository, None, args.sweep_every)
+        run('bounded', args.users, repository, args.max_sessions, args.sweep_every)
+        asyncio.run(repository.close())
+
+        conn = sqlite3.connect(database_file)
+        spilled = conn.execute('SELECT COUNT(*) FROM user_sessions').fetchone()[0]
+        conn.close()
+        print(f"   {spilled:,} sessions spilled to user_sessions "
+              f"({os.path.getsize(database_file) / 1024 / 1024:.1f} MiB on disk)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Measure resident memory per hosted bot against one process per bot.
+
+Each measurement runs in a fresh child process that imports the bot, opens
+the SQLite repository and builds ``N`` Applications the way run_tenants()
+does: shared Bot API and long-polling connection pools and a
+TenantRepository each. The baseline is the same child with N = 1, which is
+what every extra brand costs today as its own process. Nothing talks to
+Telegram, so this is the idle footprint before any sessions are loaded;
+sessions cost the same either way.
+
+Usage: python benchmarks/bench_tenants.py [--tenants 1 5 20 50]
+"""
+import argparse
+import gc
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+
+def rss_kb():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    raise RuntimeError("VmRSS not available")
+
+
+def child(count, database_file):
+    """Build ``count`` tenant Applications in this process and print the resident memory in kB."""
+    from telegram.ext import Application
+    from telegram.request import HTTPXRequest
+
+    import bot
+    import storage
+
+    repository = storage.SQLiteRepository(database_file)
+    api_request = HTTPXRequest(connection_pool_size=bot.TENANT_HTTP_POOL_SIZE)
+    updates_request = HTTPXRequest(connection_pool_size=count)
+    applications = [
+        bot.build_application(
+            Application.builder().token(f"{number}:bench").request(api_request).get_updates_request(updates_request),
+            storage.TenantRepository(repository, f"tenant{number}"),
+            admin_ids=set(), staff_chat_id=None, tenant_id=f"tenant{number}"
+        )
+        for number in range(1, count + 1)
+    ]
+    gc.collect()
+    print(rss_kb(), len(applications))
+
+
+def measure(count, database_file):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', str(count), '--database', database_file],
+        capture_output=True, text=True, check=True, cwd=ROOT
+    ).stdout.split()
+    return int(output[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tenants', type=int, nargs='+', default=[1, 5, 20, 50])
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.database)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_file = os.path.join(tmp, 'tenants.db')
+        baseline = min(measure(1, database_file) for _ in range(3))
+        print(f"🧮 One bot per process: {baseline / 1024:.1f} MB resident")
+        for count in args.tenants:
+            if count == 1:
+                continue
+            shared = min(measure(count, database_file) for _ in range(3))
+            per_tenant = (shared - baseline) / (count - 1)
+            print(f"   {count:3} bots in one process: {shared / 1024:7.1f} MB "
+                  f"(vs {count * baseline / 1024:7.1f} MB as {count} processes), "
+                  f"{per_tenant:,.0f} kB per extra bot")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,23 +1,102 @@
+import asyncio
 import logging
 import os
-import re
-import sqlite3
+import signal
+import time
+import uuid
+import warnings
 from datetime import datetime
 from dotenv import load_dotenv
-from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove, Update, KeyboardButton, InputFile
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, ConversationHandler, ContextTypes
+from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardButton, InlineKeyboardMarkup, Update, KeyboardButton, InputFile
+from telegram.error import BadRequest
+from telegram.warnings import PTBUserWarning
+from telegram.request import HTTPXRequest
+from telegram.ext import Application, CallbackQueryHandler, CommandHandler, MessageHandler, TypeHandler, filters, ConversationHandler, ContextTypes
+from staff_notifications import StaffNotifier
+from stats_snapshot import StatsSnapshot, RECENT_LIMIT
+from backup import BackupJob
+from sessions import SessionStore, Session, SavedContact, Submission, ServiceType, Source
+from storage import REQUEST_STATUSES, TenantRepository, open_repository
+from tenants import load_tenants
+from request_status import StatusCache
+from recorder import UpdateRecorder
+from health import HealthMonitor
+from funnel import FunnelConversationHandler, FunnelRecorder
+from responses import Reply
+from phones import normalize_phone
+from catalog import SERVICE_LABELS, SERVICE_ALIASES, SERVICE_TYPE_LABELS, SERVICE_TYPE_ALIASES
+from button_matcher import ButtonMatcher
+from gazetteer import describe, locate
 
 # Load environment variables
 load_dotenv()
 
+# The service picker's callbacks belong to the chat's conversation, not to one message
+warnings.filterwarnings('ignore', message="If 'per_message=False'", category=PTBUserWarning)
+
 # Enable logging
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO
 )
 logger = logging.getLogger(__name__)
 
+# Telegram user IDs allowed to use admin commands (comma-separated in .env)
+ADMIN_IDS = {int(admin_id) for admin_id in os.getenv('ADMIN_IDS', '').split(',') if admin_id.strip()}
+
+# Group chat that receives new service requests; notifications are off when unset
+STAFF_CHAT_ID = os.getenv('STAFF_CHAT_ID')
+
+# Admin dashboard snapshot: refresh interval and maximum age served, in seconds
+STATS_REFRESH_SECONDS = int(os.getenv('STATS_REFRESH_SECONDS', '60'))
+STATS_MAX_STALENESS_SECONDS = int(os.getenv('STATS_MAX_STALENESS_SECONDS', '120'))
+
+# Hours between online database backups; 0 turns them off
+BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))
+
+# Seconds after a submission during which another Confirm tap is treated as a repeat
+SUBMIT_DEDUP_SECONDS = int(os.getenv('SUBMIT_DEDUP_SECONDS', '120'))
+
+# In-memory sessions: idle hours before eviction and how many are kept at most
+SESSION_IDLE_HOURS = float(os.getenv('SESSION_IDLE_HOURS', '24'))
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', '10000'))
+
+# Minutes of inactivity before an unfinished conversation is ended; 0 turns it off
+CONVERSATION_TIMEOUT_MINUTES = float(os.getenv('CONVERSATION_TIMEOUT_MINUTES', '30'))
+
+# Seconds a service picker waits after a tap before editing, so a burst of taps costs one edit
+SERVICE_PICKER_DEBOUNCE_SECONDS = float(os.getenv('SERVICE_PICKER_DEBOUNCE_SECONDS', '0.4'))
+
+# Seconds between checks for request status changes made outside the bot
+STATUS_POLL_SECONDS = float(os.getenv('STATUS_POLL_SECONDS', '5'))
+
+# Directory that scrubbed recordings of incoming updates are written to; unset turns recording off
+RECORD_UPDATES_DIR = os.getenv('RECORD_UPDATES_DIR', '')
+
+# Local /healthz and /readyz endpoint; port 0 turns it off
+HEALTH_PORT = int(os.getenv('HEALTH_PORT', '0'))
+HEALTH_HOST = os.getenv('HEALTH_HOST', '127.0.0.1')
+# Event loop lag, in seconds, that fails /healthz and logs the blocking stack
+LOOP_LAG_WARN_SECONDS = float(os.getenv('LOOP_LAG_WARN_SECONDS', '0.5'))
+# Seconds without a processed update before /readyz fails; 0 turns the check off
+HEALTH_MAX_UPDATE_AGE_SECONDS = float(os.getenv('HEALTH_MAX_UPDATE_AGE_SECONDS', '0'))
+
+# Seconds between writes of conversation funnel events; 0 turns funnel analytics off
+FUNNEL_FLUSH_SECONDS = float(os.getenv('FUNNEL_FLUSH_SECONDS', '10'))
+
+# JSON file of tenants (bot tokens) to host in this process; unset runs the single BOT_TOKEN_CLIENT bot
+TENANTS_FILE = os.getenv('TENANTS_FILE', '')
+# Connections shared by every tenant's Bot API calls; each tenant's long poll holds one more
+TENANT_HTTP_POOL_SIZE = int(os.getenv('TENANT_HTTP_POOL_SIZE', '256'))
+
 # Conversation states
 MAIN_MENU, INFO, SETTINGS, LANGUAGE, SERVICE_TYPE, SERVICES, SERVICES_OTHER, CONTACT_CHECK, NAME_CONFIRM, PHONE, LOCATION, CONFIRMATION, POST_SUBMISSION = range(13)
+# Names the funnel analytics record the states under (see funnel.FUNNEL_STEPS)
+STATE_NAMES = {
+    MAIN_MENU: 'main_menu', INFO: 'info', SETTINGS: 'settings', LANGUAGE: 'language',
+    SERVICE_TYPE: 'service_type', SERVICES: 'services', SERVICES_OTHER: 'services_other',
+    CONTACT_CHECK: 'contact_check', NAME_CONFIRM: 'name_confirm', PHONE: 'phone', LOCATION: 'location',
+    CONFIRMATION: 'confirmation', POST_SUBMISSION: 'post_submission'
+}
 
 # Main menu options
 MAIN_MENU_OPTIONS = {
@@ -32,11 +111,6 @@ LANGUAGE_MENU = [["🇬🇧 English", "🇪🇹 Amharic"]]
 MENU_TEXT = {
     'english': {
         'service_type_menu': [["⏰ Permanent", "🔄 Temporary"]],
-        'main_services_menu': [
-            ["🧹 Full House Work", "🏠 House Cleaning"],
-            ["👕 Laundry Service", "🍳 Cooking Service"],
-            ["👶 Child Care", "👵 Elder Care"]
-        ],
         'name_confirm_menu': [
             ["✅ Use My Telegram Name", "✏️ Enter Different Name"]
         ],
@@ -51,11 +125,6 @@ MENU_TEXT = {
     },
     'amharic': {
         'service_type_menu': [["⏰ ቋሚ", "🔄 ጊዜያዊ"]],
-        'main_services_menu': [
-            ["🧹 ሙሉ የቤት ስራ", "🏠 የቤት ፅዳት"],
-            ["👕 የልብስ እጥበት", "🍳 ምግብ አብሳይ"],
-            ["👶 ህጻናት እንክብካቤ", "👵 የአዛውንት እንክብካቤ"]
-        ],
         'name_confirm_menu': [
             ["✅ የቴሌግራም ስሜን ተጠቀም", "✏️ ሌላ ስም አስገባ"]
         ],
@@ -70,6 +139,98 @@ MENU_TEXT = {
     }
 }
 
+# ServiceType of each service_type_menu button, in button order
+SERVICE_TYPE_ORDER = [ServiceType.PERMANENT, ServiceType.TEMPORARY]
+
+# Service buttons; a draft's services_mask has bit i set when SERVICE_OPTIONS[language][i] is selected
+SERVICE_OPTIONS = {
+    'english': [
+        "🧹 Full House Work", "🏠 House Cleaning", "👕 Laundry Service", "🍳 Cooking Service",
+        "👶 Child Care", "👵 Elder Care", "🐕 Pet Care", "🌿 Gardening"
+    ],
+    'amharic': [
+        "🧹 ሙሉ የቤት ስራ", "🏠 የቤት ፅዳት", "👕 የልብስ እጥበት", "🍳 ምግብ አብሳይ",
+        "👶 የህጻን እንክብካቤ", "👵 የአዛውንት እንክብካቤ", "🐕 የቤት እንስሳት", "🌿 የአትክልት ስራ"
+    ]
+}
+# Full House Work includes every other service
+FULL_HOUSE_WORK = 1 << 0
+# callback_data prefix of the inline service picker: svc:<index>, svc:other, svc:done
+SERVICE_PICKER_PREFIX = 'svc:'
+
+def menu_text(menu_key):
+    """One MENU_TEXT menu in every language."""
+    return {language: menus[menu_key] for language, menus in MENU_TEXT.items()}
+
+def menu_matcher(menus, aliases=None):
+    """ButtonMatcher over a menu given per language, pairing buttons up by position."""
+    buttons = {language: [label for row in rows for label in row] for language, rows in menus.items()}
+    return ButtonMatcher([dict(zip(buttons, labels)) for labels in zip(*buttons.values())], aliases)
+
+BACK_TO_MENU_ALIASES = ['back', 'menu', 'main menu', 'home', 'ተመለስ', 'ዋና ገፅ']
+
+# Typed text is matched against the buttons of the menu each state shows; states
+# that take free text (name, phone, address, other service) are left out
+MENU_MATCHERS = {
+    MAIN_MENU: menu_matcher(MAIN_MENU_OPTIONS, {
+        "🚀 Start": ['begin', 'request', 'request service', 'book'],
+        "ℹ️ Info": ['information', 'about', 'about us'],
+        "⚙️ Settings": ['setting', 'preferences', 'language', 'ቋንቋ']
+    }),
+    INFO: menu_matcher(menu_text('back_to_menu'), {"🏠 Back to Main Menu": BACK_TO_MENU_ALIASES}),
+    SETTINGS: menu_matcher(menu_text('settings_menu'), {
+        "🌍 Change Language": ['language', 'english', 'amharic', 'አማርኛ', 'ቋንቋ'],
+        "🏠 Back to Main Menu": BACK_TO_MENU_ALIASES
+    }),
+    LANGUAGE: menu_matcher({'english': LANGUAGE_MENU}, {
+        "🇬🇧 English": ['english', 'eng', 'እንግሊዝኛ'],
+        "🇪🇹 Amharic": ['amharic', 'amharigna', 'አማርኛ']
+    }),
+    SERVICE_TYPE: menu_matcher(menu_text('service_type_menu'), {
+        SERVICE_TYPE_LABELS[key][0]: aliases for key, aliases in SERVICE_TYPE_ALIASES.items()
+    }),
+    SERVICES: menu_matcher({
+        'english': [SERVICE_OPTIONS['english'] + ["✅ Done Selecting", "📝 Other (Specify)"]],
+        'amharic': [SERVICE_OPTIONS['amharic'] + ["✅ ምርጫ ጨርሻለሁ", "📝 ሌላ (ይግለጹ)"]]
+    }, {
+        **{SERVICE_LABELS[key][0]: aliases for key, aliases in SERVICE_ALIASES.items()},
+        "✅ Done Selecting": ['done', 'finish', 'finished', 'next', 'ጨርሻለሁ'],
+        "📝 Other (Specify)": ['other', 'something else', 'ሌላ']
+    }),
+    CONTACT_CHECK: menu_matcher({
+        'english': [["✅ Use Saved Info"], ["✏️ Update Info"]],
+        'amharic': [["✅ የተቀመጠውን መረጃ ተጠቀም"], ["✏️ መረጃ አዘምን"]]
+    }, {
+        "✅ Use Saved Info": ['use saved', 'saved', 'same'],
+        "✏️ Update Info": ['update', 'change', 'edit', 'new info']
+    }),
+    CONFIRMATION: menu_matcher(menu_text('confirmation_menu'), {
+        "✅ Confirm & Submit Request": ['confirm', 'submit', 'send', 'አረጋግጥ', 'ላክ'],
+        "❌ Cancel Request": ['cancel', 'ሰርዝ']
+    }),
+    POST_SUBMISSION: menu_matcher({
+        'english': [["🔄 New Request", "🏠 Main Menu"]],
+        'amharic': [["🔄 አዲስ ጥያቄ", "🏠 ዋና ገፅ"]]
+    }, {
+        "🔄 New Request": ['new', 'another', 'another request', 'again'],
+        "🏠 Main Menu": BACK_TO_MENU_ALIASES
+    })
+}
+
+# How /status describes each open request status
+STATUS_LABELS = {
+    'english': {
+        'pending': "⏳ Received - we're finding the right helper",
+        'assigned': "👷 Helper assigned",
+        'scheduled': "📅 Scheduled"
+    },
+    'amharic': {
+        'pending': "⏳ ደርሶናል - ተስማሚ አጋዥ እየፈለግን ነው",
+        'assigned': "👷 አጋዥ ተመድቧል",
+        'scheduled': "📅 ቀጠሮ ተይዟል"
+    }
+}
+
 # Text content in both languages
 TEXTS = {
     'english': {
@@ -306,11 +467,33 @@ TEXTS = {
             "Thank you for considering Liyu Househelp! 🏠\n"
             "We're here whenever you need us."
         ),
+        'already_submitted': (
+            "✅ Your request #{request_id} has already been submitted.\n"
+            "No need to send it again - we'll call you soon!"
+        ),
+        'submit_failed': (
+            "⚠️ Sorry, we couldn't save your request just now.\n"
+            "Your details are kept - tap ✅ Confirm & Submit Request to try again, "
+            "or call us: 0966214878"
+        ),
+        'conversation_timeout': (
+            "⌛ Your unfinished request has expired.\n"
+            "Use /start whenever you're ready to begin again."
+        ),
+        'status_none': (
+            "📋 You have no open requests.\n"
+            "Use /start to request a service."
+        ),
+        'status_header': "📋 Your open request(s):",
+        'status_line': "\n📌 #{request_id} - {services}\n   {status}\n   📅 Submitted {submitted_at}",
+        'status_assignee': " ({assigned_to})",
+        'did_you_mean': "🤔 Did you mean...? Please tap the option you want:",
         'help': (
             "🤖 Liyu Househelp Bot - Help Guide 📖\n\n"
             "Available Commands:\n"
             "• /start - Open main menu\n"
             "• /help - Show this help message\n"
+            "• /status - Check your open requests\n"
             "• /cancel - Cancel current operation\n\n"
             "🏠 Main Menu Options:\n\n"
             "🚀 Start - Request a Service\n"
@@ -527,10 +710,32 @@ TEXTS = {
             "• አዲስ ጥያቄ ለመጀመር /start ይጠቀሙ\n"
             "• ለእገዛ /help ይጠቀሙ\n\n"
         ),
+        'already_submitted': (
+            "✅ ጥያቄዎ #{request_id} ቀድሞውኑ ተልኳል።\n"
+            "እንደገና መላክ አያስፈልግም - በቅርቡ እንደውልዎታለን!"
+        ),
+        'submit_failed': (
+            "⚠️ ይቅርታ፣ ጥያቄዎን አሁን ማስቀመጥ አልቻልንም።\n"
+            "መረጃዎ አልጠፋም - እንደገና ለመሞከር ✅ አረጋግጥ እና ላክ ይጫኑ፣ "
+            "ወይም ይደውሉልን: 0966214878"
+        ),
+        'conversation_timeout': (
+            "⌛ ያልተጠናቀቀው ጥያቄዎ ጊዜው አልፎበታል።\n"
+            "እንደገና ለመጀመር /start ይጠቀሙ።"
+        ),
+        'status_none': (
+            "📋 በሂደት ላይ ያለ ጥያቄ የለዎትም።\n"
+            "አገልግሎት ለመጠየቅ /start ይጠቀሙ።"
+        ),
+        'status_header': "📋 በሂደት ላይ ያሉ ጥያቄዎችዎ:",
+        'status_line': "\n📌 #{request_id} - {services}\n   {status}\n   📅 የተላከበት {submitted_at}",
+        'status_assignee': " ({assigned_to})",
+        'did_you_mean': "🤔 ይህን ማለትዎ ነው? የሚፈልጉትን አማራጭ ይጫኑ:",
         'help': (
             "🤖 የልዩ አጋዥ ቦት - የእገዛ መመሪያ 📖\n\n"
             "• /start - ዋና ገፅ ክፈት\n"
             "• /help - የእገዛ ገፅ ክፈት\n"
+            "• /status - የጥያቄዎችዎን ሁኔታ ይመልከቱ\n"
             "• /cancel - ውጣ\n\n"
             "🏠 የዋና ገፅ አማራጮች:\n\n"
             "🚀 ጀምር - አገልግሎት ጠይቅ\n"
@@ -543,98 +748,58 @@ TEXTS = {
     }
 }
 
-# Database initialization
-DATABASE_FILE = 'liyu_agency.db'
-
-def init_database():
-    """Initialize SQLite database with required tables."""
+async def init_database(repository):
+    """Create or upgrade the storage schema."""
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                user_id INTEGER PRIMARY KEY,
-                telegram_id INTEGER UNIQUE,
-                username TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Create service_requests table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS service_requests (
-                request_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER,
-                name TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                location TEXT,
-                service_type TEXT NOT NULL,
-                services TEXT NOT NULL,
-                phone_source TEXT,
-                location_source TEXT,
-                submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users(user_id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
-        logger.info("✅ Database initialized successfully")
+        await repository.init()
+        logger.info(f"✅ Database initialized successfully ({repository.backend})")
     except Exception as e:
         logger.error(f"❌ Database initialization error: {e}")
 
-def save_user_to_db(telegram_id, username, first_name, last_name):
+async def save_user_to_db(repository, telegram_id, username, first_name, last_name):
     """Save or update user in database."""
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT OR IGNORE INTO users (telegram_id, username, first_name, last_name)
-            VALUES (?, ?, ?, ?)
-        ''', (telegram_id, username, first_name, last_name))
-        
-        conn.commit()
-        conn.close()
+        await repository.save_user(telegram_id, username, first_name, last_name)
         logger.info(f"✅ User {telegram_id} saved to database")
     except Exception as e:
         logger.error(f"❌ Error saving user: {e}")
 
-def save_service_request_to_db(telegram_id, name, phone, location, service_type, services, phone_source, location_source):
-    """Save service request to database."""
+async def save_service_request_to_db(repository, telegram_id, name, phone, location, service_type, services, phone_source, location_source, idempotency_key=None, zone=None):
+    """Save service request to database.
+    
+    A request already saved under ``idempotency_key`` is not written again;
+    its original request_id is returned instead. ``zone`` is the
+    gazetteer.Place the location resolved to, stored next to the raw text.
+    """
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        # Get user_id from telegram_id
-        cursor.execute('SELECT user_id FROM users WHERE telegram_id = ?', (telegram_id,))
-        result = cursor.fetchone()
-        user_id = result[0] if result else None
-        
-        # Insert service request
-        cursor.execute('''
-            INSERT INTO service_requests 
-            (user_id, name, phone, location, service_type, services, phone_source, location_source)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (user_id, name, phone, location, service_type, services, phone_source, location_source))
-        
-        request_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
+        request_id = await repository.save_request(
+            telegram_id, name, phone, location, service_type, services,
+            phone_source, location_source, idempotency_key,
+            location_zone=zone.zone_id if zone else None,
+            location_latitude=zone.latitude if zone else None,
+            location_longitude=zone.longitude if zone else None
+        )
         logger.info(f"✅ Service request #{request_id} saved to database")
         return request_id
     except Exception as e:
         logger.error(f"❌ Error saving service request: {e}")
         return None
 
+async def search_service_requests_in_db(repository, term, limit=10):
+    """Full-text search service requests, newest first."""
+    try:
+        return await repository.search_requests(term, limit)
+    except Exception as e:
+        logger.error(f"❌ Error searching service requests: {e}")
+        return []
+
+def is_admin(update, context):
+    """Check whether the sender may use this bot's admin commands."""
+    return update.effective_user is not None and update.effective_user.id in context.bot_data['admin_ids']
+
 def get_user_language(context):
     """Get user's selected language."""
-    return context.user_data.get('language', 'amharic')
+    return context.user_data.language
 
 def get_text(context, text_key, kwargs):
     """Get text in user's selected language."""
@@ -658,29 +823,93 @@ def get_main_menu(context):
     language = get_user_language(context)
     return MAIN_MENU_OPTIONS[language]
 
+async def menu_choice(update: Update, context: ContextTypes.DEFAULT_TYPE, state):
+    """The button typed text stands for, in the user's language, or None if unsure.
+    
+    Taps come back as they are, and unrecognised text too so the handler's own
+    fallback runs. When the text could be several buttons, or is only a weak
+    match, a "Did you mean" keyboard of them is sent and None returned; the
+    handler then stays in ``state``.
+    """
+    text = update.message.text
+    matcher = MENU_MATCHERS[state]
+    match = matcher.match(text)
+    language = get_user_language(context)
+    if match.choice is not None:
+        label = matcher.label(match.choice, language)
+        if label != text:
+            logger.info(f"🔁 Read '{text}' as '{label}' (score {match.score:.2f})")
+        return label
+    if not match.suggestions:
+        return text
+    await update.message.reply_text(
+        get_text(context, 'did_you_mean', {}),
+        reply_markup=ReplyKeyboardMarkup(
+            [[matcher.label(choice, language)] for choice in match.suggestions],
+            one_time_keyboard=True,
+            resize_keyboard=True
+        )
+    )
+    return None
+
+def parse_service_type(text):
+    """Map a service type button in either language to its ServiceType, or None."""
+    for menus in MENU_TEXT.values():
+        for service_type, label in zip(SERVICE_TYPE_ORDER, menus['service_type_menu'][0]):
+            if text == label:
+                return service_type
+    return None
+
+def service_type_label(context, service_type):
+    """Service type button text in the user's language."""
+    return get_menu(context, 'service_type_menu')[0][SERVICE_TYPE_ORDER.index(service_type)]
+
+def parse_service(text):
+    """Map a service button in either language to its bit, or None."""
+    for options in SERVICE_OPTIONS.values():
+        if text in options:
+            return 1 << options.index(text)
+    return None
+
+def selected_service_labels(context):
+    """Labels of the draft's selected services, menu services first."""
+    draft = context.user_data.draft
+    labels = [
+        label for index, label in enumerate(SERVICE_OPTIONS[get_user_language(context)])
+        if draft.services_mask & (1 << index)
+    ]
+    return labels + [f"📝 Other: {other}" for other in draft.other_services]
+
+def draft_summary(context):
+    """Display values of the draft, with 'Not provided' for anything missing."""
+    draft = context.user_data.draft
+    return {
+        'name': draft.name or 'Not provided',
+        'service_type': service_type_label(context, draft.service_type) if draft.service_type else 'Not provided',
+        'services': ', '.join(selected_service_labels(context)) or 'Not provided',
+        'phone': draft.phone or 'Not provided',
+        'location': draft.location or 'Not provided'
+    }
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Start the conversation with main menu."""
-    context.user_data.clear()
+    session = context.user_data
+    session.clear()
 
     user = update.message.from_user
     
-    if 'language' not in context.user_data:
-        context.user_data['language'] = 'amharic'
-    
     # Store user info from Telegram
-    context.user_data['user_info'] = {
-        'username': user.username,
-        'first_name': user.first_name,
-        'last_name': user.last_name,
-        'user_id': user.id
-    }
+    session.telegram_id = user.id
+    session.username = user.username
+    session.first_name = user.first_name
+    session.last_name = user.last_name
     
     # Auto-detect name from Telegram profile
     detected_name = user.first_name
     if user.last_name:
         detected_name += f" {user.last_name}"
     
-    context.user_data['detected_name'] = detected_name
+    session.detected_name = detected_name
     
     # Add logo and phone number to the welcome message
     welcome_text = get_text(context, 'initial_welcome', {'user_name': user.first_name})
@@ -701,7 +930,9 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle main menu selections."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, MAIN_MENU)
+    if choice is None:
+        return MAIN_MENU
     language = get_user_language(context)
     
     # Check for Start button
@@ -756,7 +987,9 @@ async def main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def info_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle info section navigation."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, INFO)
+    if choice is None:
+        return INFO
     
     if choice in ["🏠 Back to Main Menu", "🏠 ወደ ዋና ገፅ ተመለስ"]:
         user = update.message.from_user
@@ -774,7 +1007,9 @@ async def info_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def settings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle settings section."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, SETTINGS)
+    if choice is None:
+        return SETTINGS
     
     if choice in ["🌍 Change Language", "🌍 ቋንቋ ቀይር"]:
         await update.message.reply_text(
@@ -789,8 +1024,7 @@ async def settings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return LANGUAGE
     
     elif choice in ["🏠 Back to Main Menu", "🏠 ወደ ዋና ገፅ ተመለስ"]:
-        user_info = context.user_data.get('user_info', {})
-        user_name = user_info.get('first_name', 'there')
+        user_name = context.user_data.first_name or 'there'
         await update.message.reply_text(
             get_text(context, 'initial_welcome', {'user_name':user_name}),
             reply_markup=ReplyKeyboardMarkup(
@@ -805,38 +1039,46 @@ async def settings_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def language_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle language selection from settings."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, LANGUAGE)
+    if choice is None:
+        return LANGUAGE
     
     if choice == "🇬🇧 English":
-        context.user_data['language'] = 'english'
+        context.user_data.language = 'english'
         language_name = "English"
     elif choice == "🇪🇹 Amharic":
-        context.user_data['language'] = 'amharic'
+        context.user_data.language = 'amharic'
         language_name = "አማርኛ (Amharic)"
     else:
-        # Default fallback
-        context.user_data['language'] = 'amharic'
-        language_name = "አማርኛ (Amharic)"
-    
-    # Send language change confirmation
-    if context.user_data['language'] == 'english':
         await update.message.reply_text(
+            "🌍 Select Your Language / ቋንቋዎን ይምረጡ:",
+            reply_markup=ReplyKeyboardMarkup(
+                LANGUAGE_MENU,
+                one_time_keyboard=True,
+                resize_keyboard=True
+            )
+        )
+        return LANGUAGE
+    
+    # Language change confirmation and the main menu go out as one message
+    reply = Reply(update.message)
+    if context.user_data.language == 'english':
+        reply.add(
             f"✅ Language Updated!\n\n"
             f"Your language has been changed to {language_name}.\n"
             f"All future messages will be in English.\n\n"
             f"Returning to main menu..."
         )
     else:
-        await update.message.reply_text(
+        reply.add(
             f"✅ ቋንቋ ተቀይሯል!\n\n"
             f"ቋንቋዎ ወደ {language_name} ተቀይሯል።\n"
             f"ወደ ዋና ገፅ በመመለስ ላይ..."
         )
     
     # Return to main menu
-    user_info = context.user_data.get('user_info', {})
-    user_name = user_info.get('first_name', 'there')
-    await update.message.reply_text(
+    user_name = context.user_data.first_name or 'there'
+    reply.add(
         get_text(context, 'initial_welcome', {'user_name':user_name}),
         reply_markup=ReplyKeyboardMarkup(
             get_main_menu(context),
@@ -844,194 +1086,266 @@ async def language_selection(update: Update, context: ContextTypes.DEFAULT_TYPE)
             resize_keyboard=True
         )
     )
+    await reply.send()
     return MAIN_MENU
 
 async def service_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Store service type and show services menu."""
-    service_type = update.message.text
-    context.user_data['service_type'] = service_type
+    draft = context.user_data.draft
+    choice = await menu_choice(update, context, SERVICE_TYPE)
+    if choice is None:
+        return SERVICE_TYPE
+    service_type = parse_service_type(choice)
+    
+    if service_type is None:
+        language = get_user_language(context)
+        await update.message.reply_text(
+            "Please select an option from the menu:" if language == 'english' else "እባክዎ ከገፅ አንድ አማራጭ ይምረጡ:",
+            reply_markup=ReplyKeyboardMarkup(
+                get_menu(context, 'service_type_menu'),
+                one_time_keyboard=True,
+                resize_keyboard=True
+            )
+        )
+        return SERVICE_TYPE
     
-    if context.user_data.get('editing_from_confirmation', False):
-        context.user_data['editing_from_confirmation'] = False
+    draft.service_type = service_type
+    
+    if draft.editing_from_confirmation:
+        draft.editing_from_confirmation = False
         return await show_confirmation(update, context)
     
+    return await send_service_picker(update.message, context)
+
+def select_service(context, service_bit):
+    """Apply one service tap and return a short status line for it."""
+    language = get_user_language(context)
+    draft = context.user_data.draft
+    label = SERVICE_OPTIONS[language][service_bit.bit_length() - 1]
+    
+    # Full House Work includes every other service, so it clears them
+    if service_bit == FULL_HOUSE_WORK:
+        draft.services_mask = FULL_HOUSE_WORK
+        draft.other_services = ()
+        return (f"✅ {label} - other selections cleared" if language == 'english'
+                else f"✅ {label} - ሌሎች ምርጫዎች ተሰርዘዋል")
+    
+    # Remove "Full House Work" if user selects other services
+    draft.services_mask &= ~FULL_HOUSE_WORK
+    if draft.toggle_service(service_bit):
+        return f"{'✅ Added' if language == 'english' else '✅ ታክሏል'}: {label}"
+    return f"{'❌ Removed' if language == 'english' else '❌ ተወግዷል'}: {label}"
+
+def service_picker_text(context):
+    """The services prompt followed by the current selection."""
+    language = get_user_language(context)
+    draft = context.user_data.draft
+    service_type = service_type_label(context, draft.service_type) if draft.service_type else ''
     service_description = get_text(context, 'service_type_selected', {'key':service_type})
-    
-    await update.message.reply_text(
-        get_text(context, 'services_prompt', {'service_description':service_description}),
-        reply_markup=ReplyKeyboardMarkup(
-            create_service_selection_menu(context),
-            one_time_keyboard=False,
-            resize_keyboard=True
+    text = get_text(context, 'services_prompt', {'service_description':service_description})
+    
+    selected = selected_service_labels(context)
+    if selected:
+        selected_text = "\n".join(f"  • {s}" for s in selected)
+        text += (
+            f"\n\n{'Selected Services' if language == 'english' else 'የተመረጡ አገልግሎቶች'} ({len(selected)}):\n{selected_text}\n\n"
+            f"{'Select more services or tap ✅ Done Selecting.' if language == 'english' else 'ተጨማሪ አገልግሎቶችን ይምረጡ ወይም ✅ ምርጫ ጨርሻለሁ ን ይጫኑ።'}"
         )
-    )
-    return SERVICES
+    return text
 
-async def services(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Store services with multiple selection support."""
-    choice = update.message.text
+def create_service_picker(context):
+    """Inline keyboard of services with checkmarks on selected items."""
     language = get_user_language(context)
+    selected = context.user_data.draft.services_mask
     
-    # Remove the checkmark prefix if it exists
-    if choice.startswith("✓ "):
-        choice = choice[2:]  # Remove "✓ " prefix
-    
-    # Initialize selected_services list if not exists
-    if 'selected_services' not in context.user_data:
-        context.user_data['selected_services'] = []
+    # Base services two per row; a tap edits the picker message instead of sending a new one
+    buttons = [
+        InlineKeyboardButton(f"✓ {service}" if selected & (1 << index) else service,
+                             callback_data=f"{SERVICE_PICKER_PREFIX}{index}")
+        for index, service in enumerate(SERVICE_OPTIONS[language])
+    ]
+    rows = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    rows.append([InlineKeyboardButton("📝 Other (Specify)" if language == 'english' else "📝 ሌላ (ይግለጹ)",
+                                      callback_data=f"{SERVICE_PICKER_PREFIX}other")])
+    rows.append([InlineKeyboardButton("✅ Done Selecting" if language == 'english' else "✅ ምርጫ ጨርሻለሁ",
+                                      callback_data=f"{SERVICE_PICKER_PREFIX}done")])
+    return InlineKeyboardMarkup(rows)
+
+def picker_rendering(context):
+    """What the picker currently shows, to skip edits that would change nothing."""
+    draft = context.user_data.draft
+    return (get_user_language(context), draft.service_type, draft.services_mask, draft.other_services)
+
+async def send_service_picker(message, context, reply=None):
+    """Send the service picker, after anything already in ``reply``."""
+    reply = reply or Reply(message)
+    reply.add(service_picker_text(context), reply_markup=create_service_picker(context))
+    await reply.send()
+    context.chat_data['service_picker'] = {'rendered': picker_rendering(context), 'task': None}
+    return SERVICES
+
+async def edit_service_picker(context, message, final=False):
+    """Bring the picker message up to date; ``final`` also removes its buttons."""
+    picker = context.chat_data.setdefault('service_picker', {})
+    rendering = picker_rendering(context)
+    if not final and picker.get('rendered') == rendering:
+        return
+    picker['rendered'] = rendering
+    try:
+        await message.edit_text(
+            service_picker_text(context),
+            reply_markup=None if final else create_service_picker(context)
+        )
+    except BadRequest as e:
+        # The message already shows this selection
+        if 'not modified' not in str(e).lower():
+            logger.error(f"❌ Error updating service picker: {e}")
+
+async def edit_service_picker_later(context, message):
+    await asyncio.sleep(SERVICE_PICKER_DEBOUNCE_SECONDS)
+    await edit_service_picker(context, message)
+
+def cancel_service_picker_edit(context):
+    """Drop a pending debounced edit, e.g. when the picker is about to be finalised."""
+    picker = context.chat_data.get('service_picker') or {}
+    task = picker.get('task')
+    if task and not task.done():
+        task.cancel()
+    picker['task'] = None
+
+async def finish_service_selection(update: Update, context: ContextTypes.DEFAULT_TYPE, message):
+    """Move on from the service picker once at least one service is selected."""
+    language = get_user_language(context)
+    draft = context.user_data.draft
     
-    # Get the service menu options
-    service_menu = get_menu(context, 'main_services_menu')
-    all_services = []
-    for row in service_menu:
-        all_services.extend(row)
+    if draft.editing_from_confirmation:
+        draft.editing_from_confirmation = False
+        return await show_confirmation(update, context, Reply(message))
     
-    if choice in ["✅ Done Selecting", "✅ ምርጫ ጨርሻለሁ"]:
-        if not context.user_data['selected_services']:
-            await update.message.reply_text(
-                "⚠️ Please select at least one service!" if language == 'english' else "⚠️ እባክዎ ቢያንስ አንድ አገልግሎት ይምረጡ!",
-                reply_markup=ReplyKeyboardMarkup(
-                    create_service_selection_menu(context),
-                    one_time_keyboard=False,
-                    resize_keyboard=True
-                )
-            )
-            return SERVICES
-        
-        # Store services as comma-separated string for display
-        context.user_data['services'] = ', '.join(context.user_data['selected_services'])
+    if context.user_data.saved_contact:
+        saved_contact = context.user_data.saved_contact
+        saved_name = saved_contact.name or 'Not found'
+        saved_phone = saved_contact.phone or 'Not found'
         
-        if context.user_data.get('editing_from_confirmation', False):
-            context.user_data['editing_from_confirmation'] = False
-            return await show_confirmation(update, context)
-        
-        if 'saved_contact_info' in context.user_data:
-            saved_info = context.user_data['saved_contact_info']
-            saved_name = saved_info.get('name', 'Not found')
-            saved_phone = saved_info.get('phone', 'Not found')
-            
-            contact_check_menu = [
-                ["✅ Use Saved Info" if language == 'english' else "✅ የተቀመጠውን መረጃ ተጠቀም"],
-                ["✏️ Update Info" if language == 'english' else "✏️ መረጃ አዘምን"]
-            ]
-            
-            await update.message.reply_text(
-                f"👤 {'We have your contact information on file' if language == 'english' else 'የእርስዎን የመገኛ መረጃ አለን'}:\n\n"
-                f"📝 {'Name' if language == 'english' else 'ስም'}: {saved_name}\n"
-                f"📞 {'Phone' if language == 'english' else 'ስልክ'}: {saved_phone}\n\n"
-                f"{'Would you like to use this information or update it?' if language == 'english' else 'ይህን መረጃ መጠቀም ወይም ማዘመን ይፈልጋሉ?'}",
-                reply_markup=ReplyKeyboardMarkup(
-                    contact_check_menu,
-                    one_time_keyboard=True,
-                    resize_keyboard=True
-                )
-            )
-            return CONTACT_CHECK
-        
-        # Continue to name confirmation for new users
-        detected_name = context.user_data.get('detected_name', '')
-        service_details = context.user_data['services']
+        contact_check_menu = [
+            ["✅ Use Saved Info" if language == 'english' else "✅ የተቀመጠውን መረጃ ተጠቀም"],
+            ["✏️ Update Info" if language == 'english' else "✏️ መረጃ አዘምን"]
+        ]
         
-        await update.message.reply_text(
-            get_text(context, 'name_prompt', {
-                'service_details': service_details,
-                'detected_name': detected_name
-            }),
+        await message.reply_text(
+            f"👤 {'We have your contact information on file' if language == 'english' else 'የእርስዎን የመገኛ መረጃ አለን'}:\n\n"
+            f"📝 {'Name' if language == 'english' else 'ስም'}: {saved_name}\n"
+            f"📞 {'Phone' if language == 'english' else 'ስልክ'}: {saved_phone}\n\n"
+            f"{'Would you like to use this information or update it?' if language == 'english' else 'ይህን መረጃ መጠቀም ወይም ማዘመን ይፈልጋሉ?'}",
             reply_markup=ReplyKeyboardMarkup(
-                get_menu(context, 'name_confirm_menu'),
+                contact_check_menu,
                 one_time_keyboard=True,
                 resize_keyboard=True
             )
         )
-        return NAME_CONFIRM
+        return CONTACT_CHECK
     
-    elif choice in ["📝 Other (Specify)", "📝 ሌላ (ይግለጹ)"]:
-        await update.message.reply_text(
-            "✏️ Please describe the service you need:" if language == 'english' else "✏️ የሚፈልጉትን አገልግሎት ይግለጹ:",
-            reply_markup=ReplyKeyboardRemove()
+    # Continue to name confirmation for new users
+    detected_name = context.user_data.detected_name or ''
+    service_details = ', '.join(selected_service_labels(context))
+    
+    await message.reply_text(
+        get_text(context, 'name_prompt', {
+            'service_details': service_details,
+            'detected_name': detected_name
+        }),
+        reply_markup=ReplyKeyboardMarkup(
+            get_menu(context, 'name_confirm_menu'),
+            one_time_keyboard=True,
+            resize_keyboard=True
         )
+    )
+    return NAME_CONFIRM
+
+def other_service_prompt(context):
+    language = get_user_language(context)
+    return "✏️ Please describe the service you need:" if language == 'english' else "✏️ የሚፈልጉትን አገልግሎት ይግለጹ:"
+
+def no_service_selected_text(context):
+    language = get_user_language(context)
+    return "⚠️ Please select at least one service!" if language == 'english' else "⚠️ እባክዎ ቢያንስ አንድ አገልግሎት ይምረጡ!"
+
+async def services_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle a tap on the inline service picker.
+    
+    Every tap is answered at once. Toggles only update the draft and leave
+    one debounced edit pending, so a burst of taps costs a single
+    editMessageText showing the final selection.
+    """
+    query = update.callback_query
+    choice = query.data[len(SERVICE_PICKER_PREFIX):]
+    draft = context.user_data.draft
+    
+    if choice == 'done':
+        if not draft.has_services():
+            await query.answer(no_service_selected_text(context), show_alert=True)
+            return SERVICES
+        await query.answer()
+        cancel_service_picker_edit(context)
+        await edit_service_picker(context, query.message, final=True)
+        return await finish_service_selection(update, context, query.message)
+    
+    if choice == 'other':
+        await query.answer()
+        cancel_service_picker_edit(context)
+        await edit_service_picker(context, query.message, final=True)
+        await query.message.reply_text(other_service_prompt(context), reply_markup=ReplyKeyboardRemove())
         return SERVICES_OTHER
     
-    elif choice in all_services:
-        full_house_work = "🧹 Full House Work" if language == 'english' else "🧹 ሙሉ የቤት ስራ"
-        
-        # If "Full House Work" is selected, clear all other selections
-        if choice == full_house_work:
-            context.user_data['selected_services'] = [choice]
-            await update.message.reply_text(
-                f"✅ {choice}\n\n"
-                f"{'Note: Full House Work includes all services, so other selections have been cleared.' if language == 'english' else 'ማስታወሻ: ሙሉ የቤት ስራ ሁሉንም አገልግሎቶች ያካትታል፣ ስለዚህ ሌሎች ምርጫዎች ተሰርዘዋል።'}\n\n"
-                f"{'Click ✅ Done Selecting when ready.' if language == 'english' else '✅ ምርጫ ጨርሻለሁ ን ይጫኑ።'}",
-                reply_markup=ReplyKeyboardMarkup(
-                    create_service_selection_menu(context),
-                    one_time_keyboard=False,
-                    resize_keyboard=True
-                )
-            )
-        else:
-            # Remove "Full House Work" if user selects other services
-            if full_house_work in context.user_data['selected_services']:
-                context.user_data['selected_services'].remove(full_house_work)
-            
-            # Toggle selection
-            if choice in context.user_data['selected_services']:
-                context.user_data['selected_services'].remove(choice)
-                status = "❌ Removed" if language == 'english' else "❌ ተወግዷል"
-            else:
-                context.user_data['selected_services'].append(choice)
-                status = "✅ Added" if language == 'english' else "✅ ታክሏል"
-            
-            # Show current selections
-            selected_count = len(context.user_data['selected_services'])
-            selected_text = "\n".join([f"  • {s}" for s in context.user_data['selected_services']])
-            
-            await update.message.reply_text(
-                f"{status}: {choice}\n\n"
-                f"{'Selected Services' if language == 'english' else 'የተመረጡ አገልግሎቶች'} ({selected_count}):\n{selected_text if selected_text else ('  None' if language == 'english' else '  ምንም')}\n\n"
-                f"{'Select more services or click ✅ Done Selecting.' if language == 'english' else 'ተጨማሪ አገልግሎቶችን ይምረጡ ወይም ✅ ምርጫ ጨርሻለሁ ን ይጫኑ።'}",
-                reply_markup=ReplyKeyboardMarkup(
-                    create_service_selection_menu(context),
-                    one_time_keyboard=False,
-                    resize_keyboard=True
-                )
-            )
-        
+    if not choice.isdigit() or int(choice) >= len(SERVICE_OPTIONS['english']):
+        await query.answer()
         return SERVICES
     
+    await query.answer(select_service(context, 1 << int(choice)))
+    
+    picker = context.chat_data.setdefault('service_picker', {})
+    task = picker.get('task')
+    if task is None or task.done():
+        picker['task'] = context.application.create_task(
+            edit_service_picker_later(context, query.message), update=update
+        )
     return SERVICES
 
-def create_service_selection_menu(context):
-    """Create service selection menu with checkmarks for selected items."""
+async def expired_service_picker(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Answer taps on a service picker from a step the user has already left."""
     language = get_user_language(context)
-    selected = context.user_data.get('selected_services', [])
-    
-    # Base services
-    if language == 'english':
-        services = [
-            ["🧹 Full House Work", "🏠 House Cleaning"],
-            ["👕 Laundry Service", "🍳 Cooking Service"],
-            ["👶 Child Care", "👵 Elder Care"],
-            ["🐕 Pet Care", "🌿 Gardening"],
-            ["📝 Other (Specify)"],
-            ["✅ Done Selecting"]
-        ]
-    else:
-        services = [
-            ["🧹 ሙሉ የቤት ስራ", "🏠 የቤት ፅዳት"],
-            ["👕 የልብስ እጥበት", "🍳 ምግብ አብሳይ"],
-            ["👶 የህጻን እንክብካቤ", "👵 የአዛውንት እንክብካቤ"],
-            ["🐕 የቤት እንስሳት", "🌿 የአትክልት ስራ"],
-            ["📝 ሌላ (ይግለጹ)"],
-            ["✅ ምርጫ ጨርሻለሁ"]
-        ]
+    await update.callback_query.answer(
+        "This menu is no longer active." if language == 'english' else "ይህ ምርጫ ከአሁን በኋላ አይሰራም።"
+    )
+
+async def services(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle service choices typed as text (or sent from an older reply keyboard)."""
+    choice = await menu_choice(update, context, SERVICES)
+    if choice is None:
+        return SERVICES
     
-    # Add checkmarks to selected items
-    for i, row in enumerate(services[:-2]):  # Exclude "Other" and "Done" rows
-        for j, service in enumerate(row):
-            if service in selected:
-                services[i][j] = f"✓ {service}"
+    # Remove the checkmark prefix if it exists
+    if choice.startswith("✓ "):
+        choice = choice[2:]  # Remove "✓ " prefix
     
-    return services
+    draft = context.user_data.draft
+    service_bit = parse_service(choice)
+    
+    if choice in ["✅ Done Selecting", "✅ ምርጫ ጨርሻለሁ"]:
+        if not draft.has_services():
+            reply = Reply(update.message).add(no_service_selected_text(context))
+            return await send_service_picker(update.message, context, reply)
+        return await finish_service_selection(update, context, update.message)
+    
+    elif choice in ["📝 Other (Specify)", "📝 ሌላ (ይግለጹ)"]:
+        await update.message.reply_text(other_service_prompt(context), reply_markup=ReplyKeyboardRemove())
+        return SERVICES_OTHER
+    
+    elif service_bit is not None:
+        reply = Reply(update.message).add(select_service(context, service_bit))
+        return await send_service_picker(update.message, context, reply)
+    
+    return await send_service_picker(update.message, context)
 
 async def services_other(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle custom 'Other' service input."""
@@ -1045,44 +1359,37 @@ async def services_other(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return SERVICES_OTHER
     
     # Add "Other" service to selections
-    other_label = f"📝 Other: {other_service}"
-    if 'selected_services' not in context.user_data:
-        context.user_data['selected_services'] = []
+    context.user_data.draft.add_other_service(other_service)
     
-    context.user_data['selected_services'].append(other_label)
-    
-    await update.message.reply_text(
-        f"✅ {'Added custom service' if language == 'english' else 'ብጁ አገልግሎት ታክሏል'}: {other_service}\n\n"
-        f"{'You can select more services or click ✅ Done Selecting.' if language == 'english' else 'ተጨማሪ አገልግሎቶችን መምረጥ ወይም ✅ ምርጫ ጨርሻለሁ ን መጫን ይችላሉ።'}",
-        reply_markup=ReplyKeyboardMarkup(
-            create_service_selection_menu(context),
-            one_time_keyboard=False,
-            resize_keyboard=True
-        )
+    reply = Reply(update.message).add(
+        f"✅ {'Added custom service' if language == 'english' else 'ብጁ አገልግሎት ታክሏል'}: {other_service}"
     )
-    
-    return SERVICES
+    return await send_service_picker(update.message, context, reply)
 
 async def contact_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle returning user contact info choice."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, CONTACT_CHECK)
+    if choice is None:
+        return CONTACT_CHECK
     language = get_user_language(context)
     
     if choice in ["✅ Use Saved Info", "✅ የተቀመጠውን መረጃ ተጠቀም"]:
         # Load saved contact info
-        saved_info = context.user_data['saved_contact_info']
-        context.user_data['name'] = saved_info['name']
-        context.user_data['phone'] = saved_info['phone']
-        context.user_data['location'] = saved_info.get('location', 'Not provided')
-        context.user_data['phone_source'] = saved_info.get('phone_source', 'manual_entry')
+        saved_contact = context.user_data.saved_contact
+        draft = context.user_data.draft
+        draft.name = saved_contact.name
+        draft.phone = saved_contact.phone
+        draft.location = saved_contact.location
+        draft.phone_source = saved_contact.phone_source
+        draft.zone = locate(saved_contact.location) if saved_contact.location else None
         
         # Go directly to confirmation
         return await show_confirmation(update, context)
     
     elif choice in ["✏️ Update Info", "✏️ መረጃ አዘምን"]:
         # Continue to name confirmation to update info
-        detected_name = context.user_data.get('detected_name', '')
-        service_details = context.user_data['services']
+        detected_name = context.user_data.detected_name or ''
+        service_details = ', '.join(selected_service_labels(context))
         
         await update.message.reply_text(
             get_text(context, 'name_prompt', {
@@ -1102,15 +1409,16 @@ async def contact_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def name_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle name confirmation with menu."""
     choice = update.message.text
-    detected_name = context.user_data.get('detected_name', '')
+    draft = context.user_data.draft
+    detected_name = context.user_data.detected_name or ''
     
     name_confirm_menu = get_menu(context, 'name_confirm_menu')
     
     if choice == name_confirm_menu[0][0]:  # "Use My Telegram Name" equivalent
-        context.user_data['name'] = detected_name
+        draft.name = detected_name
         
-        if context.user_data.get('editing_from_confirmation', False):
-            context.user_data['editing_from_confirmation'] = False
+        if draft.editing_from_confirmation:
+            draft.editing_from_confirmation = False
             return await show_confirmation(update, context)
         
         # Create phone sharing keyboard
@@ -1150,10 +1458,10 @@ async def name_confirm(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return NAME_CONFIRM
         
-        context.user_data['name'] = name
+        draft.name = name
         
-        if context.user_data.get('editing_from_confirmation', False):
-            context.user_data['editing_from_confirmation'] = False
+        if draft.editing_from_confirmation:
+            draft.editing_from_confirmation = False
             return await show_confirmation(update, context)
         
         # Create phone sharing keyboard
@@ -1177,8 +1485,8 @@ async def phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.message.contact:
         # User shared contact - this is the preferred method
         phone_number = update.message.contact.phone_number
-        context.user_data['phone'] = phone_number
-        context.user_data['phone_source'] = 'contact_shared'
+        context.user_data.draft.phone = phone_number
+        context.user_data.draft.phone_source = Source.CONTACT_SHARED
         
         return await ask_for_location(update, context)
     
@@ -1198,31 +1506,17 @@ async def phone(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return PHONE
     
     else:
-        # User entered phone number manually
-        phone_input = update.message.text.strip()
-        cleaned_phone = re.sub(r'[^\d+]', '', phone_input)
+        # User entered phone number manually; Ethiopian numbers are stored as +2519XXXXXXXX
+        phone_number = normalize_phone(update.message.text.strip())
         
-        # Ethiopian phone number validation
-        ethiopian_pattern = r'^(\+251|251|0)?9\d{8}$'
-        
-        if not re.match(ethiopian_pattern, cleaned_phone):
+        if phone_number is None:
             await update.message.reply_text(
                 get_text(context, 'phone_invalid', {})
             )
             return PHONE
         
-        # Format phone number consistently
-        if cleaned_phone.startswith('0'):
-            phone_number = '+251' + cleaned_phone[1:]
-        elif cleaned_phone.startswith('251'):
-            phone_number = '+' + cleaned_phone
-        elif cleaned_phone.startswith('9'):
-            phone_number = '+251' + cleaned_phone
-        else:
-            phone_number = cleaned_phone
-        
-        context.user_data['phone'] = phone_number
-        context.user_data['phone_source'] = 'manual_entry'
+        context.user_data.draft.phone = phone_number
+        context.user_data.draft.phone_source = Source.MANUAL_ENTRY
         
         return await ask_for_location(update, context)
 
@@ -1275,13 +1569,12 @@ async def location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         lat = update.message.location.latitude
         lon = update.message.location.longitude
         location_text = f"📍 GPS: {lat}, {lon}"
-        context.user_data['location'] = location_text
-        context.user_data['location_source'] = 'gps'
+        context.user_data.draft.location = location_text
+        context.user_data.draft.location_source = Source.GPS
+        context.user_data.draft.zone = None
         
-        await update.message.reply_text(
-            get_text(context, 'location_confirmed', {'location':location_text})
-        )
-        return await show_confirmation(update, context)
+        reply = Reply(update.message).add(get_text(context, 'location_confirmed', {'location':location_text}))
+        return await show_confirmation(update, context, reply)
     
     choice = update.message.text
     
@@ -1308,48 +1601,152 @@ async def location(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return LOCATION
         
-        context.user_data['location'] = address
-        context.user_data['location_source'] = 'manual_entry'
+        context.user_data.draft.location = address
+        context.user_data.draft.location_source = Source.MANUAL_ENTRY
+        # Resolved while the user waits; a gazetteer lookup takes microseconds
+        context.user_data.draft.zone = locate(address)
         
-        await update.message.reply_text(
-            get_text(context, 'location_confirmed', {'location':address})
-        )
-        return await show_confirmation(update, context)
+        reply = Reply(update.message).add(get_text(context, 'location_confirmed', {'location':address}))
+        return await show_confirmation(update, context, reply)
 
-async def show_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Show confirmation menu with all collected information."""
-    name = context.user_data.get('name', 'Not provided')
-    service_type = context.user_data.get('service_type', 'Not provided')
-    services = context.user_data.get('services', 'Not provided')
-    phone = context.user_data.get('phone', 'Not provided')
-    location = context.user_data.get('location', 'Not provided')
-    phone_source = context.user_data.get('phone_source', 'manual_entry')
-    location_source = context.user_data.get('location_source', 'manual_entry')
-    
-    phone_status = "(✅ Verified)" if phone_source == 'contact_shared' else "(📝 Manual)"
+async def show_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE, reply=None):
+    """Show confirmation menu with all collected information, after anything already in ``reply``."""
+    summary = draft_summary(context)
+    verified = context.user_data.draft.phone_source == Source.CONTACT_SHARED
+    
+    phone_status = "(✅ Verified)" if verified else "(📝 Manual)"
     if get_user_language(context) == 'amharic':
-        phone_status = "(✅ ተረጋገጧል)" if phone_source == 'contact_shared' else "(📝 በእጅ)"
+        phone_status = "(✅ ተረጋገጧል)" if verified else "(📝 በእጅ)"
     
-    await update.message.reply_text(
-        get_text(context, 'confirmation_summary', {
-            'name': name,
-            'phone': phone,
-            'phone_status': phone_status,
-            'service_type': service_type,
-            'services': services,
-            'location': location
-        }),
+    reply = reply or Reply(update.message)
+    reply.add(
+        get_text(context, 'confirmation_summary', dict(summary, phone_status=phone_status)),
         reply_markup=ReplyKeyboardMarkup(
             get_menu(context, 'confirmation_menu'),
             one_time_keyboard=True,
             resize_keyboard=True
         )
     )
+    await reply.send()
     return CONFIRMATION
 
+def recent_submission(context):
+    """The user's last submission if it is still inside the repeat window, else None."""
+    last_submission = context.user_data.last_submission
+    if last_submission and time.monotonic() - last_submission.submitted_at <= SUBMIT_DEDUP_SECONDS:
+        return last_submission
+    return None
+
+async def send_post_submission_menu(update: Update, context: ContextTypes.DEFAULT_TYPE, reply=None):
+    """Offer a new request or the main menu after submitting, after anything already in ``reply``."""
+    language = get_user_language(context)
+    post_submission_menu = [
+        ["🔄 New Request" if language == 'english' else "🔄 አዲስ ጥያቄ"],
+        ["🏠 Main Menu" if language == 'english' else "🏠 ዋና ገፅ"]
+    ]
+    
+    reply = reply or Reply(update.message)
+    reply.add(
+        "What would you like to do next?" if language == 'english' else "ቀጥሎ ምን ማድረግ ይፈልጋሉ?",
+        reply_markup=ReplyKeyboardMarkup(
+            post_submission_menu,
+            one_time_keyboard=True,
+            resize_keyboard=True
+        )
+    )
+    await reply.send()
+
+async def reply_already_submitted(update: Update, context: ContextTypes.DEFAULT_TYPE, request_id):
+    """Answer a repeated Confirm with the original request instead of saving again."""
+    logger.info(f"♻️ Repeat Confirm for service request #{request_id}")
+    reply = Reply(update.message).add(get_text(context, 'already_submitted', {'request_id': request_id}))
+    await send_post_submission_menu(update, context, reply)
+
+async def submit_request(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Save the confirmed request, notify staff and show the post-submission menu.
+
+    If the request can't be saved the customer is told so and stays on the
+    confirmation menu with the draft intact.
+    """
+    # The same draft confirmed again (e.g. the first reply never arrived)
+    session = context.user_data
+    draft = session.draft
+    if draft.idempotency_key is None:
+        draft.idempotency_key = uuid.uuid4().hex
+    last_submission = session.last_submission
+    if last_submission and last_submission.idempotency_key == draft.idempotency_key:
+        await reply_already_submitted(update, context, last_submission.request_id)
+        return POST_SUBMISSION
+    
+    # Get all collected data
+    summary = draft_summary(context)
+    name = summary['name']
+    service_type = summary['service_type']
+    services = summary['services']
+    phone = summary['phone']
+    location = summary['location']
+    
+    telegram_id = session.telegram_id
+    repository = context.bot_data['repository']
+    await save_user_to_db(repository, telegram_id, session.username, session.first_name, session.last_name)
+    
+    request_id = await save_service_request_to_db(
+        repository, telegram_id, name, phone, location, 
+        service_type, services, draft.phone_source.db_value, draft.location_source.db_value,
+        draft.idempotency_key, draft.zone
+    )
+    if not request_id:
+        # Keep the draft and its idempotency key, so Confirm can simply be tapped again
+        await update.message.reply_text(
+            get_text(context, 'submit_failed', {}),
+            reply_markup=ReplyKeyboardMarkup(
+                get_menu(context, 'confirmation_menu'),
+                one_time_keyboard=True,
+                resize_keyboard=True
+            )
+        )
+        return CONFIRMATION
+    
+    session.saved_contact = SavedContact(name, phone, location, draft.phone_source)
+    session.last_submission = Submission(draft.idempotency_key, request_id, time.monotonic())
+    context.bot_data['status_cache'].invalidate(telegram_id)
+    
+    # Log the submission
+    logger.info(f"New service request #{request_id} - Name: {name}, Phone: {phone}, Location: {location}, Type: {service_type}, Service: {services}")
+    
+    # Queue the staff notification; the customer never waits on it
+    staff_notifier = context.bot_data.get('staff_notifier')
+    if staff_notifier:
+        staff_notifier.notify({
+            'request_id': request_id,
+            'name': name,
+            'phone': phone,
+            'location': location,
+            'zone': describe(draft.zone) if draft.zone else None,
+            'service_type': service_type,
+            'services': services
+        })
+    
+    # Final success message, sent together with the post-submission menu
+    reply = Reply(update.message).add(
+        get_text(context, 'success_message', {
+            'name': name,
+            'service_type': service_type,
+            'services': services,
+            'location': location,
+            'phone': phone
+        }))
+    await send_post_submission_menu(update, context, reply)
+    
+    # Clear only the request data, keep saved contact info and language
+    session.new_draft()
+    return POST_SUBMISSION
+
 async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle final confirmation with menu."""
-    choice = update.message.text
+    choice = await menu_choice(update, context, CONFIRMATION)
+    if choice is None:
+        return CONFIRMATION
     confirmation_menu = get_menu(context, 'confirmation_menu')
     
     # Debug logging
@@ -1358,86 +1755,13 @@ async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     logger.info(f"Match result: {choice == confirmation_menu[0][0]}")
     
     if choice == confirmation_menu[0][0]:  # "Confirm & Submit Request" equivalent
-        # Get all collected data
-        name = context.user_data.get('name', 'Not provided')
-        service_type = context.user_data.get('service_type', 'Not provided')
-        services = context.user_data.get('services', 'Not provided')
-        phone = context.user_data.get('phone', 'Not provided')
-        location = context.user_data.get('location', 'Not provided')
-        phone_source = context.user_data.get('phone_source', 'manual_entry')
-        location_source = context.user_data.get('location_source', 'manual_entry')
-        
-        context.user_data['saved_contact_info'] = {
-            'name': name,
-            'phone': phone,
-            'location': location,
-            'phone_source': phone_source
-        }
-        
-        user_info = context.user_data.get('user_info', {})
-        telegram_id = user_info.get('user_id')
-        username = user_info.get('username')
-        first_name = user_info.get('first_name')
-        last_name = user_info.get('last_name')
-        
-        save_user_to_db(telegram_id, username, first_name, last_name)
-        
-        request_id = save_service_request_to_db(
-            telegram_id, name, phone, location, 
-            service_type, services, phone_source, location_source
-        )
-        
-        # Log the submission
-        logger.info(f"New service request #{request_id} - Name: {name}, Phone: {phone}, Location: {location}, Type: {service_type}, Service: {services}")
-        
-        # Final success message
-        await update.message.reply_text(
-            get_text(context, 'success_message', {
-                'name': name,
-                'service_type': service_type,
-                'services': services,
-                'location': location,
-                'phone': phone
-            }))
-        
-        language = get_user_language(context)
-        post_submission_menu = [
-            ["🔄 New Request" if language == 'english' else "🔄 አዲስ ጥያቄ"],
-            ["🏠 Main Menu" if language == 'english' else "🏠 ዋና ገፅ"]
-        ]
-        
-        await update.message.reply_text(
-            "What would you like to do next?" if language == 'english' else "ቀጥሎ ምን ማድረግ ይፈልጋሉ?",
-            reply_markup=ReplyKeyboardMarkup(
-                post_submission_menu,
-                one_time_keyboard=True,
-                resize_keyboard=True
-            )
-        )
-        
-        # Clear only the request data, keep saved contact info and language
-        saved_contact = context.user_data.get('saved_contact_info')
-        user_info = context.user_data.get('user_info')
-        detected_name = context.user_data.get('detected_name')
-        language_pref = context.user_data.get('language')
-        
-        context.user_data.clear()
-        
-        if saved_contact:
-            context.user_data['saved_contact_info'] = saved_contact
-        if user_info:
-            context.user_data['user_info'] = user_info
-        if detected_name:
-            context.user_data['detected_name'] = detected_name
-        if language_pref:
-            context.user_data['language'] = language_pref
-        
-        return POST_SUBMISSION
+        # Updates are handled one at a time, so a second tap arrives after the first is saved;
+        # the draft's idempotency key then answers it with the original request
+        return await submit_request(update, context)
     
     elif choice == confirmation_menu[1][0]:  # "Edit Service Type" equivalent
-        context.user_data['editing_from_confirmation'] = True
-        user_info = context.user_data.get('user_info', {})
-        user_name = user_info.get('first_name', 'there')
+        context.user_data.draft.editing_from_confirmation = True
+        user_name = context.user_data.first_name or 'there'
         await update.message.reply_text(
             get_text(context, 'service_type_prompt', {'user_name':user_name}),
             reply_markup=ReplyKeyboardMarkup(
@@ -1449,22 +1773,13 @@ async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return SERVICE_TYPE
     
     elif choice == confirmation_menu[1][1]:  # "Edit Services" equivalent
-        context.user_data['editing_from_confirmation'] = True
-        service_description = get_text(context, 'service_type_selected', {'key':context.user_data.get('service_type', '')})
-        await update.message.reply_text(
-            get_text(context, 'services_prompt', {'service_description':service_description}),
-            reply_markup=ReplyKeyboardMarkup(
-                create_service_selection_menu(context),
-                one_time_keyboard=False,
-                resize_keyboard=True
-            )
-        )
-        return SERVICES
+        context.user_data.draft.editing_from_confirmation = True
+        return await send_service_picker(update.message, context)
     
     elif choice == confirmation_menu[2][0]:  # "Edit Name" equivalent
-        context.user_data['editing_from_confirmation'] = True
-        detected_name = context.user_data.get('detected_name', '')
-        services = context.user_data.get('services', '')
+        context.user_data.draft.editing_from_confirmation = True
+        detected_name = context.user_data.detected_name or ''
+        services = ', '.join(selected_service_labels(context))
         service_details = get_text(context, 'service_details', {'key':services})
         await update.message.reply_text(
             get_text(context, 'name_prompt', {
@@ -1480,7 +1795,7 @@ async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return NAME_CONFIRM
     
     elif choice == confirmation_menu[2][1]:  # "Edit Phone" equivalent
-        context.user_data['editing_from_confirmation'] = True
+        context.user_data.draft.editing_from_confirmation = True
         # Create phone sharing keyboard
         phone_keyboard = [
             [KeyboardButton("📱 Share My Phone Number" if get_user_language(context) == 'english' else "📱 ስልክ ቁጥሬን አጋራ", request_contact=True)],
@@ -1488,7 +1803,7 @@ async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         ]
         
         await update.message.reply_text(
-            get_text(context, 'name_confirmed', {'name':context.user_data.get('name', '')}),
+            get_text(context, 'name_confirmed', {'name':context.user_data.draft.name or ''}),
             reply_markup=ReplyKeyboardMarkup(
                 phone_keyboard,
                 one_time_keyboard=True,
@@ -1498,7 +1813,7 @@ async def confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return PHONE
     
     elif choice == confirmation_menu[3][0]:  # "Edit Location" equivalent
-        context.user_data['editing_from_confirmation'] = True
+        context.user_data.draft.editing_from_confirmation = True
         language = get_user_language(context)
         location_keyboard = [
             [KeyboardButton("📍 Share My Location" if language == 'english' else "📍 አድራሻ አጋራ", request_location=True)],
@@ -1533,10 +1848,19 @@ async def post_submission_handler(update: Update, context: ContextTypes.DEFAULT_
     choice = update.message.text
     language = get_user_language(context)
     
+    # Confirm tapped again after the request was already saved
+    last_submission = recent_submission(context)
+    if last_submission and choice == get_menu(context, 'confirmation_menu')[0][0]:
+        await reply_already_submitted(update, context, last_submission.request_id)
+        return POST_SUBMISSION
+    
+    choice = await menu_choice(update, context, POST_SUBMISSION)
+    if choice is None:
+        return POST_SUBMISSION
+    
     if choice in ["🔄 New Request", "🔄 አዲስ ጥያቄ"]:
         # Start a new request
-        user_info = context.user_data.get('user_info', {})
-        user_name = user_info.get('first_name', 'there')
+        user_name = context.user_data.first_name or 'there'
         await update.message.reply_text(
             get_text(context, 'service_type_prompt', {'user_name':user_name}),
             reply_markup=ReplyKeyboardMarkup(
@@ -1549,8 +1873,7 @@ async def post_submission_handler(update: Update, context: ContextTypes.DEFAULT_
     
     elif choice in ["🏠 Main Menu", "🏠 ዋና ገፅ"]:
         # Return to main menu
-        user_info = context.user_data.get('user_info', {})
-        user_name = user_info.get('first_name', 'there')
+        user_name = context.user_data.first_name or 'there'
         await update.message.reply_text(
             get_text(context, 'initial_welcome', {'user_name':user_name}),
             reply_markup=ReplyKeyboardMarkup(
@@ -1572,11 +1895,17 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data.clear()
     return ConversationHandler.END
 
+async def conversation_timeout(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """End an abandoned conversation and drop its draft."""
+    context.user_data.new_draft()
+    if update.effective_message:
+        await update.effective_message.reply_text(
+            get_text(context, 'conversation_timeout', {}),
+            reply_markup=ReplyKeyboardRemove()
+        )
+
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a help message."""
-    if 'language' not in context.user_data:
-        context.user_data['language'] = 'amharic'
-    
     await update.message.reply_text(
         get_text(context, 'help', {}),
         reply_markup=ReplyKeyboardMarkup(
@@ -1586,14 +1915,175 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     )
 
+async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the user's open requests and where each one stands."""
+    try:
+        requests = await context.bot_data['status_cache'].open_requests(update.effective_user.id)
+    except Exception as e:
+        logger.error(f"❌ Error loading open requests: {e}")
+        requests = []
+    if not requests:
+        await update.message.reply_text(get_text(context, 'status_none', {}))
+        return
+    
+    labels = STATUS_LABELS[get_user_language(context)]
+    lines = [get_text(context, 'status_header', {})]
+    for request_id, service_type, services, status, assigned_to, submitted_at, status_updated_at in requests:
+        label = labels[status]
+        if assigned_to and status != 'pending':
+            label += get_text(context, 'status_assignee', {'assigned_to': assigned_to})
+        lines.append(get_text(context, 'status_line', {
+            'request_id': request_id,
+            'services': services,
+            'status': label,
+            'submitted_at': submitted_at
+        }))
+    await update.message.reply_text("\n".join(lines)[:4000])
+
+async def setstatus_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only: move a request to a new status, optionally naming who it is assigned to."""
+    if not is_admin(update, context):
+        return
+    
+    usage = f"🔁 Usage: /setstatus <request id> <{'|'.join(REQUEST_STATUSES)}> [assignee]"
+    if len(context.args) < 2 or not context.args[0].lstrip('#').isdigit():
+        await update.message.reply_text(usage)
+        return
+    request_id = int(context.args[0].lstrip('#'))
+    status = context.args[1].lower()
+    assigned_to = ' '.join(context.args[2:]).strip() or None
+    
+    user = update.effective_user
+    try:
+        await context.bot_data['status_cache'].transition(
+            request_id, status, changed_by=user.username or str(user.id), assigned_to=assigned_to
+        )
+    except ValueError as e:
+        await update.message.reply_text(f"❌ {e}")
+        return
+    except Exception as e:
+        logger.error(f"❌ Error updating request #{request_id}: {e}")
+        await update.message.reply_text(f"❌ Couldn't update request #{request_id}, please try again.")
+        return
+    logger.info(f"🔁 Request #{request_id} moved to {status} by {user.id}")
+    await update.message.reply_text(f"✅ Request #{request_id} is now {status}" + (f" ({assigned_to})" if assigned_to else ""))
+
+async def search_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only: search requests by name, location or service text."""
+    if not is_admin(update, context):
+        return
+    
+    term = ' '.join(context.args).strip()
+    if not term:
+        await update.message.reply_text("🔎 Usage: /search <name, area or service>")
+        return
+    
+    results = await search_service_requests_in_db(context.bot_data['repository'], term)
+    if not results:
+        await update.message.reply_text(f"🔎 No requests found for \"{term}\".")
+        return
+    
+    lines = [f"🔎 {len(results)} latest request(s) matching \"{term}\":"]
+    for request_id, name, phone, location, service_type, services, submitted_at in results:
+        lines.append(
+            f"\n📌 #{request_id} - {name}\n"
+            f"📞 {phone}\n"
+            f"📍 {location}\n"
+            f"⚡ {service_type} | 🛠️ {services}\n"
+            f"📅 {submitted_at}"
+        )
+    await update.message.reply_text("\n".join(lines))
+
+def format_breakdown(breakdown):
+    """Format a service type breakdown as bullet lines."""
+    if not breakdown:
+        return "   • None"
+    return "\n".join(f"   • {name}: {count}" for name, count in sorted(breakdown.items(), key=lambda item: -item[1]))
+
+async def load_stats_snapshot(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """The cached dashboard numbers, or None after telling the admin they can't be loaded."""
+    try:
+        return await context.bot_data['stats_snapshot'].get()
+    except Exception as e:
+        logger.error(f"❌ Error loading stats snapshot: {e}")
+        await update.message.reply_text("❌ Statistics are unavailable right now. Please try again later.")
+        return None
+
+async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only: overall request statistics from the cached snapshot."""
+    if not is_admin(update, context):
+        return
+    
+    stats_snapshot = context.bot_data['stats_snapshot']
+    stats = await load_stats_snapshot(update, context)
+    if stats is None:
+        return
+    await update.message.reply_text(
+        "📊 Liyu Househelp Statistics\n\n"
+        f"👥 Total Users: {stats['users']}\n"
+        f"📋 Total Requests: {stats['requests']}\n"
+        f"⏰ Latest Request: {stats['latest_request'] or 'None'}\n\n"
+        f"⚡ By Service Type:\n{format_breakdown(stats['by_service_type'])}\n\n"
+        f"🕒 Updated {int(stats_snapshot.age())}s ago"
+    )
+
+async def today_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only: today's new users and requests from the cached snapshot."""
+    if not is_admin(update, context):
+        return
+    
+    stats_snapshot = context.bot_data['stats_snapshot']
+    stats = await load_stats_snapshot(update, context)
+    if stats is None:
+        return
+    today = stats['today']
+    await update.message.reply_text(
+        "📅 Today\n\n"
+        f"👥 New Users: {today['users']}\n"
+        f"📋 New Requests: {today['requests']}\n\n"
+        f"⚡ By Service Type:\n{format_breakdown(today['by_service_type'])}\n\n"
+        f"🕒 Updated {int(stats_snapshot.age())}s ago"
+    )
+
+async def recent_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin-only: the latest N requests from the cached snapshot."""
+    if not is_admin(update, context):
+        return
+    
+    try:
+        count = int(context.args[0]) if context.args else 5
+    except ValueError:
+        await update.message.reply_text(f"📋 Usage: /recent N (1-{RECENT_LIMIT})")
+        return
+    count = max(1, min(count, RECENT_LIMIT))
+    
+    stats_snapshot = context.bot_data['stats_snapshot']
+    stats = await load_stats_snapshot(update, context)
+    if stats is None:
+        return
+    recent = stats['recent'][:count]
+    if not recent:
+        await update.message.reply_text("📋 No service requests yet.")
+        return
+    
+    lines = [f"📋 Latest {len(recent)} Request(s):"]
+    for request_id, name, phone, location, service_type, services, submitted_at in recent:
+        lines.append(
+            f"\n📌 #{request_id} - {name} - {phone}\n"
+            f"   ⚡ {service_type} | 🛠️ {services}\n"
+            f"   📍 {location}\n"
+            f"   📅 {submitted_at}"
+        )
+    lines.append(f"\n🕒 Updated {int(stats_snapshot.age())}s ago")
+    
+    # Stay under Telegram's message length limit
+    text = "\n".join(lines)
+    await update.message.reply_text(text[:4000])
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle regular messages and guide users to /start."""
     user = update.message.from_user
     
-    # Set default language if not set
-    if 'language' not in context.user_data:
-        context.user_data['language'] = 'amharic'
-    
     # Use proper text system for consistent language
     language = get_user_language(context)
     if language == 'amharic':
@@ -1618,24 +2108,94 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
     )
 
-def main():
-    """Start the client service bot."""
-    # Get token from environment variables
-    TOKEN = os.getenv('BOT_TOKEN_CLIENT')
+def start_backup_job(repository):
+    """Start periodic snapshots of a SQLite database; None when disabled or on PostgreSQL."""
+    # PostgreSQL deployments use the server's own backups
+    if BACKUP_INTERVAL_HOURS > 0 and repository.backend == 'sqlite':
+        backup_job = BackupJob(repository.database_file, BACKUP_INTERVAL_HOURS * 3600)
+        backup_job.start()
+        return backup_job
+    return None
+
+async def post_init(application: Application):
+    """Open storage and start background jobs once the bot is initialised."""
+    repository = application.bot_data['repository']
+    await init_database(repository)
     
-    if not TOKEN:
-        logger.error("❌ BOT_TOKEN_CLIENT not found in environment variables!")
-        logger.error("Please check your .env file")
-        return
+    health_monitor = application.bot_data.get('health_monitor')
+    if health_monitor:
+        await health_monitor.start()
+    
+    update_recorder = application.bot_data.get('update_recorder')
+    if update_recorder:
+        update_recorder.start()
     
-    # Initialize database
-    init_database()
+    stats_snapshot = StatsSnapshot(repository, STATS_REFRESH_SECONDS, STATS_MAX_STALENESS_SECONDS)
+    stats_snapshot.start()
+    application.bot_data['stats_snapshot'] = stats_snapshot
     
-    # Create the Application
-    application = Application.builder().token(TOKEN).build()
+    application.bot_data['status_cache'].start()
+    
+    funnel_recorder = application.bot_data.get('funnel_recorder')
+    if funnel_recorder:
+        funnel_recorder.start()
+    
+    application.bot_data['session_store'].start()
+    
+    # A multi-tenant host backs up the shared database once, itself
+    if 'tenant_id' not in application.bot_data:
+        application.bot_data['backup_job'] = start_backup_job(repository)
+    
+    staff_chat_id = application.bot_data['staff_chat_id']
+    if staff_chat_id:
+        staff_notifier = StaffNotifier(application.bot, staff_chat_id)
+        staff_notifier.start()
+        application.bot_data['staff_notifier'] = staff_notifier
+        logger.info(f"✅ Staff notifications enabled for chat {staff_chat_id}")
+
+async def post_shutdown(application: Application):
+    """Stop background jobs when the bot shuts down, including after a post_init that failed part-way."""
+    stats_snapshot = application.bot_data.get('stats_snapshot')
+    if stats_snapshot:
+        await stats_snapshot.stop()
+    await application.bot_data['session_store'].stop()
+    await application.bot_data['status_cache'].stop()
+    backup_job = application.bot_data.get('backup_job')
+    if backup_job:
+        await backup_job.stop()
+    staff_notifier = application.bot_data.get('staff_notifier')
+    if staff_notifier:
+        await staff_notifier.stop()
+    funnel_recorder = application.bot_data.get('funnel_recorder')
+    if funnel_recorder:
+        await funnel_recorder.stop()
+    update_recorder = application.bot_data.get('update_recorder')
+    if update_recorder:
+        await update_recorder.stop()
+    health_monitor = application.bot_data.get('health_monitor')
+    if health_monitor:
+        await health_monitor.stop()
+    await application.bot_data['repository'].close()
+
+def build_application(builder, repository, update_recorder=None, health_monitor=None,
+                      admin_ids=ADMIN_IDS, staff_chat_id=STAFF_CHAT_ID, tenant_id=None):
+    """Build the Application with every handler registered.
+    
+    Shared by main() and the replay tool, which passes a builder with a
+    stubbed Bot API so recordings run through exactly the same handlers.
+    A multi-tenant host builds one per tenant, passing its ``tenant_id``
+    and a storage.TenantRepository.
+    """
+    application = builder.context_types(ContextTypes(user_data=Session)).build()
+    application.bot_data['repository'] = repository
+    application.bot_data['admin_ids'] = admin_ids
+    application.bot_data['staff_chat_id'] = staff_chat_id
+    if tenant_id:
+        application.bot_data['tenant_id'] = tenant_id
+    application.bot_data['status_cache'] = StatusCache(repository, STATUS_POLL_SECONDS)
 
     # Add conversation handler
-    conv_handler = ConversationHandler(
+    conv_handler = FunnelConversationHandler(
         entry_points=[CommandHandler('start', start)],
         states={
             MAIN_MENU: [
@@ -1648,12 +2208,13 @@ def main():
                 MessageHandler(filters.TEXT & ~filters.COMMAND, settings_handler)
             ],
             LANGUAGE: [
-                MessageHandler(filters.Regex('^(🇬🇧 English|🇪🇹 Amharic)$'), language_selection)
+                MessageHandler(filters.TEXT & ~filters.COMMAND, language_selection)
             ],
             SERVICE_TYPE: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, service_type)
             ],
             SERVICES: [
+                CallbackQueryHandler(services_callback, pattern=f'^{SERVICE_PICKER_PREFIX}'),
                 MessageHandler(filters.TEXT & ~filters.COMMAND, services)
             ],
             SERVICES_OTHER: [
@@ -1677,17 +2238,156 @@ def main():
             POST_SUBMISSION: [
                 MessageHandler(filters.TEXT & ~filters.COMMAND, post_submission_handler)
             ],
+            ConversationHandler.TIMEOUT: [
+                TypeHandler(Update, conversation_timeout)
+            ],
         },
-        fallbacks=[CommandHandler('cancel', cancel),  CommandHandler('start', start) ]
+        fallbacks=[CommandHandler('cancel', cancel),  CommandHandler('start', start) ],
+        conversation_timeout=CONVERSATION_TIMEOUT_MINUTES * 60 if CONVERSATION_TIMEOUT_MINUTES > 0 else None
     )
 
+    # Track session activity before any other handler sees the update
+    session_store = SessionStore(application, repository, SESSION_IDLE_HOURS * 3600, MAX_SESSIONS)
+    session_store.conversation_handler = conv_handler
+    application.bot_data['session_store'] = session_store
+    application.add_handler(TypeHandler(Update, session_store.touch), group=-1)
+
+    # Record conversation state changes for the booking funnel
+    if FUNNEL_FLUSH_SECONDS > 0:
+        funnel_recorder = FunnelRecorder(repository, STATE_NAMES, FUNNEL_FLUSH_SECONDS)
+        conv_handler.funnel_recorder = funnel_recorder
+        application.bot_data['funnel_recorder'] = funnel_recorder
+
+    # Record updates before anything else touches them
+    if update_recorder:
+        update_recorder.conversation_handler = conv_handler
+        update_recorder.button_matchers = MENU_MATCHERS
+        application.bot_data['update_recorder'] = update_recorder
+        application.add_handler(TypeHandler(Update, update_recorder.record), group=-2)
+
+    # Mark updates processed once every other handler group has run
+    if health_monitor:
+        health_monitor.applications.append(application)
+        application.bot_data['health_monitor'] = health_monitor
+        application.add_handler(TypeHandler(Update, health_monitor.touch), group=100)
+
     # Add handlers
     application.add_handler(conv_handler)
     application.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("status", status_command))
+    application.add_handler(CommandHandler("setstatus", setstatus_command))
+    application.add_handler(CommandHandler("stats", stats_command))
+    application.add_handler(CommandHandler("today", today_command))
+    application.add_handler(CommandHandler("recent", recent_command))
+    application.add_handler(CommandHandler("search", search_command))
     application.add_handler(CommandHandler("cancel", cancel))
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CallbackQueryHandler(expired_service_picker, pattern=f'^{SERVICE_PICKER_PREFIX}'))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
+    return application
+
+async def run_tenants(tenants):
+    """Host one bot per tenant in this process until SIGINT or SIGTERM.
+    
+    Each tenant has its own Application, sessions, caches, admins and staff
+    chat. They share the storage pool (through a TenantRepository each), one
+    HTTP connection pool for Bot API calls and one for long polling, the
+    health endpoint, the backup job and the module-level text catalogs.
+    """
+    repository = open_repository()
+    await init_database(repository)
+    api_request = HTTPXRequest(connection_pool_size=TENANT_HTTP_POOL_SIZE)
+    updates_request = HTTPXRequest(connection_pool_size=len(tenants))
+    health_monitor = HealthMonitor(
+        repository, HEALTH_PORT, HEALTH_HOST, LOOP_LAG_WARN_SECONDS, HEALTH_MAX_UPDATE_AGE_SECONDS
+    ) if HEALTH_PORT else None
+    applications = [
+        build_application(
+            Application.builder().token(tenant.token).request(api_request).get_updates_request(updates_request)
+            .post_init(post_init).post_shutdown(post_shutdown),
+            TenantRepository(repository, tenant.tenant_id),
+            UpdateRecorder(os.path.join(RECORD_UPDATES_DIR, tenant.tenant_id)) if RECORD_UPDATES_DIR else None,
+            health_monitor,
+            tenant.admin_ids,
+            tenant.staff_chat_id,
+            tenant.tenant_id
+        )
+        for tenant in tenants
+    ]
+    backup_job = start_backup_job(repository)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    initialized = []
+    try:
+        for tenant, application in zip(tenants, applications):
+            await application.initialize()
+            initialized.append(application)
+            await post_init(application)
+            await application.start()
+            await application.updater.start_polling(drop_pending_updates=True)
+            logger.info(f"✅ Tenant {tenant.tenant_id} polling as @{application.bot.username}")
+        await stop.wait()
+    finally:
+        # Every bot stops before any shuts down, since shutting one down closes the shared HTTP pools
+        for application in initialized:
+            try:
+                if application.updater.running:
+                    await application.updater.stop()
+                if application.running:
+                    await application.stop()
+                await post_shutdown(application)
+            except Exception as e:
+                logger.error(f"❌ Error stopping tenant {application.bot_data['tenant_id']}: {e}")
+        for application in initialized:
+            await application.shutdown()
+        if backup_job:
+            await backup_job.stop()
+        await repository.close()
+
+def main():
+    """Start the client service bot, or every bot in TENANTS_FILE."""
+    if TENANTS_FILE:
+        try:
+            tenants = load_tenants(TENANTS_FILE)
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Can't load tenants from {TENANTS_FILE}: {e}")
+            return
+        print(f"Liyu Househelp is starting {len(tenants)} bots: {', '.join(tenant.tenant_id for tenant in tenants)}")
+        print("Press Ctrl+C to stop the bots")
+        try:
+            asyncio.run(run_tenants(tenants))
+        except Exception as e:
+            logger.error(f"❌ Bots failed to start: {e}")
+            print("❌ Bots failed to start. Please check the tokens and internet connection.")
+        return
+    
+    # Get token from environment variables
+    TOKEN = os.getenv('BOT_TOKEN_CLIENT')
+    
+    if not TOKEN:
+        logger.error("❌ BOT_TOKEN_CLIENT not found in environment variables!")
+        logger.error("Please check your .env file")
+        return
+    
+    # SQLite file or PostgreSQL pool, chosen by DATABASE_URL; opened in post_init
+    repository = open_repository()
+    update_recorder = UpdateRecorder(RECORD_UPDATES_DIR) if RECORD_UPDATES_DIR else None
+    health_monitor = HealthMonitor(
+        repository, HEALTH_PORT, HEALTH_HOST, LOOP_LAG_WARN_SECONDS, HEALTH_MAX_UPDATE_AGE_SECONDS
+    ) if HEALTH_PORT else None
+    
+    application = build_application(
+        Application.builder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown),
+        repository,
+        update_recorder,
+        health_monitor
+    )
+
     # Start the Bot
     print("Liyu Househelp Client Service Bot is starting...")
     print("Token loaded from environment variables")
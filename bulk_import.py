@@ -0,0 +1,233 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import time
+from datetime import datetime
+
+from catalog import SERVICE_TYPE_LABELS, canonical_services, match_service_type
+from phones import normalize_phone
+from storage import REQUEST_STATUSES
+from tenants import DEFAULT_TENANT
+
+# Bulk import of historical requests and workers from CSV or JSON Lines.
+#
+# Rows are streamed, validated with the bot's phone rules, mapped onto the
+# service catalogue and written through the storage repository in batches,
+# one transaction each. After every committed batch a checkpoint records how
+# many input rows are done, so an interrupted import resumes where it stopped.
+# Requests carry an idempotency key derived from their content, so rows
+# replayed after a crash, or the same spreadsheet imported twice, are skipped
+# rather than duplicated. Rows are imported for one tenant, whose id is part
+# of the key, so the same spreadsheet can be imported for another tenant.
+# Imported requests have no status history and no telegram user; old ones
+# can be moved out with `view_database.py archive`.
+
+IMPORT_BATCH_SIZE = 5000
+# Seconds between progress lines
+PROGRESS_INTERVAL = 2
+
+# Accepted spellings of each field, after lowercasing and replacing spaces with '_'
+FIELD_ALIASES = {
+    'name': ['name', 'full_name', 'customer', 'customer_name', 'worker', 'worker_name'],
+    'phone': ['phone', 'phone_number', 'mobile', 'telephone', 'tel'],
+    'location': ['location', 'address', 'area', 'sub_city', 'subcity'],
+    'service_type': ['service_type', 'type', 'employment_type'],
+    'services': ['services', 'service', 'skills', 'jobs'],
+    'submitted_at': ['submitted_at', 'date', 'request_date', 'created_at', 'created'],
+    'status': ['status']
+}
+
+# YYYY-MM-DD[ HH:MM[:SS]] and the spreadsheet DD/MM/YYYY[ HH:MM]; matched directly, as strptime's
+# trial-and-error over formats was most of the validation time
+ISO_DATE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2}))?)?$')
+DAY_FIRST_DATE = re.compile(r'^(\d{1,2})[/.-](\d{1,2})[/.-](\d{4})(?: (\d{1,2}):(\d{2})(?::(\d{2}))?)?$')
+
+
+def open_input(path):
+    """Open a CSV or JSONL file, gzipped or not, as text (tolerating a spreadsheet BOM)."""
+    if path.endswith('.gz'):
+        return io.TextIOWrapper(gzip.open(path, 'rb'), encoding='utf-8-sig', newline='')
+    return open(path, 'r', encoding='utf-8-sig', newline='')
+
+
+def input_format(path):
+    """'csv' or 'jsonl', from the file name."""
+    name = path[:-3] if path.endswith('.gz') else path
+    return 'jsonl' if name.endswith(('.jsonl', '.json', '.ndjson')) else 'csv'
+
+
+def read_records(f, fmt):
+    """Yield each input row as a dict keyed by canonical field name."""
+    lookup = {alias: field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+    def canonical(record):
+        row = {}
+        for key, value in record.items():
+            field = lookup.get((key or '').strip().lower().replace(' ', '_'))
+            if field and field not in row:
+                row[field] = '' if value is None else str(value).strip()
+        return row
+
+    if fmt == 'csv':
+        for record in csv.DictReader(f):
+            yield canonical(record)
+    else:
+        for line in f:
+            if line.strip():
+                yield canonical(json.loads(line))
+
+
+def parse_date(value):
+    """A spreadsheet date as 'YYYY-MM-DD HH:MM:SS', None if empty; raises ValueError otherwise."""
+    if not value:
+        return None
+    match = ISO_DATE.match(value)
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+    else:
+        match = DAY_FIRST_DATE.match(value)
+        if not match:
+            raise ValueError(f"unrecognised date '{value}'")
+        day, month, year, hour, minute, second = match.groups()
+    try:
+        parsed = datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0))
+    except ValueError:
+        raise ValueError(f"impossible date '{value}'")
+    return parsed.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def request_row(record, default_status, tenant_id=DEFAULT_TENANT):
+    """Validate one request record into a tuple of storage.IMPORT_REQUEST_COLUMNS; raises ValueError."""
+    name = record.get('name')
+    if not name:
+        raise ValueError("missing name")
+    phone = normalize_phone(record.get('phone', ''))
+    if phone is None:
+        raise ValueError(f"invalid phone '{record.get('phone', '')}'")
+    service_type_key = match_service_type(record.get('service_type'))
+    if service_type_key is None:
+        raise ValueError(f"unknown service type '{record.get('service_type', '')}'")
+    services = canonical_services(record.get('services'))
+    if not services:
+        raise ValueError("missing services")
+    submitted_at = parse_date(record.get('submitted_at'))
+    status = (record.get('status') or default_status).lower()
+    if status not in REQUEST_STATUSES:
+        raise ValueError(f"unknown status '{status}'")
+
+    location = record.get('location') or None
+    service_type = SERVICE_TYPE_LABELS[service_type_key][0]
+    content = '\x1f'.join([name, phone, location or '', service_type, services, submitted_at or ''])
+    # Keys from before tenants, all the default tenant's, had no tenant in them
+    prefix = 'import:' if tenant_id == DEFAULT_TENANT else f'import:{tenant_id}:'
+    idempotency_key = prefix + hashlib.sha1(content.encode('utf-8')).hexdigest()
+    return (name, phone, location, service_type, services, submitted_at, status, idempotency_key)
+
+
+def worker_row(record):
+    """Validate one worker record into a tuple of storage.IMPORT_WORKER_COLUMNS; raises ValueError."""
+    name = record.get('name')
+    if not name:
+        raise ValueError("missing name")
+    phone = normalize_phone(record.get('phone', ''))
+    if phone is None:
+        raise ValueError(f"invalid phone '{record.get('phone', '')}'")
+    return (name, phone, record.get('location') or None, canonical_services(record.get('services')) or None)
+
+
+def checkpoint_path(path):
+    return path + '.import-checkpoint.json'
+
+
+def load_checkpoint(path, kind, tenant_id=DEFAULT_TENANT):
+    """Progress saved by an interrupted import of the same, unchanged file for the same tenant, or None."""
+    try:
+        with open(checkpoint_path(path), 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get('kind') != kind or checkpoint.get('size') != os.path.getsize(path):
+        return None
+    if checkpoint.get('tenant_id', DEFAULT_TENANT) != tenant_id:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(path, checkpoint):
+    """Write the checkpoint atomically, like the export watermarks."""
+    tmp_path = checkpoint_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, checkpoint_path(path))
+
+
+async def import_file(repository, path, kind, batch_size=IMPORT_BATCH_SIZE, default_status='done',
+                      resume=True, rejects_path=None, tenant_id=DEFAULT_TENANT):
+    """Import requests or workers from ``path`` for ``tenant_id``; returns the final counts as a dict.
+
+    ``kind`` is 'requests' or 'workers'. Rejected rows are written with their
+    reason to ``rejects_path`` (default: next to the input) as JSON Lines.
+    """
+    checkpoint = load_checkpoint(path, kind, tenant_id) if resume else None
+    if checkpoint:
+        print(f"↩️ Resuming after {checkpoint['rows']:,} rows")
+    else:
+        checkpoint = {'kind': kind, 'tenant_id': tenant_id, 'size': os.path.getsize(path), 'rows': 0,
+                      'inserted': 0, 'duplicates': 0, 'rejected': 0}
+    skip = checkpoint['rows']
+    insert = repository.import_requests if kind == 'requests' else repository.import_workers
+    rejects_path = rejects_path or path + '.rejects.jsonl'
+    rejects = open(rejects_path, 'a' if skip else 'w', encoding='utf-8')
+
+    started = time.perf_counter()
+    last_progress = started
+    processed = 0
+    batch = []
+    batch_rows = 0
+
+    async def flush():
+        nonlocal batch, batch_rows
+        inserted = await insert(batch, tenant_id=tenant_id) if batch else 0
+        checkpoint['rows'] += batch_rows
+        checkpoint['inserted'] += inserted
+        checkpoint['duplicates'] += len(batch) - inserted
+        rejects.flush()
+        save_checkpoint(path, checkpoint)
+        batch = []
+        batch_rows = 0
+
+    try:
+        with open_input(path) as f:
+            for index, record in enumerate(read_records(f, input_format(path))):
+                if index < skip:
+                    continue
+                batch_rows += 1
+                processed += 1
+                try:
+                    batch.append(request_row(record, default_status, tenant_id) if kind == 'requests'
+                                 else worker_row(record))
+                except ValueError as e:
+                    checkpoint['rejected'] += 1
+                    rejects.write(json.dumps({'row': index + 1, 'error': str(e), 'record': record},
+                                             ensure_ascii=False) + '\n')
+                if batch_rows >= batch_size:
+                    await flush()
+                    now = time.perf_counter()
+                    if now - last_progress >= PROGRESS_INTERVAL:
+                        last_progress = now
+                        print(f"⏳ {checkpoint['rows']:,} rows, {processed / (now - started):,.0f} rows/s")
+            await flush()
+    finally:
+        rejects.close()
+
+    elapsed = time.perf_counter() - started
+    # A finished import needs no checkpoint; running it again only finds duplicates
+    os.remove(checkpoint_path(path))
+    if not checkpoint['rejected']:
+        os.remove(rejects_path)
+    return dict(checkpoint, elapsed=elapsed, rate=processed / elapsed if elapsed else 0.0,
+                rejects_path=rejects_path if checkpoint['rejected'] else None)
@@ -0,0 +1,230 @@
+import functools
+import heapq
+import re
+from collections import Counter, namedtuple
+from itertools import chain
+
+from search_index import normalize_text as fold_text
+
+# Typo-tolerant matching of typed text to reply keyboard buttons.
+#
+# Users often type "cleaning", "english" or "ጀምር" instead of tapping a button.
+# A ButtonMatcher is built once per menu from its labels in every language,
+# the single words inside them and known aliases. A lookup first tries the
+# folded text as an exact key, then picks a few candidate keys from a
+# character bigram index and scores them with an edit distance in which two
+# Ethiopic syllables of the same consonant (a wrong vowel order) cost half a
+# letter, computed bit-parallel so a lookup stays in the microseconds. Results
+# are also cached, since users keep typing the same few words.
+
+# Score at which a match is treated as the tap itself
+ACCEPT_SCORE = 0.75
+# Score at which a match is offered for confirmation instead. At 0.5 a short
+# word two edits from a key ("yes" and "pets", "back" and "baby") was offered;
+# a single typo in any key of three or more letters still scores above this
+SUGGEST_SCORE = 0.6
+# A confident match must beat the next button by this much
+AMBIGUITY_MARGIN = 0.1
+# Buttons scoring this close to the best one are offered alongside it
+SUGGESTION_SPREAD = 0.2
+MAX_SUGGESTIONS = 5
+# A single word from inside a label ("cleaning") scores a little under the label
+WORD_WEIGHT = 0.95
+# A label or alias found inside a longer sentence
+CONTAINED_WEIGHT = 0.85
+# Candidate keys scored with the edit distance per lookup
+MAX_CANDIDATES = 4
+# Shorter text is only matched exactly
+MIN_FUZZY_LENGTH = 3
+MATCH_CACHE_SIZE = 2048
+
+ETHIOPIC_START, ETHIOPIC_END = 0x1200, 0x1380
+# ፀ and ጸ are written for each other; search_index folds the other homophones
+_TSADAY_FOLD = {0x1340 + order: 0x1338 + order for order in range(8)}
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+# choice: index of the matched button, or None; suggestions: buttons to offer when unsure
+Match = namedtuple('Match', ['choice', 'suggestions', 'score'])
+
+
+def normalize(text):
+    """Fold, lowercase and strip emoji and punctuation from a label or typed text."""
+    folded = fold_text(text).translate(_TSADAY_FOLD)
+    return ' '.join(_PUNCTUATION.sub(' ', folded).split())
+
+
+def emoji_key(text):
+    """The emoji a text consists of, without variation selectors, or ''."""
+    text = text.strip()
+    if not text or normalize(text):
+        return ''
+    return ''.join(text.replace('\ufe0f', '').split())
+
+
+def skeleton(key):
+    """The key with every Ethiopic syllable reduced to its consonant's first order."""
+    return ''.join(
+        chr(code - (code - ETHIOPIC_START) % 8) if ETHIOPIC_START <= code < ETHIOPIC_END else character
+        for character, code in ((character, ord(character)) for character in key)
+    )
+
+
+def _bigrams(key_skeleton):
+    padded = f" {key_skeleton} "
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def levenshtein(first, second):
+    """Plain edit distance, bit-parallel (Myers/Hyyrö) over the shorter string."""
+    if len(first) > len(second):
+        first, second = second, first
+    if not first:
+        return len(second)
+    matches = {}
+    for position, character in enumerate(first):
+        matches[character] = matches.get(character, 0) | (1 << position)
+    full = (1 << len(first)) - 1
+    last = 1 << (len(first) - 1)
+    positive, negative, distance = full, 0, len(first)
+    for character in second:
+        equal = matches.get(character, 0)
+        vertical = equal | negative
+        horizontal = (((equal & positive) + positive) ^ positive) | equal
+        horizontal_positive = (negative | ~(horizontal | positive)) & full
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = (horizontal_negative | ~(vertical | horizontal_positive)) & full
+        negative = horizontal_positive & vertical
+    return distance
+
+
+def edit_distance(first, second, first_skeleton=None, second_skeleton=None):
+    """Edit distance in which a wrong Ethiopic vowel order costs half a letter.
+
+    The mean of the exact distance and the distance between the consonant
+    skeletons, which only differ for Ethiopic text.
+    """
+    first_skeleton = skeleton(first) if first_skeleton is None else first_skeleton
+    second_skeleton = skeleton(second) if second_skeleton is None else second_skeleton
+    exact = levenshtein(first, second)
+    if first_skeleton == first and second_skeleton == second:
+        return exact
+    return (exact + levenshtein(first_skeleton, second_skeleton)) / 2
+
+
+class ButtonMatcher:
+    """Resolve typed text to one button of a menu.
+
+    ``choices`` lists the buttons, each as a dict of its label per language.
+    ``aliases`` maps any label of a button to extra names typed for it.
+    """
+
+    def __init__(self, choices, aliases=None):
+        self.choices = [dict(labels) for labels in choices]
+        self.labels = {label: index for index, labels in enumerate(self.choices) for label in labels.values()}
+        aliases = aliases or {}
+        self._keys = {}
+        self._emoji = {}
+        phrases = set()
+        for index, labels in enumerate(self.choices):
+            names = []
+            for label in labels.values():
+                names.append(label)
+                names.extend(aliases.get(label, []))
+                emoji = emoji_key(label.split()[0]) if label.split() else ''
+                if emoji:
+                    self._emoji.setdefault(emoji, {})[index] = 1.0
+            for name in names:
+                key = normalize(name)
+                if not key:
+                    continue
+                self._add(key, index, 1.0)
+                phrases.add(key)
+                for word in key.split():
+                    if len(word) >= MIN_FUZZY_LENGTH:
+                        self._add(word, index, WORD_WEIGHT)
+
+        # Whole labels and aliases, space-padded, for finding them inside sentences
+        self._phrases = [(f" {phrase} ", list(self._keys[phrase])) for phrase in phrases
+                         if len(phrase) >= MIN_FUZZY_LENGTH]
+        self._entries = [(key, skeleton(key), weights) for key, weights in self._keys.items()]
+        self._lengths = [len(key) for key, _, _ in self._entries]
+        # Share of its length an entry can differ by and still reach SUGGEST_SCORE
+        self._slack = [1.0 - SUGGEST_SCORE / max(weights.values()) for _, _, weights in self._entries]
+        self._gram_counts = []
+        self._postings = {}
+        for entry, (_, key_skeleton, _) in enumerate(self._entries):
+            grams = _bigrams(key_skeleton)
+            self._gram_counts.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(entry)
+        self.match = functools.lru_cache(maxsize=MATCH_CACHE_SIZE)(self._match)
+
+    def _add(self, key, index, weight):
+        weights = self._keys.setdefault(key, {})
+        weights[index] = max(weights.get(index, 0.0), weight)
+
+    def label(self, choice, language):
+        """The button's label in ``language``, or in its only language."""
+        labels = self.choices[choice]
+        return labels.get(language) or next(iter(labels.values()))
+
+    def _match(self, text):
+        """Match typed text; see Match. Cached, so use ``match``."""
+        text = (text or '').strip()
+        if text in self.labels:
+            return Match(self.labels[text], [], 1.0)
+        key = normalize(text)
+        if not key:
+            return self._decide(dict(self._emoji.get(emoji_key(text), {})))
+        if key in self._keys:
+            return self._decide(dict(self._keys[key]))
+        scores = {}
+        if len(key) >= MIN_FUZZY_LENGTH:
+            self._fuzzy_scores(key, scores)
+            self._contained_scores(key, scores)
+        return self._decide(scores)
+
+    def _fuzzy_scores(self, key, scores):
+        key_skeleton = skeleton(key)
+        grams = _bigrams(key_skeleton)
+        shared = Counter(chain.from_iterable(self._postings.get(gram, ()) for gram in grams))
+        # The length difference alone rules out candidates that could never be suggested
+        feasible = [
+            entry for entry in shared
+            if abs(len(key) - self._lengths[entry]) <= self._slack[entry] * max(len(key), self._lengths[entry])
+        ]
+        candidates = heapq.nlargest(
+            MAX_CANDIDATES, feasible, key=lambda entry: shared[entry] / (len(grams) + self._gram_counts[entry])
+        )
+        for entry in candidates:
+            candidate, candidate_skeleton, weights = self._entries[entry]
+            similarity = 1.0 - edit_distance(key, candidate, key_skeleton, candidate_skeleton) / max(len(key), len(candidate))
+            for index, weight in weights.items():
+                scores[index] = max(scores.get(index, 0.0), similarity * weight)
+
+    def _contained_scores(self, key, scores):
+        padded = f" {key} "
+        for phrase, indexes in self._phrases:
+            if phrase in padded and len(phrase) < len(padded):
+                for index in indexes:
+                    scores[index] = max(scores.get(index, 0.0), CONTAINED_WEIGHT)
+
+    def _decide(self, scores):
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] < SUGGEST_SCORE:
+            return Match(None, [], ranked[0][1] if ranked else 0.0)
+        best_choice, best = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if best >= ACCEPT_SCORE and best - runner_up >= AMBIGUITY_MARGIN:
+            return Match(best_choice, [], best)
+        suggestions = [
+            index for index, score in ranked[:MAX_SUGGESTIONS]
+            if score >= max(SUGGEST_SCORE, best - SUGGESTION_SPREAD)
+        ]
+        return Match(None, suggestions, best)
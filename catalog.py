@@ -0,0 +1,117 @@
+import functools
+import re
+
+# The service catalogue: button labels stored in service_requests, in both
+# languages, keyed by the short names the CLI and importer use. The first
+# label of each entry is the canonical (English) one.
+
+SERVICE_TYPE_LABELS = {
+    'permanent': ['⏰ Permanent', '⏰ ቋሚ'],
+    'temporary': ['🔄 Temporary', '🔄 ጊዜያዊ']
+}
+
+SERVICE_LABELS = {
+    'full_house': ['🧹 Full House Work', '🧹 ሙሉ የቤት ስራ'],
+    'cleaning': ['🏠 House Cleaning', '🏠 የቤት ፅዳት'],
+    'laundry': ['👕 Laundry Service', '👕 የልብስ እጥበት'],
+    'cooking': ['🍳 Cooking Service', '🍳 ምግብ አብሳይ'],
+    'child_care': ['👶 Child Care', '👶 የህጻን እንክብካቤ'],
+    'elder_care': ['👵 Elder Care', '👵 የአዛውንት እንክብካቤ'],
+    'pet_care': ['🐕 Pet Care', '🐕 የቤት እንስሳት'],
+    'gardening': ['🌿 Gardening', '🌿 የአትክልት ስራ'],
+    'other': ['📝 Other:']
+}
+
+# Free-text names seen in spreadsheets and typed messages, besides the labels themselves
+SERVICE_TYPE_ALIASES = {
+    'permanent': ['permanent', 'full time', 'fulltime', 'live in', 'long term', 'regular', 'ቋሚ'],
+    'temporary': ['temporary', 'temp', 'part time', 'parttime', 'one time', 'once', 'short term', 'contract', 'ጊዜያዊ']
+}
+
+SERVICE_ALIASES = {
+    'full_house': ['full house', 'full house work', 'all work', 'housemaid', 'house maid', 'maid', 'house help',
+                   'househelp', 'ሙሉ የቤት ስራ', 'የቤት ሰራተኛ'],
+    'cleaning': ['cleaning', 'house cleaning', 'clean', 'cleaner', 'ፅዳት', 'ጽዳት'],
+    'laundry': ['laundry', 'washing clothes', 'clothes washing', 'clothes', 'ironing', 'እጥበት', 'ልብስ'],
+    'cooking': ['cooking', 'cook', 'chef', 'food', 'ምግብ', 'ምግብ ማብሰል', 'አብሳይ'],
+    'child_care': ['child care', 'childcare', 'nanny', 'babysitting', 'babysitter', 'baby', 'kids', 'children',
+                   'ህጻን', 'ሕፃን', 'ልጅ'],
+    'elder_care': ['elder care', 'elderly', 'elderly care', 'caregiver', 'aged care', 'አዛውንት', 'አረጋውያን'],
+    'pet_care': ['pet care', 'pet', 'pets', 'dog', 'dog walking', 'እንስሳት'],
+    'gardening': ['gardening', 'garden', 'gardener', 'አትክልት']
+}
+
+# Separators between services in one free-text cell
+SERVICE_SEPARATORS = re.compile(r'\s*(?:[,;/|+&\n]|\band\b|\bእና\b)\s*', re.IGNORECASE)
+
+OTHER_PREFIX = '📝 Other:'
+
+
+def normalize_text(text):
+    """Lowercase, drop emoji and punctuation, and collapse spaces, for matching."""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', text.lower()).split())
+
+
+def _build_matcher(labels, aliases):
+    # Longest phrases first, so "house cleaning" is found before "cleaning"
+    phrases = {}
+    for key, names in labels.items():
+        for name in names + aliases.get(key, []):
+            normalized = normalize_text(name)
+            if normalized:
+                phrases.setdefault(normalized, key)
+    ordered = sorted(phrases, key=len, reverse=True)
+    pattern = re.compile(r'\b(?:' + '|'.join(re.escape(phrase) for phrase in ordered) + r')\b')
+    return phrases, pattern
+
+
+_SERVICE_TYPE_PHRASES, _SERVICE_TYPE_PATTERN = _build_matcher(SERVICE_TYPE_LABELS, SERVICE_TYPE_ALIASES)
+_SERVICE_PHRASES, _SERVICE_PATTERN = _build_matcher(
+    {key: labels for key, labels in SERVICE_LABELS.items() if key != 'other'}, SERVICE_ALIASES
+)
+
+
+def _match(text, phrases, pattern):
+    normalized = normalize_text(text)
+    if normalized in phrases:
+        return phrases[normalized]
+    found = pattern.search(normalized)
+    return phrases[found.group(0)] if found else None
+
+
+@functools.lru_cache(maxsize=4096)
+def match_service_type(text):
+    """The SERVICE_TYPE_LABELS key for a free-text service type, or None."""
+    return _match(text or '', _SERVICE_TYPE_PHRASES, _SERVICE_TYPE_PATTERN)
+
+
+def match_service(text):
+    """The SERVICE_LABELS key for one free-text service name, or None."""
+    return _match(text or '', _SERVICE_PHRASES, _SERVICE_PATTERN)
+
+
+@functools.lru_cache(maxsize=4096)
+def canonical_services(text):
+    """Map a free-text list of services to canonical labels, as the bot stores them.
+
+    Recognised names become their English catalogue label, in catalogue
+    order and without repeats; anything else is kept as "📝 Other: ...".
+    Returns the comma-separated string, or '' when nothing was given.
+    Cached, since imported spreadsheets repeat the same few cells.
+    """
+    keys = set()
+    others = []
+    for part in SERVICE_SEPARATORS.split(text or ''):
+        part = part.strip()
+        if not part:
+            continue
+        if part.startswith(OTHER_PREFIX):
+            others.append(part)
+            continue
+        key = match_service(part)
+        if key:
+            keys.add(key)
+        else:
+            others.append(f"{OTHER_PREFIX} {part}")
+    labels = [labels[0] for key, labels in SERVICE_LABELS.items() if key in keys]
+    return ', '.join(labels + others)
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+
+from catalog import SERVICE_TYPE_LABELS
+
+# Service-level deadlines for the dispatch queue.
+#
+# Every pending request sits in the dispatch_queue table with the deadline by
+# which staff should have assigned it: its submission time plus the SLA of
+# its service type, shortened for customers we have already served. Ordering
+# the queue by deadline therefore weighs all three at once: a temporary
+# booking jumps ahead of a permanent placement submitted a few hours
+# earlier, and an old request of either kind rises as its deadline nears.
+# The (deadline, request_id) index is the queue itself, shared by every
+# dispatcher: enqueue, claim and re-prioritise are each one B-tree insert,
+# seek or update, and a claim takes a time-limited lease on the request so
+# two dispatchers never work on the same one.
+
+# Hours from submission to assignment, by SERVICE_TYPE_LABELS key; temporary
+# bookings are usually for the next few days
+SLA_HOURS = {'temporary': 4, 'permanent': 24}
+DEFAULT_SLA_HOURS = 24
+# Customers with a request done before get this share of the SLA
+RETURNING_CUSTOMER_FACTOR = 0.5
+# How long a claim holds a request before another dispatcher may take it
+DISPATCH_LEASE_SECONDS = 900
+
+_SERVICE_TYPE_KEYS = {label: key for key, labels in SERVICE_TYPE_LABELS.items() for label in labels}
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def sla_hours(service_type, returning_customer=False):
+    """Hours a request of ``service_type`` (its stored label) may wait for assignment."""
+    hours = SLA_HOURS.get(_SERVICE_TYPE_KEYS.get(service_type), DEFAULT_SLA_HOURS)
+    return hours * RETURNING_CUSTOMER_FACTOR if returning_customer else hours
+
+
+def sla_deadline(service_type, submitted_at, returning_customer=False):
+    """The assignment deadline of a request submitted at ``submitted_at``, in the same UTC text form."""
+    submitted = datetime.fromisoformat(submitted_at)
+    deadline = submitted + timedelta(hours=sla_hours(service_type, returning_customer))
+    return deadline.strftime(TIMESTAMP_FORMAT)
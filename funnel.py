@@ -0,0 +1,222 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from telegram.ext import ConversationHandler
+
+from sessions import SessionConversationHandler
+
+logger = logging.getLogger(__name__)
+
+# Booking funnel analytics from conversation state changes.
+#
+# FunnelConversationHandler hands every change of a customer's conversation
+# state to a FunnelRecorder, which costs a dict lookup, a clock read and an
+# append of a (time, user, from, to) tuple to a fixed-size ring buffer.
+# Everything else happens every FLUSH_INTERVAL seconds: buffered events are
+# folded into journeys and appended, with the per-step aggregate deltas they
+# produce, to storage in one transaction. Reports read the small
+# funnel_steps table instead of scanning the events.
+#
+# A journey starts with a conversation (/start), or when a customer without
+# one enters the booking flow again after submitting, and ends at
+# submission, /cancel, a conversation timeout or a session eviction. Reaching
+# a step counts every earlier step as reached too, since returning customers
+# skip the phone and location steps. Journeys live in memory like the
+# conversations themselves, so ones open at a restart are never finished.
+
+# Seconds between writes of buffered events
+FLUSH_INTERVAL = 10.0
+# Events held between flushes; the oldest are dropped beyond this
+BUFFER_SIZE = 65536
+
+# Steps of the booking funnel, in order, with the conversation states (by
+# their names in bot.py's STATE_NAMES) that count as being at each
+FUNNEL_STEPS = [
+    ('menu', {'main_menu', 'info', 'settings', 'language'}),
+    ('service_type', {'service_type'}),
+    ('services', {'services', 'services_other'}),
+    ('contact', {'contact_check', 'name_confirm', 'phone'}),
+    ('location', {'location'}),
+    ('confirmation', {'confirmation'}),
+    ('submitted', {'post_submission'}),
+]
+STEP_NAMES = [step for step, _ in FUNNEL_STEPS]
+_STEP_OF_STATE = {state: index for index, (_, states) in enumerate(FUNNEL_STEPS) for state in states}
+
+# Names recorded for the end of a conversation: by a handler, by the
+# conversation timeout, or with an evicted session
+END_STATE = 'end'
+TIMEOUT_STATE = 'timeout'
+EVICTED_STATE = 'evicted'
+ENDINGS = {END_STATE, TIMEOUT_STATE, EVICTED_STATE}
+
+
+class FunnelConversationHandler(SessionConversationHandler):
+    """A SessionConversationHandler that passes every state change to its ``funnel_recorder``.
+
+    Conversations ended by their timeout or by a session eviction are
+    recorded as such; every other change, with or without a handler, as the
+    state it moved to.
+    """
+
+    funnel_recorder = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Why each conversation being ended outside its handlers is ending
+        self._endings = {}
+
+    # PTB has no hook for state changes; _update_state is where every one lands
+    def _update_state(self, new_state, key, handler=None):
+        old_state = self._conversations.get(key)
+        super()._update_state(new_state, key, handler)
+        # A handler returning the state it is in (an invalid choice, say) is not a step
+        if self.funnel_recorder is not None and new_state is not None and new_state != old_state:
+            reason = self._endings.get(key) if handler is None and new_state == self.END else None
+            self.funnel_recorder.record(key[-1], old_state, new_state, reason)
+
+    async def _trigger_timeout(self, context):
+        key = context.job.data.conversation_key
+        self._endings[key] = TIMEOUT_STATE
+        try:
+            await super()._trigger_timeout(context)
+        finally:
+            self._endings.pop(key, None)
+
+    def end_conversation(self, key):
+        self._endings[key] = EVICTED_STATE
+        try:
+            super().end_conversation(key)
+        finally:
+            del self._endings[key]
+
+
+class FunnelRecorder:
+    """Records conversation state changes and keeps the funnel aggregates up to date.
+
+    A FunnelConversationHandler calls record() for each change; a background
+    task started by start() writes through ``repository.record_funnel`` every
+    ``flush_interval`` seconds. Events and aggregate deltas from a failed write
+    are kept and retried with the next flush.
+    """
+
+    def __init__(self, repository, state_names, flush_interval=FLUSH_INTERVAL, buffer_size=BUFFER_SIZE):
+        self.repository = repository
+        self.state_names = {**state_names, ConversationHandler.END: END_STATE}
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.recorded = 0
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._journeys = {}
+        self._unwritten_events = deque(maxlen=buffer_size)
+        self._unwritten_steps = {}
+        self._task = None
+
+    def record(self, telegram_id, old_state, new_state, reason=None):
+        """Buffer one state change; old_state is None when the conversation starts.
+
+        ``reason`` names why a conversation ended (TIMEOUT_STATE or
+        EVICTED_STATE) when something other than its handlers ended it.
+        """
+        if reason is not None and new_state == ConversationHandler.END:
+            new_state = reason
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append((time.time(), telegram_id, old_state, new_state))
+
+    def start(self):
+        """Start periodic flushes on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop flushing and write what is buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error writing funnel events: {e}")
+
+    def fold(self, events):
+        """Turn buffered events into event rows, updating journeys and the pending step deltas."""
+        names = self.state_names
+        journeys = self._journeys
+        steps = self._unwritten_steps
+        last_step = len(FUNNEL_STEPS) - 1
+        rows = []
+        second = None
+        for occurred, telegram_id, old_state, new_state in events:
+            from_name = names.get(old_state, str(old_state)) if old_state is not None else None
+            to_name = names.get(new_state, str(new_state))
+            # Events come in time order, many to a second
+            if int(occurred) != second:
+                second = int(occurred)
+                occurred_at = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(second))
+                day = occurred_at[:10]
+            rows.append((telegram_id, from_name, to_name, occurred_at))
+
+            journey = journeys.get(telegram_id)
+            step = _STEP_OF_STATE.get(to_name)
+            if step is not None and (journey is not None or old_state is None or step > 0):
+                if journey is None:
+                    journey = journeys[telegram_id] = [occurred, -1]
+                if step > journey[1]:
+                    seconds = occurred - journey[0]
+                    for reached in range(journey[1] + 1, step + 1):
+                        delta = steps.setdefault((day, STEP_NAMES[reached]), [0, 0, 0.0])
+                        delta[0] += 1
+                        delta[2] += seconds
+                    journey[1] = step
+                    if step == last_step:
+                        del journeys[telegram_id]
+            elif to_name in ENDINGS and journey is not None:
+                delta = steps.setdefault((day, STEP_NAMES[journey[1]]), [0, 0, 0.0])
+                delta[1] += 1
+                del journeys[telegram_id]
+        return rows
+
+    async def flush(self):
+        """Fold buffered events and append them, with the step deltas, to storage."""
+        if self._buffer:
+            events = list(self._buffer)
+            self._buffer.clear()
+            self.recorded += len(events)
+            self._unwritten_events.extend(self.fold(events))
+        if self.dropped:
+            logger.warning(f"⚠️ Funnel buffer full, dropped {self.dropped} event(s); flush more often")
+            self.dropped = 0
+        if not self._unwritten_events and not self._unwritten_steps:
+            return
+        rows, deltas = list(self._unwritten_events), self._unwritten_steps
+        self._unwritten_events.clear()
+        self._unwritten_steps = {}
+        try:
+            await self.repository.record_funnel(rows, [(day, step, *delta) for (day, step), delta in deltas.items()])
+        except Exception:
+            # Keep them for the next flush, ahead of anything folded meanwhile
+            self._unwritten_events = deque(rows + list(self._unwritten_events), maxlen=self.buffer_size)
+            for key, delta in self._unwritten_steps.items():
+                merged = deltas.setdefault(key, [0, 0, 0.0])
+                merged[0] += delta[0]
+                merged[1] += delta[1]
+                merged[2] += delta[2]
+            self._unwritten_steps = deltas
+            raise
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error writing funnel events: {e}")
@@ -0,0 +1,215 @@
+import math
+import re
+from collections import namedtuple
+
+from button_matcher import normalize, skeleton
+
+# Offline gazetteer of Addis Ababa for resolving typed addresses to zones.
+#
+# Sub-cities and common landmarks, each with its Amharic and usual Latin
+# spellings, are loaded into a word trie at import. Words are keyed by their
+# consonant skeleton, so Amharic spelled with a different vowel order
+# ("መድሃኒአለም" for "መድሃኔዓለም") still matches. locate() walks the
+# normalised address through it, taking the longest name at each position,
+# completing a truncated last word from a prefix index and dropping Amharic
+# prepositions glued to a name ("የቦሌ", "ከፒያሳ"). A woreda number after a
+# sub-city ("Bole woreda 3") narrows the zone. Centroids are approximate, to
+# within a kilometre or so: enough for routing a request to a team and for
+# counting requests per area, not for navigation.
+
+# zone_id: (centroid, names); the first name is the display name
+SUB_CITIES = {
+    'addis_ketema': ((9.0330, 38.7350), ['Addis Ketema', 'አዲስ ከተማ', 'addis ketama']),
+    'akaki_kality': ((8.8900, 38.7800), ['Akaki Kality', 'አቃቂ ቃሊቲ', 'akaky kaliti', 'akaki kaliti', 'akaki', 'akaky',
+                                          'kality', 'kaliti', 'አቃቂ', 'ቃሊቲ']),
+    'arada': ((9.0350, 38.7500), ['Arada', 'አራዳ']),
+    'bole': ((8.9900, 38.8000), ['Bole', 'ቦሌ']),
+    'gullele': ((9.0700, 38.7350), ['Gullele', 'ጉለሌ', 'gulele', 'gulelle']),
+    'kirkos': ((9.0050, 38.7600), ['Kirkos', 'ቂርቆስ', 'qirqos', 'kirqos', 'chirkos']),
+    'kolfe_keranio': ((9.0100, 38.6950), ['Kolfe Keranio', 'ኮልፌ ቀራንዮ', 'kolfe keraniyo', 'kolfe', 'ኮልፌ']),
+    'lideta': ((9.0100, 38.7350), ['Lideta', 'ልደታ', 'ledeta']),
+    'nifas_silk_lafto': ((8.9600, 38.7400), ['Nifas Silk-Lafto', 'ንፋስ ስልክ ላፍቶ', 'nifas silk', 'nefas silk',
+                                              'nefas silk lafto', 'ንፋስ ስልክ', 'lafto', 'ላፍቶ']),
+    'yeka': ((9.0500, 38.8100), ['Yeka', 'የካ']),
+    'lemi_kura': ((9.0000, 38.8800), ['Lemi Kura', 'ለሚ ኩራ', 'lemi kurra', 'lemi'])
+}
+
+# landmark: (zone_id, centroid, names)
+LANDMARKS = {
+    'piassa': ('arada', (9.0352, 38.7525), ['Piassa', 'ፒያሳ', 'piazza', 'piasa']),
+    'arat_kilo': ('arada', (9.0330, 38.7630), ['Arat Kilo', 'አራት ኪሎ', '4 kilo']),
+    'sidist_kilo': ('gullele', (9.0440, 38.7610), ['Sidist Kilo', 'ስድስት ኪሎ', '6 kilo']),
+    'shiro_meda': ('gullele', (9.0630, 38.7630), ['Shiro Meda', 'ሽሮ ሜዳ']),
+    'entoto': ('gullele', (9.0800, 38.7600), ['Entoto', 'እንጦጦ']),
+    'merkato': ('addis_ketema', (9.0330, 38.7390), ['Merkato', 'መርካቶ', 'mercato', 'markato']),
+    'autobus_tera': ('addis_ketema', (9.0390, 38.7330), ['Autobus Tera', 'አውቶቡስ ተራ', 'atobus tera']),
+    'sebategna': ('addis_ketema', (9.0300, 38.7360), ['Sebategna', 'ሰባተኛ', 'sebategna']),
+    'tekle_haimanot': ('addis_ketema', (9.0250, 38.7420), ['Tekle Haimanot', 'ተክለ ሃይማኖት', 'teklehaimanot']),
+    'kazanchis': ('kirkos', (9.0180, 38.7680), ['Kazanchis', 'ካዛንቺስ', 'kazanches']),
+    'meskel_square': ('kirkos', (9.0108, 38.7613), ['Meskel Square', 'መስቀል አደባባይ', 'meskel adebabay']),
+    'stadium': ('kirkos', (9.0120, 38.7570), ['Stadium', 'ስታዲየም']),
+    'mexico': ('kirkos', (9.0100, 38.7460), ['Mexico', 'ሜክሲኮ', 'meksiko']),
+    'kera': ('kirkos', (8.9960, 38.7530), ['Kera', 'ቄራ', 'qera']),
+    'wollo_sefer': ('kirkos', (8.9990, 38.7710), ['Wollo Sefer', 'ወሎ ሰፈር', 'welo sefer']),
+    'bole_medhanealem': ('bole', (8.9960, 38.7860), ['Bole Medhanealem', 'ቦሌ መድሃኔዓለም', 'medhanealem',
+                                                             'medhane alem', 'መድሃኔዓለም']),
+    'edna_mall': ('bole', (8.9980, 38.7890), ['Edna Mall', 'ኤድና ሞል', 'edna']),
+    'airport': ('bole', (8.9779, 38.7993), ['Bole Airport', 'ቦሌ ኤርፖርት', 'airport', 'ኤርፖርት']),
+    'atlas': ('bole', (8.9990, 38.7810), ['Atlas', 'አትላስ']),
+    'gerji': ('bole', (8.9950, 38.8180), ['Gerji', 'ገርጂ']),
+    'summit': ('bole', (9.0030, 38.8500), ['Summit', 'ሰሚት']),
+    'goro': ('bole', (8.9940, 38.8360), ['Goro', 'ጎሮ']),
+    'bulbula': ('bole', (8.9480, 38.7890), ['Bulbula', 'ቡልቡላ']),
+    'haya_hulet': ('yeka', (9.0120, 38.7840), ['Haya Hulet', 'ሃያ ሁለት', '22 mazoria']),
+    'megenagna': ('yeka', (9.0200, 38.8010), ['Megenagna', 'መገናኛ', 'megenagnia']),
+    'cmc': ('yeka', (9.0250, 38.8460), ['CMC', 'ሲኤምሲ']),
+    'kotebe': ('yeka', (9.0330, 38.8600), ['Kotebe', 'ኮተቤ']),
+    'shola': ('yeka', (9.0300, 38.7930), ['Shola', 'ሾላ', 'shola gebeya']),
+    'gurd_shola': ('yeka', (9.0130, 38.8170), ['Gurd Shola', 'ጉርድ ሾላ']),
+    'ayat': ('lemi_kura', (9.0300, 38.8850), ['Ayat', 'አያት']),
+    'tor_hailoch': ('kolfe_keranio', (9.0120, 38.7190), ['Tor Hailoch', 'ጦር ሃይሎች', 'tor hayloch']),
+    'ayer_tena': ('kolfe_keranio', (8.9930, 38.6940), ['Ayer Tena', 'አየር ጤና', 'ayertena']),
+    'asko': ('kolfe_keranio', (9.0600, 38.7000), ['Asko', 'አስኮ']),
+    'jemo': ('nifas_silk_lafto', (8.9580, 38.7130), ['Jemo', 'ጀሞ']),
+    'lebu': ('nifas_silk_lafto', (8.9530, 38.7310), ['Lebu', 'ለቡ']),
+    'gofa': ('nifas_silk_lafto', (8.9850, 38.7520), ['Gofa', 'ጎፋ']),
+    'sarbet': ('nifas_silk_lafto', (8.9990, 38.7430), ['Sarbet', 'ሳር ቤት', 'sar bet', 'ሳርቤት']),
+    'old_airport': ('nifas_silk_lafto', (8.9930, 38.7280), ['Old Airport', 'ኦልድ ኤርፖርት', 'አሮጌው ኤርፖርት']),
+    'bisrate_gebriel': ('nifas_silk_lafto', (8.9920, 38.7350), ['Bisrate Gebriel', 'ብስራተ ገብርኤል']),
+    'haile_garment': ('nifas_silk_lafto', (8.9620, 38.7270), ['Haile Garment', 'ሃይሌ ጋርመንት']),
+    'gotera': ('nifas_silk_lafto', (8.9910, 38.7570), ['Gotera', 'ጎተራ']),
+    'saris': ('akaki_kality', (8.9530, 38.7610), ['Saris', 'ሳሪስ']),
+    'tulu_dimtu': ('akaki_kality', (8.8900, 38.7950), ['Tulu Dimtu', 'ቱሉ ዲምቱ', 'tuludimtu'])
+}
+
+# Prepositions written joined to the next word: "ከቦሌ" (from Bole), "የፒያሳ" (Piassa's)
+AMHARIC_PREFIXES = ('ወደ', 'የ', 'ከ', 'በ', 'ለ')
+# Typed words at least this long may stand for a longer name ("kazanch")
+MIN_PREFIX_LENGTH = 4
+WOREDA_PATTERN = re.compile(r'(?:^| )(?:woreda|wereda|wor|w|ወረዳ) ?0*(\d{1,2})(?= |$)')
+MAX_WOREDA = 20
+KM_PER_DEGREE = 111.2
+
+# zone_id is the sub-city, or "<sub_city>-wNN" when the woreda is known
+Place = namedtuple('Place', ['zone_id', 'sub_city', 'woreda', 'landmark', 'latitude', 'longitude'])
+
+_LEAF = ''
+
+
+def _build_index():
+    """The word trie of every name and the prefix index of its words."""
+    trie = {}
+    names = [(key, names) for key, (_, names) in SUB_CITIES.items()]
+    names += [(key, names) for key, (_, _, names) in LANDMARKS.items()]
+    for key, spellings in names:
+        for spelling in spellings:
+            node = trie
+            for word in normalize(spelling).split():
+                node = node.setdefault(skeleton(word), {})
+            node.setdefault(_LEAF, key)
+
+    prefixes = {}
+    stack = [trie]
+    while stack:
+        node = stack.pop()
+        for word, child in node.items():
+            if word == _LEAF:
+                continue
+            for length in range(MIN_PREFIX_LENGTH, len(word)):
+                prefixes.setdefault(word[:length], set()).add(word)
+            stack.append(child)
+    return trie, prefixes
+
+
+_TRIE, _PREFIXES = _build_index()
+
+
+def _child(node, token):
+    """The word below ``node`` that a typed token stands for, or None."""
+    if token in node:
+        return token
+    for prefix in AMHARIC_PREFIXES:
+        if token.startswith(prefix) and len(token) > len(prefix) and token[len(prefix):] in node:
+            return token[len(prefix):]
+    # A truncated word counts if everything it could be spells the same place
+    completions = sorted(word for word in _PREFIXES.get(token, ()) if word in node)
+    if len(completions) == 1 or (completions and len({node[word].get(_LEAF) for word in completions}) == 1
+                                 and _LEAF in node[completions[0]]):
+        return completions[0]
+    return None
+
+
+def find_places(address):
+    """Keys of every sub-city and landmark named in the address, in order."""
+    tokens = [skeleton(token) for token in normalize(address or '').split()]
+    found = []
+    start = 0
+    while start < len(tokens):
+        node = _TRIE
+        longest = None
+        position = start
+        while position < len(tokens):
+            word = _child(node, tokens[position])
+            if word is None:
+                break
+            node = node[word]
+            position += 1
+            if _LEAF in node:
+                longest = (node[_LEAF], position)
+        if longest:
+            found.append(longest[0])
+            start = longest[1]
+        else:
+            start += 1
+    return found
+
+
+def locate(address):
+    """Resolve a typed address to a Place, or None if it names no known area.
+
+    A sub-city named outright wins over the one a landmark implies; the
+    landmark's centroid is only used when both agree.
+    """
+    found = find_places(address)
+    sub_city = next((key for key in found if key in SUB_CITIES), None)
+    landmark = next((key for key in found if key in LANDMARKS), None)
+    if landmark and sub_city and LANDMARKS[landmark][0] != sub_city:
+        landmark = None
+    if landmark:
+        sub_city, (latitude, longitude), _ = LANDMARKS[landmark]
+    elif sub_city:
+        latitude, longitude = SUB_CITIES[sub_city][0]
+    else:
+        return None
+
+    woreda = None
+    match = WOREDA_PATTERN.search(normalize(address))
+    if match and 0 < int(match.group(1)) <= MAX_WOREDA:
+        woreda = int(match.group(1))
+    zone_id = f"{sub_city}-w{woreda:02d}" if woreda else sub_city
+    return Place(zone_id, sub_city, woreda, landmark, latitude, longitude)
+
+
+def distance_km(first, second):
+    """Approximate distance between two (latitude, longitude) points; fine across one city."""
+    latitude = math.radians((first[0] + second[0]) / 2)
+    return KM_PER_DEGREE * math.hypot(first[0] - second[0], (first[1] - second[1]) * math.cos(latitude))
+
+
+def describe(place):
+    """A place as staff read it, e.g. "Bole, Woreda 03 (Edna Mall)"."""
+    text = SUB_CITIES[place.sub_city][1][0]
+    if place.woreda:
+        text += f", Woreda {place.woreda:02d}"
+    if place.landmark:
+        text += f" ({LANDMARKS[place.landmark][2][0]})"
+    return text
+
+
+def zone_name(zone_id):
+    """Display name of a stored zone_id, or the id itself if unknown."""
+    sub_city, _, woreda = (zone_id or '').partition('-w')
+    if sub_city not in SUB_CITIES:
+        return zone_id
+    name = SUB_CITIES[sub_city][1][0]
+    return f"{name}, Woreda {woreda}" if woreda else name
@@ -0,0 +1,186 @@
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Seconds between event loop probes
+PROBE_INTERVAL = 0.25
+# Loop lag, in seconds, past which the process is unhealthy and the loop thread's stack is logged
+LAG_THRESHOLD = 0.5
+# Seconds after a storage error during which readiness fails
+DB_ERROR_GRACE = 60
+
+
+def _json_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+
+
+class HealthMonitor:
+    """Local health server and event loop watchdog.
+
+    A probe task sleeps PROBE_INTERVAL at a time and records how late it
+    wakes up (the event loop lag). A watchdog thread checks the probe's
+    heartbeat; when the loop hasn't come back for ``lag_threshold`` seconds
+    it logs the loop thread's current stack, which shows the handler that
+    is blocking, while it is still blocking.
+
+    ``GET /healthz`` fails once loop lag passes the threshold; ``GET
+    /readyz`` also fails when any watched bot has stopped polling, no
+    update has been processed for ``max_update_age`` seconds (if set) or
+    storage failed in the last DB_ERROR_GRACE seconds. Both return the full
+    report as JSON.
+    """
+
+    def __init__(self, repository, port, host='127.0.0.1', lag_threshold=LAG_THRESHOLD,
+                 max_update_age=0, probe_interval=PROBE_INTERVAL):
+        # Every Application watched, added by bot.build_application
+        self.applications = []
+        self.repository = repository
+        self.port = port
+        self.host = host
+        self.lag_threshold = lag_threshold
+        self.max_update_age = max_update_age
+        self.probe_interval = probe_interval
+        self.started_at = time.monotonic()
+        self.last_update_at = None
+        self.updates_processed = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._stop_watchdog = threading.Event()
+        self._watchdog = None
+        self._task = None
+        self._server = None
+
+    async def start(self):
+        """Start the probe, the watchdog thread and the HTTP server."""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        self._stop_watchdog.clear()
+        self._watchdog = threading.Thread(target=self._watch, name='loop-watchdog', daemon=True)
+        self._watchdog.start()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        logger.info(f"✅ Health endpoint listening on http://{self.host}:{self.port}/healthz")
+
+    async def stop(self):
+        """Stop serving and watching."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._stop_watchdog.set()
+            await asyncio.to_thread(self._watchdog.join)
+            self._watchdog = None
+
+    async def touch(self, update, context):
+        """Record a processed update; runs after every other handler group."""
+        self.last_update_at = time.monotonic()
+        self.updates_processed += 1
+
+    def report(self):
+        """Current health as a dict, with ``healthy`` and ``ready`` flags."""
+        now = time.monotonic()
+        update_age = now - self.last_update_at if self.last_update_at is not None else None
+        last_error = getattr(self.repository, 'last_error', None)
+        polling = bool(self.applications) and all(
+            application.running and (application.updater is None or application.updater.running)
+            for application in self.applications
+        )
+
+        problems = []
+        if self.lag > self.lag_threshold:
+            problems.append(f"event loop lag {self.lag:.2f}s")
+        healthy = not problems
+        if not polling:
+            problems.append("not polling")
+        if self.max_update_age and (update_age if update_age is not None else now - self.started_at) > self.max_update_age:
+            problems.append("no recent updates")
+        if last_error and time.time() - last_error[0] < DB_ERROR_GRACE:
+            problems.append("recent storage error")
+
+        return {
+            'healthy': healthy,
+            'ready': not problems,
+            'problems': problems,
+            'uptime_seconds': round(now - self.started_at, 1),
+            'polling': polling,
+            'updates_processed': self.updates_processed,
+            'seconds_since_last_update': round(update_age, 1) if update_age is not None else None,
+            'event_loop_lag_ms': round(self.lag * 1000, 1),
+            'max_event_loop_lag_ms': round(self.max_lag * 1000, 1),
+            'loop_stalls': self.stalls,
+            'db_backend': getattr(self.repository, 'backend', None),
+            'db_pending_writes': getattr(self.repository, 'pending_writes', None),
+            'db_last_error': {'at': _json_time(last_error[0]), 'error': last_error[1]} if last_error else None
+        }
+
+    async def _serve(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else '/'
+            report = self.report()
+            if path == '/healthz':
+                ok = report['healthy']
+            elif path == '/readyz':
+                ok = report['ready']
+            else:
+                ok = None
+            status = '404 Not Found' if ok is None else '200 OK' if ok else '503 Service Unavailable'
+            body = json.dumps(report if ok is not None else {'error': 'not found'}).encode()
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except Exception as e:
+            logger.error(f"❌ Error serving health check: {e}")
+        finally:
+            writer.close()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.probe_interval)
+            self.lag = max(0.0, loop.time() - started - self.probe_interval)
+            self.max_lag = max(self.max_lag, self.lag)
+            self._heartbeat = time.monotonic()
+
+    def _watch(self):
+        """Watchdog thread: log the loop thread's stack once per stall."""
+        reported = False
+        while not self._stop_watchdog.wait(self.probe_interval / 2):
+            stalled = time.monotonic() - self._heartbeat - self.probe_interval
+            if stalled <= self.lag_threshold:
+                reported = False
+                continue
+            # The probe can't update lag while the loop is stuck, so do it here
+            self.lag = stalled
+            self.max_lag = max(self.max_lag, stalled)
+            if reported:
+                continue
+            reported = True
+            self.stalls += 1
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame else "    (stack unavailable)\n"
+            logger.warning(f"🐢 Event loop blocked for {stalled:.2f}s, loop thread is at:\n{stack.rstrip()}")
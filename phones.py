@@ -0,0 +1,31 @@
+import re
+
+# Ethiopian mobile numbers, with or without the country code or leading 0
+ETHIOPIAN_PHONE_PATTERN = re.compile(r'^(\+251|251|0)?9\d{8}$')
+_NOT_PHONE_CHARACTERS = re.compile(r'[^\d+]')
+
+
+def clean_phone(value):
+    """Strip everything but digits and '+' from a typed number."""
+    return _NOT_PHONE_CHARACTERS.sub('', value)
+
+
+def normalize_phone(value):
+    """The number as +2519XXXXXXXX, or None if it isn't an Ethiopian mobile number."""
+    cleaned = clean_phone(value)
+    if not ETHIOPIAN_PHONE_PATTERN.match(cleaned):
+        return None
+    return '+251' + cleaned[-9:]
+
+
+def phone_variants(value):
+    """Return every stored form of an Ethiopian phone number, or None if it isn't one.
+
+    Manually typed numbers are saved as +2519XXXXXXXX but shared contacts keep
+    whatever Telegram sent, usually 2519XXXXXXXX.
+    """
+    cleaned = clean_phone(value)
+    if not ETHIOPIAN_PHONE_PATTERN.match(cleaned):
+        return None
+    local = cleaned[-9:]
+    return ['+251' + local, '251' + local, '0' + local, local]
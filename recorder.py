@@ -0,0 +1,232 @@
+import asyncio
+import gzip
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Seconds between writes of buffered updates to the recording
+FLUSH_INTERVAL = 1.0
+# Decimal places kept in recorded coordinates (2 is roughly 1 km)
+COORDINATE_PRECISION = 2
+
+# Fields holding names or handles, replaced wholesale
+_NAME_FIELDS = {'first_name', 'last_name', 'username', 'title', 'vcard'}
+# Fields holding user or chat ids, replaced by stable pseudonyms
+_ID_FIELDS = {'user_id'}
+_ID_PARENTS = {'from', 'chat', 'user', 'sender_chat', 'forward_from', 'forward_from_chat'}
+# Fields holding free text typed by the user
+_TEXT_FIELDS = {'text', 'caption'}
+
+_DIGIT_RUN = re.compile(r'\d{6,}')
+_WORD_CHARACTER = re.compile(r'[^\W\d_]')
+
+
+def _mask_digits(match):
+    """Keep the first four digits of a long number so phone prefixes still validate."""
+    digits = match.group()
+    return digits[:4] + '0' * (len(digits) - 4)
+
+
+def _mask_words(text):
+    return _WORD_CHARACTER.sub('x', _DIGIT_RUN.sub(_mask_digits, text))
+
+
+def scrub_text(text):
+    """Scrub free text typed by a user.
+
+    Button labels start with an emoji and are kept so the conversation
+    replays (UpdateRecorder also keeps typed text the menu reads as a
+    button); commands keep their name. Anything else has its letters
+    replaced with 'x' and long numbers zeroed after their prefix, keeping
+    the length so names, phones and addresses still pass validation.
+    """
+    if not text:
+        return text
+    if text.startswith('/'):
+        command, separator, rest = text.partition(' ')
+        return command + separator + _mask_words(rest)
+    if not text[0].isalnum() and text[0] != '+':
+        return text
+    return _mask_words(text)
+
+
+class Pseudonymizer:
+    """Maps real user and chat ids to stable fake ids for one recording."""
+
+    def __init__(self, key=None):
+        self.key = key or os.urandom(16)
+
+    def __call__(self, value):
+        digest = hmac.new(self.key, str(abs(value)).encode(), hashlib.sha256).digest()
+        fake = int.from_bytes(digest[:6], 'big') or 1
+        # Group chats have negative ids, private chats share the user's id
+        return -fake if value < 0 else fake
+
+
+def scrub_update(data, pseudonymize, parent=None, kept=()):
+    """Return a copy of an Update's dict with personal data removed.
+
+    Texts in ``kept`` are left as they are.
+    """
+    if isinstance(data, list):
+        return [scrub_update(item, pseudonymize, parent, kept) for item in data]
+    if not isinstance(data, dict):
+        return data
+    scrubbed = {}
+    for key, value in data.items():
+        if key in _NAME_FIELDS and isinstance(value, str):
+            scrubbed[key] = 'x' * len(value) if key != 'vcard' else ''
+        elif key == 'phone_number' and isinstance(value, str):
+            scrubbed[key] = _DIGIT_RUN.sub(_mask_digits, value)
+        elif key in ('latitude', 'longitude') and isinstance(value, (int, float)):
+            scrubbed[key] = round(value, COORDINATE_PRECISION)
+        elif key in _TEXT_FIELDS and isinstance(value, str):
+            scrubbed[key] = value if value in kept else scrub_text(value)
+        elif isinstance(value, int) and (key in _ID_FIELDS or (key == 'id' and parent in _ID_PARENTS)):
+            scrubbed[key] = pseudonymize(value)
+        else:
+            scrubbed[key] = scrub_update(value, pseudonymize, key, kept)
+    return scrubbed
+
+
+def conversation_states(conversation_handler, key_map=None):
+    """Current state of every open conversation as ``{"chat:user": state}``."""
+    key_map = key_map or (lambda value: value)
+    # PTB keeps no public view of live conversations without persistence
+    return {
+        ':'.join(str(key_map(part)) for part in key): state
+        for key, state in conversation_handler._conversations.items()
+        if isinstance(state, int)
+    }
+
+
+def open_recording(path, mode):
+    """Open a recording as text, gzip-compressed when the name ends in .gz."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_recording(path):
+    """Return ``(entries, final_states)`` from a recording.
+
+    Entries are ``(offset_seconds, update_dict)``; final_states is None if
+    the bot didn't shut down cleanly while recording.
+    """
+    entries = []
+    final_states = None
+    with open_recording(path, 'r') as recording:
+        for line in recording:
+            record = json.loads(line)
+            if 'states' in record:
+                final_states = record['states']
+            else:
+                entries.append((record['t'], record['u']))
+    return entries, final_states
+
+
+class UpdateRecorder:
+    """Appends every incoming update, with personal data scrubbed, to a JSONL recording.
+
+    Each run of the bot writes its own gzip-compressed file in ``directory``.
+    record() runs as a TypeHandler ahead of every other handler and only
+    buffers; a background task appends the buffer to the file every
+    FLUSH_INTERVAL seconds. Each line is ``{"t": seconds_since_start, "u":
+    update}``, and stop() adds a final ``{"states": ...}`` line with the open
+    conversations so a replay can check it ends in the same place.
+
+    ``button_matchers`` maps conversation states to the ButtonMatcher of the
+    menu they show. Text typed in such a state that the matcher reads as a
+    button, or offers buttons for, is recorded unscrubbed, since masking it
+    would send the replayed conversation down another path.
+    """
+
+    def __init__(self, directory, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.path = None
+        self.flush_interval = flush_interval
+        self.pseudonymize = Pseudonymizer()
+        self.conversation_handler = None
+        self.button_matchers = {}
+        self.started_at = None
+        self.recorded = 0
+        self._buffer = []
+        self._task = None
+
+    def start(self):
+        """Start periodic flushes on the running event loop."""
+        if self._task is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = os.path.join(self.directory, f"updates-{datetime.now().strftime('%Y%m%d-%H%M%S')}.jsonl.gz")
+            self.started_at = asyncio.get_running_loop().time()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"⏺️ Recording updates to {self.path}")
+
+    async def stop(self):
+        """Flush what is buffered and write the final conversation states."""
+        if self.path is None:
+            return
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.conversation_handler is not None:
+            states = conversation_states(self.conversation_handler, self.pseudonymize)
+            self._buffer.append(json.dumps({'states': states}, separators=(',', ':')))
+        await self.flush()
+        logger.info(f"⏹️ Recorded {self.recorded} update(s) to {self.path}")
+
+    async def record(self, update, context):
+        """Buffer one scrubbed update."""
+        try:
+            loop_time = asyncio.get_running_loop().time()
+            offset = loop_time - self.started_at if self.started_at is not None else 0.0
+            kept = self.button_texts(update)
+            entry = {'t': round(offset, 3), 'u': scrub_update(update.to_dict(), self.pseudonymize, kept=kept)}
+            self._buffer.append(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+            self.recorded += 1
+        except Exception as e:
+            logger.error(f"❌ Error recording update: {e}")
+
+    def button_texts(self, update):
+        """The update's text if the menu its sender is at reads it as a button, else nothing."""
+        message = update.effective_message
+        if self.conversation_handler is None or message is None or not message.text:
+            return ()
+        if update.effective_chat is None or update.effective_user is None:
+            return ()
+        # Recording runs first, so this is the state the update will be handled in
+        state = self.conversation_handler._conversations.get((update.effective_chat.id, update.effective_user.id))
+        matcher = self.button_matchers.get(state) if isinstance(state, int) else None
+        if matcher is None:
+            return ()
+        match = matcher.match(message.text)
+        return (message.text,) if match.choice is not None or match.suggestions else ()
+
+    async def flush(self):
+        """Append buffered lines to the recording off the event loop."""
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        await asyncio.to_thread(self._append, lines)
+
+    def _append(self, lines):
+        with open_recording(self.path, 'a') as recording:
+            recording.write('\n'.join(lines) + '\n')
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Error writing update recording: {e}")
@@ -0,0 +1,192 @@
+"""Replay a recorded stream of updates through the bot's handlers.
+
+Feeds a recording written with RECORD_UPDATES_DIR into the same handlers
+main() registers, against a fresh SQLite database and a stubbed Bot API
+that answers every call locally. Reports throughput, handler latency, Bot
+API calls and handler errors, and compares the open conversations at the
+end with the states the recording finished in.
+
+Usage: python replay.py RECORDING [--speed 0] [--database FILE]
+
+--speed 0 (the default) replays as fast as possible; 1 keeps the recorded
+timing and 10 runs ten times faster. Duplicate-Confirm detection depends on
+wall-clock time, so very fast replays of rapid repeated taps can diverge.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from telegram import Update
+from telegram.ext import Application, ConversationHandler
+from telegram.request import BaseRequest
+
+import bot
+from recorder import conversation_states, read_recording
+from storage import SQLiteRepository
+
+STUB_BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Replay', 'username': 'replay_bot'}
+
+
+class StubRequest(BaseRequest):
+    """Answers Bot API calls locally, counting them by method and bytes sent.
+
+    ``latency`` seconds are added to every call to stand in for the HTTPS
+    round-trip to Telegram.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = Counter()
+        self.bytes_sent = Counter()
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        endpoint = url.rsplit('/', 1)[-1]
+        self.calls[endpoint] += 1
+        if request_data:
+            self.bytes_sent[endpoint] += len(request_data.json_payload)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        parameters = request_data.json_parameters if request_data else {}
+
+        if endpoint == 'getMe':
+            result = STUB_BOT_USER
+        elif endpoint in ('sendMessage', 'sendContact', 'sendLocation', 'sendDocument', 'editMessageText'):
+            if endpoint != 'editMessageText':
+                self._message_id += 1
+            chat_id = int(parameters.get('chat_id', 0))
+            result = {
+                'message_id': int(parameters.get('message_id', self._message_id)),
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private' if chat_id > 0 else 'group'},
+                'from': STUB_BOT_USER,
+                'text': parameters.get('text', '')
+            }
+        elif endpoint == 'getUpdates':
+            result = []
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode()
+
+
+async def replay(entries, speed, database_file):
+    """Run the recorded updates and return the replay's report as a dict."""
+    # Background jobs that would touch files outside the replay
+    bot.BACKUP_INTERVAL_HOURS = 0
+
+    stub = StubRequest()
+    application = bot.build_application(
+        Application.builder().token('0:replay').request(stub).get_updates_request(StubRequest()).job_queue(None),
+        SQLiteRepository(database_file)
+    )
+    conversation_handler = next(
+        handler for handler in application.handlers[0] if isinstance(handler, ConversationHandler)
+    )
+
+    errors = []
+
+    async def record_error(update, context):
+        errors.append(repr(context.error))
+
+    application.add_error_handler(record_error)
+
+    latencies = []
+    async with application:
+        await bot.post_init(application)
+        await application.start()
+        started = time.perf_counter()
+        for offset, data in entries:
+            if speed > 0:
+                delay = started + offset / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            update = Update.de_json(data, application.bot)
+            handled = time.perf_counter()
+            await application.process_update(update)
+            latencies.append((time.perf_counter() - handled) * 1000)
+        elapsed = time.perf_counter() - started
+        states = conversation_states(conversation_handler)
+        await application.stop()
+        await bot.post_shutdown(application)
+
+    return {
+        'updates': len(entries),
+        'elapsed': elapsed,
+        'latencies': sorted(latencies),
+        'api_calls': stub.calls,
+        'errors': errors,
+        'states': states
+    }
+
+
+def diff_states(expected, actual):
+    """Conversations whose final state differs, as ``{key: (expected, actual)}``."""
+    return {
+        key: (expected.get(key), actual.get(key))
+        for key in sorted(set(expected) | set(actual))
+        if expected.get(key) != actual.get(key)
+    }
+
+
+def print_report(report, expected_states):
+    latencies = report['latencies']
+    print(f"▶️ Replayed {report['updates']} update(s) in {report['elapsed']:.2f}s "
+          f"({report['updates'] / max(report['elapsed'], 1e-9):,.0f} updates/s)")
+    if latencies:
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"   handler latency p50 {latencies[len(latencies) // 2]:.2f} ms  "
+              f"p99 {p99:.2f} ms  max {latencies[-1]:.2f} ms")
+    calls = ', '.join(f"{endpoint} {count}" for endpoint, count in report['api_calls'].most_common())
+    print(f"   Bot API calls: {calls or 'none'}")
+
+    if report['errors']:
+        print(f"❌ {len(report['errors'])} handler error(s):")
+        for error in Counter(report['errors']).most_common():
+            print(f"   • {error[0]} x{error[1]}")
+
+    if expected_states is None:
+        print(f"ℹ️  Recording has no final states; {len(report['states'])} conversation(s) open after replay")
+        return True
+    divergence = diff_states(expected_states, report['states'])
+    if not divergence:
+        print(f"✅ Final states match ({len(expected_states)} open conversation(s))")
+        return True
+    print(f"❌ {len(divergence)} conversation(s) ended in a different state:")
+    for key, (expected, actual) in divergence.items():
+        print(f"   • {key}: recorded {expected}, replayed {actual}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recording')
+    parser.add_argument('--speed', type=float, default=0, help="Replay speed multiplier; 0 for as fast as possible")
+    parser.add_argument('--database', help="SQLite file to replay into (default: a temporary file)")
+    args = parser.parse_args()
+
+    entries, expected_states = read_recording(args.recording)
+    with tempfile.TemporaryDirectory() as tmp:
+        database_file = args.database or os.path.join(tmp, 'replay.db')
+        report = asyncio.run(replay(entries, args.speed, database_file))
+    matched = print_report(report, expected_states)
+    return 0 if matched and not report['errors'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
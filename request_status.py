@@ -0,0 +1,120 @@
+import asyncio
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks for status changes made outside this process
+DEFAULT_POLL_INTERVAL = 5
+# Oldest cached entry served even if no change was seen, as a backstop
+DEFAULT_MAX_AGE = 300
+# Users whose open requests are kept, least recently asked dropped first
+DEFAULT_MAX_USERS = 10000
+# Open requests listed per user
+OPEN_REQUESTS_LIMIT = 10
+# Transitions read per query while catching up
+TRANSITIONS_BATCH = 1000
+
+
+class StatusCache:
+    """Per-user cache of open requests behind the customer /status command.
+
+    An entry lives until a status change for one of the user's requests
+    invalidates it. Changes made through transition() invalidate at once;
+    changes from other processes (the database viewer, another bot host)
+    are picked up by a background task that reads new rows of the
+    transitions table every ``poll_interval`` seconds, which is one indexed
+    query however many users are cached. Concurrent misses for one user
+    share a single query.
+    """
+
+    def __init__(self, repository, poll_interval=DEFAULT_POLL_INTERVAL, max_age=DEFAULT_MAX_AGE,
+                 max_users=DEFAULT_MAX_USERS):
+        self.repository = repository
+        self.poll_interval = poll_interval
+        self.max_age = max_age
+        self.max_users = max_users
+        self.last_transition_id = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._task = None
+
+    def start(self):
+        """Start watching for status changes on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop watching for status changes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def open_requests(self, telegram_id):
+        """The user's open requests, from the cache when possible."""
+        now = asyncio.get_running_loop().time()
+        entry = self._entries.get(telegram_id)
+        if entry is not None and now - entry[0] <= self.max_age:
+            self._entries.move_to_end(telegram_id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        future = self._loading.get(telegram_id)
+        if future is None:
+            future = asyncio.ensure_future(self.repository.open_requests(telegram_id, OPEN_REQUESTS_LIMIT))
+            self._loading[telegram_id] = future
+            future.add_done_callback(lambda done: self._store(telegram_id, done, now))
+        return await asyncio.shield(future)
+
+    def _store(self, telegram_id, future, loaded_at):
+        # An invalidation during the query dropped this future; its rows may be stale
+        if self._loading.get(telegram_id) is not future:
+            return
+        del self._loading[telegram_id]
+        if future.cancelled() or future.exception() is not None:
+            return
+        self._entries[telegram_id] = (loaded_at, future.result())
+        self._entries.move_to_end(telegram_id)
+        while len(self._entries) > self.max_users:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, telegram_id):
+        """Forget a user's cached requests, including a query still in flight."""
+        self._entries.pop(telegram_id, None)
+        self._loading.pop(telegram_id, None)
+
+    async def transition(self, request_id, status, changed_by=None, assigned_to=None, note=None):
+        """Change a request's status and invalidate its owner; raises ValueError if not allowed."""
+        telegram_id = await self.repository.transition_request(request_id, status, changed_by, assigned_to, note)
+        if telegram_id is not None:
+            self.invalidate(telegram_id)
+        return telegram_id
+
+    async def poll(self):
+        """Invalidate users whose requests changed since the last poll."""
+        if self.last_transition_id is None:
+            # Nothing cached predates this, so earlier changes don't matter
+            self.last_transition_id = await self.repository.latest_transition_id()
+            return
+        while True:
+            rows = await self.repository.transitions_since(self.last_transition_id, TRANSITIONS_BATCH)
+            for transition_id, telegram_id in rows:
+                self.invalidate(telegram_id)
+                self.last_transition_id = transition_id
+            if len(rows) < TRANSITIONS_BATCH:
+                return
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"❌ Error checking request status changes: {e}")
+            await asyncio.sleep(self.poll_interval)
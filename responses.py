@@ -0,0 +1,56 @@
+# Stay under Telegram's 4096 character message limit
+MAX_MESSAGE_LENGTH = 4000
+# Join a handler's texts into as few messages as fit; False sends every text on its own
+COALESCE_REPLIES = True
+
+# Separates texts joined into one message
+SEPARATOR = "\n\n"
+
+
+class Reply:
+    """Collects the texts a handler sends and delivers them as few messages as possible.
+
+    Each Bot API call is a round-trip the user waits through, so a step that
+    used to send a confirmation and then the next prompt sends one message
+    instead. Texts are joined with a blank line up to MAX_MESSAGE_LENGTH, and
+    the last reply_markup given goes on the final message, leaving the user
+    with the keyboard the handler meant to show.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        self.texts = []
+        self.reply_markup = None
+
+    def add(self, text, reply_markup=None):
+        """Queue a text, and the keyboard to show once everything is sent."""
+        self.texts.append((text, reply_markup))
+        if reply_markup is not None:
+            self.reply_markup = reply_markup
+        return self
+
+    def messages(self):
+        """The texts joined into as few messages as fit."""
+        messages = []
+        for text, _ in self.texts:
+            if messages and len(messages[-1]) + len(SEPARATOR) + len(text) <= MAX_MESSAGE_LENGTH:
+                messages[-1] += SEPARATOR + text
+            else:
+                messages.append(text)
+        return messages
+
+    async def send(self):
+        """Send everything queued; returns the number of messages sent."""
+        if not COALESCE_REPLIES:
+            for text, reply_markup in self.texts:
+                await self.message.reply_text(text, reply_markup=reply_markup)
+            sent = len(self.texts)
+        else:
+            messages = self.messages()
+            for index, text in enumerate(messages):
+                last = index == len(messages) - 1
+                await self.message.reply_text(text, reply_markup=self.reply_markup if last else None)
+            sent = len(messages)
+        self.texts = []
+        self.reply_markup = None
+        return sent
@@ -0,0 +1,215 @@
+import re
+from contextlib import contextmanager
+
+# Full-text search over service requests.
+#
+# service_requests_fts holds a folded copy of name, location and services with
+# rowid = request_id. Triggers keep it in sync, and the folding is done with
+# plain replace() calls so any connection (bot, viewer, sqlite3 shell) can write
+# to service_requests without registering Python functions first.
+
+FTS_TABLE = 'service_requests_fts'
+FTS_COLUMNS = ['name', 'location', 'services']
+INSERT_TRIGGER = 'service_requests_fts_insert'
+
+# Folding replace() calls per nested subselect, kept well under SQLite's parser limit
+FOLD_STAGE_SIZE = 16
+
+
+def _ethiopic_family(base, count=8):
+    """Return the syllables of an Ethiopic consonant family, first order first."""
+    return [chr(base + order) for order in range(count)]
+
+
+def _build_folds():
+    """Map homophone Ethiopic letters onto one spelling.
+
+    ሐ, ኀ and ሠ, ዐ families are folded onto ሀ, ሰ and አ order by order, and the
+    fourth-order "a" forms (ሃ, ሓ, ኃ, ዓ, ኣ) onto the first order, since both are
+    written interchangeably in addresses and names.
+    """
+    folds = {}
+    h_family = _ethiopic_family(0x1200)
+    s_family = _ethiopic_family(0x1230)
+    a_family = _ethiopic_family(0x12A0)
+    for variant_base in (0x1210, 0x1280):
+        for variant, target in zip(_ethiopic_family(variant_base, 7), h_family):
+            folds[variant] = target
+    for variant, target in zip(_ethiopic_family(0x1220), s_family):
+        folds[variant] = target
+    for variant, target in zip(_ethiopic_family(0x12D0, 7), a_family):
+        folds[variant] = target
+    folds[h_family[3]] = h_family[0]
+    folds[a_family[3]] = a_family[0]
+    for letter, target in list(folds.items()):
+        if target in (h_family[3], a_family[3]):
+            folds[letter] = target.translate({ord(h_family[3]): h_family[0], ord(a_family[3]): a_family[0]})
+    return folds
+
+
+ETHIOPIC_FOLDS = _build_folds()
+_FOLD_TABLE = str.maketrans(ETHIOPIC_FOLDS)
+
+# Emoji and pictographs used as button prefixes, plus variation selectors and ZWJ
+_EMOJI_PATTERN = re.compile(
+    '[\U0001F000-\U0001FAFF\u2139\u2190-\u21FF\u2300-\u27BF\u2B00-\u2BFF\uFE0F\u200D]'
+)
+
+
+def normalize_text(text):
+    """Fold Ethiopic homophones and strip emoji prefixes, as the index stores text."""
+    if not text:
+        return ''
+    text = _EMOJI_PATTERN.sub(' ', text)
+    return text.translate(_FOLD_TABLE).lower()
+
+
+def sql_fold_select(rowid_expression, source_columns, from_clause=''):
+    """SELECT statement yielding ``request_id`` and the folded FTS columns.
+
+    Applies the same Ethiopic folding as normalize_text with replace(). The
+    calls are split across nested subselects because SQLite's parser overflows
+    on much more than 30 nested function calls in one expression. Emoji don't
+    need stripping here: the unicode61 tokenizer already treats symbols as
+    separators.
+    """
+    selected = ', '.join(
+        f"lower(coalesce({source}, '')) AS {column}"
+        for source, column in zip(source_columns, FTS_COLUMNS)
+    )
+    statement = f"SELECT {rowid_expression} AS request_id, {selected} {from_clause}"
+
+    folds = list(ETHIOPIC_FOLDS.items())
+    for start in range(0, len(folds), FOLD_STAGE_SIZE):
+        stage = []
+        for column in FTS_COLUMNS:
+            expression = column
+            for variant, target in folds[start:start + FOLD_STAGE_SIZE]:
+                expression = f"replace({expression}, '{variant}', '{target}')"
+            stage.append(f"{expression} AS {column}")
+        statement = f"SELECT request_id, {', '.join(stage)} FROM ({statement})"
+    return statement
+
+
+def ensure_search_index(conn):
+    """Create the FTS table and its sync triggers, backfilling existing rows once."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+    if exists:
+        return
+
+    folded = sql_fold_select('new.request_id', [f'new.{column}' for column in FTS_COLUMNS])
+    conn.executescript(f'''
+        CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {', '.join(FTS_COLUMNS)},
+            tokenize = 'unicode61 remove_diacritics 2'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS {INSERT_TRIGGER}
+        AFTER INSERT ON service_requests BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)})
+            {folded};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS service_requests_fts_update
+        AFTER UPDATE OF {', '.join(FTS_COLUMNS)} ON service_requests BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.request_id;
+            INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)})
+            {folded};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS service_requests_fts_delete
+        AFTER DELETE ON service_requests BEGIN
+            DELETE FROM {FTS_TABLE} WHERE rowid = old.request_id;
+        END;
+    ''')
+    rebuild_search_index(conn)
+
+
+def rebuild_search_index(conn):
+    """Repopulate the FTS table from service_requests."""
+    folded = sql_fold_select('request_id', FTS_COLUMNS, 'FROM service_requests')
+    conn.execute(f'DELETE FROM {FTS_TABLE}')
+    conn.execute(f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) {folded}")
+    conn.commit()
+
+
+def build_match_query(term, prefix=True):
+    """Turn free text into an FTS5 query matching every word, or None.
+
+    With ``prefix`` each word also matches longer tokens ("medhane" finds
+    "medhanealem").
+    """
+    words = re.findall(r'\w+', normalize_text(term))
+    if not words:
+        return None
+    suffix = '*' if prefix else ''
+    return ' '.join(f'"{word}"{suffix}' for word in words)
+
+
+def _run_search(conn, match, columns, clauses, params, limit):
+    """Run one FTS query joined to service_requests, newest first."""
+    # The subquery only exposes match_id, so filter clauses can name
+    # service_requests columns without clashing with the FTS columns
+    query = f'''
+        SELECT {', '.join(columns)}
+        FROM (SELECT rowid AS match_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ?)
+        JOIN service_requests ON request_id = match_id
+    '''
+    query_params = [match]
+    if clauses:
+        query += ' WHERE ' + ' AND '.join(clauses)
+        query_params.extend(params)
+    query += ' ORDER BY match_id DESC'
+    if limit:
+        query += ' LIMIT ?'
+        query_params.append(limit)
+    return conn.execute(query, query_params).fetchall()
+
+
+def search_requests(conn, term, columns, clauses=(), params=(), limit=20):
+    """Return up to ``limit`` requests matching ``term``, newest first.
+
+    FTS5 walks whole-word matches in descending rowid order and the join stops
+    at ``limit``, which is sub-millisecond even for common words. Prefix
+    matching has to merge every token sharing the prefix, so it only runs when
+    whole words don't fill the page; its results are a superset of the first
+    query's. ``clauses`` are extra filters on service_requests columns.
+    Returns None if ``term`` has no searchable words.
+    """
+    match = build_match_query(term, prefix=False)
+    if match is None:
+        return None
+
+    if limit:
+        rows = _run_search(conn, match, columns, clauses, params, limit)
+        if len(rows) >= limit:
+            return rows
+    return _run_search(conn, build_match_query(term), columns, clauses, params, limit)
+
+
+@contextmanager
+def batch_indexed(conn):
+    """Index the service_requests inserted inside the block in one pass.
+
+    The insert trigger folds each row with ~100 nested replace() calls; for
+    bulk inserts it is dropped for the block and the new rows are folded in
+    Python and added with one executemany, then the trigger is restored.
+    Must run inside a write transaction, so no other connection ever sees
+    the trigger missing; if the block raises, rolling back restores it.
+    """
+    trigger_sql = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (INSERT_TRIGGER,)
+    ).fetchone()[0]
+    last_id = conn.execute('SELECT COALESCE(MAX(request_id), 0) FROM service_requests').fetchone()[0]
+    conn.execute(f'DROP TRIGGER {INSERT_TRIGGER}')
+    yield
+    new_rows = conn.execute(
+        f"SELECT request_id, {', '.join(FTS_COLUMNS)} FROM service_requests WHERE request_id > ?", (last_id,)
+    )
+    conn.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, {', '.join(FTS_COLUMNS)}) VALUES (?{', ?' * len(FTS_COLUMNS)})",
+        ((row[0], *(normalize_text(value) for value in row[1:])) for row in new_rows)
+    )
+    conn.execute(trigger_sql)
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from enum import IntEnum
+
+from telegram.ext import ConversationHandler
+
+logger = logging.getLogger(__name__)
+
+# Seconds a user can stay idle before their session is evicted
+SESSION_IDLE_TTL = 24 * 3600
+# Sessions kept in memory; the least recently active are evicted beyond this
+MAX_SESSIONS = 10000
+# Seconds between eviction sweeps
+SWEEP_INTERVAL = 300
+
+# Version tag of Session.dumps(), bumped if the field order changes
+SESSION_FORMAT = 1
+
+
+class ServiceType(IntEnum):
+    NONE = 0
+    PERMANENT = 1
+    TEMPORARY = 2
+
+
+class Source(IntEnum):
+    """Where a phone number or location came from."""
+    MANUAL_ENTRY = 0
+    CONTACT_SHARED = 1
+    GPS = 2
+
+    @property
+    def db_value(self):
+        """The string stored in phone_source/location_source."""
+        return self.name.lower()
+
+
+class SavedContact:
+    """Contact details remembered from the last submitted request."""
+    __slots__ = ('name', 'phone', 'location', 'phone_source')
+
+    def __init__(self, name, phone, location=None, phone_source=Source.MANUAL_ENTRY):
+        self.name = name
+        self.phone = phone
+        self.location = location
+        self.phone_source = phone_source
+
+
+class Submission:
+    """The last request saved for a user, for answering repeated Confirm taps."""
+    __slots__ = ('idempotency_key', 'request_id', 'submitted_at')
+
+    def __init__(self, idempotency_key, request_id, submitted_at):
+        self.idempotency_key = idempotency_key
+        self.request_id = request_id
+        self.submitted_at = submitted_at
+
+
+class RequestDraft:
+    """The service request being filled in.
+
+    Menu services are bits in ``services_mask`` (bit i is the i-th service
+    button); free-text "Other" services are kept separately. ``zone`` is the
+    gazetteer.Place a typed location resolved to, if any.
+    """
+    __slots__ = ('service_type', 'services_mask', 'other_services', 'name', 'phone', 'phone_source',
+                 'location', 'location_source', 'zone', 'editing_from_confirmation', 'idempotency_key')
+
+    def __init__(self):
+        self.service_type = ServiceType.NONE
+        self.services_mask = 0
+        self.other_services = ()
+        self.name = None
+        self.phone = None
+        self.phone_source = Source.MANUAL_ENTRY
+        self.location = None
+        self.location_source = Source.MANUAL_ENTRY
+        self.zone = None
+        self.editing_from_confirmation = False
+        self.idempotency_key = None
+
+    def has_services(self):
+        return bool(self.services_mask or self.other_services)
+
+    def toggle_service(self, bit):
+        """Flip one service; returns True if it is now selected."""
+        self.services_mask ^= bit
+        return bool(self.services_mask & bit)
+
+    def add_other_service(self, text):
+        self.other_services = self.other_services + (text,)
+
+
+class Session:
+    """Everything the bot keeps for one user, used as PTB's user_data.
+
+    Registered through ContextTypes(user_data=Session), so context.user_data
+    is one of these. dumps()/loads() serialise the fields worth keeping across
+    an eviction or restart (language, Telegram profile and saved contact) as
+    a compact JSON array; the draft is never persisted.
+    """
+    __slots__ = ('language', 'telegram_id', 'username', 'first_name', 'last_name',
+                 'detected_name', 'saved_contact', 'last_submission', 'draft')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """Forget everything, as at /start."""
+        self.language = 'amharic'
+        self.telegram_id = None
+        self.username = None
+        self.first_name = None
+        self.last_name = None
+        self.detected_name = None
+        self.saved_contact = None
+        self.last_submission = None
+        self.draft = RequestDraft()
+
+    def new_draft(self):
+        """Start a fresh request, keeping the user's profile and saved contact."""
+        self.draft = RequestDraft()
+
+    def has_persistent_data(self):
+        return self.telegram_id is not None or self.saved_contact is not None or self.language != 'amharic'
+
+    def dumps(self):
+        """Serialise the persistent fields."""
+        contact = self.saved_contact
+        return json.dumps([
+            SESSION_FORMAT, self.language, self.telegram_id, self.username, self.first_name,
+            self.last_name, self.detected_name,
+            [contact.name, contact.phone, contact.location, int(contact.phone_source)] if contact else None
+        ], ensure_ascii=False, separators=(',', ':'))
+
+    def loads(self, text):
+        """Restore the persistent fields written by dumps(); returns self."""
+        data = json.loads(text)
+        (_, self.language, self.telegram_id, self.username, self.first_name,
+         self.last_name, self.detected_name, contact) = data
+        self.saved_contact = SavedContact(contact[0], contact[1], contact[2], Source(contact[3])) if contact else None
+        return self
+
+
+class SessionConversationHandler(ConversationHandler):
+    """A ConversationHandler that knows each user's open conversations, so a SessionStore can end them.
+
+    Keys are whatever per_chat/per_user/per_message build, recorded against
+    the user whose update opened or continued the conversation.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_conversations = {}
+
+    async def handle_update(self, update, application, check_result, context):
+        user = update.effective_user
+        if user is not None:
+            self.user_conversations.setdefault(user.id, set()).add(check_result[1])
+        return await super().handle_update(update, application, check_result, context)
+
+    def open_conversations(self, user_id):
+        """Keys of the user's conversations that have not ended, forgetting the ended ones."""
+        keys = [key for key in self.user_conversations.get(user_id, ()) if key in self._conversations]
+        if keys:
+            self.user_conversations[user_id] = set(keys)
+        else:
+            self.user_conversations.pop(user_id, None)
+        return keys
+
+    def end_conversation(self, key):
+        """End an open conversation and cancel its pending timeout."""
+        timeout_job = self.timeout_jobs.pop(key, None)
+        if timeout_job is not None:
+            timeout_job.schedule_removal()
+        self._update_state(self.END, key)
+
+
+class SessionStore:
+    """Keeps the application's user_data bounded by idle time and count.
+
+    touch() runs before every other handler and records when each user was
+    last active, in LRU order. A background sweep evicts users idle longer
+    than ``idle_ttl`` and then the least recently active beyond
+    ``max_sessions``: the persistent part of their Session is saved through
+    the storage repository and the rest, with their private chat_data, is
+    dropped. A user's first update after an eviction or a restart loads it
+    back.
+
+    Users part-way through a conversation of ``conversation_handler`` (a
+    SessionConversationHandler) keep their session while over the limit,
+    since the draft lives in it; the conversation timeout ends it. An idle
+    user's conversations are ended with their session, so their next message
+    starts afresh.
+    """
+
+    def __init__(self, application, repository, idle_ttl=SESSION_IDLE_TTL,
+                 max_sessions=MAX_SESSIONS, sweep_interval=SWEEP_INTERVAL):
+        self.application = application
+        self.repository = repository
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self.sweep_interval = sweep_interval
+        self.last_seen = OrderedDict()
+        self.conversation_handler = None
+        self._task = None
+
+    def start(self):
+        """Start periodic sweeps on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop periodic sweeps."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def touch(self, update, context):
+        """Mark the user as active, restoring a spilled session on their first update."""
+        user = update.effective_user
+        if user is None:
+            return
+        if user.id in self.last_seen:
+            self.last_seen.move_to_end(user.id)
+        elif context.user_data.telegram_id is None:
+            try:
+                restored = await self.repository.load_preferences(user.id)
+                if restored:
+                    context.user_data.loads(restored)
+            except Exception as e:
+                logger.error(f"❌ Error restoring session for user {user.id}: {e}")
+        self.last_seen[user.id] = time.monotonic()
+
+    def evict(self, now=None):
+        """Drop idle and over-limit sessions; returns ``{user_id: serialised_session}`` to spill."""
+        now = time.monotonic() if now is None else now
+        spilled = {}
+        handler = self.conversation_handler
+        for user_id, seen in list(self.last_seen.items()):
+            idle = now - seen > self.idle_ttl
+            if not idle and len(self.last_seen) <= self.max_sessions:
+                break
+            keys = handler.open_conversations(user_id) if handler else ()
+            if keys and not idle:
+                continue
+            for key in keys:
+                handler.end_conversation(key)
+            if handler:
+                handler.user_conversations.pop(user_id, None)
+            del self.last_seen[user_id]
+            session = self.application.user_data.get(user_id)
+            if session is not None and session.has_persistent_data():
+                spilled[user_id] = session.dumps()
+            self.application.drop_user_data(user_id)
+            self.application.drop_chat_data(user_id)
+        return spilled
+
+    async def sweep(self):
+        """Evict sessions and save what is worth keeping."""
+        active = len(self.last_seen)
+        spilled = self.evict()
+        if spilled:
+            await self.repository.save_preferences(spilled)
+        if active != len(self.last_seen):
+            logger.info(f"🧹 Evicted {active - len(self.last_seen)} session(s), "
+                        f"{len(spilled)} spilled to disk, {len(self.last_seen)} active")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"❌ Error sweeping sessions: {e}")
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+from telegram.error import RetryAfter
+
+logger = logging.getLogger(__name__)
+
+# Telegram allows roughly 20 messages a minute into one group chat
+MIN_SEND_INTERVAL = 3.0
+# Most requests folded into a single digest message
+MAX_DIGEST_SIZE = 25
+# Pending notifications kept before new ones are dropped
+MAX_QUEUE_SIZE = 1000
+# Stay under Telegram's 4096 character message limit
+MAX_MESSAGE_LENGTH = 4000
+
+
+def zone_line(request, indent=''):
+    """The request's resolved zone as its own line, or '' if there is none."""
+    return f"{indent}🗺️ Zone: {request['zone']}\n" if request.get('zone') else ''
+
+
+def format_request(request):
+    """Format one new request as a standalone staff message."""
+    return (
+        f"🆕 New Service Request #{request['request_id']}\n\n"
+        f"👤 Name: {request['name']}\n"
+        f"📞 Phone: {request['phone']}\n"
+        f"📍 Location: {request['location']}\n"
+        f"{zone_line(request)}"
+        f"⚡ Service Type: {request['service_type']}\n"
+        f"🛠️ Services: {request['services']}"
+    )
+
+
+def format_digest(requests):
+    """Format several new requests as digest messages, split to fit Telegram's limit."""
+    header = f"🆕 {len(requests)} New Service Requests\n"
+    messages = []
+    current = header
+    for request in requests:
+        entry = (
+            f"\n📌 #{request['request_id']} - {request['name']} - {request['phone']}\n"
+            f"   ⚡ {request['service_type']} | 🛠️ {request['services']}\n"
+            f"   📍 {request['location']}\n"
+            f"{zone_line(request, '   ')}"
+        )
+        if len(current) + len(entry) > MAX_MESSAGE_LENGTH:
+            messages.append(current)
+            current = header
+        current += entry
+    messages.append(current)
+    return messages
+
+
+class StaffNotifier:
+    """Posts new service requests to a staff group chat from a background task.
+
+    notify() only enqueues, so handlers never wait on the Bot API. The worker
+    sends at most one message per MIN_SEND_INTERVAL; requests that arrive while
+    it waits are coalesced into a digest, so a quiet period gives one message
+    per request and a burst gives a few digests.
+    """
+
+    def __init__(self, bot, chat_id, min_interval=MIN_SEND_INTERVAL, max_digest_size=MAX_DIGEST_SIZE):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.min_interval = min_interval
+        self.max_digest_size = max_digest_size
+        self.queue = asyncio.Queue(maxsize=MAX_QUEUE_SIZE)
+        self._task = None
+        self._last_sent = 0.0
+
+    def start(self):
+        """Start the background sender on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the background sender, logging anything left unsent."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if not self.queue.empty():
+            logger.warning(f"⚠️ {self.queue.qsize()} staff notification(s) not sent before shutdown")
+
+    def notify(self, request):
+        """Queue a saved request for the staff chat without waiting."""
+        try:
+            self.queue.put_nowait(request)
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Staff notification queue full, dropping request #{request.get('request_id')}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+
+            # Wait out the send interval; anything arriving meanwhile joins the batch
+            wait = self.min_interval - (loop.time() - self._last_sent)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            while len(batch) < self.max_digest_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            messages = [format_request(batch[0])] if len(batch) == 1 else format_digest(batch)
+            for index, text in enumerate(messages):
+                if index:
+                    await asyncio.sleep(self.min_interval)
+                await self._send(text)
+                self._last_sent = loop.time()
+
+    async def _send(self, text):
+        """Send one message, honouring flood-control back-off once."""
+        for attempt in range(2):
+            try:
+                await self.bot.send_message(chat_id=self.chat_id, text=text)
+                return
+            except RetryAfter as e:
+                delay = e.retry_after
+                delay = delay.total_seconds() if hasattr(delay, 'total_seconds') else delay
+                logger.warning(f"⚠️ Staff chat flood control, retrying in {delay}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                logger.error(f"❌ Error sending staff notification: {e}")
+                return
+        logger.error("❌ Staff notification dropped after flood-control retry")
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import sqlite3
+from datetime import datetime, timezone
+
+from archive import ARCHIVE_DIR, archived_totals
+
+logger = logging.getLogger(__name__)
+
+# Seconds between background refreshes
+DEFAULT_REFRESH_INTERVAL = 60
+# Oldest snapshot an admin command will accept before forcing a refresh
+DEFAULT_MAX_STALENESS = 120
+# Recent requests kept in the snapshot, which caps /recent N
+RECENT_LIMIT = 50
+
+SERVICE_TYPE_NAMES = {
+    '⏰ Permanent': 'Permanent',
+    '⏰ ቋሚ': 'Permanent',
+    '🔄 Temporary': 'Temporary',
+    '🔄 ጊዜያዊ': 'Temporary'
+}
+
+
+def today_start_utc():
+    """Start of the local calendar day as a UTC timestamp string, matching submitted_at."""
+    local_midnight = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+    return local_midnight.astimezone(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _service_type_breakdown(cursor, where='', params=()):
+    """Count requests per service type, merging the English and Amharic labels."""
+    cursor.execute(f'SELECT service_type, COUNT(*) FROM service_requests {where} GROUP BY service_type', params)
+    breakdown = {}
+    for service_type, count in cursor.fetchall():
+        name = SERVICE_TYPE_NAMES.get(service_type, service_type)
+        breakdown[name] = breakdown.get(name, 0) + count
+    return breakdown
+
+
+def collect_snapshot(database_file, archive_dir=ARCHIVE_DIR, tenant_id=None):
+    """Run the dashboard queries once and return the results as a dict.
+
+    All-time totals include archived requests; today's numbers and recent
+    requests only ever live in the hot database. With ``tenant_id``, only
+    that tenant's users and requests are counted.
+    """
+    conn = sqlite3.connect(database_file)
+    try:
+        cursor = conn.cursor()
+        today_start = today_start_utc()
+        tenant_clause, tenant_params = ('tenant_id = ?', (tenant_id,)) if tenant_id else ('1 = 1', ())
+
+        cursor.execute(f'SELECT COUNT(*) FROM users WHERE {tenant_clause}', tenant_params)
+        user_count = cursor.fetchone()[0]
+        cursor.execute(f'SELECT COUNT(*), MAX(submitted_at) FROM service_requests WHERE {tenant_clause}',
+                       tenant_params)
+        request_count, latest_request = cursor.fetchone()
+
+        cursor.execute(f'SELECT COUNT(*) FROM users WHERE created_at >= ? AND {tenant_clause}',
+                       (today_start, *tenant_params))
+        users_today = cursor.fetchone()[0]
+        cursor.execute(f'SELECT COUNT(*) FROM service_requests WHERE submitted_at >= ? AND {tenant_clause}',
+                       (today_start, *tenant_params))
+        requests_today = cursor.fetchone()[0]
+
+        cursor.execute(f'''
+            SELECT request_id, name, phone, location, service_type, services, submitted_at
+            FROM service_requests
+            WHERE {tenant_clause}
+            ORDER BY submitted_at DESC, request_id DESC
+            LIMIT ?
+        ''', (*tenant_params, RECENT_LIMIT))
+        recent = cursor.fetchall()
+
+        by_service_type = _service_type_breakdown(cursor, f'WHERE {tenant_clause}', tenant_params)
+        archived = archived_totals(archive_dir, tenant_id)
+        for service_type, count in archived['by_service_type'].items():
+            name = SERVICE_TYPE_NAMES.get(service_type, service_type)
+            by_service_type[name] = by_service_type.get(name, 0) + count
+
+        return {
+            'users': user_count,
+            'requests': request_count + archived['requests'],
+            'latest_request': latest_request,
+            'by_service_type': by_service_type,
+            'today': {
+                'users': users_today,
+                'requests': requests_today,
+                'by_service_type': _service_type_breakdown(
+                    cursor, f'WHERE submitted_at >= ? AND {tenant_clause}', (today_start, *tenant_params)
+                )
+            },
+            'recent': recent
+        }
+    finally:
+        conn.close()
+
+
+class StatsSnapshot:
+    """Dashboard numbers refreshed in the background and shared by every admin.
+
+    A background task re-runs the queries every ``refresh_interval``
+    seconds through the storage repository. get() serves the cached copy
+    unless it is older than ``max_staleness``; then one caller refreshes
+    while the rest wait on the same lock, so a burst of /stats costs one
+    round of queries. If that refresh fails, the stale copy is served.
+    """
+
+    def __init__(self, repository, refresh_interval=DEFAULT_REFRESH_INTERVAL, max_staleness=DEFAULT_MAX_STALENESS):
+        self.repository = repository
+        self.refresh_interval = refresh_interval
+        self.max_staleness = max_staleness
+        self.data = None
+        self.taken_at = 0.0
+        self._lock = asyncio.Lock()
+        self._task = None
+
+    def start(self):
+        """Start background refreshes on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop background refreshes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def age(self):
+        """Seconds since the current snapshot was taken."""
+        return asyncio.get_running_loop().time() - self.taken_at
+
+    async def get(self):
+        """Return the snapshot, refreshing first if it is missing or too stale.
+
+        Raises only when there is no snapshot at all to fall back on.
+        """
+        if self.data is None or self.age() > self.max_staleness:
+            async with self._lock:
+                # Another caller may have refreshed while we waited for the lock
+                if self.data is None or self.age() > self.max_staleness:
+                    try:
+                        await self.refresh()
+                    except Exception as e:
+                        if self.data is None:
+                            raise
+                        logger.warning(f"⚠️ Serving stats snapshot from {int(self.age())}s ago, refresh failed: {e}")
+        return self.data
+
+    async def refresh(self):
+        """Re-run the dashboard queries off the event loop."""
+        data = await self.repository.stats_snapshot()
+        self.data = data
+        self.taken_at = asyncio.get_running_loop().time()
+
+    async def _run(self):
+        while True:
+            try:
+                async with self._lock:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"❌ Error refreshing stats snapshot: {e}")
+            await asyncio.sleep(self.refresh_interval)
@@ -0,0 +1,2076 @@
+import asyncio
+import functools
+import heapq
+import itertools
+import logging
+import operator
+import os
+import queue
+import re
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import archive
+from catalog import SERVICE_LABELS, SERVICE_TYPE_LABELS
+from dispatch import DISPATCH_LEASE_SECONDS, sla_deadline
+from phones import phone_variants
+from search_index import FTS_TABLE, batch_indexed, ensure_search_index, search_requests
+from stats_snapshot import RECENT_LIMIT, SERVICE_TYPE_NAMES, collect_snapshot, today_start_utc
+from tenants import DEFAULT_TENANT
+
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+
+# Storage backends shared by the bot and the database viewer.
+#
+# Both expose the same async repository methods (users, requests, preferences,
+# stats, listing and export), which the database viewer uses too.
+# SQLiteRepository is the default and keeps the local file the archive,
+# backup and search index tools work on. PostgresRepository is selected by a
+# postgresql:// DATABASE_URL so several bot hosts can share one database.
+
+DATABASE_FILE = 'liyu_agency.db'
+
+# Idle SQLite connections kept for reuse, and PostgreSQL pool bounds
+SQLITE_POOL_SIZE = 4
+POSTGRES_POOL_MIN = 1
+POSTGRES_POOL_MAX = 10
+
+SEARCH_COLUMNS = ['request_id', 'name', 'phone', 'location', 'service_type', 'services', 'submitted_at']
+# Default fields of the rows returned by list_requests, and of those returned by list_users
+LIST_COLUMNS = ['request_id', 'user_id', 'name', 'phone', 'location', 'service_type',
+                'services', 'phone_source', 'location_source', 'submitted_at']
+USER_COLUMNS = ['user_id', 'telegram_id', 'username', 'first_name', 'last_name', 'created_at']
+
+# Keys of the filters dict taken by list_requests, search_requests, request_stats and
+# export_rows: a date range on submitted_at, catalog keys (see catalog.py), the
+# sources of the location and phone, and ``phones``, the stored forms of a number
+REQUEST_FILTERS = ['date_from', 'date_to', 'service_type', 'service', 'location_source', 'phone_source', 'phones']
+# Columns request_stats counts requests by
+STATS_BREAKDOWNS = ['service_type', 'location_source', 'phone_source', 'location_zone']
+
+# Tables export_rows reads, each in the order of its key
+EXPORT_TABLES = {
+    'users': {'key': 'user_id', 'timestamp': 'created_at', 'columns': USER_COLUMNS},
+    'service_requests': {
+        'key': 'request_id',
+        'timestamp': 'submitted_at',
+        'columns': ['request_id', 'user_id', 'name', 'phone', 'location', 'service_type', 'services', 'submitted_at']
+    }
+}
+EXPORT_BATCH_SIZE = 5000
+
+# Lifecycle of a service request, and the statuses each one may move to
+REQUEST_STATUSES = ['pending', 'assigned', 'scheduled', 'done', 'cancelled']
+STATUS_TRANSITIONS = {
+    'pending': {'assigned', 'scheduled', 'cancelled'},
+    'assigned': {'pending', 'scheduled', 'done', 'cancelled'},
+    'scheduled': {'assigned', 'done', 'cancelled'},
+    'done': set(),
+    'cancelled': {'pending'}
+}
+# Requests still in progress, as listed by the customer /status command
+OPEN_STATUSES = ['pending', 'assigned', 'scheduled']
+
+OPEN_REQUEST_COLUMNS = ['request_id', 'service_type', 'services', 'status', 'assigned_to', 'submitted_at', 'status_updated_at']
+HISTORY_COLUMNS = ['from_status', 'to_status', 'changed_by', 'note', 'changed_at']
+
+# Fields of the row tuples taken by import_requests and import_workers
+IMPORT_REQUEST_COLUMNS = ['name', 'phone', 'location', 'service_type', 'services', 'submitted_at', 'status',
+                          'idempotency_key']
+IMPORT_WORKER_COLUMNS = ['name', 'phone', 'location', 'services']
+
+# Fields of the rows returned by the dispatch queue
+DISPATCH_COLUMNS = ['request_id', 'name', 'phone', 'location', 'service_type', 'services', 'submitted_at',
+                    'deadline', 'leased_by', 'lease_expires_at']
+_DISPATCH_SELECT = [f"q.{column}" if column in ('request_id', 'deadline', 'leased_by', 'lease_expires_at')
+                    else f"r.{column}" for column in DISPATCH_COLUMNS]
+
+# Fields of the rows returned by worker_calendars
+WORKER_COLUMNS = ['worker_id', 'name', 'phone', 'location', 'services']
+CALENDAR_COLUMNS = ['worker_id', 'starts_at', 'ends_at']
+
+# Rows appended by record_funnel, and the funnel totals read back
+FUNNEL_EVENT_COLUMNS = ['telegram_id', 'from_state', 'to_state', 'occurred_at']
+FUNNEL_STEP_COLUMNS = ['day', 'step', 'reached', 'abandoned', 'seconds_to_reach']
+FUNNEL_COLUMNS = ['step', 'reached', 'abandoned', 'seconds_to_reach']
+
+logger = logging.getLogger(__name__)
+
+
+# Tables keyed by tenant and Telegram account; tenant_id defaults to tenants.DEFAULT_TENANT
+USERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        user_id INTEGER PRIMARY KEY,
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        telegram_id INTEGER,
+        username TEXT,
+        first_name TEXT,
+        last_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (tenant_id, telegram_id)
+    )
+'''
+USER_SESSIONS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        telegram_id INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (tenant_id, telegram_id)
+    )
+'''
+# Household staff, each working for one tenant; phone numbers are stored as +2519XXXXXXXX
+WORKERS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        worker_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        location TEXT,
+        services TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (tenant_id, phone)
+    )
+'''
+# service_requests columns added after the table was first created, with their definitions
+SERVICE_REQUEST_UPGRADES = [
+    ('idempotency_key', 'TEXT'),
+    ('status', "TEXT NOT NULL DEFAULT 'pending'"),
+    ('assigned_to', 'TEXT'),
+    ('status_updated_at', 'TIMESTAMP'),
+    ('location_zone', 'TEXT'),
+    ('location_latitude', 'REAL'),
+    ('location_longitude', 'REAL'),
+    ('tenant_id', "TEXT NOT NULL DEFAULT 'default'")
+]
+# Rows of tables that took a tenant_id after requests had one belong to their request's tenant
+_REQUEST_TENANT_BACKFILL = '''
+    UPDATE {table} SET tenant_id = COALESCE(
+        (SELECT r.tenant_id FROM service_requests r WHERE r.request_id = {table}.request_id), 'default'
+    )
+'''
+
+
+def _needs_tenant_rebuild(cursor, table):
+    """Whether ``table`` exists from before tenants, with a key (telegram_id, phone) unique on its own."""
+    columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+    return bool(columns) and 'tenant_id' not in columns
+
+
+def _add_tenant_column(cursor, table, backfill=None):
+    """Add tenant_id to ``table`` if it predates tenants; ``backfill`` then sets each old row's."""
+    columns = [row[1] for row in cursor.execute(f'PRAGMA table_info({table})')]
+    if 'tenant_id' not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN tenant_id TEXT NOT NULL DEFAULT 'default'")
+        if backfill:
+            cursor.execute(backfill.format(table=table))
+
+
+def _rebuild_with_tenant(conn, table, table_sql):
+    """Recreate a pre-tenant table from ``table_sql``, its rows becoming the default tenant's.
+
+    SQLite can't drop a UNIQUE constraint in place, so the rows are copied to
+    a new table that then takes the old one's name, in one transaction.
+    """
+    columns = ', '.join(row[1] for row in conn.execute(f'PRAGMA table_info({table})'))
+    conn.commit()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(table_sql.format(table=f'{table}_rebuild'))
+        conn.execute(f'INSERT INTO {table}_rebuild ({columns}) SELECT {columns} FROM {table}')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_rebuild RENAME TO {table}')
+    logger.info(f"✅ Upgraded {table} to per-tenant rows")
+
+
+def init_sqlite_schema(conn):
+    """Create or upgrade the SQLite tables, indexes and search index."""
+    cursor = conn.cursor()
+
+    # WAL lets backups and dashboard reads run without blocking handler writes
+    cursor.execute('PRAGMA journal_mode=WAL')
+
+    # A Telegram account is a separate user, with its own saved session, in each tenant
+    if _needs_tenant_rebuild(cursor, 'users'):
+        _rebuild_with_tenant(conn, 'users', USERS_TABLE)
+    cursor.execute(USERS_TABLE.format(table='users'))
+
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS service_requests (
+            request_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            location TEXT,
+            service_type TEXT NOT NULL,
+            services TEXT NOT NULL,
+            phone_source TEXT,
+            location_source TEXT,
+            submitted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            idempotency_key TEXT,
+            status TEXT NOT NULL DEFAULT 'pending',
+            assigned_to TEXT,
+            status_updated_at TIMESTAMP,
+            location_zone TEXT,
+            location_latitude REAL,
+            location_longitude REAL,
+            tenant_id TEXT NOT NULL DEFAULT 'default',
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+
+    # Older databases predate idempotency keys, request statuses, zones and tenants
+    cursor.execute('PRAGMA table_info(service_requests)')
+    existing = [row[1] for row in cursor.fetchall()]
+    for column, definition in SERVICE_REQUEST_UPGRADES:
+        if column not in existing:
+            cursor.execute(f'ALTER TABLE service_requests ADD COLUMN {column} {definition}')
+
+    # One row per draft, so a repeated Confirm can never insert twice
+    cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_service_requests_idempotency_key
+        ON service_requests(idempotency_key)
+    ''')
+
+    # Index for newest-first keyset pagination in the database viewer
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_submitted_at
+        ON service_requests(submitted_at, request_id)
+    ''')
+
+    # Indexes for the viewer's service type filter and phone lookups
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_service_type
+        ON service_requests(service_type, submitted_at)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_phone
+        ON service_requests(phone)
+    ''')
+
+    # Index for a customer's open requests
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_user_status
+        ON service_requests(user_id, status)
+    ''')
+
+    # Index for counting and routing requests by gazetteer zone
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_location_zone
+        ON service_requests(location_zone, submitted_at)
+    ''')
+
+    # Index for a tenant's stats, recent requests and search results
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_service_requests_tenant
+        ON service_requests(tenant_id, submitted_at)
+    ''')
+
+    # Every status change, oldest first; transition_id order is what the status cache polls
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS request_status_transitions (
+            transition_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            request_id INTEGER NOT NULL,
+            from_status TEXT,
+            to_status TEXT NOT NULL,
+            changed_by TEXT,
+            note TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tenant_id TEXT NOT NULL DEFAULT 'default'
+        )
+    ''')
+    _add_tenant_column(cursor, 'request_status_transitions', _REQUEST_TENANT_BACKFILL)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_request_status_transitions_request
+        ON request_status_transitions(request_id, transition_id)
+    ''')
+    # Index for a tenant's bot polling its own status changes
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_request_status_transitions_tenant
+        ON request_status_transitions(tenant_id, transition_id)
+    ''')
+
+    # Household staff; the same phone can be a worker of several tenants
+    if _needs_tenant_rebuild(cursor, 'workers'):
+        _rebuild_with_tenant(conn, 'workers', WORKERS_TABLE)
+    cursor.execute(WORKERS_TABLE.format(table='workers'))
+
+    # When workers can be booked, and their bookings, in local wall-clock time.
+    # Windows are kept merged and bookings never overlap (see book_worker)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS worker_availability (
+            availability_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            worker_id INTEGER NOT NULL REFERENCES workers(worker_id),
+            starts_at TIMESTAMP NOT NULL,
+            ends_at TIMESTAMP NOT NULL,
+            tenant_id TEXT NOT NULL DEFAULT 'default'
+        )
+    ''')
+    # Workers were all the default tenant's before they had one, and so were their calendars
+    _add_tenant_column(cursor, 'worker_availability')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_worker_availability_worker
+        ON worker_availability(worker_id, starts_at)
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS worker_bookings (
+            booking_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            worker_id INTEGER NOT NULL REFERENCES workers(worker_id),
+            request_id INTEGER,
+            starts_at TIMESTAMP NOT NULL,
+            ends_at TIMESTAMP NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            tenant_id TEXT NOT NULL DEFAULT 'default'
+        )
+    ''')
+    _add_tenant_column(cursor, 'worker_bookings')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_worker_bookings_worker
+        ON worker_bookings(worker_id, starts_at)
+    ''')
+
+    # Pending requests in SLA deadline order, with the dispatcher holding each (see dispatch.py)
+    new_queue = not cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dispatch_queue'"
+    ).fetchone()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS dispatch_queue (
+            request_id INTEGER PRIMARY KEY,
+            deadline TIMESTAMP NOT NULL,
+            leased_by TEXT,
+            lease_expires_at TIMESTAMP,
+            tenant_id TEXT NOT NULL DEFAULT 'default'
+        )
+    ''')
+    _add_tenant_column(cursor, 'dispatch_queue', _REQUEST_TENANT_BACKFILL)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_dispatch_queue_deadline
+        ON dispatch_queue(deadline, request_id)
+    ''')
+    # Index for a tenant's dispatchers working through their own queue
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_dispatch_queue_tenant
+        ON dispatch_queue(tenant_id, deadline, request_id)
+    ''')
+    if new_queue:
+        enqueue_requests(conn, '1 = 1')
+
+    # Conversation state changes, appended in batches and never updated (see funnel.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS funnel_events (
+            event_id INTEGER PRIMARY KEY,
+            tenant_id TEXT NOT NULL DEFAULT 'default',
+            telegram_id INTEGER NOT NULL,
+            from_state TEXT,
+            to_state TEXT NOT NULL,
+            occurred_at TIMESTAMP NOT NULL
+        )
+    ''')
+    # Per-day funnel aggregates, incremented with each batch of events
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS funnel_steps (
+            tenant_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            step TEXT NOT NULL,
+            reached INTEGER NOT NULL DEFAULT 0,
+            abandoned INTEGER NOT NULL DEFAULT 0,
+            seconds_to_reach REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (tenant_id, day, step)
+        )
+    ''')
+
+    # Preferences of users whose in-memory session was evicted
+    if _needs_tenant_rebuild(cursor, 'user_sessions'):
+        _rebuild_with_tenant(conn, 'user_sessions', USER_SESSIONS_TABLE)
+    cursor.execute(USER_SESSIONS_TABLE.format(table='user_sessions'))
+
+    # Full-text search index over names, locations and services
+    ensure_search_index(conn)
+    conn.commit()
+
+
+def check_sqlite_schema(conn):
+    """Raise RuntimeError unless init_sqlite_schema has already run, for read-only connections."""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(service_requests)')}
+    current = (
+        {'users', 'service_requests', 'dispatch_queue', 'funnel_steps', 'user_sessions', FTS_TABLE} <= tables
+        and {column for column, _ in SERVICE_REQUEST_UPGRADES} <= columns
+        and not any(_needs_tenant_rebuild(conn, table) for table in ('users', 'workers', 'user_sessions'))
+    )
+    if not current:
+        raise RuntimeError("the database schema is out of date; run `python view_database.py migrate` "
+                           "or start the bot once to upgrade it")
+
+
+def insert_user(conn, telegram_id, username, first_name, last_name, tenant_id=DEFAULT_TENANT):
+    """Insert a user unless their telegram_id is already known to the tenant."""
+    with conn:
+        conn.execute('''
+            INSERT OR IGNORE INTO users (tenant_id, telegram_id, username, first_name, last_name)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (tenant_id, telegram_id, username, first_name, last_name))
+
+
+def insert_request(conn, telegram_id, name, phone, location, service_type, services,
+                   phone_source, location_source, idempotency_key=None,
+                   location_zone=None, location_latitude=None, location_longitude=None, tenant_id=DEFAULT_TENANT):
+    """Insert a service request and return its request_id.
+
+    A request already saved under ``idempotency_key`` is not written again;
+    its original request_id is returned instead. The location_zone and
+    centroid are what the gazetteer resolved the typed location to, if anything.
+    """
+    with conn:
+        row = conn.execute(
+            'SELECT user_id FROM users WHERE tenant_id = ? AND telegram_id = ?', (tenant_id, telegram_id)
+        ).fetchone()
+        user_id = row[0] if row else None
+
+        cursor = conn.execute('''
+            INSERT INTO service_requests
+            (user_id, name, phone, location, service_type, services, phone_source, location_source, idempotency_key,
+             location_zone, location_latitude, location_longitude, tenant_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(idempotency_key) DO NOTHING
+        ''', (user_id, name, phone, location, service_type, services, phone_source, location_source, idempotency_key,
+              location_zone, location_latitude, location_longitude, tenant_id))
+
+        if cursor.rowcount == 0:
+            request_id = conn.execute(
+                'SELECT request_id FROM service_requests WHERE idempotency_key = ?', (idempotency_key,)
+            ).fetchone()[0]
+            logger.info(f"♻️ Service request #{request_id} already saved, skipping duplicate")
+            return request_id
+        conn.execute('''
+            INSERT INTO request_status_transitions (request_id, to_status, tenant_id) VALUES (?, 'pending', ?)
+        ''', (cursor.lastrowid, tenant_id))
+        enqueue_requests(conn, 'request_id = ?', (cursor.lastrowid,))
+        return cursor.lastrowid
+
+
+def import_requests(conn, rows, tenant_id=DEFAULT_TENANT):
+    """Insert rows of IMPORT_REQUEST_COLUMNS for a tenant in one transaction; returns how many were new.
+
+    Rows whose idempotency_key is already stored are skipped, so a batch
+    retried after a crash is not imported twice. A missing submitted_at
+    becomes the current time.
+    """
+    # Taking the write lock up front keeps the search trigger swap in batch_indexed atomic
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        last_id = conn.execute('SELECT COALESCE(MAX(request_id), 0) FROM service_requests').fetchone()[0]
+        with batch_indexed(conn):
+            cursor = conn.executemany('''
+                INSERT INTO service_requests
+                (name, phone, location, service_type, services, submitted_at, status, idempotency_key,
+                 phone_source, location_source, status_updated_at, tenant_id)
+                VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, 'manual_entry', 'manual_entry', CURRENT_TIMESTAMP, ?)
+                ON CONFLICT(idempotency_key) DO NOTHING
+            ''', [(*row, tenant_id) for row in rows])
+        # Imported requests still pending join the dispatch queue
+        enqueue_requests(conn, 'request_id > ?', (last_id,))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return cursor.rowcount
+
+
+def import_workers(conn, rows, tenant_id=DEFAULT_TENANT):
+    """Insert rows of IMPORT_WORKER_COLUMNS for a tenant in one transaction, skipping its known phone numbers."""
+    with conn:
+        cursor = conn.executemany('''
+            INSERT INTO workers (name, phone, location, services, tenant_id) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(tenant_id, phone) DO NOTHING
+        ''', [(*row, tenant_id) for row in rows])
+        return cursor.rowcount
+
+
+def check_interval(starts_at, ends_at):
+    """Raise ValueError unless ``starts_at`` is before ``ends_at`` (both 'YYYY-MM-DD HH:MM:SS')."""
+    if not starts_at < ends_at:
+        raise ValueError(f"{starts_at} to {ends_at} is not a time range")
+
+
+def _worker_tenant(conn, worker_id, tenant_id=None):
+    """The tenant a worker works for; raises ValueError if there's no such worker (in ``tenant_id``)."""
+    row = conn.execute('SELECT tenant_id FROM workers WHERE worker_id = ?', (worker_id,)).fetchone()
+    # Another tenant's worker is treated as missing
+    if row is None or tenant_id not in (None, row[0]):
+        raise ValueError(f"Worker #{worker_id} not found")
+    return row[0]
+
+
+def add_availability(conn, worker_id, starts_at, ends_at, tenant_id=None):
+    """Make a worker bookable from ``starts_at`` to ``ends_at``; returns the merged window.
+
+    Windows overlapping or touching the new one are merged into it, so a
+    booking within one stretch of availability lies inside a single row.
+    With ``tenant_id``, only that tenant's workers can be changed.
+    """
+    check_interval(starts_at, ends_at)
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        tenant_id = _worker_tenant(conn, worker_id, tenant_id)
+        first, last = conn.execute('''
+            SELECT MIN(starts_at), MAX(ends_at) FROM worker_availability
+            WHERE worker_id = ? AND starts_at <= ? AND ends_at >= ?
+        ''', (worker_id, ends_at, starts_at)).fetchone()
+        starts_at = min(starts_at, first or starts_at)
+        ends_at = max(ends_at, last or ends_at)
+        conn.execute('''
+            DELETE FROM worker_availability WHERE worker_id = ? AND starts_at <= ? AND ends_at >= ?
+        ''', (worker_id, ends_at, starts_at))
+        conn.execute('INSERT INTO worker_availability (worker_id, starts_at, ends_at, tenant_id) VALUES (?, ?, ?, ?)',
+                     (worker_id, starts_at, ends_at, tenant_id))
+    return starts_at, ends_at
+
+
+def book_worker(conn, worker_id, starts_at, ends_at, request_id=None, tenant_id=None):
+    """Book a worker from ``starts_at`` to ``ends_at``; returns the booking_id.
+
+    Raises ValueError unless one availability window covers the slot and no
+    other booking overlaps it. The write lock is taken before checking, so
+    another process can't book the same slot in between. With ``tenant_id``,
+    only that tenant's workers can be booked; a worker is never booked for
+    another tenant's request.
+    """
+    check_interval(starts_at, ends_at)
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        tenant_id = _worker_tenant(conn, worker_id, tenant_id)
+        if request_id is not None and conn.execute(
+            'SELECT 1 FROM service_requests WHERE request_id = ? AND tenant_id != ?', (request_id, tenant_id)
+        ).fetchone():
+            raise ValueError(f"Request #{request_id} not found")
+        if conn.execute('''
+            SELECT 1 FROM worker_availability WHERE worker_id = ? AND starts_at <= ? AND ends_at >= ?
+        ''', (worker_id, starts_at, ends_at)).fetchone() is None:
+            raise ValueError(f"Worker #{worker_id} is not available from {starts_at} to {ends_at}")
+        clash = conn.execute('''
+            SELECT booking_id, starts_at, ends_at FROM worker_bookings
+            WHERE worker_id = ? AND starts_at < ? AND ends_at > ?
+            LIMIT 1
+        ''', (worker_id, ends_at, starts_at)).fetchone()
+        if clash:
+            raise ValueError(f"Worker #{worker_id} is already booked from {clash[1]} to {clash[2]} "
+                             f"(booking #{clash[0]})")
+        cursor = conn.execute('''
+            INSERT INTO worker_bookings (worker_id, request_id, starts_at, ends_at, tenant_id) VALUES (?, ?, ?, ?, ?)
+        ''', (worker_id, request_id, starts_at, ends_at, tenant_id))
+    return cursor.lastrowid
+
+
+def cancel_booking(conn, booking_id, tenant_id=None):
+    """Delete a booking, freeing its slot; returns whether it existed (in ``tenant_id``, if given)."""
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    with conn:
+        return conn.execute(
+            f'DELETE FROM worker_bookings WHERE booking_id = ? {tenant_clause}', (booking_id, *params)
+        ).rowcount > 0
+
+
+def worker_calendars(conn, since, tenant_id=None):
+    """Every worker, with the windows and bookings ending after ``since``; every tenant's unless one is given.
+
+    Returns ``(workers, windows, bookings)``: rows of WORKER_COLUMNS, then
+    rows of CALENDAR_COLUMNS ordered by worker and start.
+    """
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    workers = conn.execute(
+        f"SELECT {', '.join(WORKER_COLUMNS)} FROM workers WHERE 1 = 1 {tenant_clause} ORDER BY worker_id", params
+    ).fetchall()
+    windows, bookings = [
+        conn.execute(f'''
+            SELECT {', '.join(CALENDAR_COLUMNS)} FROM {table}
+            WHERE ends_at > ? {tenant_clause} ORDER BY worker_id, starts_at
+        ''', (since, *params)).fetchall()
+        for table in ('worker_availability', 'worker_bookings')
+    ]
+    return workers, windows, bookings
+
+
+def check_transition(request_id, current, status):
+    """Raise ValueError unless a request may move from ``current`` to ``status``."""
+    if status not in STATUS_TRANSITIONS:
+        raise ValueError(f"Unknown status '{status}' (choose from {', '.join(REQUEST_STATUSES)})")
+    if current is None:
+        raise ValueError(f"Request #{request_id} not found")
+    if status not in STATUS_TRANSITIONS[current]:
+        raise ValueError(f"Request #{request_id} can't go from {current} to {status}")
+
+
+def _transition(conn, request_id, status, changed_by=None, assigned_to=None, note=None, tenant_id=None):
+    """transition_request without its own transaction."""
+    row = conn.execute('''
+        SELECT r.status, r.assigned_to, u.telegram_id, r.tenant_id
+        FROM service_requests r LEFT JOIN users u ON u.user_id = r.user_id
+        WHERE r.request_id = ?
+    ''', (request_id,)).fetchone()
+    # Another tenant's request is treated as missing
+    if row is None or tenant_id not in (None, row[3]):
+        row = (None, None, None, None)
+    current, current_assignee, telegram_id, request_tenant = row
+    check_transition(request_id, current, status)
+    assignee = None if status == 'pending' else assigned_to or current_assignee
+
+    cursor = conn.execute('''
+        UPDATE service_requests SET status = ?, assigned_to = ?, status_updated_at = CURRENT_TIMESTAMP
+        WHERE request_id = ? AND status = ?
+    ''', (status, assignee, request_id, current))
+    if cursor.rowcount == 0:
+        raise ValueError(f"Request #{request_id} changed while updating it, try again")
+    conn.execute('''
+        INSERT INTO request_status_transitions (request_id, from_status, to_status, changed_by, note, tenant_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (request_id, current, status, changed_by, note, request_tenant))
+    # Only pending requests wait in the dispatch queue
+    if status == 'pending':
+        enqueue_requests(conn, 'request_id = ?', (request_id,))
+    elif current == 'pending':
+        conn.execute('DELETE FROM dispatch_queue WHERE request_id = ?', (request_id,))
+    return telegram_id
+
+
+def transition_request(conn, request_id, status, changed_by=None, assigned_to=None, note=None, tenant_id=None):
+    """Move a request to ``status`` and log the change; returns the owner's telegram_id.
+
+    Going back to pending clears the assignee; other statuses keep it unless
+    ``assigned_to`` is given. A request changed by someone else in between
+    raises ValueError rather than skipping a step of its lifecycle. With
+    ``tenant_id``, only that tenant's requests can be changed.
+    """
+    with conn:
+        return _transition(conn, request_id, status, changed_by, assigned_to, note, tenant_id)
+
+
+def enqueue_requests(conn, where, params=()):
+    """Put the pending requests matching ``where`` in the dispatch queue at their SLA deadline.
+
+    Runs in the caller's transaction; a request already queued is re-queued
+    and loses its lease. A customer is returning if an earlier request from
+    the same phone number to the same tenant is done.
+    """
+    rows = conn.execute(f'''
+        SELECT r.request_id, r.service_type, r.submitted_at, EXISTS (
+            SELECT 1 FROM service_requests earlier
+            WHERE earlier.phone = r.phone AND earlier.tenant_id = r.tenant_id AND earlier.status = 'done'
+              AND earlier.request_id < r.request_id
+        ), r.tenant_id
+        FROM service_requests r
+        WHERE r.status = 'pending' AND ({where})
+    ''', params).fetchall()
+    conn.executemany('''
+        INSERT OR REPLACE INTO dispatch_queue (request_id, deadline, tenant_id) VALUES (?, ?, ?)
+    ''', [(request_id, sla_deadline(service_type, submitted_at, returning), tenant_id)
+          for request_id, service_type, submitted_at, returning, tenant_id in rows])
+
+
+def claim_request(conn, dispatcher, lease_seconds=DISPATCH_LEASE_SECONDS, tenant_id=None):
+    """Lease the most urgent unclaimed request to ``dispatcher``; a tuple of DISPATCH_COLUMNS, or None.
+
+    Requests whose lease has run out are claimable again. The write lock is
+    taken first, so two dispatchers never lease the same request. With
+    ``tenant_id``, only that tenant's requests are claimed.
+    """
+    tenant_clause, params = ('AND q.tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(f'''
+            SELECT q.request_id FROM dispatch_queue q JOIN service_requests r ON r.request_id = q.request_id
+            WHERE (q.lease_expires_at IS NULL OR q.lease_expires_at <= CURRENT_TIMESTAMP) {tenant_clause}
+            ORDER BY q.deadline, q.request_id
+            LIMIT 1
+        ''', params).fetchone()
+        if row is None:
+            return None
+        conn.execute('''
+            UPDATE dispatch_queue SET leased_by = ?, lease_expires_at = datetime('now', ?) WHERE request_id = ?
+        ''', (dispatcher, f'+{int(lease_seconds)} seconds', row[0]))
+        return conn.execute(f'''
+            SELECT {', '.join(_DISPATCH_SELECT)} FROM dispatch_queue q JOIN service_requests r ON r.request_id = q.request_id
+            WHERE q.request_id = ?
+        ''', row).fetchone()
+
+
+def release_request(conn, request_id, dispatcher, tenant_id=None):
+    """Give back a request ``dispatcher`` has claimed; returns whether they held it (in ``tenant_id``, if given)."""
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    with conn:
+        return conn.execute(f'''
+            UPDATE dispatch_queue SET leased_by = NULL, lease_expires_at = NULL
+            WHERE request_id = ? AND leased_by = ? {tenant_clause}
+        ''', (request_id, dispatcher, *params)).rowcount > 0
+
+
+def assign_claimed(conn, request_id, dispatcher, assigned_to, note=None, tenant_id=None):
+    """Assign a request ``dispatcher`` holds a live lease on; returns the owner's telegram_id.
+
+    Raises ValueError if the request isn't claimed by them, so a dispatcher
+    whose lease ran out can't assign a request someone else has taken. With
+    ``tenant_id``, only that tenant's requests can be assigned.
+    """
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        lease = conn.execute(f'''
+            SELECT leased_by, lease_expires_at > CURRENT_TIMESTAMP FROM dispatch_queue
+            WHERE request_id = ? {tenant_clause}
+        ''', (request_id, *params)).fetchone()
+        if lease is None or lease[0] != dispatcher or not lease[1]:
+            raise ValueError(f"Request #{request_id} is not claimed by {dispatcher}; claim it first")
+        return _transition(conn, request_id, 'assigned', dispatcher, assigned_to, note, tenant_id)
+
+
+def reprioritise_request(conn, request_id, deadline, tenant_id=None):
+    """Move a queued request to a new deadline; returns whether it was queued (in ``tenant_id``, if given)."""
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    with conn:
+        return conn.execute(
+            f'UPDATE dispatch_queue SET deadline = ? WHERE request_id = ? {tenant_clause}',
+            (deadline, request_id, *params)
+        ).rowcount > 0
+
+
+def dispatch_queue(conn, limit, tenant_id=None):
+    """The most urgent queued requests first, as tuples of DISPATCH_COLUMNS; every tenant's unless one is given."""
+    tenant_clause, params = ('WHERE q.tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    return conn.execute(f'''
+        SELECT {', '.join(_DISPATCH_SELECT)} FROM dispatch_queue q JOIN service_requests r ON r.request_id = q.request_id
+        {tenant_clause}
+        ORDER BY q.deadline, q.request_id
+        LIMIT ?
+    ''', (*params, limit)).fetchall()
+
+
+def record_funnel(conn, events, steps, tenant_id=DEFAULT_TENANT):
+    """Append tuples of FUNNEL_EVENT_COLUMNS and add tuples of FUNNEL_STEP_COLUMNS to the totals, atomically."""
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(f'''
+            INSERT INTO funnel_events (tenant_id, {', '.join(FUNNEL_EVENT_COLUMNS)}) VALUES (?, ?, ?, ?, ?)
+        ''', [(tenant_id, *event) for event in events])
+        conn.executemany(f'''
+            INSERT INTO funnel_steps (tenant_id, {', '.join(FUNNEL_STEP_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(tenant_id, day, step) DO UPDATE SET
+                reached = reached + excluded.reached,
+                abandoned = abandoned + excluded.abandoned,
+                seconds_to_reach = seconds_to_reach + excluded.seconds_to_reach
+        ''', [(tenant_id, *step) for step in steps])
+
+
+def funnel_report(conn, since, tenant_id=None):
+    """Funnel totals from day ``since`` (YYYY-MM-DD) on, as tuples of FUNNEL_COLUMNS; every tenant's unless one is given."""
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    return conn.execute(f'''
+        SELECT step, SUM(reached), SUM(abandoned), SUM(seconds_to_reach)
+        FROM funnel_steps
+        WHERE day >= ? {tenant_clause}
+        GROUP BY step
+    ''', (since, *params)).fetchall()
+
+
+def open_requests(conn, telegram_id, limit, tenant_id=DEFAULT_TENANT):
+    """A user's requests in OPEN_STATUSES, newest first, as tuples of OPEN_REQUEST_COLUMNS."""
+    return conn.execute(f'''
+        SELECT {', '.join(f'r.{column}' for column in OPEN_REQUEST_COLUMNS)}
+        FROM service_requests r JOIN users u ON u.user_id = r.user_id
+        WHERE u.tenant_id = ? AND u.telegram_id = ? AND r.status IN ({', '.join('?' * len(OPEN_STATUSES))})
+        ORDER BY r.request_id DESC
+        LIMIT ?
+    ''', (tenant_id, telegram_id, *OPEN_STATUSES, limit)).fetchall()
+
+
+def _range_end(value):
+    """Turn a date_to filter into an exclusive upper bound; a bare date covers the whole day."""
+    try:
+        day = datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        return '<=', value
+    return '<', (day + timedelta(days=1)).strftime('%Y-%m-%d')
+
+
+def request_filter_clauses(filters=None, tenant_id=None, timestamp=str):
+    """Parameterised WHERE clauses, with ? placeholders, for a dict of REQUEST_FILTERS.
+
+    Returns ``(clauses, params)``. Service types are matched with ``IN`` on
+    their stored labels so idx_service_requests_service_type applies, and the
+    date range is a plain range on submitted_at. ``timestamp`` turns the
+    typed dates into what the backend binds to a timestamp.
+    """
+    filters = filters or {}
+    clauses = []
+    params = []
+    if filters.get('date_from'):
+        clauses.append('submitted_at >= ?')
+        params.append(timestamp(filters['date_from']))
+    if filters.get('date_to'):
+        comparison, bound = _range_end(filters['date_to'])
+        clauses.append(f'submitted_at {comparison} ?')
+        params.append(timestamp(bound))
+    if filters.get('service_type'):
+        labels = SERVICE_TYPE_LABELS[filters['service_type']]
+        clauses.append(f"service_type IN ({', '.join('?' * len(labels))})")
+        params.extend(labels)
+    if filters.get('service'):
+        labels = SERVICE_LABELS[filters['service']]
+        clauses.append('(' + ' OR '.join('services LIKE ?' for _ in labels) + ')')
+        params.extend(f'%{label}%' for label in labels)
+    for column in ('location_source', 'phone_source'):
+        if filters.get(column):
+            clauses.append(f'{column} = ?')
+            params.append(filters[column])
+    if filters.get('phones'):
+        clauses.append(f"phone IN ({', '.join('?' * len(filters['phones']))})")
+        params.extend(filters['phones'])
+    if tenant_id:
+        clauses.append('tenant_id = ?')
+        params.append(tenant_id)
+    return clauses, params
+
+
+def _where(clauses):
+    """Join filter clauses into a WHERE clause, or nothing."""
+    return (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+
+
+def list_requests(conn, filters=None, limit=None, columns=None, start=None, inclusive=False, tenant_id=None):
+    """Requests matching ``filters`` newest first, hot and archived, as tuples of ``columns``.
+
+    ``columns`` (LIST_COLUMNS by default) must include submitted_at and
+    request_id. ``start`` is a ``(submitted_at, request_id)`` pair to continue
+    after, or from with ``inclusive``; the row-value comparison seeks
+    straight to it on idx_service_requests_submitted_at, so a page costs the
+    same wherever it is. Partitions outside the date range aren't opened.
+    """
+    filters = filters or {}
+    clauses, params = request_filter_clauses(filters, tenant_id)
+    date_to = filters.get('date_to')
+    if start is not None:
+        clauses.append(f"(submitted_at, request_id) {'<=' if inclusive else '<'} (?, ?)")
+        params.extend(start)
+        date_to = min(date_to or start[0], start[0])
+    query = f"SELECT {', '.join(columns or LIST_COLUMNS)} FROM service_requests{_where(clauses)} " \
+            "ORDER BY submitted_at DESC, request_id DESC"
+    batches = archive.query_newest_first(conn, query, params, limit, filters.get('date_from'), date_to)
+    return [row for batch in batches for row in batch]
+
+
+def find_requests(conn, term, limit=10, filters=None, columns=None, tenant_id=None):
+    """Requests matching ``term`` newest first: phone numbers by index, anything else through FTS.
+
+    Phone lookups include archived requests; the FTS index covers the hot
+    database. Rows are tuples of ``columns``, SEARCH_COLUMNS by default.
+    """
+    columns = columns or SEARCH_COLUMNS
+    variants = phone_variants(term)
+    if variants:
+        return list_requests(conn, {**(filters or {}), 'phones': variants}, limit, columns, tenant_id=tenant_id)
+    clauses, params = request_filter_clauses(filters, tenant_id)
+    return search_requests(conn, term, columns, clauses, params, limit) or []
+
+
+def request_key(conn, request_id, tenant_id=None):
+    """The ``(submitted_at, request_id)`` list_requests starts from for a request, hot or archived, or None."""
+    tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    for source in archive.request_sources(conn):
+        key = source.execute(f'SELECT submitted_at, request_id FROM service_requests WHERE request_id = ? {tenant_clause}',
+                             (request_id, *params)).fetchone()
+        if key:
+            return key
+    return None
+
+
+def list_users(conn, start=None, inclusive=False, limit=20, tenant_id=None):
+    """Users in user_id order, after ``start`` (a user_id) or from it with ``inclusive``, as tuples of USER_COLUMNS."""
+    clauses, params = (['tenant_id = ?'], [tenant_id]) if tenant_id else ([], [])
+    if start is not None:
+        clauses.append(f"user_id {'>=' if inclusive else '>'} ?")
+        params.append(start)
+    return conn.execute(
+        f"SELECT {', '.join(USER_COLUMNS)} FROM users{_where(clauses)} ORDER BY user_id LIMIT ?", (*params, limit)
+    ).fetchall()
+
+
+def request_stats(conn, filters=None, tenant_id=None):
+    """Request counts and breakdowns for ``filters``, archived requests included.
+
+    Returns users, requests and latest_request, and a ``by_<column>`` dict of
+    ``{stored value: count}`` per STATS_BREAKDOWNS column. Partitions outside
+    the date range are skipped.
+    """
+    filters = filters or {}
+    clauses, params = request_filter_clauses(filters, tenant_id)
+    where = _where(clauses)
+    user_clause, user_params = (' WHERE tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+    stats = {
+        'users': conn.execute(f'SELECT COUNT(*) FROM users{user_clause}', user_params).fetchone()[0],
+        'requests': 0,
+        'latest_request': None,
+        **{f'by_{column}': {} for column in STATS_BREAKDOWNS}
+    }
+    for source in archive.request_sources(conn, filters.get('date_from'), filters.get('date_to')):
+        count, latest = source.execute(f'SELECT COUNT(*), MAX(submitted_at) FROM service_requests{where}',
+                                       params).fetchone()
+        stats['requests'] += count
+        if latest and (stats['latest_request'] is None or latest > stats['latest_request']):
+            stats['latest_request'] = latest
+        for column in STATS_BREAKDOWNS:
+            breakdown = stats[f'by_{column}']
+            for value, count in source.execute(
+                f'SELECT {column}, COUNT(*) FROM service_requests{where} GROUP BY {column}', params
+            ):
+                breakdown[value] = breakdown.get(value, 0) + count
+    return stats
+
+
+def export_rows(conn, table, after_key=None, since=None, filters=None, limit=EXPORT_BATCH_SIZE, tenant_id=None):
+    """Up to ``limit`` rows of an EXPORT_TABLES table after ``after_key``, in key order.
+
+    ``since`` is a lower bound on the table's timestamp column; ``filters``
+    only apply to service_requests. Archived requests are merged in by key,
+    so paging on the last key returned reads the whole table once, holding
+    at most ``limit`` rows per source.
+    """
+    spec = EXPORT_TABLES[table]
+    key = spec['key']
+    filters = filters or {}
+    if table == 'service_requests':
+        clauses, params = request_filter_clauses(filters, tenant_id)
+    else:
+        clauses, params = (['tenant_id = ?'], [tenant_id]) if tenant_id else ([], [])
+    if after_key is not None:
+        clauses.append(f'{key} > ?')
+        params.append(after_key)
+    if since:
+        clauses.append(f"{spec['timestamp']} >= ?")
+        params.append(since)
+    query = f"SELECT {', '.join(spec['columns'])} FROM {table}{_where(clauses)} ORDER BY {key} LIMIT ?"
+    params.append(limit)
+
+    sources = [conn]
+    if table == 'service_requests':
+        sources = archive.request_sources(conn, max(since or '', filters.get('date_from') or '') or None,
+                                          filters.get('date_to'))
+    rows = (row for source in sources for row in source.execute(query, params).fetchall())
+    return heapq.nsmallest(limit, rows, key=operator.itemgetter(spec['columns'].index(key)))
+
+
+def _tracked(write=False):
+    """Count in-flight writes and remember the last error, for the health endpoint."""
+    def decorate(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            if write:
+                self.pending_writes += 1
+            try:
+                return await method(self, *args, **kwargs)
+            except Exception as e:
+                self.last_error = (time.time(), f"{method.__name__}: {e}")
+                raise
+            finally:
+                if write:
+                    self.pending_writes -= 1
+        return wrapper
+    return decorate
+
+
+class SQLiteRepository:
+    """Repository over the local SQLite file.
+
+    Every call runs in a worker thread on a pooled connection, so the event
+    loop never waits on SQLite and connections aren't reopened per call.
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, database_file=DATABASE_FILE, pool_size=SQLITE_POOL_SIZE, read_only=False):
+        self.database_file = database_file
+        self.read_only = read_only
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self.pending_writes = 0
+        self.last_error = None
+
+    @contextmanager
+    def _connection(self):
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            if self.read_only:
+                conn = sqlite3.connect(f"file:{self.database_file}?mode=ro", uri=True, check_same_thread=False)
+            else:
+                conn = sqlite3.connect(self.database_file, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _call(self, function, *args):
+        with self._connection() as conn:
+            return function(conn, *args)
+
+    async def _run(self, function, *args):
+        return await asyncio.to_thread(self._call, function, *args)
+
+    @_tracked()
+    async def init(self):
+        """Create or upgrade the schema; read-only, only check it is current."""
+        await self._run(check_sqlite_schema if self.read_only else init_sqlite_schema)
+
+    async def close(self):
+        """Close pooled connections."""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    @_tracked(write=True)
+    async def save_user(self, telegram_id, username, first_name, last_name, tenant_id=DEFAULT_TENANT):
+        await self._run(insert_user, telegram_id, username, first_name, last_name, tenant_id)
+
+    @_tracked(write=True)
+    async def save_request(self, telegram_id, name, phone, location, service_type, services,
+                           phone_source, location_source, idempotency_key=None,
+                           location_zone=None, location_latitude=None, location_longitude=None,
+                           tenant_id=DEFAULT_TENANT):
+        """Save a request, returning the original request_id for a repeated idempotency_key."""
+        return await self._run(insert_request, telegram_id, name, phone, location, service_type,
+                               services, phone_source, location_source, idempotency_key,
+                               location_zone, location_latitude, location_longitude, tenant_id)
+
+    @_tracked()
+    async def search_requests(self, term, limit=10, tenant_id=None, filters=None, columns=None):
+        """Requests matching ``term`` and ``filters``, newest first, as tuples of ``columns``; see find_requests."""
+        return await self._run(find_requests, term, limit, filters, columns, tenant_id)
+
+    @_tracked()
+    async def list_requests(self, filters=None, limit=None, columns=None, start=None, inclusive=False, tenant_id=None):
+        """Requests matching ``filters``, newest first, from ``start``; see list_requests."""
+        return await self._run(list_requests, filters, limit, columns, start, inclusive, tenant_id)
+
+    @_tracked()
+    async def request_key(self, request_id, tenant_id=None):
+        """The ``(submitted_at, request_id)`` to list requests from to reach ``request_id``, or None."""
+        return await self._run(request_key, request_id, tenant_id)
+
+    @_tracked()
+    async def list_users(self, start=None, inclusive=False, limit=20, tenant_id=None):
+        """Users in user_id order from ``start``, as tuples of USER_COLUMNS."""
+        return await self._run(list_users, start, inclusive, limit, tenant_id)
+
+    @_tracked()
+    async def request_stats(self, filters=None, tenant_id=None):
+        """Request counts and per-value breakdowns for ``filters``; see request_stats."""
+        return await self._run(request_stats, filters, tenant_id)
+
+    @_tracked()
+    async def export_rows(self, table, after_key=None, since=None, filters=None, limit=EXPORT_BATCH_SIZE,
+                          tenant_id=None):
+        """The next ``limit`` rows of an EXPORT_TABLES table after ``after_key``, in key order."""
+        return await self._run(export_rows, table, after_key, since, filters, limit, tenant_id)
+
+    @_tracked(write=True)
+    async def save_preferences(self, sessions, tenant_id=DEFAULT_TENANT):
+        """Store ``{telegram_id: serialised_session}``, replacing older copies."""
+        def upsert(conn):
+            with conn:
+                conn.executemany('''
+                    INSERT INTO user_sessions (tenant_id, telegram_id, data) VALUES (?, ?, ?)
+                    ON CONFLICT(tenant_id, telegram_id) DO UPDATE SET data = excluded.data, updated_at = CURRENT_TIMESTAMP
+                ''', [(tenant_id, telegram_id, data) for telegram_id, data in sessions.items()])
+        await self._run(upsert)
+
+    @_tracked()
+    async def load_preferences(self, telegram_id, tenant_id=DEFAULT_TENANT):
+        """The serialised session stored for a user, or None."""
+        row = await self._run(lambda conn: conn.execute(
+            'SELECT data FROM user_sessions WHERE tenant_id = ? AND telegram_id = ?', (tenant_id, telegram_id)
+        ).fetchone())
+        return row[0] if row else None
+
+    @_tracked(write=True)
+    async def import_requests(self, rows, tenant_id=DEFAULT_TENANT):
+        """Bulk insert tuples of IMPORT_REQUEST_COLUMNS in one transaction; returns how many were new."""
+        return await self._run(import_requests, rows, tenant_id)
+
+    @_tracked(write=True)
+    async def import_workers(self, rows, tenant_id=DEFAULT_TENANT):
+        """Bulk insert tuples of IMPORT_WORKER_COLUMNS, skipping the tenant's known phones; returns how many were new."""
+        return await self._run(import_workers, rows, tenant_id)
+
+    @_tracked(write=True)
+    async def transition_request(self, request_id, status, changed_by=None, assigned_to=None, note=None,
+                                 tenant_id=None):
+        """Move a request to ``status``; returns the owner's telegram_id. Raises ValueError if not allowed."""
+        return await self._run(transition_request, request_id, status, changed_by, assigned_to, note, tenant_id)
+
+    @_tracked(write=True)
+    async def claim_request(self, dispatcher, lease_seconds=DISPATCH_LEASE_SECONDS, tenant_id=None):
+        """Lease the most urgent unclaimed request; a tuple of DISPATCH_COLUMNS, or None when none is waiting."""
+        return await self._run(claim_request, dispatcher, lease_seconds, tenant_id)
+
+    @_tracked(write=True)
+    async def release_request(self, request_id, dispatcher, tenant_id=None):
+        """Give back a claimed request; returns whether ``dispatcher`` held it."""
+        return await self._run(release_request, request_id, dispatcher, tenant_id)
+
+    @_tracked(write=True)
+    async def assign_claimed(self, request_id, dispatcher, assigned_to, note=None, tenant_id=None):
+        """Assign a request claimed by ``dispatcher``; returns the owner's telegram_id. Raises ValueError."""
+        return await self._run(assign_claimed, request_id, dispatcher, assigned_to, note, tenant_id)
+
+    @_tracked(write=True)
+    async def reprioritise_request(self, request_id, deadline, tenant_id=None):
+        """Move a queued request to a new deadline; returns whether it was queued."""
+        return await self._run(reprioritise_request, request_id, deadline, tenant_id)
+
+    @_tracked()
+    async def dispatch_queue(self, limit=20, tenant_id=None):
+        """The most urgent queued requests first, as tuples of DISPATCH_COLUMNS; every tenant's unless one is given."""
+        return await self._run(dispatch_queue, limit, tenant_id)
+
+    @_tracked()
+    async def open_requests(self, telegram_id, limit=10, tenant_id=DEFAULT_TENANT):
+        """A user's open requests, newest first, as tuples of OPEN_REQUEST_COLUMNS."""
+        return await self._run(open_requests, telegram_id, limit, tenant_id)
+
+    @_tracked(write=True)
+    async def record_funnel(self, events, steps, tenant_id=DEFAULT_TENANT):
+        """Append funnel events and add to the per-day step totals in one transaction."""
+        await self._run(record_funnel, events, steps, tenant_id)
+
+    @_tracked()
+    async def funnel_report(self, since, tenant_id=None):
+        """Funnel totals from day ``since`` on, as tuples of FUNNEL_COLUMNS; every tenant's unless one is given."""
+        return await self._run(funnel_report, since, tenant_id)
+
+    @_tracked()
+    async def request_history(self, request_id, tenant_id=None):
+        """A request's status changes, oldest first, as tuples of HISTORY_COLUMNS; none for another tenant's."""
+        tenant_clause, params = ('AND tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+        return await self._run(lambda conn: conn.execute(f'''
+            SELECT {', '.join(HISTORY_COLUMNS)} FROM request_status_transitions
+            WHERE request_id = ? {tenant_clause} ORDER BY transition_id
+        ''', (request_id, *params)).fetchall())
+
+    @_tracked()
+    async def latest_transition_id(self):
+        """The newest transition_id, or 0 when there are none."""
+        row = await self._run(lambda conn: conn.execute(
+            'SELECT MAX(transition_id) FROM request_status_transitions'
+        ).fetchone())
+        return row[0] or 0
+
+    @_tracked()
+    async def transitions_since(self, transition_id, limit=1000, tenant_id=None):
+        """``(transition_id, telegram_id)`` of changes after ``transition_id``, oldest first.
+
+        With ``tenant_id``, other tenants' changes are skipped.
+        """
+        tenant_clause, params = ('AND t.tenant_id = ?', (tenant_id,)) if tenant_id else ('', ())
+        return await self._run(lambda conn: conn.execute(f'''
+            SELECT t.transition_id, u.telegram_id
+            FROM request_status_transitions t
+            LEFT JOIN service_requests r ON r.request_id = t.request_id
+            LEFT JOIN users u ON u.user_id = r.user_id
+            WHERE t.transition_id > ? {tenant_clause}
+            ORDER BY t.transition_id
+            LIMIT ?
+        ''', (transition_id, *params, limit)).fetchall())
+
+    @_tracked(write=True)
+    async def add_availability(self, worker_id, starts_at, ends_at, tenant_id=None):
+        """Make a worker bookable for a time range; returns the merged window. Raises ValueError."""
+        return await self._run(add_availability, worker_id, starts_at, ends_at, tenant_id)
+
+    @_tracked(write=True)
+    async def book_worker(self, worker_id, starts_at, ends_at, request_id=None, tenant_id=None):
+        """Book a free worker; returns the booking_id. Raises ValueError if not available or already booked."""
+        return await self._run(book_worker, worker_id, starts_at, ends_at, request_id, tenant_id)
+
+    @_tracked(write=True)
+    async def cancel_booking(self, booking_id, tenant_id=None):
+        """Delete a booking; returns whether it existed."""
+        return await self._run(cancel_booking, booking_id, tenant_id)
+
+    @_tracked()
+    async def worker_calendars(self, since, tenant_id=None):
+        """``(workers, windows, bookings)`` for building an availability index; see worker_calendars."""
+        return await self._run(worker_calendars, since, tenant_id)
+
+    @_tracked()
+    async def stats_snapshot(self, tenant_id=None):
+        """Dashboard numbers, including archived requests; every tenant's unless one is given."""
+        return await asyncio.to_thread(collect_snapshot, self.database_file, tenant_id=tenant_id)
+
+
+POSTGRES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS users (
+        user_id BIGSERIAL PRIMARY KEY,
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        telegram_id BIGINT,
+        username TEXT,
+        first_name TEXT,
+        last_name TEXT,
+        created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')
+    );
+
+    -- Older databases had one user per Telegram account; each tenant now has its own
+    ALTER TABLE users ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    ALTER TABLE users DROP CONSTRAINT IF EXISTS users_telegram_id_key;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_users_tenant_telegram ON users(tenant_id, telegram_id);
+
+    CREATE TABLE IF NOT EXISTS service_requests (
+        request_id BIGSERIAL PRIMARY KEY,
+        user_id BIGINT REFERENCES users(user_id),
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        location TEXT,
+        service_type TEXT NOT NULL,
+        services TEXT NOT NULL,
+        phone_source TEXT,
+        location_source TEXT,
+        submitted_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+        idempotency_key TEXT UNIQUE
+    );
+
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'pending';
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS assigned_to TEXT;
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS status_updated_at TIMESTAMP;
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS location_zone TEXT;
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS location_latitude DOUBLE PRECISION;
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS location_longitude DOUBLE PRECISION;
+    ALTER TABLE service_requests ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+
+    CREATE INDEX IF NOT EXISTS idx_service_requests_submitted_at ON service_requests(submitted_at, request_id);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_submitted_second
+        ON service_requests(date_trunc('second', submitted_at), request_id);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_service_type ON service_requests(service_type, submitted_at);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_phone ON service_requests(phone);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_user_status ON service_requests(user_id, status);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_location_zone ON service_requests(location_zone, submitted_at);
+    CREATE INDEX IF NOT EXISTS idx_service_requests_tenant ON service_requests(tenant_id, submitted_at);
+
+    CREATE TABLE IF NOT EXISTS request_status_transitions (
+        transition_id BIGSERIAL PRIMARY KEY,
+        request_id BIGINT NOT NULL,
+        from_status TEXT,
+        to_status TEXT NOT NULL,
+        changed_by TEXT,
+        note TEXT,
+        changed_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+        tenant_id TEXT NOT NULL DEFAULT 'default'
+    );
+    ALTER TABLE request_status_transitions ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    CREATE INDEX IF NOT EXISTS idx_request_status_transitions_request
+        ON request_status_transitions(request_id, transition_id);
+    CREATE INDEX IF NOT EXISTS idx_request_status_transitions_tenant
+        ON request_status_transitions(tenant_id, transition_id);
+
+    CREATE TABLE IF NOT EXISTS workers (
+        worker_id BIGSERIAL PRIMARY KEY,
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        name TEXT NOT NULL,
+        phone TEXT NOT NULL,
+        location TEXT,
+        services TEXT,
+        created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc')
+    );
+    -- Older databases had one worker per phone; each tenant now has its own
+    ALTER TABLE workers ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    ALTER TABLE workers DROP CONSTRAINT IF EXISTS workers_phone_key;
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_workers_tenant_phone ON workers(tenant_id, phone);
+
+    CREATE TABLE IF NOT EXISTS worker_availability (
+        availability_id BIGSERIAL PRIMARY KEY,
+        worker_id BIGINT NOT NULL REFERENCES workers(worker_id),
+        starts_at TIMESTAMP NOT NULL,
+        ends_at TIMESTAMP NOT NULL,
+        tenant_id TEXT NOT NULL DEFAULT 'default'
+    );
+    ALTER TABLE worker_availability ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    CREATE INDEX IF NOT EXISTS idx_worker_availability_worker ON worker_availability(worker_id, starts_at);
+
+    CREATE TABLE IF NOT EXISTS worker_bookings (
+        booking_id BIGSERIAL PRIMARY KEY,
+        worker_id BIGINT NOT NULL REFERENCES workers(worker_id),
+        request_id BIGINT,
+        starts_at TIMESTAMP NOT NULL,
+        ends_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+        tenant_id TEXT NOT NULL DEFAULT 'default'
+    );
+    ALTER TABLE worker_bookings ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    CREATE INDEX IF NOT EXISTS idx_worker_bookings_worker ON worker_bookings(worker_id, starts_at);
+
+    CREATE TABLE IF NOT EXISTS dispatch_queue (
+        request_id BIGINT PRIMARY KEY REFERENCES service_requests(request_id),
+        deadline TIMESTAMP NOT NULL,
+        leased_by TEXT,
+        lease_expires_at TIMESTAMP,
+        tenant_id TEXT NOT NULL DEFAULT 'default'
+    );
+    ALTER TABLE dispatch_queue ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    CREATE INDEX IF NOT EXISTS idx_dispatch_queue_deadline ON dispatch_queue(deadline, request_id);
+    CREATE INDEX IF NOT EXISTS idx_dispatch_queue_tenant ON dispatch_queue(tenant_id, deadline, request_id);
+
+    CREATE TABLE IF NOT EXISTS funnel_events (
+        event_id BIGSERIAL PRIMARY KEY,
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        telegram_id BIGINT NOT NULL,
+        from_state TEXT,
+        to_state TEXT NOT NULL,
+        occurred_at TIMESTAMP NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS funnel_steps (
+        tenant_id TEXT NOT NULL,
+        day DATE NOT NULL,
+        step TEXT NOT NULL,
+        reached INTEGER NOT NULL DEFAULT 0,
+        abandoned INTEGER NOT NULL DEFAULT 0,
+        seconds_to_reach DOUBLE PRECISION NOT NULL DEFAULT 0,
+        PRIMARY KEY (tenant_id, day, step)
+    );
+
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        tenant_id TEXT NOT NULL DEFAULT 'default',
+        telegram_id BIGINT NOT NULL,
+        data TEXT NOT NULL,
+        updated_at TIMESTAMP DEFAULT (now() AT TIME ZONE 'utc'),
+        CONSTRAINT user_sessions_tenant_pkey PRIMARY KEY (tenant_id, telegram_id)
+    );
+    -- Older databases keyed sessions by telegram_id alone, or by a unique index on both
+    ALTER TABLE user_sessions ADD COLUMN IF NOT EXISTS tenant_id TEXT NOT NULL DEFAULT 'default';
+    DO $$
+    BEGIN
+        IF to_regclass('user_sessions_tenant_pkey') IS NULL THEN
+            ALTER TABLE user_sessions DROP CONSTRAINT IF EXISTS user_sessions_pkey;
+            DROP INDEX IF EXISTS idx_user_sessions_tenant_telegram;
+            ALTER TABLE user_sessions ADD CONSTRAINT user_sessions_tenant_pkey PRIMARY KEY (tenant_id, telegram_id);
+        END IF;
+    END $$;
+'''
+# Whether POSTGRES_SCHEMA has been applied, checked by read-only pools instead of applying it
+_POSTGRES_SCHEMA_CURRENT = '''
+    SELECT to_regclass('dispatch_queue') IS NOT NULL AND to_regclass('funnel_steps') IS NOT NULL
+        AND to_regclass('idx_service_requests_submitted_second') IS NOT NULL
+        AND to_regclass('user_sessions_tenant_pkey') IS NOT NULL
+'''
+
+# submitted_at rendered like SQLite's CURRENT_TIMESTAMP text
+_POSTGRES_TIMESTAMP = "to_char(submitted_at, 'YYYY-MM-DD HH24:MI:SS')"
+
+
+def _timestamp(text):
+    """A 'YYYY-MM-DD HH:MM:SS' string as the datetime asyncpg binds to TIMESTAMP."""
+    return datetime.strptime(text, '%Y-%m-%d %H:%M:%S')
+
+
+def _postgres_columns(columns, prefix=''):
+    """Select list for ``columns``, rendering timestamps like SQLite does."""
+    return ', '.join(
+        f"to_char({prefix}{column}, 'YYYY-MM-DD HH24:MI:SS')" if column.endswith('_at') else f"{prefix}{column}"
+        for column in columns
+    )
+
+
+# SQL shared with SQLite is written with ? placeholders; asyncpg takes $1, $2, ...
+_PLACEHOLDER = re.compile(r'\?')
+
+
+def _numbered(sql):
+    """``sql`` with its ? placeholders numbered in order, as asyncpg takes them."""
+    numbers = itertools.count(1)
+    return _PLACEHOLDER.sub(lambda match: f'${next(numbers)}', sql)
+
+
+def _filter_timestamp(text):
+    """A typed date (and time) filter as the datetime asyncpg binds to TIMESTAMP."""
+    return datetime.fromisoformat(text)
+
+
+# Requests are listed and paged to the second, as submitted_at is rendered
+_SUBMITTED_SECOND = "date_trunc('second', submitted_at)"
+
+_POSTGRES_DISPATCH_SELECT = ', '.join(
+    f"to_char({column}, 'YYYY-MM-DD HH24:MI:SS')" if column.endswith(('_at', 'deadline')) else column
+    for column in _DISPATCH_SELECT
+)
+
+
+async def _postgres_enqueue(conn, where, *params):
+    """enqueue_requests for PostgreSQL; runs in the caller's transaction."""
+    rows = await conn.fetch(f'''
+        SELECT r.request_id, r.service_type, {_postgres_columns(['submitted_at'], 'r.')}, EXISTS (
+            SELECT 1 FROM service_requests earlier
+            WHERE earlier.phone = r.phone AND earlier.tenant_id = r.tenant_id AND earlier.status = 'done'
+              AND earlier.request_id < r.request_id
+        ), r.tenant_id
+        FROM service_requests r
+        WHERE r.status = 'pending' AND ({where})
+    ''', *params)
+    await conn.executemany('''
+        INSERT INTO dispatch_queue (request_id, deadline, tenant_id) VALUES ($1, $2, $3)
+        ON CONFLICT (request_id) DO UPDATE SET deadline = excluded.deadline, leased_by = NULL, lease_expires_at = NULL
+    ''', [(request_id, _timestamp(sla_deadline(service_type, submitted_at, returning)), tenant_id)
+          for request_id, service_type, submitted_at, returning, tenant_id in rows])
+
+
+async def _postgres_transition(conn, request_id, status, changed_by=None, assigned_to=None, note=None, tenant_id=None):
+    """transition_request for PostgreSQL; runs in the caller's transaction."""
+    row = await conn.fetchrow('''
+        SELECT r.status, r.assigned_to, u.telegram_id, r.tenant_id
+        FROM service_requests r LEFT JOIN users u ON u.user_id = r.user_id
+        WHERE r.request_id = $1 AND ($2::text IS NULL OR r.tenant_id = $2)
+        FOR UPDATE OF r
+    ''', request_id, tenant_id)
+    current, current_assignee, telegram_id, request_tenant = tuple(row) if row else (None, None, None, None)
+    check_transition(request_id, current, status)
+    assignee = None if status == 'pending' else assigned_to or current_assignee
+    await conn.execute('''
+        UPDATE service_requests
+        SET status = $1, assigned_to = $2, status_updated_at = now() AT TIME ZONE 'utc'
+        WHERE request_id = $3
+    ''', status, assignee, request_id)
+    await conn.execute('''
+        INSERT INTO request_status_transitions (request_id, from_status, to_status, changed_by, note, tenant_id)
+        VALUES ($1, $2, $3, $4, $5, $6)
+    ''', request_id, current, status, changed_by, note, request_tenant)
+    if status == 'pending':
+        await _postgres_enqueue(conn, 'r.request_id = $1', request_id)
+    elif current == 'pending':
+        await conn.execute('DELETE FROM dispatch_queue WHERE request_id = $1', request_id)
+    return telegram_id
+
+
+async def _postgres_worker_tenant(conn, worker_id, tenant_id=None):
+    """_worker_tenant for PostgreSQL, locking the worker row until the caller's transaction ends."""
+    worker_tenant = await conn.fetchval('SELECT tenant_id FROM workers WHERE worker_id = $1 FOR UPDATE', worker_id)
+    if worker_tenant is None or tenant_id not in (None, worker_tenant):
+        raise ValueError(f"Worker #{worker_id} not found")
+    return worker_tenant
+
+
+class PostgresRepository:
+    """Repository over PostgreSQL with an asyncpg connection pool.
+
+    ``schema`` puts the tables in their own search_path schema, which the
+    conformance suite uses to run against a shared server. Search is a plain
+    case-insensitive match on every word; the Ethiopic folding of the SQLite
+    FTS index isn't applied.
+    """
+
+    backend = 'postgres'
+
+    def __init__(self, dsn, min_size=POSTGRES_POOL_MIN, max_size=POSTGRES_POOL_MAX, schema=None, read_only=False):
+        if asyncpg is None:
+            raise RuntimeError("asyncpg is required for PostgreSQL storage (pip install asyncpg)")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.schema = schema
+        self.read_only = read_only
+        self.pool = None
+        self.pending_writes = 0
+        self.last_error = None
+
+    @_tracked()
+    async def init(self):
+        """Open the pool and create the schema; read-only, only check it is current."""
+        if self.schema and not self.read_only:
+            conn = await asyncpg.connect(self.dsn)
+            try:
+                await conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{self.schema}"')
+            finally:
+                await conn.close()
+        server_settings = {'search_path': self.schema} if self.schema else {}
+        if self.read_only:
+            server_settings['default_transaction_read_only'] = 'on'
+        self.pool = await asyncpg.create_pool(
+            self.dsn, min_size=self.min_size, max_size=self.max_size, server_settings=server_settings or None
+        )
+        if self.read_only:
+            async with self.pool.acquire() as conn:
+                if not await conn.fetchval(_POSTGRES_SCHEMA_CURRENT):
+                    raise RuntimeError("the database schema is out of date; run `python view_database.py migrate` "
+                                       "or start the bot once to upgrade it")
+            return
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                queue_is_new = await conn.fetchval("SELECT to_regclass('dispatch_queue')") is None
+                # Rows already there when tenant_id is added take their request's tenant
+                backfill = [
+                    table for table in ('request_status_transitions', 'dispatch_queue') if await conn.fetchval('''
+                        SELECT to_regclass($1) IS NOT NULL AND NOT EXISTS (
+                            SELECT 1 FROM information_schema.columns
+                            WHERE table_schema = current_schema() AND table_name = $1 AND column_name = 'tenant_id'
+                        )
+                    ''', table)
+                ]
+                await conn.execute(POSTGRES_SCHEMA)
+                for table in backfill:
+                    await conn.execute(_REQUEST_TENANT_BACKFILL.format(table=table))
+                # Requests already pending when the queue is added join it
+                if queue_is_new:
+                    await _postgres_enqueue(conn, 'TRUE')
+
+    async def close(self):
+        """Close the pool."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+
+    @_tracked(write=True)
+    async def save_user(self, telegram_id, username, first_name, last_name, tenant_id=DEFAULT_TENANT):
+        async with self.pool.acquire() as conn:
+            await conn.execute('''
+                INSERT INTO users (tenant_id, telegram_id, username, first_name, last_name)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (tenant_id, telegram_id) DO NOTHING
+            ''', tenant_id, telegram_id, username, first_name, last_name)
+
+    @_tracked(write=True)
+    async def save_request(self, telegram_id, name, phone, location, service_type, services,
+                           phone_source, location_source, idempotency_key=None,
+                           location_zone=None, location_latitude=None, location_longitude=None,
+                           tenant_id=DEFAULT_TENANT):
+        """Save a request, returning the original request_id for a repeated idempotency_key."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                user_id = await conn.fetchval(
+                    'SELECT user_id FROM users WHERE tenant_id = $1 AND telegram_id = $2', tenant_id, telegram_id
+                )
+                request_id = await conn.fetchval('''
+                    INSERT INTO service_requests
+                    (user_id, name, phone, location, service_type, services, phone_source, location_source, idempotency_key,
+                     location_zone, location_latitude, location_longitude, tenant_id)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13)
+                    ON CONFLICT (idempotency_key) DO NOTHING
+                    RETURNING request_id
+                ''', user_id, name, phone, location, service_type, services, phone_source, location_source, idempotency_key,
+                    location_zone, location_latitude, location_longitude, tenant_id)
+                if request_id is None:
+                    request_id = await conn.fetchval(
+                        'SELECT request_id FROM service_requests WHERE idempotency_key = $1', idempotency_key
+                    )
+                    logger.info(f"♻️ Service request #{request_id} already saved, skipping duplicate")
+                    return request_id
+                await conn.execute('''
+                    INSERT INTO request_status_transitions (request_id, to_status, tenant_id) VALUES ($1, 'pending', $2)
+                ''', request_id, tenant_id)
+                await _postgres_enqueue(conn, 'r.request_id = $1', request_id)
+                return request_id
+
+    @_tracked()
+    async def search_requests(self, term, limit=10, tenant_id=None, filters=None, columns=None):
+        """Requests matching ``term`` and ``filters``, newest first, as tuples of ``columns``.
+
+        A phone number is looked up in any of its stored forms; otherwise
+        every word of ``term`` must appear in the name, location or services.
+        """
+        columns = columns or SEARCH_COLUMNS
+        variants = phone_variants(term)
+        if variants:
+            return await self.list_requests({**(filters or {}), 'phones': variants}, limit, columns,
+                                            tenant_id=tenant_id)
+        words = term.split()
+        if not words:
+            return []
+        clauses, params = request_filter_clauses(filters, tenant_id, _filter_timestamp)
+        for word in words:
+            clauses.append('(name ILIKE ? OR location ILIKE ? OR services ILIKE ?)')
+            params.extend([f"%{word}%"] * 3)
+        params.append(limit)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(_numbered(
+                f"SELECT {_postgres_columns(columns)} FROM service_requests{_where(clauses)} "
+                f"ORDER BY request_id DESC LIMIT ?"
+            ), *params)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def list_requests(self, filters=None, limit=None, columns=None, start=None, inclusive=False, tenant_id=None):
+        """Requests matching ``filters``, newest first, from ``start``; see list_requests."""
+        clauses, params = request_filter_clauses(filters, tenant_id, _filter_timestamp)
+        if start is not None:
+            clauses.append(f"({_SUBMITTED_SECOND}, request_id) {'<=' if inclusive else '<'} (?, ?)")
+            params.extend([_timestamp(start[0]), start[1]])
+        query = f"SELECT {_postgres_columns(columns or LIST_COLUMNS)} FROM service_requests{_where(clauses)} " \
+                f"ORDER BY {_SUBMITTED_SECOND} DESC, request_id DESC"
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(_numbered(query), *params)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def request_key(self, request_id, tenant_id=None):
+        """The ``(submitted_at, request_id)`` to list requests from to reach ``request_id``, or None."""
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(f'''
+                SELECT {_POSTGRES_TIMESTAMP}, request_id FROM service_requests
+                WHERE request_id = $1 AND ($2::text IS NULL OR tenant_id = $2)
+            ''', request_id, tenant_id)
+        return tuple(row) if row else None
+
+    @_tracked()
+    async def list_users(self, start=None, inclusive=False, limit=20, tenant_id=None):
+        """Users in user_id order from ``start``, as tuples of USER_COLUMNS."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT {_postgres_columns(USER_COLUMNS)} FROM users
+                WHERE ($1::bigint IS NULL OR user_id {'>=' if inclusive else '>'} $1) AND ($2::text IS NULL OR tenant_id = $2)
+                ORDER BY user_id
+                LIMIT $3
+            ''', start, tenant_id, limit)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def request_stats(self, filters=None, tenant_id=None):
+        """Request counts and per-value breakdowns for ``filters``; see request_stats."""
+        clauses, params = request_filter_clauses(filters, tenant_id, _filter_timestamp)
+        where = _numbered(_where(clauses))
+        async with self.pool.acquire() as conn:
+            users = await conn.fetchval('SELECT COUNT(*) FROM users WHERE $1::text IS NULL OR tenant_id = $1', tenant_id)
+            requests, latest_request = await conn.fetchrow(
+                f'SELECT COUNT(*), MAX({_POSTGRES_TIMESTAMP}) FROM service_requests{where}', *params
+            )
+            breakdowns = {
+                f'by_{column}': dict(tuple(row) for row in await conn.fetch(
+                    f'SELECT {column}, COUNT(*) FROM service_requests{where} GROUP BY {column}', *params
+                ))
+                for column in STATS_BREAKDOWNS
+            }
+        return {'users': users, 'requests': requests, 'latest_request': latest_request, **breakdowns}
+
+    @_tracked()
+    async def export_rows(self, table, after_key=None, since=None, filters=None, limit=EXPORT_BATCH_SIZE,
+                          tenant_id=None):
+        """The next ``limit`` rows of an EXPORT_TABLES table after ``after_key``, in key order."""
+        spec = EXPORT_TABLES[table]
+        if table == 'service_requests':
+            clauses, params = request_filter_clauses(filters, tenant_id, _filter_timestamp)
+        else:
+            clauses, params = (['tenant_id = ?'], [tenant_id]) if tenant_id else ([], [])
+        if after_key is not None:
+            clauses.append(f"{spec['key']} > ?")
+            params.append(after_key)
+        if since:
+            clauses.append(f"{spec['timestamp']} >= ?")
+            params.append(_filter_timestamp(since))
+        params.append(limit)
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(_numbered(
+                f"SELECT {_postgres_columns(spec['columns'])} FROM {table}{_where(clauses)} "
+                f"ORDER BY {spec['key']} LIMIT ?"
+            ), *params)
+        return [tuple(row) for row in rows]
+
+    @_tracked(write=True)
+    async def save_preferences(self, sessions, tenant_id=DEFAULT_TENANT):
+        """Store ``{telegram_id: serialised_session}``, replacing older copies."""
+        async with self.pool.acquire() as conn:
+            await conn.executemany('''
+                INSERT INTO user_sessions (tenant_id, telegram_id, data) VALUES ($1, $2, $3)
+                ON CONFLICT (tenant_id, telegram_id)
+                DO UPDATE SET data = excluded.data, updated_at = now() AT TIME ZONE 'utc'
+            ''', [(tenant_id, telegram_id, data) for telegram_id, data in sessions.items()])
+
+    @_tracked()
+    async def load_preferences(self, telegram_id, tenant_id=DEFAULT_TENANT):
+        """The serialised session stored for a user, or None."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval(
+                'SELECT data FROM user_sessions WHERE tenant_id = $1 AND telegram_id = $2', tenant_id, telegram_id
+            )
+
+    @_tracked(write=True)
+    async def import_requests(self, rows, tenant_id=DEFAULT_TENANT):
+        """Bulk insert tuples of IMPORT_REQUEST_COLUMNS in one statement; returns how many were new."""
+        columns = list(zip(*rows)) if rows else [[]] * len(IMPORT_REQUEST_COLUMNS)
+        submitted_index = IMPORT_REQUEST_COLUMNS.index('submitted_at')
+        columns[submitted_index] = [
+            datetime.strptime(value, '%Y-%m-%d %H:%M:%S') if value else None for value in columns[submitted_index]
+        ]
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                inserted = await conn.fetch('''
+                    INSERT INTO service_requests
+                    (name, phone, location, service_type, services, submitted_at, status, idempotency_key,
+                     phone_source, location_source, status_updated_at, tenant_id)
+                    SELECT name, phone, location, service_type, services,
+                           COALESCE(submitted_at, now() AT TIME ZONE 'utc'), status, idempotency_key,
+                           'manual_entry', 'manual_entry', now() AT TIME ZONE 'utc', $9
+                    FROM unnest($1::text[], $2::text[], $3::text[], $4::text[], $5::text[], $6::timestamp[],
+                                $7::text[], $8::text[])
+                         AS t(name, phone, location, service_type, services, submitted_at, status, idempotency_key)
+                    ON CONFLICT (idempotency_key) DO NOTHING
+                    RETURNING request_id
+                ''', *[list(column) for column in columns], tenant_id)
+                request_ids = [row[0] for row in inserted]
+                await _postgres_enqueue(conn, 'r.request_id = ANY($1::bigint[])', request_ids)
+        return len(request_ids)
+
+    @_tracked(write=True)
+    async def import_workers(self, rows, tenant_id=DEFAULT_TENANT):
+        """Bulk insert tuples of IMPORT_WORKER_COLUMNS, skipping the tenant's known phones; returns how many were new."""
+        columns = list(zip(*rows)) if rows else [[]] * len(IMPORT_WORKER_COLUMNS)
+        async with self.pool.acquire() as conn:
+            result = await conn.execute('''
+                INSERT INTO workers (name, phone, location, services, tenant_id)
+                SELECT *, $5 FROM unnest($1::text[], $2::text[], $3::text[], $4::text[])
+                ON CONFLICT (tenant_id, phone) DO NOTHING
+            ''', *[list(column) for column in columns], tenant_id)
+        return int(result.split()[-1])
+
+    @_tracked(write=True)
+    async def transition_request(self, request_id, status, changed_by=None, assigned_to=None, note=None,
+                                 tenant_id=None):
+        """Move a request to ``status``; returns the owner's telegram_id. Raises ValueError if not allowed."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                return await _postgres_transition(conn, request_id, status, changed_by, assigned_to, note, tenant_id)
+
+    @_tracked(write=True)
+    async def claim_request(self, dispatcher, lease_seconds=DISPATCH_LEASE_SECONDS, tenant_id=None):
+        """Lease the most urgent unclaimed request; a tuple of DISPATCH_COLUMNS, or None when none is waiting."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # SKIP LOCKED lets concurrent claims each take the next request instead of waiting
+                request_id = await conn.fetchval('''
+                    UPDATE dispatch_queue
+                    SET leased_by = $1, lease_expires_at = now() AT TIME ZONE 'utc' + make_interval(secs => $2)
+                    WHERE request_id = (
+                        SELECT request_id FROM dispatch_queue
+                        WHERE (lease_expires_at IS NULL OR lease_expires_at <= now() AT TIME ZONE 'utc')
+                          AND ($3::text IS NULL OR tenant_id = $3)
+                        ORDER BY deadline, request_id
+                        LIMIT 1
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING request_id
+                ''', dispatcher, float(lease_seconds), tenant_id)
+                if request_id is None:
+                    return None
+                row = await conn.fetchrow(f'''
+                    SELECT {_POSTGRES_DISPATCH_SELECT}
+                    FROM dispatch_queue q JOIN service_requests r ON r.request_id = q.request_id
+                    WHERE q.request_id = $1
+                ''', request_id)
+        return tuple(row)
+
+    @_tracked(write=True)
+    async def release_request(self, request_id, dispatcher, tenant_id=None):
+        """Give back a claimed request; returns whether ``dispatcher`` held it."""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute('''
+                UPDATE dispatch_queue SET leased_by = NULL, lease_expires_at = NULL
+                WHERE request_id = $1 AND leased_by = $2 AND ($3::text IS NULL OR tenant_id = $3)
+            ''', request_id, dispatcher, tenant_id)
+        return int(result.split()[-1]) > 0
+
+    @_tracked(write=True)
+    async def assign_claimed(self, request_id, dispatcher, assigned_to, note=None, tenant_id=None):
+        """Assign a request claimed by ``dispatcher``; returns the owner's telegram_id. Raises ValueError."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                lease = await conn.fetchrow('''
+                    SELECT leased_by, lease_expires_at > now() AT TIME ZONE 'utc' FROM dispatch_queue
+                    WHERE request_id = $1 AND ($2::text IS NULL OR tenant_id = $2)
+                    FOR UPDATE
+                ''', request_id, tenant_id)
+                if lease is None or lease[0] != dispatcher or not lease[1]:
+                    raise ValueError(f"Request #{request_id} is not claimed by {dispatcher}; claim it first")
+                return await _postgres_transition(conn, request_id, 'assigned', dispatcher, assigned_to, note,
+                                                  tenant_id)
+
+    @_tracked(write=True)
+    async def reprioritise_request(self, request_id, deadline, tenant_id=None):
+        """Move a queued request to a new deadline; returns whether it was queued."""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute('''
+                UPDATE dispatch_queue SET deadline = $1 WHERE request_id = $2 AND ($3::text IS NULL OR tenant_id = $3)
+            ''', _timestamp(deadline), request_id, tenant_id)
+        return int(result.split()[-1]) > 0
+
+    @_tracked()
+    async def dispatch_queue(self, limit=20, tenant_id=None):
+        """The most urgent queued requests first, as tuples of DISPATCH_COLUMNS; every tenant's unless one is given."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT {_POSTGRES_DISPATCH_SELECT}
+                FROM dispatch_queue q JOIN service_requests r ON r.request_id = q.request_id
+                WHERE $2::text IS NULL OR q.tenant_id = $2
+                ORDER BY q.deadline, q.request_id
+                LIMIT $1
+            ''', limit, tenant_id)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def open_requests(self, telegram_id, limit=10, tenant_id=DEFAULT_TENANT):
+        """A user's open requests, newest first, as tuples of OPEN_REQUEST_COLUMNS."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT {_postgres_columns(OPEN_REQUEST_COLUMNS, 'r.')}
+                FROM service_requests r JOIN users u ON u.user_id = r.user_id
+                WHERE u.tenant_id = $1 AND u.telegram_id = $2 AND r.status = ANY($3::text[])
+                ORDER BY r.request_id DESC
+                LIMIT $4
+            ''', tenant_id, telegram_id, OPEN_STATUSES, limit)
+        return [tuple(row) for row in rows]
+
+    @_tracked(write=True)
+    async def record_funnel(self, events, steps, tenant_id=DEFAULT_TENANT):
+        """Append funnel events and add to the per-day step totals in one transaction."""
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany(f'''
+                    INSERT INTO funnel_events (tenant_id, {', '.join(FUNNEL_EVENT_COLUMNS)}) VALUES ($1, $2, $3, $4, $5)
+                ''', [(tenant_id, telegram_id, from_state, to_state, _timestamp(occurred_at))
+                      for telegram_id, from_state, to_state, occurred_at in events])
+                await conn.executemany(f'''
+                    INSERT INTO funnel_steps (tenant_id, {', '.join(FUNNEL_STEP_COLUMNS)}) VALUES ($1, $2, $3, $4, $5, $6)
+                    ON CONFLICT (tenant_id, day, step) DO UPDATE SET
+                        reached = funnel_steps.reached + excluded.reached,
+                        abandoned = funnel_steps.abandoned + excluded.abandoned,
+                        seconds_to_reach = funnel_steps.seconds_to_reach + excluded.seconds_to_reach
+                ''', [(tenant_id, date.fromisoformat(day), step, reached, abandoned, seconds)
+                      for day, step, reached, abandoned, seconds in steps])
+
+    @_tracked()
+    async def funnel_report(self, since, tenant_id=None):
+        """Funnel totals from day ``since`` on, as tuples of FUNNEL_COLUMNS; every tenant's unless one is given."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT step, SUM(reached), SUM(abandoned), SUM(seconds_to_reach)
+                FROM funnel_steps
+                WHERE day >= $1 AND ($2::text IS NULL OR tenant_id = $2)
+                GROUP BY step
+            ''', date.fromisoformat(since), tenant_id)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def request_history(self, request_id, tenant_id=None):
+        """A request's status changes, oldest first, as tuples of HISTORY_COLUMNS; none for another tenant's."""
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f'''
+                SELECT {_postgres_columns(HISTORY_COLUMNS)} FROM request_status_transitions
+                WHERE request_id = $1 AND ($2::text IS NULL OR tenant_id = $2) ORDER BY transition_id
+            ''', request_id, tenant_id)
+        return [tuple(row) for row in rows]
+
+    @_tracked()
+    async def latest_transition_id(self):
+        """The newest transition_id, or 0 when there are none."""
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval('SELECT COALESCE(MAX(transition_id), 0) FROM request_status_transitions')
+
+    @_tracked()
+    async def transitions_since(self, transition_id, limit=1000, tenant_id=None):
+        """``(transition_id, telegram_id)`` of changes after ``transition_id``, oldest first.
+
+        With ``tenant_id``, other tenants' changes are skipped.
+        """
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch('''
+                SELECT t.transition_id, u.telegram_id
+                FROM request_status_transitions t
+                LEFT JOIN service_requests r ON r.request_id = t.request_id
+                LEFT JOIN users u ON u.user_id = r.user_id
+                WHERE t.transition_id > $1 AND ($3::text IS NULL OR t.tenant_id = $3)
+                ORDER BY t.transition_id
+                LIMIT $2
+            ''', transition_id, limit, tenant_id)
+        return [tuple(row) for row in rows]
+
+    @_tracked(write=True)
+    async def add_availability(self, worker_id, starts_at, ends_at, tenant_id=None):
+        """Make a worker bookable for a time range; returns the merged window. Raises ValueError."""
+        check_interval(starts_at, ends_at)
+        starts, ends = _timestamp(starts_at), _timestamp(ends_at)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Locking the worker serialises every calendar change for them
+                tenant_id = await _postgres_worker_tenant(conn, worker_id, tenant_id)
+                first, last = await conn.fetchrow('''
+                    WITH merged AS (
+                        DELETE FROM worker_availability WHERE worker_id = $1 AND starts_at <= $2 AND ends_at >= $3
+                        RETURNING starts_at, ends_at
+                    )
+                    SELECT MIN(starts_at), MAX(ends_at) FROM merged
+                ''', worker_id, ends, starts)
+                starts, ends = min(starts, first or starts), max(ends, last or ends)
+                await conn.execute('''
+                    INSERT INTO worker_availability (worker_id, starts_at, ends_at, tenant_id) VALUES ($1, $2, $3, $4)
+                ''', worker_id, starts, ends, tenant_id)
+        return starts.strftime('%Y-%m-%d %H:%M:%S'), ends.strftime('%Y-%m-%d %H:%M:%S')
+
+    @_tracked(write=True)
+    async def book_worker(self, worker_id, starts_at, ends_at, request_id=None, tenant_id=None):
+        """Book a free worker; returns the booking_id. Raises ValueError if not available or already booked."""
+        check_interval(starts_at, ends_at)
+        starts, ends = _timestamp(starts_at), _timestamp(ends_at)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                tenant_id = await _postgres_worker_tenant(conn, worker_id, tenant_id)
+                if request_id is not None and await conn.fetchval(
+                    'SELECT 1 FROM service_requests WHERE request_id = $1 AND tenant_id <> $2', request_id, tenant_id
+                ):
+                    raise ValueError(f"Request #{request_id} not found")
+                if await conn.fetchval('''
+                    SELECT 1 FROM worker_availability WHERE worker_id = $1 AND starts_at <= $2 AND ends_at >= $3
+                ''', worker_id, starts, ends) is None:
+                    raise ValueError(f"Worker #{worker_id} is not available from {starts_at} to {ends_at}")
+                clash = await conn.fetchrow(f'''
+                    SELECT booking_id, {_postgres_columns(['starts_at', 'ends_at'])} FROM worker_bookings
+                    WHERE worker_id = $1 AND starts_at < $2 AND ends_at > $3
+                    LIMIT 1
+                ''', worker_id, ends, starts)
+                if clash:
+                    raise ValueError(f"Worker #{worker_id} is already booked from {clash[1]} to {clash[2]} "
+                                     f"(booking #{clash[0]})")
+                return await conn.fetchval('''
+                    INSERT INTO worker_bookings (worker_id, request_id, starts_at, ends_at, tenant_id)
+                    VALUES ($1, $2, $3, $4, $5)
+                    RETURNING booking_id
+                ''', worker_id, request_id, starts, ends, tenant_id)
+
+    @_tracked(write=True)
+    async def cancel_booking(self, booking_id, tenant_id=None):
+        """Delete a booking; returns whether it existed."""
+        async with self.pool.acquire() as conn:
+            result = await conn.execute(
+                'DELETE FROM worker_bookings WHERE booking_id = $1 AND ($2::text IS NULL OR tenant_id = $2)',
+                booking_id, tenant_id
+            )
+        return int(result.split()[-1]) > 0
+
+    @_tracked()
+    async def worker_calendars(self, since, tenant_id=None):
+        """``(workers, windows, bookings)`` for building an availability index; see worker_calendars."""
+        async with self.pool.acquire() as conn:
+            workers = await conn.fetch(f'''
+                SELECT {', '.join(WORKER_COLUMNS)} FROM workers
+                WHERE $1::text IS NULL OR tenant_id = $1
+                ORDER BY worker_id
+            ''', tenant_id)
+            windows, bookings = [
+                await conn.fetch(f'''
+                    SELECT {_postgres_columns(CALENDAR_COLUMNS)} FROM {table}
+                    WHERE ends_at > $1 AND ($2::text IS NULL OR tenant_id = $2) ORDER BY worker_id, starts_at
+                ''', _timestamp(since), tenant_id)
+                for table in ('worker_availability', 'worker_bookings')
+            ]
+        return [tuple(row) for row in workers], [tuple(row) for row in windows], [tuple(row) for row in bookings]
+
+    @_tracked()
+    async def stats_snapshot(self, tenant_id=None):
+        """Dashboard numbers in the same shape as stats_snapshot.collect_snapshot; every tenant's unless one is given."""
+        today_start = datetime.strptime(today_start_utc(), '%Y-%m-%d %H:%M:%S')
+        tenant = '($1::text IS NULL OR tenant_id = $1)'
+
+        def breakdown(rows):
+            result = {}
+            for service_type, count in rows:
+                name = SERVICE_TYPE_NAMES.get(service_type, service_type)
+                result[name] = result.get(name, 0) + count
+            return result
+
+        async with self.pool.acquire() as conn:
+            user_count = await conn.fetchval(f'SELECT COUNT(*) FROM users WHERE {tenant}', tenant_id)
+            totals = await conn.fetchrow(
+                f'SELECT COUNT(*), MAX({_POSTGRES_TIMESTAMP}) FROM service_requests WHERE {tenant}', tenant_id
+            )
+            users_today = await conn.fetchval(
+                f'SELECT COUNT(*) FROM users WHERE {tenant} AND created_at >= $2', tenant_id, today_start
+            )
+            requests_today = await conn.fetchval(
+                f'SELECT COUNT(*) FROM service_requests WHERE {tenant} AND submitted_at >= $2', tenant_id, today_start
+            )
+            recent = await conn.fetch(f'''
+                SELECT request_id, name, phone, location, service_type, services, {_POSTGRES_TIMESTAMP}
+                FROM service_requests
+                WHERE {tenant}
+                ORDER BY submitted_at DESC, request_id DESC
+                LIMIT $2
+            ''', tenant_id, RECENT_LIMIT)
+            by_service_type = await conn.fetch(
+                f'SELECT service_type, COUNT(*) FROM service_requests WHERE {tenant} GROUP BY service_type', tenant_id
+            )
+            today_by_service_type = await conn.fetch(
+                f'SELECT service_type, COUNT(*) FROM service_requests WHERE {tenant} AND submitted_at >= $2 '
+                f'GROUP BY service_type',
+                tenant_id, today_start
+            )
+
+        return {
+            'users': user_count,
+            'requests': totals[0],
+            'latest_request': totals[1],
+            'by_service_type': breakdown(by_service_type),
+            'today': {
+                'users': users_today,
+                'requests': requests_today,
+                'by_service_type': breakdown(today_by_service_type)
+            },
+            'recent': [tuple(row) for row in recent]
+        }
+
+
+class TenantRepository:
+    """One tenant's view of a repository shared by several bots in one process.
+
+    Calls on behalf of customers, admins and staff (imports, calendars,
+    dispatch) are scoped to ``tenant_id``; everything else (backend,
+    counters) passes straight through. The host process opens and closes the
+    shared repository, so init() and close() here do nothing.
+    """
+
+    # Repository methods taking a tenant_id keyword
+    TENANT_METHODS = {'save_user', 'save_request', 'search_requests', 'save_preferences', 'load_preferences',
+                      'open_requests', 'transition_request', 'request_history', 'transitions_since', 'stats_snapshot',
+                      'record_funnel', 'funnel_report', 'import_requests', 'import_workers', 'add_availability',
+                      'book_worker', 'cancel_booking', 'worker_calendars', 'claim_request', 'release_request',
+                      'assign_claimed', 'reprioritise_request', 'dispatch_queue', 'list_requests', 'request_key',
+                      'list_users', 'request_stats', 'export_rows'}
+
+    def __init__(self, repository, tenant_id):
+        self.repository = repository
+        self.tenant_id = tenant_id
+
+    def __getattr__(self, name):
+        attribute = getattr(self.repository, name)
+        if name in self.TENANT_METHODS:
+            return functools.partial(attribute, tenant_id=self.tenant_id)
+        return attribute
+
+    async def init(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+def open_repository(database_url=None, database_file=None, read_only=False):
+    """The PostgreSQL repository for a postgres:// URL, otherwise SQLite on ``database_file``.
+
+    Both default to the DATABASE_URL and DATABASE_FILE environment variables.
+    A ``read_only`` repository never creates or upgrades the schema and
+    refuses writes, so reporting tools can't lock or change the live database.
+    """
+    database_url = os.getenv('DATABASE_URL', '') if database_url is None else database_url
+    database_file = database_file or os.getenv('DATABASE_FILE', DATABASE_FILE)
+    if database_url.startswith(('postgres://', 'postgresql://')):
+        return PostgresRepository(database_url, read_only=read_only)
+    return SQLiteRepository(database_file, read_only=read_only)
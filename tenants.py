@@ -0,0 +1,66 @@
+import json
+import os
+import re
+from collections import namedtuple
+
+# Partner agency brands hosted by one bot process.
+#
+# The bot's TENANTS_FILE setting names a JSON file listing one entry per
+# bot token:
+#
+#   {"tenants": [
+#     {"id": "liyu", "token_env": "BOT_TOKEN_CLIENT", "admin_ids": [123], "staff_chat_id": "-100..."},
+#     {"id": "acme", "token_env": "BOT_TOKEN_ACME"}
+#   ]}
+#
+# Tokens are read from the environment variable each entry names (or a
+# literal "token", for local testing), so the file itself holds no secrets.
+# Every tenant gets its own Application, handlers and sessions; the text
+# catalogs, HTTP connection pools and database pool are shared, and every
+# user, session and request row carries the tenant's id.
+
+# Tenant of rows written before tenants existed, and of a single-token deployment
+DEFAULT_TENANT = 'default'
+
+TENANT_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,31}$')
+
+Tenant = namedtuple('Tenant', ['tenant_id', 'token', 'admin_ids', 'staff_chat_id'])
+
+
+def parse_tenants(config, environ=os.environ):
+    """Tenants from a parsed TENANTS_FILE; raises ValueError naming the first problem."""
+    entries = config.get('tenants') if isinstance(config, dict) else None
+    if not entries:
+        raise ValueError("no tenants listed (expected {\"tenants\": [...]})")
+    tenants = []
+    seen_ids, seen_tokens = set(), set()
+    for number, entry in enumerate(entries, 1):
+        tenant_id = str(entry.get('id', ''))
+        if not TENANT_ID_PATTERN.match(tenant_id):
+            raise ValueError(f"tenant {number}: id '{tenant_id}' must be 1-32 lowercase letters, digits, - or _")
+        if tenant_id in seen_ids:
+            raise ValueError(f"tenant {number}: id '{tenant_id}' is listed twice")
+        token = entry.get('token') or environ.get(entry.get('token_env', ''), '')
+        if not token:
+            raise ValueError(f"tenant '{tenant_id}': no token (set {entry.get('token_env') or 'token_env'})")
+        if token in seen_tokens:
+            raise ValueError(f"tenant '{tenant_id}': token already used by another tenant")
+        try:
+            admin_ids = {int(admin_id) for admin_id in entry.get('admin_ids', [])}
+        except (TypeError, ValueError):
+            raise ValueError(f"tenant '{tenant_id}': admin_ids must be Telegram user ids")
+        staff_chat_id = entry.get('staff_chat_id')
+        tenants.append(Tenant(tenant_id, token, admin_ids, str(staff_chat_id) if staff_chat_id else None))
+        seen_ids.add(tenant_id)
+        seen_tokens.add(token)
+    return tenants
+
+
+def load_tenants(path):
+    """Read and check the tenants file; raises ValueError or OSError."""
+    with open(path, encoding='utf-8') as f:
+        try:
+            config = json.load(f)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{path} is not valid JSON: {e}")
+    return parse_tenants(config)
@@ -0,0 +1,72 @@
+"""The storage conformance checks as pytest tests, once per repository backend.
+
+SQLite runs on a temporary file. PostgreSQL runs when CONFORMANCE_DATABASE_URL
+is set, in a throwaway schema; see storage_conformance.py for a disposable
+server. The checks build on each other's rows, so they run in CHECKS order.
+
+Usage: CONFORMANCE_DATABASE_URL=postgresql://... python -m pytest -q test_storage.py
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+
+import storage
+from storage_conformance import CHECKS
+
+POSTGRES_URL = os.getenv('CONFORMANCE_DATABASE_URL', '')
+
+
+@pytest.fixture(scope='module', params=['sqlite', 'postgres'])
+def backend(request, tmp_path_factory):
+    """An initialised repository and the event loop its connections belong to."""
+    if request.param == 'postgres':
+        if not POSTGRES_URL:
+            pytest.skip("set CONFORMANCE_DATABASE_URL to test PostgreSQL")
+        schema = f"conformance_{uuid.uuid4().hex[:12]}"
+        repository = storage.PostgresRepository(POSTGRES_URL, schema=schema)
+    else:
+        repository = storage.SQLiteRepository(str(tmp_path_factory.mktemp('sqlite') / 'conformance.db'))
+    # One loop for the whole module, so the asyncpg pool outlives each test
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(repository.init())
+    # Initialising an existing schema must be safe, as on every bot restart
+    loop.run_until_complete(repository.init())
+    try:
+        yield repository, loop
+    finally:
+        loop.run_until_complete(repository.close())
+        if request.param == 'postgres':
+            loop.run_until_complete(_drop_schema(schema))
+        loop.close()
+
+
+async def _drop_schema(schema):
+    conn = await storage.asyncpg.connect(POSTGRES_URL)
+    try:
+        await conn.execute(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE')
+    finally:
+        await conn.close()
+
+
+@pytest.mark.parametrize('check', CHECKS, ids=[check.__name__ for check in CHECKS])
+def test_conformance(backend, check):
+    repository, loop = backend
+    loop.run_until_complete(check(repository))
+
+
+def test_read_only(backend):
+    """A read-only repository reads the initialised store but never writes to it."""
+    repository, loop = backend
+    if repository.backend == 'postgres':
+        reader = storage.PostgresRepository(repository.dsn, schema=repository.schema, read_only=True)
+    else:
+        reader = storage.SQLiteRepository(repository.database_file, read_only=True)
+    loop.run_until_complete(reader.init())
+    try:
+        assert loop.run_until_complete(reader.request_stats())['requests'] > 0
+        with pytest.raises(Exception):
+            loop.run_until_complete(reader.save_user(4004, 'read', 'Only', None))
+    finally:
+        loop.run_until_complete(reader.close())
@@ -1,170 +1,410 @@
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
 import sqlite3
+import sys
+import time
+from contextlib import contextmanager
 from tabulate import tabulate
-from datetime import datetime
+import analytics
+import archive
+import availability
+import backup
+import bulk_import
+import funnel
+import storage
+from catalog import SERVICE_LABELS, SERVICE_TYPE_LABELS
+from dispatch import DISPATCH_LEASE_SECONDS
+from gazetteer import describe, locate, zone_name
+from tenants import DEFAULT_TENANT
+from datetime import datetime, timedelta
 
-DATABASE_FILE = 'liyu_agency.db'
+DATABASE_FILE = os.getenv('DATABASE_FILE', storage.DATABASE_FILE)
 
-def view_users_table():
-    """Display all users in a formatted table."""
+# Rows shown per page in the table views
+PAGE_SIZE = 20
+
+SOURCES = ['contact_shared', 'manual_entry', 'gps']
+
+# Streaming export settings
+EXPORT_BATCH_SIZE = storage.EXPORT_BATCH_SIZE
+WATERMARK_FILE = 'export_watermarks.json'
+
+# Commands that only read, run on a read-only connection so they never write to or lock the bot's database
+READ_ONLY_COMMANDS = ['stats', 'list', 'search', 'export', 'analytics', 'funnel']
+
+# Columns returned by the list and search commands
+LIST_COLUMNS = storage.LIST_COLUMNS
+# Columns print_detailed_requests shows, in its order
+DETAILED_COLUMNS = ['request_id', 'name', 'phone', 'location', 'service_type', 'services', 'submitted_at']
+
+# CSV headers of the exported tables, for storage.EXPORT_TABLES' columns
+EXPORT_HEADERS = {
+    'users': ['User ID', 'Telegram ID', 'Username', 'First Name', 'Last Name', 'Created At'],
+    'service_requests': ['Request ID', 'User ID', 'Name', 'Phone', 'Location', 'Service Type', 'Services', 'Submitted At']
+}
+
+@contextmanager
+def open_storage(repository=None):
+    """Open the configured repository read-only on its own event loop; yields ``(repository, run)``.
+
+    ``run`` runs one repository call to completion, so the viewer's
+    synchronous code can page through results with a call per page.
+    """
+    repository = repository or storage.open_repository(database_file=DATABASE_FILE, read_only=True)
+    loop = asyncio.new_event_loop()
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT user_id, telegram_id, username, first_name, last_name, created_at FROM users')
-        users = cursor.fetchall()
-        conn.close()
-        
-        if not users:
-            print("\n❌ No users found in database.\n")
+        loop.run_until_complete(repository.init())
+        yield repository, loop.run_until_complete
+    finally:
+        loop.run_until_complete(repository.close())
+        loop.close()
+
+def iter_requests(run, repository, filters=None, limit=None, columns=LIST_COLUMNS, batch_size=EXPORT_BATCH_SIZE):
+    """Yield batches of requests matching ``filters``, newest first, one bounded query per batch.
+
+    ``columns`` must include submitted_at and request_id; each batch
+    continues from the last row of the one before.
+    """
+    submitted_at, request_id = columns.index('submitted_at'), columns.index('request_id')
+    start = None
+    while True:
+        size = min(batch_size, limit) if limit else batch_size
+        batch = run(repository.list_requests(filters, size, columns, start))
+        if batch:
+            yield batch
+        if len(batch) < size or (limit and limit <= len(batch)):
             return
-        
-        print("\n" + "="*120)
-        print("👥 USERS TABLE")
-        print("="*120)
-        
-        headers = ["User ID", "Telegram ID", "Username", "First Name", "Last Name", "Created At"]
-        print(tabulate(users, headers=headers, tablefmt="grid"))
-        print(f"\n✅ Total Users: {len(users)}\n")
-        
+        if limit:
+            limit -= len(batch)
+        start = (batch[-1][submitted_at], batch[-1][request_id])
+
+def prompt_navigation(rows, start, inclusive, history, page_key, lookup_key):
+    """Ask for the next page to show; returns its ``(start, inclusive)`` or None to quit."""
+    while True:
+        choice = input("\n[n]ext, [p]revious, [j]ump <id>, [q]uit: ").strip().lower()
+        if choice in ('n', ''):
+            if len(rows) < PAGE_SIZE:
+                print("\nℹ️  Already on the last page.")
+                continue
+            history.append((start, inclusive))
+            return page_key(rows[-1]), False
+        elif choice == 'p':
+            if not history:
+                print("\nℹ️  Already on the first page.")
+                continue
+            return history.pop()
+        elif choice.startswith('j'):
+            target = choice[1:].strip()
+            key = lookup_key(int(target)) if target.isdigit() else None
+            if key is None:
+                print("\n❌ No row with that ID.")
+                continue
+            history.append((start, inclusive))
+            return key, True
+        elif choice == 'q':
+            return None
+        else:
+            print("\n❌ Invalid choice. Please try again.")
+
+def page_through(title, width, fetch_page, page_key, render_page, lookup_key):
+    """Interactively page through rows with next/previous/jump navigation.
+
+    ``fetch_page(repository, start, inclusive)`` and ``lookup_key(repository,
+    id)`` return repository calls. Only the start key of each visited page is
+    remembered, so going back re-runs one bounded query instead of holding
+    earlier pages in memory.
+    """
+    with open_storage() as (repository, run):
+        history = []
+        start, inclusive = None, False
+        # (id jumped to or None, page number counted from there); one per history entry
+        labels = []
+        label = (None, 1)
+
+        while True:
+            rows = run(fetch_page(repository, start, inclusive))
+            if not rows and not history:
+                print("\n❌ No rows found in database.\n")
+                return
+
+            print("\n" + "="*width)
+            anchor, page = label
+            print(f"{title} — Page {page}" if anchor is None else f"{title} — From #{anchor}, page {page}")
+            print("="*width)
+            if rows:
+                render_page(rows)
+            else:
+                print("\n(No more rows)")
+
+            depth = len(history)
+            navigation = prompt_navigation(rows, start, inclusive, history, page_key,
+                                           lambda target: run(lookup_key(repository, target)))
+            if navigation is None:
+                return
+            start, inclusive = navigation
+            if len(history) < depth:
+                label = labels.pop()
+            else:
+                labels.append(label)
+                # A jump starts at the row asked for; next continues from this page
+                label = (start[-1], 1) if inclusive else (anchor, page + 1)
+
+async def lookup_user_key(repository, user_id):
+    """Return the pagination key of a user, or None if they don't exist."""
+    rows = await repository.list_users(user_id, True, 1)
+    return (user_id,) if rows and rows[0][0] == user_id else None
+
+def view_users_table():
+    """Display users one page at a time in a formatted table."""
+    headers = ["User ID", "Telegram ID", "Username", "First Name", "Last Name", "Created At"]
+    try:
+        page_through(
+            "👥 USERS TABLE", 120,
+            lambda repository, start, inclusive: repository.list_users(start and start[0], inclusive, PAGE_SIZE),
+            page_key=lambda row: (row[0],),
+            render_page=lambda rows: print(tabulate(rows, headers=headers, tablefmt="grid")),
+            lookup_key=lookup_user_key
+        )
     except Exception as e:
         print(f"❌ Error reading users table: {e}")
 
+def fetch_requests_page(columns):
+    """A page_through fetch_page listing requests as ``columns``, newest first."""
+    return lambda repository, start, inclusive: repository.list_requests(None, PAGE_SIZE, columns, start, inclusive)
+
 def view_service_requests_table():
-    """Display all service requests in a formatted table."""
+    """Display service requests one page at a time in a formatted table."""
+    columns = ['request_id', 'user_id', 'name', 'phone', 'location', 'service_type', 'services', 'submitted_at']
+    headers = ["Request ID", "User ID", "Name", "Phone", "Location", "Service Type", "Services", "Submitted At"]
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT request_id, user_id, name, phone, location, service_type, services, submitted_at 
-            FROM service_requests
-            ORDER BY submitted_at DESC
-        ''')
-        requests = cursor.fetchall()
-        conn.close()
-        
-        if not requests:
-            print("\n❌ No service requests found in database.\n")
-            return
-        
-        print("\n" + "="*180)
-        print("📋 SERVICE REQUESTS TABLE")
-        print("="*180)
-        
-        headers = ["Request ID", "User ID", "Name", "Phone", "Location", "Service Type", "Services", "Submitted At"]
-        print(tabulate(requests, headers=headers, tablefmt="grid"))
-        print(f"\n✅ Total Requests: {len(requests)}\n")
-        
+        page_through(
+            "📋 SERVICE REQUESTS TABLE", 180,
+            fetch_requests_page(columns),
+            page_key=lambda row: (row[7], row[0]),
+            render_page=lambda rows: print(tabulate(rows, headers=headers, tablefmt="grid")),
+            lookup_key=lambda repository, request_id: repository.request_key(request_id)
+        )
     except Exception as e:
         print(f"❌ Error reading service requests table: {e}")
 
+def print_detailed_requests(requests):
+    """Print service requests in the readable one-block-per-request layout."""
+    for request in requests:
+        request_id, name, phone, location, service_type, services, submitted_at = request
+        print(f"\n📌 Request #{request_id}")
+        print(f"   👤 Name: {name}")
+        print(f"   📞 Phone: {phone}")
+        print(f"   📍 Location: {location}")
+        print(f"   ⚡ Service Type: {service_type}")
+        print(f"   🛠️  Services: {services}")
+        print(f"   📅 Submitted: {submitted_at}")
+        print("-" * 100)
+
 def view_detailed_requests():
-    """Display service requests with more readable formatting."""
+    """Display service requests with more readable formatting, one page at a time."""
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT request_id, name, phone, location, service_type, services, submitted_at 
-            FROM service_requests
-            ORDER BY submitted_at DESC
-        ''')
-        requests = cursor.fetchall()
-        conn.close()
+        page_through(
+            "📝 DETAILED SERVICE REQUESTS", 100,
+            fetch_requests_page(DETAILED_COLUMNS),
+            page_key=lambda row: (row[6], row[0]),
+            render_page=print_detailed_requests,
+            lookup_key=lambda repository, request_id: repository.request_key(request_id)
+        )
+    except Exception as e:
+        print(f"❌ Error reading detailed requests: {e}")
+
+def _label_key(labels, value):
+    """Map a stored button label back to its language-independent key."""
+    for key, options in labels.items():
+        if value in options:
+            return key
+    return value
+
+def collect_stats(run, repository, filters=None):
+    """Collect request counts and breakdowns, honouring any request filters.
+
+    Counts cover archived requests too; stored labels are grouped under their
+    catalog keys and zones shown by name.
+    """
+    stats = run(repository.request_stats(filters))
+    for column, name in (('service_type', lambda value: _label_key(SERVICE_TYPE_LABELS, value)),
+                         ('location_source', lambda value: value),
+                         ('phone_source', lambda value: value),
+                         ('location_zone', lambda value: zone_name(value) if value else 'unresolved')):
+        breakdown = {}
+        for value, count in stats[f'by_{column}'].items():
+            key = name(value) or 'unknown'
+            breakdown[key] = breakdown.get(key, 0) + count
+        stats[f'by_{column}'] = breakdown
+    return stats
+
+def print_stats(stats):
+    """Print collected statistics in the viewer's layout."""
+    print("\n" + "="*60)
+    print("📊 DATABASE STATISTICS")
+    print("="*60)
+    print(f"👥 Total Users: {stats['users']}")
+    print(f"📋 Total Service Requests: {stats['requests']}")
+    if stats['latest_request']:
+        print(f"⏰ Latest Request: {stats['latest_request']}")
+    for title, key in (("⚡ By Service Type", 'by_service_type'),
+                       ("📍 By Location Source", 'by_location_source'),
+                       ("📞 By Phone Source", 'by_phone_source'),
+                       ("🗺️ By Zone", 'by_location_zone')):
+        if stats[key]:
+            print(f"\n{title}:")
+            for value, count in sorted(stats[key].items(), key=lambda item: -item[1]):
+                print(f"   • {value}: {count}")
+    print("="*60 + "\n")
+
+def search_requests_interactive():
+    """Prompt for search text and show the latest matching requests."""
+    term = input("\n🔎 Search by name, area, service or phone: ").strip()
+    if not term:
+        return
+    try:
+        with open_storage() as (repository, run):
+            requests = run(repository.search_requests(term, PAGE_SIZE, columns=DETAILED_COLUMNS))
         
         if not requests:
-            print("\n❌ No service requests found in database.\n")
+            print(f"\n❌ No requests found for \"{term}\".\n")
             return
         
         print("\n" + "="*100)
-        print("📝 DETAILED SERVICE REQUESTS")
+        print(f"🔎 LATEST {len(requests)} REQUEST(S) MATCHING \"{term}\"")
         print("="*100)
-        
-        for idx, request in enumerate(requests, 1):
-            request_id, name, phone, location, service_type, services, submitted_at = request
-            print(f"\n📌 Request #{request_id}")
-            print(f"   👤 Name: {name}")
-            print(f"   📞 Phone: {phone}")
-            print(f"   📍 Location: {location}")
-            print(f"   ⚡ Service Type: {service_type}")
-            print(f"   🛠️  Services: {services}")
-            print(f"   📅 Submitted: {submitted_at}")
-            print("-" * 100)
-        
-        print(f"\n✅ Total Requests: {len(requests)}\n")
+        print_detailed_requests(requests)
         
     except Exception as e:
-        print(f"❌ Error reading detailed requests: {e}")
+        print(f"❌ Error searching requests: {e}")
 
 def get_database_stats():
     """Display database statistics."""
     try:
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        # Count users
-        cursor.execute('SELECT COUNT(*) FROM users')
-        user_count = cursor.fetchone()[0]
-        
-        # Count service requests
-        cursor.execute('SELECT COUNT(*) FROM service_requests')
-        request_count = cursor.fetchone()[0]
-        
-        # Get latest request
-        cursor.execute('SELECT submitted_at FROM service_requests ORDER BY submitted_at DESC LIMIT 1')
-        latest_request = cursor.fetchone()
-        
-        conn.close()
-        
-        print("\n" + "="*60)
-        print("📊 DATABASE STATISTICS")
-        print("="*60)
-        print(f"👥 Total Users: {user_count}")
-        print(f"📋 Total Service Requests: {request_count}")
-        if latest_request:
-            print(f"⏰ Latest Request: {latest_request[0]}")
-        print("="*60 + "\n")
+        with open_storage() as (repository, run):
+            stats = collect_stats(run, repository)
+        print_stats(stats)
         
     except Exception as e:
         print(f"❌ Error getting statistics: {e}")
 
-def export_to_csv():
-    """Export database to CSV files."""
+def _open_export_file(path, compress):
+    """Open an export file for text writing, gzip-compressed if requested."""
+    if compress:
+        return gzip.open(path, 'wt', newline='', encoding='utf-8')
+    return open(path, 'w', newline='', encoding='utf-8')
+
+def load_watermarks(path=WATERMARK_FILE):
+    """Load the last exported key per table from the watermark file."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def save_watermarks(watermarks, path=WATERMARK_FILE):
+    """Persist export watermarks atomically so a crashed run never corrupts them."""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(watermarks, f, indent=2)
+    os.replace(tmp_path, path)
+
+def iter_export_rows(run, repository, table, since=None, since_key=None, filters=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield a table's rows in key order in fixed-size batches, one repository call per batch."""
+    key_index = storage.EXPORT_TABLES[table]['columns'].index(storage.EXPORT_TABLES[table]['key'])
+    after_key = since_key
+    while True:
+        batch = run(repository.export_rows(table, after_key, since, filters, batch_size))
+        if not batch:
+            break
+        yield batch
+        after_key = batch[-1][key_index]
+
+def export_table(run, repository, table, fmt='csv', compress=False, since=None, since_key=None,
+                 output_dir='.', batch_size=EXPORT_BATCH_SIZE, filters=None):
+    """Stream one table to a CSV or JSON Lines file.
+
+    Rows are read a batch at a time in key order, so memory use does not
+    grow with the table. ``since`` filters on the table's timestamp column
+    and ``since_key`` skips rows already covered by a previous export.
+    ``filters`` is a dict of storage.REQUEST_FILTERS for service_requests.
+    Returns ``(path, row_count, last_key)``; ``path`` is None when nothing was written.
+    """
+    columns = storage.EXPORT_TABLES[table]['columns']
+    key_index = columns.index(storage.EXPORT_TABLES[table]['key'])
+
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    extension = 'csv' if fmt == 'csv' else 'jsonl'
+    path = os.path.join(output_dir, f"{table}_export_{stamp}.{extension}")
+    if compress:
+        path += '.gz'
+
+    f = None
+    row_count = 0
+    last_key = since_key
     try:
-        import csv
-        
-        conn = sqlite3.connect(DATABASE_FILE)
-        cursor = conn.cursor()
-        
-        # Export users
-        cursor.execute('SELECT user_id, telegram_id, username, first_name, last_name, created_at FROM users')
-        users = cursor.fetchall()
-        
-        if users:
-            with open('users_export.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['User ID', 'Telegram ID', 'Username', 'First Name', 'Last Name', 'Created At'])
-                writer.writerows(users)
-            print("✅ Users exported to users_export.csv")
-        
-        # Export service requests
-        cursor.execute('''
-            SELECT request_id, user_id, name, phone, location, service_type, services, submitted_at 
-            FROM service_requests
-        ''')
-        requests = cursor.fetchall()
-        
-        if requests:
-            with open('service_requests_export.csv', 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Request ID', 'User ID', 'Name', 'Phone', 'Location', 'Service Type', 'Services', 'Submitted At'])
-                writer.writerows(requests)
-            print("✅ Service requests exported to service_requests_export.csv")
-        
-        conn.close()
-        
+        for batch in iter_export_rows(run, repository, table, since, since_key, filters, batch_size):
+            # Open lazily so empty exports don't leave empty files behind
+            if f is None:
+                f = _open_export_file(path, compress)
+                if fmt == 'csv':
+                    writer = csv.writer(f)
+                    writer.writerow(EXPORT_HEADERS[table])
+            if fmt == 'csv':
+                writer.writerows(batch)
+            else:
+                f.writelines(
+                    json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                    for row in batch
+                )
+            row_count += len(batch)
+            # Batches come in key order across hot and archived rows
+            last_key = batch[-1][key_index]
+    finally:
+        if f is not None:
+            f.close()
+
+    return (path if row_count else None), row_count, last_key
+
+def export_database(fmt='csv', compress=False, since=None, incremental=False,
+                    output_dir='.', watermark_file=WATERMARK_FILE, batch_size=EXPORT_BATCH_SIZE,
+                    request_filters=None, repository=None):
+    """Export users and service requests, optionally only rows new since the last run.
+
+    ``request_filters`` only applies to service_requests. Returns whether
+    every table was exported.
+    """
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        watermarks = load_watermarks(watermark_file) if incremental else {}
+
+        with open_storage(repository) as (repository, run):
+            for table in storage.EXPORT_TABLES:
+                path, row_count, last_key = export_table(
+                    run, repository, table, fmt=fmt, compress=compress, since=since,
+                    since_key=watermarks.get(table), output_dir=output_dir,
+                    batch_size=batch_size,
+                    filters=request_filters if table == 'service_requests' else None
+                )
+                if path:
+                    print(f"✅ {row_count} {table} rows exported to {path}")
+                    watermarks[table] = last_key
+                else:
+                    print(f"ℹ️  No new {table} rows to export")
+
+        if incremental:
+            save_watermarks(watermarks, watermark_file)
+        return True
     except Exception as e:
-        print(f"❌ Error exporting to CSV: {e}")
+        print(f"❌ Error exporting database: {e}", file=sys.stderr)
+        return False
+
+def export_to_csv():
+    """Export database to CSV files."""
+    export_database(fmt='csv')
 
 def main():
     """Main menu for database viewer."""
@@ -180,9 +420,10 @@ def main():
         print("4. View Database Statistics")
         print("5. Export to CSV")
         print("6. View All (Users + Requests + Stats)")
-        print("7. Exit")
+        print("7. Search Requests")
+        print("8. Exit")
         
-        choice = input("\nEnter your choice (1-7): ").strip()
+        choice = input("\nEnter your choice (1-8): ").strip()
         
         if choice == '1':
             view_users_table()
@@ -199,10 +440,622 @@ def main():
             view_users_table()
             view_service_requests_table()
         elif choice == '7':
+            search_requests_interactive()
+        elif choice == '8':
             print("\n👋 Goodbye!\n")
             break
         else:
             print("\n❌ Invalid choice. Please try again.")
 
+def write_rows(rows, columns, fmt, out=None):
+    """Write an iterable of row batches to ``out`` as table, CSV, JSON or JSON Lines."""
+    out = out or sys.stdout
+    if fmt == 'table':
+        # tabulate needs every row up front; the CLI caps this with --limit
+        all_rows = [row for batch in rows for row in batch]
+        print(tabulate(all_rows, headers=columns, tablefmt="grid"), file=out)
+    elif fmt == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for batch in rows:
+            writer.writerows(batch)
+    elif fmt == 'jsonl':
+        for batch in rows:
+            for row in batch:
+                out.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n')
+    else:
+        json.dump([dict(zip(columns, row)) for batch in rows for row in batch], out, ensure_ascii=False, indent=2)
+        out.write('\n')
+
+def add_filter_arguments(parser):
+    """Add the shared service_requests filter options to a subcommand."""
+    parser.add_argument('--from', dest='date_from', help="Only requests submitted on/after this date (YYYY-MM-DD[ HH:MM:SS])")
+    parser.add_argument('--to', dest='date_to', help="Only requests submitted on/before this date")
+    parser.add_argument('--service-type', choices=sorted(SERVICE_TYPE_LABELS))
+    parser.add_argument('--service', choices=sorted(SERVICE_LABELS))
+    parser.add_argument('--location-source', choices=SOURCES)
+    parser.add_argument('--phone-source', choices=SOURCES)
+
+def filters_from_args(args):
+    """Build a dict of storage.REQUEST_FILTERS from parsed CLI arguments."""
+    return {name: getattr(args, name) for name in storage.REQUEST_FILTERS if getattr(args, name, None)}
+
+def migrate_database(repository):
+    """Create or upgrade the schema, indexes and search index, as the bot does when it starts."""
+    async def migrate():
+        try:
+            await repository.init()
+        finally:
+            await repository.close()
+
+    try:
+        asyncio.run(migrate())
+        print("✅ Database schema is up to date")
+        return 0
+    except Exception as e:
+        print(f"❌ Error migrating the database: {e}", file=sys.stderr)
+        return 1
+
+def archive_requests(older_than_days, archive_dir, vacuum=False):
+    """Move old closed requests into monthly partitions and report what moved."""
+    try:
+        # Archiving reads request statuses, which databases the bot hasn't upgraded yet lack
+        conn = sqlite3.connect(DATABASE_FILE)
+        try:
+            storage.init_sqlite_schema(conn)
+        finally:
+            conn.close()
+        moved = archive.archive_old_requests(DATABASE_FILE, older_than_days, archive_dir)
+        if not moved:
+            print(f"ℹ️  No closed requests older than {older_than_days} days to archive")
+        for month, count in moved.items():
+            print(f"✅ {count} requests from {month} archived to {archive.partition_path(month, archive_dir)}")
+        if vacuum and moved:
+            conn = sqlite3.connect(DATABASE_FILE)
+            conn.execute('VACUUM')
+            conn.close()
+            print("✅ Hot database vacuumed")
+        return 0
+    except Exception as e:
+        print(f"❌ Error archiving requests: {e}", file=sys.stderr)
+        return 1
+
+def backup_database(backup_dir, keep, list_only=False):
+    """Take a snapshot, or list the existing ones with their checksum status."""
+    try:
+        if list_only:
+            for path in backup.list_backups(backup_dir):
+                status = "✅" if backup.verify_backup(path) else "❌"
+                print(f"{status} {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+            return 0
+        path = backup.create_backup(DATABASE_FILE, backup_dir, keep)
+        print(f"✅ Database backed up to {path}")
+        return 0
+    except Exception as e:
+        print(f"❌ Error backing up database: {e}", file=sys.stderr)
+        return 1
+
+def restore_database(snapshot):
+    """Restore the database from a snapshot after verifying it."""
+    try:
+        backup.restore_backup(snapshot, DATABASE_FILE)
+        print(f"✅ Database restored from {snapshot} (previous copy kept as {DATABASE_FILE}.pre-restore)")
+        return 0
+    except Exception as e:
+        print(f"❌ Error restoring database: {e}", file=sys.stderr)
+        return 1
+
+def request_status(repository, request_id, status=None, assignee=None, note=None, changed_by=None, tenant_id=None):
+    """Move a request to a new status if one is given, then print its status history."""
+    async def run():
+        await repository.init()
+        try:
+            if status:
+                await repository.transition_request(request_id, status, changed_by, assignee, note, tenant_id=tenant_id)
+            return await repository.request_history(request_id, tenant_id=tenant_id)
+        finally:
+            await repository.close()
+
+    try:
+        history = asyncio.run(run())
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"❌ Error updating request status: {e}", file=sys.stderr)
+        return 1
+    if status:
+        print(f"✅ Request #{request_id} is now {status}")
+    if not history:
+        print(f"ℹ️  No status history for request #{request_id}")
+    for from_status, to_status, by, change_note, changed_at in history:
+        line = f"{changed_at}  {from_status or '-':>9} → {to_status:<9}"
+        if by:
+            line += f"  by {by}"
+        if change_note:
+            line += f"  ({change_note})"
+        print(line)
+    return 0
+
+def import_data(repository, path, kind, batch_size, default_status, restart=False, tenant_id=DEFAULT_TENANT):
+    """Bulk import requests or workers for a tenant from a CSV/JSONL file and report throughput."""
+    async def run():
+        await repository.init()
+        try:
+            return await bulk_import.import_file(repository, path, kind, batch_size, default_status,
+                                                 resume=not restart, tenant_id=tenant_id)
+        finally:
+            await repository.close()
+
+    try:
+        result = asyncio.run(run())
+    except Exception as e:
+        print(f"❌ Error importing {path}: {e} (run the same command again to resume)", file=sys.stderr)
+        return 1
+    print(f"✅ {result['inserted']:,} {kind} imported from {result['rows']:,} rows in {result['elapsed']:.1f}s "
+          f"({result['rate']:,.0f} rows/s)")
+    if result['duplicates']:
+        print(f"♻️ {result['duplicates']:,} already in the database, skipped")
+    if result['rejected']:
+        print(f"⚠️ {result['rejected']:,} rows rejected, see {result['rejects_path']}")
+    return 0
+
+def calendar_time(text):
+    """Parse a typed local time for the calendar commands into the stored form."""
+    try:
+        return availability.format_time(availability.parse_time(text))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a time (YYYY-MM-DD HH:MM)")
+
+def run_action(repository, action, description):
+    """Run one calendar or dispatch call through the repository; returns (result, exit code)."""
+    async def run():
+        await repository.init()
+        try:
+            return await action()
+        finally:
+            await repository.close()
+
+    try:
+        return asyncio.run(run()), 0
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+    except Exception as e:
+        print(f"❌ Error {description}: {e}", file=sys.stderr)
+    return None, 1
+
+def worker_availability(repository, worker_id, starts_at, ends_at, days=1, tenant_id=None):
+    """Make a worker available for a time range, repeated on ``days`` consecutive days."""
+    start, end = availability.parse_time(starts_at), availability.parse_time(ends_at)
+
+    async def add():
+        return [
+            await repository.add_availability(worker_id, availability.format_time(start + day * 86400),
+                                              availability.format_time(end + day * 86400), tenant_id=tenant_id)
+            for day in range(days)
+        ]
+
+    windows, status = run_action(repository, add, "adding availability")
+    for window_start, window_end in windows or []:
+        print(f"✅ Worker #{worker_id} available {window_start} → {window_end}")
+    return status
+
+def find_free_workers(repository, starts_at, ends_at, service=None, near=None, max_km=availability.MAX_DISTANCE_KM,
+                      limit=20, fmt='table', tenant_id=None):
+    """List workers free for a whole time range, nearest to a place first."""
+    place = locate(near) if near else None
+    if near and place is None:
+        print(f"❌ '{near}' is not a known sub-city or landmark", file=sys.stderr)
+        return 1
+    # Only windows and bookings still running at the start can matter
+    calendars, status = run_action(repository, lambda: repository.worker_calendars(starts_at, tenant_id=tenant_id),
+                                     "loading worker calendars")
+    if status:
+        return status
+    index = availability.build_index(*calendars)
+    free = index.free_workers(availability.parse_time(starts_at), availability.parse_time(ends_at),
+                              service, place, max_km, limit)
+    if not free and fmt == 'table':
+        print(f"ℹ️  No {service or ''} workers free from {starts_at} to {ends_at}"
+              + (f" within {max_km:g} km of {describe(place)}" if place else ""))
+        return 0
+    rows = [(worker.worker_id, worker.name, worker.phone, zone_name(worker.zone_id) if worker.zone_id else None,
+             None if worker.distance_km is None else round(worker.distance_km, 1)) for worker in free]
+    write_rows([rows], ['worker_id', 'name', 'phone', 'zone', 'distance_km'], fmt)
+    return 0
+
+def book_worker(repository, worker_id, starts_at, ends_at, request_id=None, tenant_id=None):
+    """Book a worker for a time range, refusing clashes."""
+    booking_id, status = run_action(
+        repository, lambda: repository.book_worker(worker_id, starts_at, ends_at, request_id, tenant_id=tenant_id),
+        "booking worker"
+    )
+    if not status:
+        print(f"✅ Booking #{booking_id}: worker #{worker_id} from {starts_at} to {ends_at}"
+              + (f" for request #{request_id}" if request_id else ""))
+    return status
+
+def cancel_booking(repository, booking_id, tenant_id=None):
+    """Cancel a booking, freeing the worker's slot."""
+    cancelled, status = run_action(repository, lambda: repository.cancel_booking(booking_id, tenant_id=tenant_id),
+                                   "cancelling booking")
+    if status:
+        return status
+    if not cancelled:
+        print(f"❌ Booking #{booking_id} not found", file=sys.stderr)
+        return 1
+    print(f"✅ Booking #{booking_id} cancelled")
+    return 0
+
+def dispatch_list(repository, limit=20, fmt='table', tenant_id=None):
+    """List the dispatch queue, most urgent first."""
+    rows, status = run_action(repository, lambda: repository.dispatch_queue(limit, tenant_id=tenant_id),
+                              "loading the dispatch queue")
+    if status:
+        return status
+    if not rows and fmt == 'table':
+        print("ℹ️  No pending requests waiting for dispatch")
+        return 0
+    write_rows([rows], storage.DISPATCH_COLUMNS, fmt)
+    return 0
+
+def dispatch_claim(repository, dispatcher, lease_minutes, tenant_id=None):
+    """Claim the most urgent unclaimed request and show it."""
+    row, status = run_action(
+        repository, lambda: repository.claim_request(dispatcher, lease_minutes * 60, tenant_id=tenant_id),
+        "claiming a request"
+    )
+    if status:
+        return status
+    if row is None:
+        print("ℹ️  No unclaimed requests waiting for dispatch")
+        return 0
+    request = dict(zip(storage.DISPATCH_COLUMNS, row))
+    print(f"✅ Request #{request['request_id']} claimed by {dispatcher} until {request['lease_expires_at']} UTC")
+    print(f"   {request['name']} ({request['phone']}), {request['location'] or 'no location'}")
+    print(f"   {request['service_type']}: {request['services']}")
+    print(f"   Submitted {request['submitted_at']}, due {request['deadline']} UTC")
+    return 0
+
+def dispatch_release(repository, request_id, dispatcher, tenant_id=None):
+    """Give a claimed request back to the queue."""
+    released, status = run_action(
+        repository, lambda: repository.release_request(request_id, dispatcher, tenant_id=tenant_id),
+        "releasing a request"
+    )
+    if status:
+        return status
+    if not released:
+        print(f"❌ Request #{request_id} is not claimed by {dispatcher}", file=sys.stderr)
+        return 1
+    print(f"✅ Request #{request_id} is back in the queue")
+    return 0
+
+def dispatch_assign(repository, request_id, dispatcher, assignee, note=None, tenant_id=None):
+    """Assign a claimed request, taking it off the queue."""
+    _, status = run_action(
+        repository, lambda: repository.assign_claimed(request_id, dispatcher, assignee, note, tenant_id=tenant_id),
+        "assigning a request"
+    )
+    if not status:
+        print(f"✅ Request #{request_id} assigned to {assignee}")
+    return status
+
+def dispatch_reprioritise(repository, request_id, hours, tenant_id=None):
+    """Move a queued request's deadline to ``hours`` from now."""
+    deadline = (datetime.utcnow() + timedelta(hours=hours)).strftime('%Y-%m-%d %H:%M:%S')
+    queued, status = run_action(
+        repository, lambda: repository.reprioritise_request(request_id, deadline, tenant_id=tenant_id),
+        "reprioritising a request"
+    )
+    if status:
+        return status
+    if not queued:
+        print(f"❌ Request #{request_id} is not in the dispatch queue", file=sys.stderr)
+        return 1
+    print(f"✅ Request #{request_id} now due {deadline} UTC")
+    return 0
+
+def funnel_summary(repository, days=7, tenant_id=None, fmt='table'):
+    """Show how far booking journeys got over the last ``days`` days, step by step."""
+    since = (datetime.utcnow() - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+    rows, status = run_action(repository, lambda: repository.funnel_report(since, tenant_id), "loading the funnel")
+    if status:
+        return status
+    totals = {step: (reached, abandoned, seconds) for step, reached, abandoned, seconds in rows}
+    if not totals and fmt == 'table':
+        print(f"ℹ️  No conversations recorded since {since}")
+        return 0
+    started = totals.get(funnel.STEP_NAMES[0], (0, 0, 0))[0]
+    summary = []
+    previous = started
+    for step in funnel.STEP_NAMES:
+        reached, abandoned, seconds = totals.get(step, (0, 0, 0))
+        summary.append((step, reached, round(100 * reached / previous, 1) if previous else None,
+                        round(100 * reached / started, 1) if started else None, abandoned,
+                        round(seconds / reached) if reached else None))
+        previous = reached
+    write_rows([summary], ['step', 'reached', 'step_conversion_pct', 'overall_pct', 'abandoned_here',
+                           'avg_seconds_from_start'], fmt)
+    return 0
+
+def demand_report(run, repository, filters, output_dir, cell_km, utc_offset, fmt='table'):
+    """Load requests into NumPy arrays, write the demand grids and summarise them."""
+    started = time.perf_counter()
+    data = analytics.load_requests(iter_requests(run, repository, filters,
+                                                 columns=analytics.LOAD_COLUMNS + ['request_id'],
+                                                 batch_size=analytics.LOAD_BATCH_SIZE))
+    loaded = time.perf_counter()
+    results = analytics.analyse(data, cell_km, utc_offset)
+    paths = analytics.write_reports(results, output_dir)
+    finished = time.perf_counter()
+
+    hours = results['hour_of_week']
+    busiest = [(f"{analytics.WEEKDAYS[index // 24]} {index % 24:02d}:00", int(hours.flat[index]))
+               for index in hours.ravel().argsort()[::-1][:5] if hours.flat[index]]
+    zone_totals = sorted(zip(results['zones'], analytics.zone_totals(data['zone_codes'], len(results['zones'])).tolist()),
+                         key=lambda item: -item[1])
+    services = [SERVICE_LABELS[key][0] for key in analytics.SERVICE_KEYS]
+    pairs = sorted(((services[i], services[j], int(results['cooccurrence'][i, j]))
+                    for i in range(len(services)) for j in range(i + 1, len(services))
+                    if results['cooccurrence'][i, j]), key=lambda item: -item[2])
+    summary = {
+        'requests': results['requests'],
+        'located': results['located'],
+        'busiest_hours': dict(busiest),
+        'by_zone': dict(zone_totals),
+        'top_service_pairs': [list(pair) for pair in pairs[:5]],
+        'files': paths,
+        'load_seconds': round(loaded - started, 3),
+        'analyse_seconds': round(finished - loaded, 3)
+    }
+    if fmt == 'json':
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+
+    print(f"📈 {summary['requests']:,} requests analysed, {summary['located']:,} with coordinates "
+          f"(loaded in {summary['load_seconds']:.2f}s, analysed in {summary['analyse_seconds']:.2f}s)")
+    if busiest:
+        print("\n⏰ Busiest hours (local time):")
+        for hour, count in busiest:
+            print(f"   • {hour}: {count}")
+    if zone_totals:
+        print("\n🗺️ By Zone:")
+        for zone, count in zone_totals:
+            print(f"   • {zone}: {count}")
+    if pairs:
+        print("\n🤝 Most requested together:")
+        for first, second, count in pairs[:5]:
+            print(f"   • {first} + {second}: {count}")
+    print()
+    for path in paths:
+        print(f"💾 {path}")
+
+def run_cli(argv):
+    """Run a single non-interactive command and return the process exit code."""
+    parser = argparse.ArgumentParser(description="Liyu Agency database viewer")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    stats_parser = subparsers.add_parser('stats', help="Show request counts and breakdowns")
+    add_filter_arguments(stats_parser)
+    stats_parser.add_argument('--format', choices=['table', 'json'], default='table')
+
+    list_parser = subparsers.add_parser('list', help="List service requests, newest first")
+    add_filter_arguments(list_parser)
+    list_parser.add_argument('--format', choices=['table', 'csv', 'json', 'jsonl'], default='table')
+    list_parser.add_argument('--limit', type=int, default=50, help="Maximum rows (0 for no limit)")
+
+    search_parser = subparsers.add_parser('search', help="Full-text search requests by name, location, service or phone")
+    search_parser.add_argument('term')
+    add_filter_arguments(search_parser)
+    search_parser.add_argument('--format', choices=['table', 'csv', 'json', 'jsonl'], default='table')
+    search_parser.add_argument('--limit', type=int, default=50, help="Maximum rows (0 for no limit)")
+
+    export_parser = subparsers.add_parser('export', help="Stream tables to CSV or JSON Lines files")
+    add_filter_arguments(export_parser)
+    export_parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    export_parser.add_argument('--gzip', action='store_true', help="Compress output with gzip")
+    export_parser.add_argument('--since', help="Only export rows since a timestamp (YYYY-MM-DD[ HH:MM:SS]) "
+                                               "or 'last' for rows added since the previous export")
+    export_parser.add_argument('--output-dir', default='.')
+    export_parser.add_argument('--watermark-file', default=WATERMARK_FILE)
+    export_parser.add_argument('--batch-size', type=int, default=EXPORT_BATCH_SIZE)
+
+    subparsers.add_parser('migrate', help="Create or upgrade the schema, indexes and search index; "
+                                          "the other read commands never do")
+
+    archive_parser = subparsers.add_parser('archive', help="Move old done and cancelled requests into monthly archive files")
+    archive_parser.add_argument('--older-than-days', type=int, default=archive.ARCHIVE_AFTER_DAYS)
+    archive_parser.add_argument('--archive-dir', default=archive.ARCHIVE_DIR)
+    archive_parser.add_argument('--vacuum', action='store_true', help="VACUUM the hot database afterwards")
+
+    backup_parser = subparsers.add_parser('backup', help="Take an online, compressed snapshot of the database")
+    backup_parser.add_argument('--backup-dir', default=backup.BACKUP_DIR)
+    backup_parser.add_argument('--keep', type=int, default=backup.BACKUP_KEEP, help="Snapshots to keep")
+    backup_parser.add_argument('--list', action='store_true', help="List existing snapshots instead")
+
+    restore_parser = subparsers.add_parser('restore', help="Restore the database from a snapshot")
+    restore_parser.add_argument('snapshot')
+
+    import_parser = subparsers.add_parser('import', help="Bulk import historical requests or workers from CSV/JSONL")
+    import_parser.add_argument('file', help="CSV or JSON Lines file, optionally gzipped")
+    import_parser.add_argument('--kind', choices=['requests', 'workers'], default='requests')
+    import_parser.add_argument('--status', choices=storage.REQUEST_STATUSES, default='done',
+                               help="Status of imported requests without a status column")
+    import_parser.add_argument('--batch-size', type=int, default=bulk_import.IMPORT_BATCH_SIZE,
+                               help="Rows per transaction and checkpoint")
+    import_parser.add_argument('--restart', action='store_true', help="Ignore a saved checkpoint and start over")
+    import_parser.add_argument('--tenant', default=DEFAULT_TENANT,
+                               help="Tenant the rows belong to (default: %(default)s)")
+
+    # Needs numpy (in requirements.txt); only this command uses it
+    analytics_parser = subparsers.add_parser('analytics', help="Demand heatmap, hour-of-week and service co-occurrence grids "
+                                                               "(needs numpy)")
+    add_filter_arguments(analytics_parser)
+    analytics_parser.add_argument('--output-dir', default='analytics', help="Where the grid CSV files are written")
+    analytics_parser.add_argument('--cell-km', type=float, default=analytics.HEATMAP_CELL_KM,
+                                  help="Heatmap cell size in kilometres")
+    analytics_parser.add_argument('--utc-offset', type=int, default=analytics.LOCAL_UTC_OFFSET_HOURS,
+                                  help="Hours added to the stored UTC times for the hour-of-week grid")
+    analytics_parser.add_argument('--format', choices=['table', 'json'], default='table')
+
+    availability_parser = subparsers.add_parser('availability', help="Make a worker available for bookings")
+    availability_parser.add_argument('worker_id', type=int)
+    availability_parser.add_argument('--from', dest='starts_at', type=calendar_time, required=True,
+                                     help="Local time, YYYY-MM-DD HH:MM")
+    availability_parser.add_argument('--to', dest='ends_at', type=calendar_time, required=True)
+    availability_parser.add_argument('--days', type=int, default=1, help="Repeat on this many consecutive days")
+
+    free_parser = subparsers.add_parser('free-workers', help="Workers free for a whole time range, nearest first")
+    free_parser.add_argument('--from', dest='starts_at', type=calendar_time, required=True,
+                             help="Local time, YYYY-MM-DD HH:MM")
+    free_parser.add_argument('--to', dest='ends_at', type=calendar_time, required=True)
+    free_parser.add_argument('--service', choices=sorted(SERVICE_LABELS))
+    free_parser.add_argument('--near', help="Sub-city or landmark, e.g. 'Bole' or 'ፒያሳ'")
+    free_parser.add_argument('--max-km', type=float, default=availability.MAX_DISTANCE_KM)
+    free_parser.add_argument('--limit', type=int, default=20, help="Maximum workers (0 for no limit)")
+    free_parser.add_argument('--format', choices=['table', 'csv', 'json', 'jsonl'], default='table')
+
+    book_parser = subparsers.add_parser('book', help="Book a worker for a time range")
+    book_parser.add_argument('worker_id', type=int)
+    book_parser.add_argument('--from', dest='starts_at', type=calendar_time, required=True,
+                             help="Local time, YYYY-MM-DD HH:MM")
+    book_parser.add_argument('--to', dest='ends_at', type=calendar_time, required=True)
+    book_parser.add_argument('--request', dest='request_id', type=int, help="The request the booking is for")
+
+    cancel_parser = subparsers.add_parser('cancel-booking', help="Cancel a worker booking")
+    cancel_parser.add_argument('booking_id', type=int)
+
+    dispatch_parser = subparsers.add_parser('dispatch', help="Work through pending requests in SLA deadline order")
+    dispatch_actions = dispatch_parser.add_subparsers(dest='action', required=True)
+    dispatch_list_parser = dispatch_actions.add_parser('list', help="Show the queue, most urgent first")
+    dispatch_list_parser.add_argument('--limit', type=int, default=20)
+    dispatch_list_parser.add_argument('--format', choices=['table', 'csv', 'json', 'jsonl'], default='table')
+    dispatch_claim_parser = dispatch_actions.add_parser('claim', help="Take the most urgent unclaimed request")
+    dispatch_claim_parser.add_argument('--lease-minutes', type=float, default=DISPATCH_LEASE_SECONDS / 60,
+                                       help="How long before others may claim it")
+    dispatch_release_parser = dispatch_actions.add_parser('release', help="Put a claimed request back in the queue")
+    dispatch_release_parser.add_argument('request_id', type=int)
+    dispatch_assign_parser = dispatch_actions.add_parser('assign', help="Assign a claimed request")
+    dispatch_assign_parser.add_argument('request_id', type=int)
+    dispatch_assign_parser.add_argument('--to', dest='assignee', required=True, help="Who the request is assigned to")
+    dispatch_assign_parser.add_argument('--note')
+    dispatch_reprioritise_parser = dispatch_actions.add_parser('reprioritise', help="Change a queued request's deadline")
+    dispatch_reprioritise_parser.add_argument('request_id', type=int)
+    dispatch_reprioritise_parser.add_argument('--hours', type=float, required=True,
+                                              help="New deadline, in hours from now (0 or less to put it first)")
+    for action_parser in (dispatch_claim_parser, dispatch_release_parser, dispatch_assign_parser):
+        action_parser.add_argument('--by', default=os.getenv('USER'), help="The dispatcher holding the claim")
+    # Staff of one partner agency only see and change their own tenant's workers and requests
+    for tenant_parser in (availability_parser, free_parser, book_parser, cancel_parser, dispatch_list_parser,
+                          dispatch_claim_parser, dispatch_release_parser, dispatch_assign_parser,
+                          dispatch_reprioritise_parser):
+        tenant_parser.add_argument('--tenant', help="Only this tenant's workers and requests (default: every tenant)")
+
+    funnel_parser = subparsers.add_parser('funnel', help="Booking funnel: how many journeys reached and left each step")
+    funnel_parser.add_argument('--days', type=int, default=7, help="Days to include, today among them")
+    funnel_parser.add_argument('--tenant', help="Only this tenant's bot (default: every tenant)")
+    funnel_parser.add_argument('--format', choices=['table', 'csv', 'json', 'jsonl'], default='table')
+
+    status_parser = subparsers.add_parser('status', help="Show a request's status history, or move it to a new status")
+    status_parser.add_argument('request_id', type=int)
+    status_parser.add_argument('status', nargs='?', choices=storage.REQUEST_STATUSES)
+    status_parser.add_argument('--assignee', help="Who the request is assigned to")
+    status_parser.add_argument('--note')
+    status_parser.add_argument('--by', default=os.getenv('USER'), help="Recorded as the person making the change")
+    status_parser.add_argument('--tenant', help="Only a request of this tenant (default: any tenant)")
+
+    args = parser.parse_args(argv)
+
+    # Everything but archive, backup and restore goes through the repository, so it works on either backend
+    try:
+        repository = storage.open_repository(database_file=DATABASE_FILE,
+                                             read_only=args.command in READ_ONLY_COMMANDS)
+    except Exception as e:
+        print(f"❌ Error opening storage: {e}", file=sys.stderr)
+        return 1
+    if args.command == 'migrate':
+        return migrate_database(repository)
+    if args.command == 'availability':
+        return worker_availability(repository, args.worker_id, args.starts_at, args.ends_at, args.days, args.tenant)
+    if args.command == 'free-workers':
+        return find_free_workers(repository, args.starts_at, args.ends_at, args.service, args.near, args.max_km,
+                                 args.limit, args.format, args.tenant)
+    if args.command == 'book':
+        return book_worker(repository, args.worker_id, args.starts_at, args.ends_at, args.request_id, args.tenant)
+    if args.command == 'cancel-booking':
+        return cancel_booking(repository, args.booking_id, args.tenant)
+    if args.command == 'dispatch':
+        if args.action == 'list':
+            return dispatch_list(repository, args.limit, args.format, args.tenant)
+        if args.action == 'reprioritise':
+            return dispatch_reprioritise(repository, args.request_id, args.hours, args.tenant)
+        if not args.by:
+            print("❌ Say who is dispatching with --by", file=sys.stderr)
+            return 1
+        if args.action == 'claim':
+            return dispatch_claim(repository, args.by, args.lease_minutes, args.tenant)
+        if args.action == 'release':
+            return dispatch_release(repository, args.request_id, args.by, args.tenant)
+        return dispatch_assign(repository, args.request_id, args.by, args.assignee, args.note, args.tenant)
+    if args.command == 'funnel':
+        return funnel_summary(repository, args.days, args.tenant, args.format)
+    if args.command == 'status':
+        return request_status(repository, args.request_id, args.status, args.assignee, args.note, args.by, args.tenant)
+    if args.command == 'import':
+        return import_data(repository, args.file, args.kind, args.batch_size, args.status, args.restart, args.tenant)
+    if args.command in ('archive', 'backup', 'restore'):
+        # Archive partitions and snapshots are files next to the SQLite database
+        if repository.backend != 'sqlite':
+            print(f"❌ {args.command} needs the SQLite database; PostgreSQL has its own archiving and backups",
+                  file=sys.stderr)
+            return 1
+        if args.command == 'archive':
+            return archive_requests(args.older_than_days, args.archive_dir, args.vacuum)
+        if args.command == 'backup':
+            return backup_database(args.backup_dir, args.keep, args.list)
+        return restore_database(args.snapshot)
+
+    filters = filters_from_args(args)
+
+    if args.command == 'export':
+        incremental = args.since == 'last'
+        exported = export_database(
+            fmt=args.format,
+            compress=args.gzip,
+            since=None if incremental else args.since,
+            incremental=incremental,
+            output_dir=args.output_dir,
+            watermark_file=args.watermark_file,
+            batch_size=args.batch_size,
+            request_filters=filters,
+            repository=repository
+        )
+        return 0 if exported else 1
+
+    try:
+        with open_storage(repository) as (repository, run):
+            if args.command == 'stats':
+                stats = collect_stats(run, repository, filters)
+                if args.format == 'json':
+                    print(json.dumps(stats, ensure_ascii=False, indent=2))
+                else:
+                    print_stats(stats)
+            elif args.command == 'analytics':
+                demand_report(run, repository, filters, args.output_dir, args.cell_km, args.utc_offset, args.format)
+            elif args.command == 'search':
+                rows = run(repository.search_requests(args.term, args.limit or None, filters=filters,
+                                                      columns=LIST_COLUMNS))
+                write_rows([rows] if rows else [], LIST_COLUMNS, args.format)
+            else:
+                write_rows(iter_requests(run, repository, filters, args.limit or None), LIST_COLUMNS, args.format)
+        return 0
+    except Exception as e:
+        print(f"❌ Error running {args.command}: {e}", file=sys.stderr)
+        return 1
+
 if __name__ == '__main__':
-    main()
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    else:
+        main()